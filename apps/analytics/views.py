@@ -19,6 +19,7 @@ from rest_framework_expiring_authtoken.authentication import (
 from rest_framework.throttling import UserRateThrottle
 
 from accounts.permissions import HasVerifiedEmail
+from base.db_router import use_read_replica
 from challenges.permissions import IsChallengeCreator
 from challenges.utils import get_challenge_model, get_challenge_phase_model
 from hosts.utils import is_user_a_host_of_challenge
@@ -54,6 +55,7 @@ from .serializers import (
     (permissions.IsAuthenticated, HasVerifiedEmail, IsChallengeCreator)
 )
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def get_participant_team_count(request, challenge_pk):
     """
         Returns the number of participant teams in a challenge
@@ -71,6 +73,7 @@ def get_participant_team_count(request, challenge_pk):
     (permissions.IsAuthenticated, HasVerifiedEmail, IsChallengeCreator)
 )
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def get_participant_count(request, challenge_pk):
     """
         Returns the number of participants in a challenge
@@ -91,6 +94,7 @@ def get_participant_count(request, challenge_pk):
     (permissions.IsAuthenticated, HasVerifiedEmail, IsChallengeCreator)
 )
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def get_submission_count(request, challenge_pk, duration):
     """
         Returns submission count for a challenge according to the duration
@@ -140,6 +144,7 @@ def get_submission_count(request, challenge_pk, duration):
     (permissions.IsAuthenticated, HasVerifiedEmail, IsChallengeCreator)
 )
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def get_challenge_phase_submission_count_by_team(
     request, challenge_pk, challenge_phase_pk
 ):
@@ -182,6 +187,7 @@ def get_challenge_phase_submission_count_by_team(
     (permissions.IsAuthenticated, HasVerifiedEmail, IsChallengeCreator)
 )
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def get_last_submission_time(
     request, challenge_pk, challenge_phase_pk, submission_by
 ):
@@ -217,6 +223,7 @@ def get_last_submission_time(
     (permissions.IsAuthenticated, HasVerifiedEmail, IsChallengeCreator)
 )
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def get_last_submission_datetime_analysis(
     request, challenge_pk, challenge_phase_pk
 ):
@@ -280,6 +287,7 @@ def get_last_submission_datetime_analysis(
 @throttle_classes([UserRateThrottle])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def get_challenge_phase_submission_analysis(
     request, challenge_pk, challenge_phase_pk
 ):
@@ -330,6 +338,7 @@ def get_challenge_phase_submission_analysis(
     (permissions.IsAuthenticated, HasVerifiedEmail, IsChallengeCreator)
 )
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def download_all_participants(request, challenge_pk):
     """
         Returns the List of Participant Teams and its details in csv format
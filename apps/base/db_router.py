@@ -0,0 +1,168 @@
+import functools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Per-thread routing state. `use_replica` is switched on only for the
+# duration of a view decorated with `use_read_replica`, and `pinned` is set
+# as soon as anything is written so that the rest of the request reads its
+# own writes from the primary.
+_state = threading.local()
+
+# Per-process cache of the last measured replication lag.
+# Shape: {alias: (measured_at, lag_in_seconds)}
+_replica_lag = {}
+
+
+def get_replica_alias():
+    """
+    Returns the database alias of the read replica, or None if no replica is
+    configured for the current environment.
+    """
+    alias = getattr(settings, "REPLICA_DATABASE_ALIAS", "replica")
+    if alias and alias != "default" and alias in settings.DATABASES:
+        return alias
+    return None
+
+
+def get_sticky_cache_key(user_pk):
+    return "db_router:pin_to_primary:{}".format(user_pk)
+
+
+def pin_user_to_primary(user):
+    """
+    Marks a user's reads to be served from the primary database for
+    `REPLICA_STICKY_SECONDS`, so that the user sees their own writes even if
+    the replica has not caught up yet.
+    """
+    if user is None or not user.is_authenticated:
+        return
+    cache.set(
+        get_sticky_cache_key(user.pk),
+        True,
+        getattr(settings, "REPLICA_STICKY_SECONDS", 10),
+    )
+
+
+def is_user_pinned_to_primary(user):
+    if user is None or not user.is_authenticated:
+        return False
+    return bool(cache.get(get_sticky_cache_key(user.pk)))
+
+
+def get_replication_lag(alias):
+    """
+    Returns the replication lag (in seconds) of the replica database.
+
+    The lag is measured at most once every `REPLICA_LAG_CHECK_INTERVAL`
+    seconds per process. Non-postgres stand-ins (e.g. SQLite while testing
+    locally) are considered to have no lag. If the lag cannot be measured,
+    `None` is returned and the caller should fall back to the primary.
+    """
+    check_interval = getattr(settings, "REPLICA_LAG_CHECK_INTERVAL", 5)
+    now = time.time()
+    measured_at, lag = _replica_lag.get(alias, (0, None))
+    if measured_at and now - measured_at < check_interval:
+        return lag
+
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        lag = 0
+    else:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT CASE WHEN pg_is_in_recovery() "
+                    "THEN COALESCE(EXTRACT(EPOCH FROM now() - "
+                    "pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+                )
+                lag = float(cursor.fetchone()[0])
+        except DatabaseError:
+            logger.exception(
+                "Unable to measure replication lag of database {}".format(
+                    alias
+                )
+            )
+            lag = None
+    _replica_lag[alias] = (now, lag)
+    return lag
+
+
+def is_replica_healthy(alias):
+    lag = get_replication_lag(alias)
+    if lag is None:
+        return False
+    return lag <= getattr(settings, "REPLICA_MAX_LAG_SECONDS", 5)
+
+
+class ReplicaRouter(object):
+    """
+    Routes reads of views decorated with `use_read_replica` to the read
+    replica and every other query to the primary (`default`) database.
+
+    Reads fall back to the primary when:
+        - no replica is configured,
+        - something has already been written in the current request,
+        - the replica is lagging more than `REPLICA_MAX_LAG_SECONDS`.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not getattr(_state, "use_replica", False):
+            return "default"
+        if getattr(_state, "pinned", False):
+            return "default"
+        alias = get_replica_alias()
+        if alias is None or not is_replica_healthy(alias):
+            return "default"
+        return alias
+
+    def db_for_write(self, model, **hints):
+        _state.pinned = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds exactly the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+def use_read_replica(view):
+    """
+    Decorator for read-only API views (leaderboards, challenge catalog,
+    analytics and exports) which allows their queries to be served from the
+    read replica.
+
+    Only safe HTTP methods are routed to the replica, and users who wrote
+    something recently keep reading from the primary. Place it directly above
+    the view function, below the DRF decorators, so that `request.user` is
+    already authenticated.
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or is_user_pinned_to_primary(
+            request.user
+        ):
+            return view(request, *args, **kwargs)
+
+        previous_state = (
+            getattr(_state, "use_replica", False),
+            getattr(_state, "pinned", False),
+        )
+        _state.use_replica, _state.pinned = True, False
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _state.use_replica, _state.pinned = previous_state
+
+    return wrapper
@@ -0,0 +1,334 @@
+"""
+Lightweight publish/subscribe of events, e.g. for server-sent event streams.
+
+Events are JSON serializable dicts published on named channels. The broker is
+configured with `settings.EVENT_BROKER`:
+    - `InMemoryBroker` only delivers the events to the subscribers of the
+      process which publishes them, for local development and tests,
+    - `RedisBroker` uses Redis pub/sub, so that the events published by the
+      workers reach the streams served by every web server.
+
+Events are best effort: a failure to publish is logged and never raised to
+the publisher, and subscribers only get the events published while they are
+subscribed.
+
+Browsers' `EventSource` can neither send an `Authorization` header nor choose
+its `Accept` header, so the streams are authenticated with short-lived signed
+tokens passed in the query string, and rendered by `EventStreamRenderer`.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.renderers import BaseRenderer
+
+logger = logging.getLogger(__name__)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+EVENT_STREAM_TOKEN_SALT = "base.events.stream"
+EVENT_STREAM_SLOT_CACHE_KEY = "event_stream_slot:{}"
+
+
+class InMemorySubscription(object):
+    def __init__(self, broker, channels, max_pending_events):
+        self.broker = broker
+        self.channels = channels
+        self.events = queue.Queue(maxsize=max_pending_events)
+
+    def put(self, channel, event):
+        try:
+            self.events.put_nowait((channel, event))
+        except queue.Full:
+            logger.warning(
+                "Dropped an event of channel {}: too many pending events".format(
+                    channel
+                )
+            )
+
+    def get_event(self, timeout=None):
+        """
+        Returns the next (channel, event) tuple, or None if no event was
+        published within `timeout` seconds
+        """
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker(object):
+    def __init__(self, max_pending_events=1000):
+        self.max_pending_events = max_pending_events
+        self.subscriptions = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def publish(self, channel, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(channel, event)
+
+    def subscribe(self, channels):
+        subscription = InMemorySubscription(
+            self, list(channels), self.max_pending_events
+        )
+        with self.lock:
+            for channel in subscription.channels:
+                self.subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.subscriptions.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscriptions[channel]
+
+
+class RedisSubscription(object):
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    def get_event(self, timeout=None):
+        """
+        Returns the next (channel, event) tuple, or None if no event was
+        published within `timeout` seconds
+        """
+        message = self.pubsub.get_message(
+            ignore_subscribe_messages=True, timeout=timeout or 0
+        )
+        if message is None or message["type"] != "message":
+            return None
+        channel = message["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode("utf-8")
+        data = message["data"]
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        return channel, json.loads(data)
+
+    def close(self):
+        self.pubsub.close()
+
+
+class RedisBroker(object):
+    def __init__(self, url):
+        # Only needed when the Redis broker is configured
+        import redis
+
+        self.client = redis.StrictRedis.from_url(url)
+
+    def publish(self, channel, event):
+        self.client.publish(channel, json.dumps(event))
+
+    def subscribe(self, channels):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(*channels)
+        return RedisSubscription(pubsub)
+
+
+def get_event_broker():
+    """
+    Returns the event broker of the process, created from
+    `settings.EVENT_BROKER` on first use
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(settings.EVENT_BROKER["BACKEND"])
+                _broker = broker_class(
+                    **settings.EVENT_BROKER.get("OPTIONS", {})
+                )
+    return _broker
+
+
+def reset_event_broker():
+    """
+    Forgets the event broker, e.g. after `settings.EVENT_BROKER` changed
+    """
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def publish_event(channel, event_type, data):
+    """
+    Publishes an event on a channel. Errors are logged, not raised.
+
+    Arguments:
+        channel {str} -- Name of the channel
+        event_type {str} -- Type of the event, e.g. `submission_status`
+        data {dict} -- JSON serializable data of the event
+    """
+    try:
+        get_event_broker().publish(
+            channel, {"type": event_type, "data": data}
+        )
+    except Exception:
+        logger.exception(
+            "Failed to publish {} event on channel {}".format(
+                event_type, channel
+            )
+        )
+
+
+def subscribe_to_events(channels):
+    """
+    Subscribes to the events published on channels.
+
+    Returns:
+        Subscription -- with `get_event(timeout)`, returning a (channel,
+                        event) tuple or None on timeout, and `close()`
+    """
+    return get_event_broker().subscribe(channels)
+
+
+def format_server_sent_event(event_type, data):
+    return "event: {}\ndata: {}\n\n".format(event_type, json.dumps(data))
+
+
+def stream_server_sent_events(
+    subscription, is_event_visible=None, stream_slot=None
+):
+    """
+    Yields the events of a subscription in the server-sent events format,
+    with heartbeat comments while no event is published, for at most
+    `settings.EVENT_STREAM["MAX_DURATION"]` seconds. The subscription is
+    closed, and the stream slot released, when the stream ends or the client
+    disconnects.
+
+    Arguments:
+        subscription {Subscription} -- Returned by `subscribe_to_events`
+        is_event_visible {callable} -- Called with the channel and the
+                                       event, filters the streamed events
+        stream_slot {str} -- Returned by `acquire_event_stream_slot`
+    """
+    config = settings.EVENT_STREAM
+    deadline = time.time() + config["MAX_DURATION"]
+    try:
+        yield "retry: {}\n\n".format(config["RETRY"] * 1000)
+        while True:
+            timeout = min(
+                config["HEARTBEAT_INTERVAL"], deadline - time.time()
+            )
+            if timeout <= 0:
+                return
+            channel_and_event = subscription.get_event(timeout=timeout)
+            if channel_and_event is None:
+                yield ": heartbeat\n\n"
+                continue
+            channel, event = channel_and_event
+            if is_event_visible is None or is_event_visible(channel, event):
+                yield format_server_sent_event(event["type"], event["data"])
+    finally:
+        subscription.close()
+        if stream_slot is not None:
+            release_event_stream_slot(stream_slot)
+
+
+def acquire_event_stream_slot():
+    """
+    Reserves one of the `settings.EVENT_STREAM["MAX_STREAMS"]` slots of the
+    event streams, shared through the cache by all the web servers, as each
+    open stream holds a server process.
+
+    The slots expire after the maximum duration of a stream, so that the
+    slots of the processes which were killed are freed.
+
+    Returns:
+        str -- Cache key of the slot, or None if all the slots are taken
+    """
+    config = settings.EVENT_STREAM
+    keys = [
+        EVENT_STREAM_SLOT_CACHE_KEY.format(slot)
+        for slot in range(config["MAX_STREAMS"])
+    ]
+    taken_keys = cache.get_many(keys)
+    timeout = config["MAX_DURATION"] + config["HEARTBEAT_INTERVAL"]
+    for key in keys:
+        # `add` fails if another stream took the slot in the meantime
+        if key not in taken_keys and cache.add(key, True, timeout):
+            return key
+    return None
+
+
+def release_event_stream_slot(stream_slot):
+    cache.delete(stream_slot)
+
+
+def get_event_stream_token(user, path):
+    """
+    Returns a signed token authenticating `user` on the event stream at
+    `path`, valid for `settings.EVENT_STREAM["TOKEN_MAX_AGE"]` seconds
+    """
+    return signing.dumps(
+        {"user": user.pk, "path": path}, salt=EVENT_STREAM_TOKEN_SALT
+    )
+
+
+class EventStreamTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates the requests to an event stream with the `token` query
+    parameter returned by `get_event_stream_token` for its path
+    """
+
+    def authenticate(self, request):
+        token = request.query_params.get("token")
+        if not token:
+            return None
+        try:
+            data = signing.loads(
+                token,
+                salt=EVENT_STREAM_TOKEN_SALT,
+                max_age=settings.EVENT_STREAM["TOKEN_MAX_AGE"],
+            )
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed(
+                "Invalid or expired event stream token"
+            )
+        if data.get("path") != request.path:
+            raise exceptions.AuthenticationFailed(
+                "The event stream token is not valid for this stream"
+            )
+        try:
+            user = User.objects.get(pk=data.get("user"), is_active=True)
+        except User.DoesNotExist:
+            raise exceptions.AuthenticationFailed("User inactive or deleted")
+        return user, None
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets the views streaming server-sent events accept the
+    `Accept: text/event-stream` header sent by `EventSource`. Errors are
+    rendered as a single `error` event.
+    """
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return format_server_sent_event("error", data).encode(self.charset)
@@ -0,0 +1,32 @@
+from django.core.management import BaseCommand, call_command
+
+
+class Command(BaseCommand):
+
+    help = "Benchmarks the hot API endpoints against the scale seeded challenge."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-i",
+            nargs="?",
+            default=5,
+            type=int,
+            help="Number of iterations per endpoint.",
+        )
+        parser.add_argument(
+            "-r",
+            nargs="?",
+            default="benchmark_report.json",
+            help="Path of the JSON report.",
+        )
+        parser.add_argument(
+            "--update-budgets",
+            action="store_true",
+            help="Record the measured query counts as the new budgets.",
+        )
+
+    def handle(self, *args, **options):
+        script_args = [options["i"], options["r"]]
+        if options["update_budgets"]:
+            script_args.append("update_budgets")
+        call_command("runscript", "benchmark", "--script-args", *script_args)
@@ -0,0 +1,34 @@
+from django.core.management import BaseCommand, call_command
+
+
+class Command(BaseCommand):
+
+    help = "Seeds the database with a production scale challenge for benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-ns",
+            nargs="?",
+            default=100000,
+            type=int,
+            help="Number of submissions per challenge phase.",
+        )
+        parser.add_argument(
+            "-nt",
+            nargs="?",
+            default=2000,
+            type=int,
+            help="Number of participant teams.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS("Starting the scale seeder. Hang on...")
+        )
+        call_command(
+            "runscript",
+            "scale_seed",
+            "--script-args",
+            options["ns"],
+            options["nt"],
+        )
@@ -0,0 +1,38 @@
+from django.core.management import BaseCommand, call_command
+
+
+class Command(BaseCommand):
+
+    help = "Replays a recorded queue depth trace through the worker autoscaler."
+
+    def add_arguments(self, parser):
+        parser.add_argument("-t", required=True, help="Path of the trace.")
+        parser.add_argument(
+            "-min",
+            nargs="?",
+            default=0,
+            type=int,
+            help="Minimum number of workers.",
+        )
+        parser.add_argument(
+            "-max",
+            nargs="?",
+            default=1,
+            type=int,
+            help="Maximum number of workers.",
+        )
+        parser.add_argument(
+            "-c",
+            nargs="?",
+            default=None,
+            type=int,
+            help="Only replay the observations of this challenge.",
+        )
+
+    def handle(self, *args, **options):
+        script_args = [options["t"], options["min"], options["max"]]
+        if options["c"] is not None:
+            script_args.append(options["c"])
+        call_command(
+            "runscript", "simulate_autoscaler", "--script-args", *script_args
+        )
@@ -0,0 +1,223 @@
+"""
+Process wide access to the SQS submission queues.
+
+Creating a boto3 resource resolves credentials and endpoints, and looking a
+queue up by name is an extra SQS API call, so both are cached here instead
+of being repeated for every message published, received or deleted:
+    - every thread gets its own boto3 resource, as resources are not thread
+      safe, which is reused for the lifetime of the thread,
+    - queue URLs are shared by all the threads of the process.
+"""
+import logging
+import os
+import threading
+
+import boto3
+import botocore
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_NAME = "evalai_submission_queue"
+NON_EXISTENT_QUEUE_ERROR_CODE = "AWS.SimpleQueueService.NonExistentQueue"
+# Error codes of an SQS API call made with the URL of a deleted queue
+NON_EXISTENT_QUEUE_ERROR_CODES = (
+    NON_EXISTENT_QUEUE_ERROR_CODE,
+    "QueueDoesNotExist",
+)
+# Maximum number of entries of a SendMessageBatch or DeleteMessageBatch call
+MAX_BATCH_SIZE = 10
+
+_thread_local = threading.local()
+_queue_urls = {}
+_queue_urls_lock = threading.Lock()
+
+
+def create_sqs_resource():
+    if settings.DEBUG or settings.TEST:
+        return boto3.resource(
+            "sqs",
+            endpoint_url=os.environ.get("AWS_SQS_ENDPOINT", "http://sqs:9324"),
+            region_name=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
+            aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY", "x"),
+            aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID", "x"),
+        )
+    return boto3.resource(
+        "sqs",
+        region_name=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
+        aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
+        aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
+    )
+
+
+def get_sqs_resource():
+    """
+    Returns the SQS resource of the current thread
+    """
+    resource = getattr(_thread_local, "resource", None)
+    if resource is None:
+        resource = create_sqs_resource()
+        _thread_local.resource = resource
+    return resource
+
+
+def get_queue_url(queue_name):
+    """
+    Returns the URL of a queue, creating the queue if it does not exist.
+
+    Arguments:
+        queue_name {str} -- Name of the SQS queue
+    Returns:
+        str -- URL of the queue
+    """
+    queue_url = _queue_urls.get(queue_name)
+    if queue_url is not None:
+        return queue_url
+    client = get_sqs_resource().meta.client
+    try:
+        queue_url = client.get_queue_url(QueueName=queue_name)["QueueUrl"]
+    except botocore.exceptions.ClientError as ex:
+        if not is_non_existent_queue_error(ex):
+            logger.exception("Cannot get queue: {}".format(queue_name))
+        queue_url = client.create_queue(QueueName=queue_name)["QueueUrl"]
+    with _queue_urls_lock:
+        _queue_urls[queue_name] = queue_url
+    return queue_url
+
+
+def is_non_existent_queue_error(ex):
+    return ex.response["Error"]["Code"] in NON_EXISTENT_QUEUE_ERROR_CODES
+
+
+def clear_sqs_cache():
+    """
+    Forgets the cached queue URLs, e.g. after queues were deleted
+    """
+    with _queue_urls_lock:
+        _queue_urls.clear()
+
+
+def get_or_create_sqs_queue(queue_name):
+    """
+    Returns the SQS Queue object of a queue, creating the queue if it does
+    not exist. No SQS API call is made once the URL of the queue is cached.
+
+    Arguments:
+        queue_name {str} -- Name of the SQS queue, defaults to the
+                            `evalai_submission_queue` if empty
+    Returns:
+        SQS Queue object
+    """
+    if queue_name == "":
+        queue_name = DEFAULT_QUEUE_NAME
+    return get_sqs_resource().Queue(get_queue_url(queue_name))
+
+
+def receive_messages(queue_name, **kwargs):
+    """
+    Receives messages from a queue. If the queue was deleted since its URL
+    was cached, the cache is cleared and the queue looked up (or created)
+    again instead of failing on every poll.
+
+    Arguments:
+        queue_name {str} -- Name of the SQS queue
+        kwargs -- Arguments of the `ReceiveMessage` SQS API call
+    Returns:
+        list -- SQS Message objects
+    """
+    try:
+        return get_or_create_sqs_queue(queue_name).receive_messages(**kwargs)
+    except botocore.exceptions.ClientError as ex:
+        if not is_non_existent_queue_error(ex):
+            raise
+        logger.warning(
+            "The queue {} doesn't exist anymore, looking it up again".format(
+                queue_name
+            )
+        )
+        clear_sqs_cache()
+        return get_or_create_sqs_queue(queue_name).receive_messages(**kwargs)
+
+
+def batches(items, batch_size=MAX_BATCH_SIZE):
+    for start in range(0, len(items), batch_size):
+        end = start + batch_size
+        yield items[start:end]
+
+
+def send_messages(queue_name, message_bodies):
+    """
+    Sends messages to a queue, `MAX_BATCH_SIZE` messages per SQS API call.
+
+    Arguments:
+        queue_name {str} -- Name of the SQS queue
+        message_bodies {list} -- Bodies (strings) of the messages
+    Returns:
+        list -- Failed entries, with the `Id` of a message being its index
+                in `message_bodies`
+    """
+    queue = get_or_create_sqs_queue(queue_name)
+    failed = []
+    for offset, batch in enumerate(batches(list(message_bodies))):
+        response = queue.send_messages(
+            Entries=[
+                {
+                    "Id": str(offset * MAX_BATCH_SIZE + i),
+                    "MessageBody": message_body,
+                }
+                for i, message_body in enumerate(batch)
+            ]
+        )
+        failed.extend(response.get("Failed", []))
+    if failed:
+        logger.error(
+            "{} messages couldn't be sent to the queue {}: {}".format(
+                len(failed), queue_name, failed
+            )
+        )
+    return failed
+
+
+def delete_messages(queue_name, receipt_handles):
+    """
+    Deletes messages from a queue, `MAX_BATCH_SIZE` messages per SQS API
+    call.
+
+    Arguments:
+        queue_name {str} -- Name of the SQS queue
+        receipt_handles {list} -- Receipt handles of the messages
+    Returns:
+        list -- Failed entries, with the `Id` of a message being the index
+                of its receipt handle in `receipt_handles`
+    """
+    queue = get_or_create_sqs_queue(queue_name)
+    receipt_handles = list(receipt_handles)
+    failed = []
+    for offset, batch in enumerate(batches(receipt_handles)):
+        start = offset * MAX_BATCH_SIZE
+        try:
+            response = queue.delete_messages(
+                Entries=[
+                    {"Id": str(start + i), "ReceiptHandle": receipt_handle}
+                    for i, receipt_handle in enumerate(batch)
+                ]
+            )
+        except botocore.exceptions.ClientError as ex:
+            if not is_non_existent_queue_error(ex):
+                raise
+            # The messages were deleted along with the queue
+            clear_sqs_cache()
+            failed.extend(
+                {"Id": str(i), "Code": ex.response["Error"]["Code"]}
+                for i in range(start, len(receipt_handles))
+            )
+            break
+        failed.extend(response.get("Failed", []))
+    if failed:
+        logger.error(
+            "{} messages couldn't be deleted from the queue {}: {}".format(
+                len(failed), queue_name, failed
+            )
+        )
+    return failed
@@ -1,12 +1,14 @@
 import base64
 import boto3
-import botocore
+import hashlib
 import json
 import logging
 import os
 import re
 import requests
 import sendgrid
+import threading
+import time
 import uuid
 
 from contextlib import contextmanager
@@ -19,8 +21,16 @@ from rest_framework.pagination import PageNumberPagination
 
 from sendgrid.helpers.mail import Email, Mail, Personalization
 
+from .sqs import DEFAULT_QUEUE_NAME, get_or_create_sqs_queue
+
 logger = logging.getLogger(__name__)
 
+CHECKSUM_CHUNK_SIZE = 64 * 1024
+
+# Time spent serializing the response of the request handled on the current
+# thread, reported by the `DatadogMiddleware`
+_serialization_time = threading.local()
+
 
 class StandardResultSetPagination(PageNumberPagination):
     page_size = 100
@@ -168,34 +178,21 @@ def get_boto3_client(resource, aws_keys):
         logger.exception(e)
 
 
-def get_or_create_sqs_queue_object(queue_name):
+def get_sqs_queue_name(queue_name):
+    """
+    Returns the name of the SQS queue of a challenge queue. The default queue
+    is used in the development and test environments.
+    """
     if settings.DEBUG or settings.TEST:
-        queue_name = "evalai_submission_queue"
-        sqs = boto3.resource(
-            "sqs",
-            endpoint_url=os.environ.get("AWS_SQS_ENDPOINT", "http://sqs:9324"),
-            region_name=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
-            aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY", "x"),
-            aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID", "x"),
-        )
-    else:
-        sqs = boto3.resource(
-            "sqs",
-            region_name=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
-            aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
-            aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
-        )
-    # Check if the queue exists. If no, then create one
-    try:
-        queue = sqs.get_queue_by_name(QueueName=queue_name)
-    except botocore.exceptions.ClientError as ex:
-        if (
-            ex.response["Error"]["Code"]
-            != "AWS.SimpleQueueService.NonExistentQueue"
-        ):
-            logger.exception("Cannot get queue: {}".format(queue_name))
-        queue = sqs.create_queue(QueueName=queue_name)
-    return queue
+        return DEFAULT_QUEUE_NAME
+    return queue_name
+
+
+def get_or_create_sqs_queue_object(queue_name):
+    """
+    Returns the SQS Queue object of a challenge queue
+    """
+    return get_or_create_sqs_queue(get_sqs_queue_name(queue_name))
 
 
 def get_slug(param):
@@ -305,3 +302,41 @@ def is_model_field_changed(model_obj, field_name):
     if prev != curr:
         return True
     return False
+
+
+def get_file_checksum(file_object):
+    """
+    Returns the SHA-256 checksum of the contents of a file object
+    """
+    checksum = hashlib.sha256()
+    file_object.seek(0)
+    for chunk in file_object.chunks(CHECKSUM_CHUNK_SIZE):
+        checksum.update(chunk)
+    file_object.seek(0)
+    return checksum.hexdigest()
+
+
+def reset_serialization_time():
+    _serialization_time.total = 0
+
+
+def get_serialization_time():
+    return getattr(_serialization_time, "total", 0)
+
+
+@contextmanager
+def timed_serialization():
+    """
+    Adds the time spent in the block to the serialization time of the
+    current request, e.g.
+
+        with timed_serialization():
+            response_data = serializer.data
+    """
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        _serialization_time.total = get_serialization_time() + (
+            time.time() - start_time
+        )
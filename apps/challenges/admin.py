@@ -1,16 +1,20 @@
 from django import forms
+from django.conf.urls import url
 from django.contrib import admin, messages
+from django.core.urlresolvers import reverse
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.utils.html import format_html
 
 from django.contrib.admin.helpers import ActionForm
 
 from base.admin import ImportExportTimeStampedAdmin
 
 from .aws_utils import (
-    delete_workers,
-    restart_workers,
-    scale_workers,
-    start_workers,
-    stop_workers,
+    WORKER_OPERATIONS,
+    get_worker_operation_progress,
+    run_worker_operation,
+    run_worker_operation_in_background,
 )
 
 from .admin_filters import ChallengeFilter
@@ -33,6 +37,9 @@ from .models import (
 class UpdateNumOfWorkersForm(ActionForm):
     label = "Number of workers. (Enter a whole number while scaling. Otherwise, ignore.)"
     num_of_tasks = forms.IntegerField(initial=-1, label=label, required=False)
+    run_in_background = forms.BooleanField(
+        label="Run in the background", required=False
+    )
 
 
 @admin.register(Challenge)
@@ -82,17 +89,82 @@ class ChallengeAdmin(ImportExportTimeStampedAdmin):
     ]
     action_form = UpdateNumOfWorkersForm
 
-    def start_selected_workers(self, request, queryset):
-        response = start_workers(queryset)
+    def get_urls(self):
+        urls = super(ChallengeAdmin, self).get_urls()
+        custom_urls = [
+            url(
+                r"^worker_operations/(?P<operation_id>[0-9a-f]+)/$",
+                self.admin_site.admin_view(self.worker_operation_view),
+                name="challenges_challenge_worker_operation",
+            )
+        ]
+        return custom_urls + urls
+
+    def worker_operation_view(self, request, operation_id):
+        """
+        Shows the progress of a worker operation running in the background.
+        """
+        progress = get_worker_operation_progress(operation_id)
+        if progress is None:
+            raise Http404("Worker operation {} not found".format(operation_id))
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title="Worker operation {}".format(operation_id),
+            progress=progress,
+            failures=[
+                result
+                for result in progress["results"]
+                if not result["success"]
+            ],
+        )
+        return TemplateResponse(
+            request,
+            "admin/challenges/challenge/worker_operation.html",
+            context,
+        )
+
+    def run_worker_operation(self, request, queryset, operation, **kwargs):
+        """
+        Runs a worker operation for the selected challenges, or queues it in
+        a celery task when `run_in_background` is checked, and shows the
+        result to the admin.
+        """
+        verb = WORKER_OPERATIONS[operation][1]
+        if request.POST.get("run_in_background"):
+            operation_id = run_worker_operation_in_background(
+                operation,
+                list(queryset.values_list("pk", flat=True)),
+                **kwargs
+            )
+            progress_url = reverse(
+                "admin:challenges_challenge_worker_operation",
+                args=(operation_id,),
+            )
+            messages.info(
+                request,
+                format_html(
+                    'The challenge workers are being {} in the background. <a href="{}">See the progress.</a>',
+                    verb,
+                    progress_url,
+                ),
+            )
+            return
+
+        response = run_worker_operation(operation, queryset, **kwargs)
         count, failures = response["count"], response["failures"]
 
         if count == queryset.count():
-            message = "All selected challenge workers successfully started."
+            message = "All selected challenge workers successfully {}.".format(
+                verb
+            )
             messages.success(request, message)
         else:
             messages.success(
                 request,
-                "{} challenge workers were succesfully started.".format(count),
+                "{} challenge workers were succesfully {}.".format(
+                    count, verb
+                ),
             )
             for fail in failures:
                 challenge_pk, message = fail["challenge_pk"], fail["message"]
@@ -101,28 +173,15 @@ class ChallengeAdmin(ImportExportTimeStampedAdmin):
                 )
                 messages.error(request, display_message)
 
+    def start_selected_workers(self, request, queryset):
+        self.run_worker_operation(request, queryset, "start")
+
     start_selected_workers.short_description = (
         "Start all selected challenge workers."
     )
 
     def stop_selected_workers(self, request, queryset):
-        response = stop_workers(queryset)
-        count, failures = response["count"], response["failures"]
-
-        if count == queryset.count():
-            message = "All selected challenge workers successfully stopped."
-            messages.success(request, message)
-        else:
-            messages.success(
-                request,
-                "{} challenge workers were succesfully stopped.".format(count),
-            )
-            for fail in failures:
-                challenge_pk, message = fail["challenge_pk"], fail["message"]
-                display_message = "Challenge {}: {}".format(
-                    challenge_pk, message
-                )
-                messages.error(request, display_message)
+        self.run_worker_operation(request, queryset, "stop")
 
     stop_selected_workers.short_description = (
         "Stop all selected challenge workers."
@@ -131,27 +190,9 @@ class ChallengeAdmin(ImportExportTimeStampedAdmin):
     def scale_selected_workers(self, request, queryset):
         num_of_tasks = int(request.POST["num_of_tasks"])
         if num_of_tasks >= 0 and num_of_tasks % 1 == 0:
-            response = scale_workers(queryset, num_of_tasks)
-            count, failures = response["count"], response["failures"]
-            if count == queryset.count():
-                message = "All selected challenge workers successfully scaled."
-                messages.success(request, message)
-            else:
-                messages.success(
-                    request,
-                    "{} challenge workers were succesfully scaled.".format(
-                        count
-                    ),
-                )
-                for fail in failures:
-                    challenge_pk, message = (
-                        fail["challenge_pk"],
-                        fail["message"],
-                    )
-                    display_message = "Challenge {}: {}".format(
-                        challenge_pk, message
-                    )
-                    messages.error(request, display_message)
+            self.run_worker_operation(
+                request, queryset, "scale", num_of_tasks=num_of_tasks
+            )
         else:
             messages.warning(
                 request, "Please enter a valid whole number to scale."
@@ -162,48 +203,14 @@ class ChallengeAdmin(ImportExportTimeStampedAdmin):
     )
 
     def restart_selected_workers(self, request, queryset):
-        response = restart_workers(queryset)
-        count, failures = response["count"], response["failures"]
-
-        if count == queryset.count():
-            message = "All selected challenge workers successfully restarted."
-            messages.success(request, message)
-        else:
-            messages.success(
-                request,
-                "{} challenge workers were succesfully restarted.".format(
-                    count
-                ),
-            )
-            for fail in failures:
-                challenge_pk, message = fail["challenge_pk"], fail["message"]
-                display_message = "Challenge {}: {}".format(
-                    challenge_pk, message
-                )
-                messages.error(request, display_message)
+        self.run_worker_operation(request, queryset, "restart")
 
     restart_selected_workers.short_description = (
         "Restart all selected challenge workers."
     )
 
     def delete_selected_workers(self, request, queryset):
-        response = delete_workers(queryset)
-        count, failures = response["count"], response["failures"]
-
-        if count == queryset.count():
-            message = "All selected challenge workers successfully deleted."
-            messages.success(request, message)
-        else:
-            messages.success(
-                request,
-                "{} challenge workers were succesfully deleted.".format(count),
-            )
-            for fail in failures:
-                challenge_pk, message = fail["challenge_pk"], fail["message"]
-                display_message = "Challenge {}: {}".format(
-                    challenge_pk, message
-                )
-                messages.error(request, display_message)
+        self.run_worker_operation(request, queryset, "delete")
 
     delete_selected_workers.short_description = (
         "Delete all selected challenge workers."
@@ -0,0 +1,265 @@
+"""
+Queue depth driven autoscaling of challenge workers.
+
+For every challenge with `autoscale_workers` set, the autoscaler compares the
+load of the challenge (messages waiting in its SQS queue, plus the
+submissions being evaluated) with its current number of workers, and scales
+the worker service within the `min_workers` and `max_workers` bounds of the
+challenge:
+    - it scales up as soon as the load needs more workers,
+    - it only scales down once the load would fit in fewer workers at
+      `SCALE_DOWN_UTILIZATION`, so that the count doesn't flap,
+    - scaling up and down have their own cooldowns.
+
+Every observation is logged as JSON, so that recorded traces can be replayed
+with `simulate_autoscaling` to tune the settings.
+"""
+import json
+import logging
+import math
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+from http import HTTPStatus
+
+from base.utils import get_or_create_sqs_queue_object
+from jobs.models import Submission
+
+from .aws_utils import get_ecs_client, service_manager
+from .models import Challenge
+
+logger = logging.getLogger(__name__)
+
+OBSERVATION_LOG_PREFIX = "Autoscaler observation: "
+
+
+def get_desired_workers(
+    current_workers,
+    observation,
+    min_workers,
+    max_workers,
+    seconds_since_last_scaling=None,
+    config=None,
+):
+    """
+    Returns the number of workers a challenge should have.
+
+    Arguments:
+        current_workers {int} -- Current number of workers
+        observation {dict} -- `queue_depth`, `in_flight` and
+                              `running_submissions` of the challenge
+        min_workers {int} -- Lower bound of the number of workers
+        max_workers {int} -- Upper bound of the number of workers
+        seconds_since_last_scaling {float} -- None if never scaled
+        config {dict} -- Defaults to `settings.WORKER_AUTOSCALER`
+    Returns:
+        int -- Desired number of workers
+    """
+    config = config or settings.WORKER_AUTOSCALER
+    # In flight messages and running submissions mostly overlap
+    load = observation["queue_depth"] + max(
+        observation["in_flight"], observation["running_submissions"]
+    )
+    submissions_per_worker = config["SUBMISSIONS_PER_WORKER"]
+    if seconds_since_last_scaling is None:
+        seconds_since_last_scaling = float("inf")
+
+    def bounded(workers):
+        return max(min_workers, min(max_workers, workers))
+
+    scale_up_target = bounded(math.ceil(load / submissions_per_worker))
+    if scale_up_target > current_workers:
+        if seconds_since_last_scaling >= config["SCALE_UP_COOLDOWN"]:
+            return scale_up_target
+        return current_workers
+
+    scale_down_target = bounded(
+        math.ceil(
+            load / (submissions_per_worker * config["SCALE_DOWN_UTILIZATION"])
+        )
+    )
+    if (
+        scale_down_target < current_workers
+        and seconds_since_last_scaling >= config["SCALE_DOWN_COOLDOWN"]
+    ):
+        return scale_down_target
+    return current_workers
+
+
+def get_queue_observation(queue_name):
+    """
+    Returns the approximate number of visible and in flight messages of a
+    submission queue.
+    """
+    queue = get_or_create_sqs_queue_object(queue_name)
+    attributes = queue.attributes
+    return {
+        "queue_depth": int(attributes.get("ApproximateNumberOfMessages", 0)),
+        "in_flight": int(
+            attributes.get("ApproximateNumberOfMessagesNotVisible", 0)
+        ),
+    }
+
+
+def get_running_submissions_count(challenge_pks):
+    """
+    Returns a dict of challenge pk: number of running submissions.
+    """
+    return dict(
+        Submission.objects.filter(
+            challenge_phase__challenge__in=challenge_pks,
+            status=Submission.RUNNING,
+        )
+        .values_list("challenge_phase__challenge")
+        .annotate(count=Count("id"))
+    )
+
+
+def autoscale_challenge_workers(challenge, running_submissions, now):
+    """
+    Scales the workers of a challenge to the number its load needs.
+
+    Returns:
+        int -- The number of workers of the challenge
+    """
+    observation = get_queue_observation(challenge.queue)
+    observation["running_submissions"] = running_submissions
+    seconds_since_last_scaling = (
+        (now - challenge.workers_scaled_at).total_seconds()
+        if challenge.workers_scaled_at
+        else None
+    )
+    desired_workers = get_desired_workers(
+        challenge.workers,
+        observation,
+        challenge.min_workers,
+        challenge.max_workers,
+        seconds_since_last_scaling,
+    )
+    logger.info(
+        OBSERVATION_LOG_PREFIX
+        + json.dumps(
+            dict(
+                observation,
+                challenge_pk=challenge.pk,
+                time=now.timestamp(),
+                workers=challenge.workers,
+                desired_workers=desired_workers,
+            )
+        )
+    )
+    if desired_workers == challenge.workers:
+        return challenge.workers
+
+    response = service_manager(
+        get_ecs_client(), challenge=challenge, num_of_tasks=desired_workers
+    )
+    if response["ResponseMetadata"]["HTTPStatusCode"] != HTTPStatus.OK:
+        logger.error(
+            "Autoscaler couldn't scale the workers of challenge {} to {}: {}".format(
+                challenge.pk, desired_workers, response.get("Error")
+            )
+        )
+        return challenge.workers
+    Challenge.objects.filter(pk=challenge.pk).update(workers_scaled_at=now)
+    logger.info(
+        "Autoscaler scaled the workers of challenge {} to {}".format(
+            challenge.pk, desired_workers
+        )
+    )
+    return desired_workers
+
+
+def run_autoscaler():
+    """
+    Autoscales the workers of all the challenges with `autoscale_workers`
+    set and a running worker service.
+    """
+    if settings.DEBUG:
+        return
+    # Services of code upload challenges are not managed from here, and
+    # services which were never started are left to the admins.
+    challenges = Challenge.objects.filter(
+        autoscale_workers=True, workers__isnull=False, is_docker_based=False
+    )
+    running_submissions = get_running_submissions_count(
+        [challenge.pk for challenge in challenges]
+    )
+    now = timezone.now()
+    for challenge in challenges:
+        try:
+            autoscale_challenge_workers(
+                challenge, running_submissions.get(challenge.pk, 0), now
+            )
+        except Exception:
+            logger.exception(
+                "Autoscaler failed for challenge {}".format(challenge.pk)
+            )
+
+
+def simulate_autoscaling(
+    trace, min_workers, max_workers, initial_workers=None, config=None
+):
+    """
+    Replays a trace of observations through the autoscaler.
+
+    Arguments:
+        trace {list} -- Observations ordered by time, i.e. dicts with `time`
+                        (in seconds), `queue_depth`, `in_flight` and
+                        `running_submissions` keys, as logged by the
+                        autoscaler
+        min_workers {int} -- Lower bound of the number of workers
+        max_workers {int} -- Upper bound of the number of workers
+        initial_workers {int} -- Defaults to `min_workers`
+        config {dict} -- Defaults to `settings.WORKER_AUTOSCALER`
+    Returns:
+        list -- The observations, with the resulting `workers`
+    """
+    workers = min_workers if initial_workers is None else initial_workers
+    last_scaled_at = None
+    steps = []
+    for observation in trace:
+        seconds_since_last_scaling = (
+            observation["time"] - last_scaled_at
+            if last_scaled_at is not None
+            else None
+        )
+        desired_workers = get_desired_workers(
+            workers,
+            observation,
+            min_workers,
+            max_workers,
+            seconds_since_last_scaling,
+            config,
+        )
+        if desired_workers != workers:
+            workers = desired_workers
+            last_scaled_at = observation["time"]
+        steps.append(dict(observation, workers=workers))
+    return steps
+
+
+def summarize_simulation(steps):
+    """
+    Returns the number of scaling events, the worker seconds spent and the
+    largest backlog per worker of a simulation.
+    """
+    scaling_events = sum(
+        1
+        for previous, step in zip(steps, steps[1:])
+        if step["workers"] != previous["workers"]
+    )
+    worker_seconds = sum(
+        previous["workers"] * (step["time"] - previous["time"])
+        for previous, step in zip(steps, steps[1:])
+    )
+    max_backlog_per_worker = max(
+        (step["queue_depth"] / max(step["workers"], 1) for step in steps),
+        default=0,
+    )
+    return {
+        "scaling_events": scaling_events,
+        "worker_seconds": worker_seconds,
+        "max_backlog_per_worker": max_backlog_per_worker,
+    }
@@ -2,11 +2,17 @@ import logging
 import os
 import random
 import string
+import threading
+import time
+import uuid
 import yaml
 
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 from django.core import serializers
+from django.core.cache import cache
+from django.db import connections
 from django.core.files.temp import NamedTemporaryFile
 from http import HTTPStatus
 from rest_framework.authtoken.models import Token
@@ -21,6 +27,31 @@ from evalai.celery import app
 
 logger = logging.getLogger(__name__)
 
+CODE_UPLOAD_WORKERS_NOT_SUPPORTED_MESSAGE = (
+    "Sorry. This feature is not available for code upload/docker based "
+    "challenges."
+)
+# Maximum number of challenges a bulk worker operation handles concurrently
+WORKER_OPERATION_MAX_CONCURRENCY = 10
+WORKER_OPERATION_CACHE_KEY = "worker_operation:{}"
+# Time, in seconds, for which the progress of a worker operation is kept
+WORKER_OPERATION_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Number of log events requested per `filter_log_events` call
+CLOUDWATCH_LOGS_PAGE_SIZE = 10000
+DEVELOPMENT_WORKER_LOGS_MESSAGE = (
+    "The worker logs in the development environment are available on the "
+    "terminal. Please use docker-compose worker -f to view the logs."
+)
+WORKER_LOGS_CACHE_KEY = "worker_logs:{}:{}"
+# Time for which hosts polling the logs of a challenge share a CloudWatch read
+WORKER_LOGS_CACHE_TIMEOUT = 5
+# Time frame, in milliseconds, of the worker logs kept in a tail
+WORKER_LOGS_TIMEFRAME = 15 * 60 * 1000
+WORKER_LOGS_MAX_EVENTS = 1000
+# Time, in milliseconds, it can take for an event to be searchable
+WORKER_LOGS_INGESTION_DELAY = 10 * 1000
+
 DJANGO_SETTINGS_MODULE = os.environ.get("DJANGO_SETTINGS_MODULE")
 ENV = DJANGO_SETTINGS_MODULE.split(".")[-1]
 aws_keys = {
@@ -338,6 +369,36 @@ delete_service_args = """
 """
 
 
+_ecs_client = None
+_ecs_client_lock = threading.Lock()
+
+
+def get_ecs_client():
+    """
+    Returns the ECS client shared by all the worker operations of the
+    process.
+
+    Creating clients on the default boto3 session is not thread safe, so the
+    client is created once, under a lock. Using the created client from many
+    threads is safe.
+    """
+    global _ecs_client
+    with _ecs_client_lock:
+        if _ecs_client is None:
+            _ecs_client = get_boto3_client("ecs", aws_keys)
+        return _ecs_client
+
+
+def reset_ecs_client():
+    """
+    Drops the shared ECS client, so that the next call of `get_ecs_client`
+    creates a new one.
+    """
+    global _ecs_client
+    with _ecs_client_lock:
+        _ecs_client = None
+
+
 def client_token_generator(challenge_pk):
     """
     Returns a 32 characters long client token to ensure idempotency with create_service boto3 requests.
@@ -535,7 +596,7 @@ def update_service_by_challenge_pk(
         return e.response
 
 
-def delete_service_by_challenge_pk(challenge):
+def delete_service_by_challenge_pk(challenge, client=None):
     """
     Deletes the workers service of a challenge.
 
@@ -543,11 +604,13 @@ def delete_service_by_challenge_pk(challenge):
 
     Parameters:
     challenge (<class 'challenges.models.Challenge'>): The challenge object for whom the task definition is being registered.
+    client (boto3.client): the client used for making requests to ECS. Default is the shared ECS client.
 
     Returns:
     dict: The response returned by the delete_service method from boto3
     """
-    client = get_boto3_client("ecs", aws_keys)
+    if client is None:
+        client = get_ecs_client()
     queue_name = challenge.queue
     service_name = "{}_service".format(queue_name)
     kwargs = delete_service_args.format(
@@ -609,6 +672,186 @@ def service_manager(
         return response
 
 
+def start_worker(client, challenge):
+    """
+    Starts the worker service of a challenge with inactive workers.
+
+    Returns:
+    str: The error message if the worker couldn't be started, else None
+    """
+    if challenge.is_docker_based:
+        return CODE_UPLOAD_WORKERS_NOT_SUPPORTED_MESSAGE
+    if (challenge.workers == 0) or (challenge.workers is None):
+        response = service_manager(client, challenge=challenge, num_of_tasks=1)
+        if response["ResponseMetadata"]["HTTPStatusCode"] != HTTPStatus.OK:
+            return response["Error"]
+        return None
+    return "Please select challenge with inactive workers only."
+
+
+def stop_worker(client, challenge):
+    """
+    Scales the worker service of a challenge with active workers down to zero.
+
+    Returns:
+    str: The error message if the worker couldn't be stopped, else None
+    """
+    if challenge.is_docker_based:
+        return CODE_UPLOAD_WORKERS_NOT_SUPPORTED_MESSAGE
+    if (challenge.workers is not None) and (challenge.workers > 0):
+        response = service_manager(client, challenge=challenge, num_of_tasks=0)
+        if response["ResponseMetadata"]["HTTPStatusCode"] != HTTPStatus.OK:
+            return response["Error"]
+        return None
+    return "Please select challenges with active workers only."
+
+
+def scale_worker(client, challenge, num_of_tasks):
+    """
+    Scales the worker service of a challenge to `num_of_tasks` workers.
+
+    Returns:
+    str: The error message if the worker couldn't be scaled, else None
+    """
+    if challenge.workers is None:
+        return "Please start worker(s) before scaling."
+    if num_of_tasks == challenge.workers:
+        return "Please scale to a different number. Challenge has {} worker(s).".format(
+            num_of_tasks
+        )
+    response = service_manager(
+        client, challenge=challenge, num_of_tasks=num_of_tasks
+    )
+    if response["ResponseMetadata"]["HTTPStatusCode"] != HTTPStatus.OK:
+        return response["Error"]
+    return None
+
+
+def restart_worker(client, challenge):
+    """
+    Redeploys the worker service of a challenge with active workers.
+
+    Returns:
+    str: The error message if the worker couldn't be restarted, else None
+    """
+    if challenge.is_docker_based:
+        return CODE_UPLOAD_WORKERS_NOT_SUPPORTED_MESSAGE
+    if (challenge.workers is not None) and (challenge.workers > 0):
+        response = service_manager(
+            client,
+            challenge=challenge,
+            num_of_tasks=challenge.workers,
+            force_new_deployment=True,
+        )
+        if response["ResponseMetadata"]["HTTPStatusCode"] != HTTPStatus.OK:
+            return response["Error"]
+        return None
+    return "Please select challenges with active workers only."
+
+
+def delete_worker(client, challenge):
+    """
+    Deletes the worker service and the worker logs of a challenge.
+
+    Returns:
+    str: The error message if the worker couldn't be deleted, else None
+    """
+    if challenge.is_docker_based:
+        return CODE_UPLOAD_WORKERS_NOT_SUPPORTED_MESSAGE
+    if challenge.workers is not None:
+        response = delete_service_by_challenge_pk(
+            challenge=challenge, client=client
+        )
+        if response["ResponseMetadata"]["HTTPStatusCode"] != HTTPStatus.OK:
+            return response["Error"]
+        log_group_name = "challenge-pk-{}-workers".format(challenge.pk)
+        delete_log_group(log_group_name)
+        return None
+    return "Please select challenges with active workers only."
+
+
+# Worker operation name: (function, past participle used in messages)
+WORKER_OPERATIONS = {
+    "start": (start_worker, "started"),
+    "stop": (stop_worker, "stopped"),
+    "scale": (scale_worker, "scaled"),
+    "restart": (restart_worker, "restarted"),
+    "delete": (delete_worker, "deleted"),
+}
+
+
+def run_worker_operation(
+    operation, challenges, progress_callback=None, **kwargs
+):
+    """
+    Runs a worker operation for many challenges at once.
+
+    The ECS calls of the challenges are made concurrently, on a thread pool
+    of at most `WORKER_OPERATION_MAX_CONCURRENCY` threads sharing one ECS
+    client. A single challenge is handled in the calling thread.
+
+    Parameters:
+    operation (str): One of the keys of WORKER_OPERATIONS.
+    challenges (iterable): The challenges to run the operation for.
+    progress_callback (callable): Called with the result of every challenge as soon as it is available.
+    kwargs: Passed to the operation function, e.g. `num_of_tasks` for scaling.
+
+    Returns:
+    dict: keys-> 'count': the number of challenges the operation succeeded for.
+                 'failures': a list of all the failures with their error messages and the challenge pk
+                 'results': the result of every challenge, in the order of `challenges`
+    """
+    operation_func, operation_verb = WORKER_OPERATIONS[operation]
+    challenges = list(challenges)
+    # The client is created before the pool starts and passed to its threads
+    client = None if settings.DEBUG or not challenges else get_ecs_client()
+
+    def run_for_challenge(challenge):
+        if settings.DEBUG:
+            message = "Workers cannot be {} on AWS ECS service in development environment".format(
+                operation_verb
+            )
+        else:
+            try:
+                message = operation_func(client, challenge, **kwargs)
+            except Exception as e:
+                logger.exception(e)
+                message = str(e)
+        result = {
+            "challenge_pk": challenge.pk,
+            "success": message is None,
+            "message": message,
+        }
+        if progress_callback is not None:
+            progress_callback(result)
+        return result
+
+    def run_in_thread(challenge):
+        try:
+            return run_for_challenge(challenge)
+        finally:
+            # Threads of the pool get their own database connections
+            connections.close_all()
+
+    if len(challenges) <= 1:
+        results = [run_for_challenge(challenge) for challenge in challenges]
+    else:
+        max_workers = min(WORKER_OPERATION_MAX_CONCURRENCY, len(challenges))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(run_in_thread, challenges))
+
+    failures = [
+        {"message": result["message"], "challenge_pk": result["challenge_pk"]}
+        for result in results
+        if not result["success"]
+    ]
+    return {
+        "count": len(results) - len(failures),
+        "failures": failures,
+        "results": results,
+    }
+
+
 def start_workers(queryset):
     """
     The function called by the admin action method to start all the selected workers.
@@ -622,45 +865,7 @@ def start_workers(queryset):
     dict: keys-> 'count': the number of workers successfully started.
                  'failures': a dict of all the failures with their error messages and the challenge pk
     """
-    if settings.DEBUG:
-        failures = []
-        for challenge in queryset:
-            failures.append(
-                {
-                    "message": "Workers cannot be started on AWS ECS service in development environment",
-                    "challenge_pk": challenge.pk,
-                }
-            )
-        return {"count": 0, "failures": failures}
-
-    client = get_boto3_client("ecs", aws_keys)
-    count = 0
-    failures = []
-    for challenge in queryset:
-        if challenge.is_docker_based:
-            response = "Sorry. This feature is not available for code upload/docker based challenges."
-            failures.append(
-                {"message": response, "challenge_pk": challenge.pk}
-            )
-        elif (challenge.workers == 0) or (challenge.workers is None):
-            response = service_manager(
-                client, challenge=challenge, num_of_tasks=1
-            )
-            if response["ResponseMetadata"]["HTTPStatusCode"] != HTTPStatus.OK:
-                failures.append(
-                    {
-                        "message": response["Error"],
-                        "challenge_pk": challenge.pk,
-                    }
-                )
-                continue
-            count += 1
-        else:
-            response = "Please select challenge with inactive workers only."
-            failures.append(
-                {"message": response, "challenge_pk": challenge.pk}
-            )
-    return {"count": count, "failures": failures}
+    return run_worker_operation("start", queryset)
 
 
 def stop_workers(queryset):
@@ -676,45 +881,7 @@ def stop_workers(queryset):
     dict: keys-> 'count': the number of workers successfully stopped.
                  'failures': a dict of all the failures with their error messages and the challenge pk
     """
-    if settings.DEBUG:
-        failures = []
-        for challenge in queryset:
-            failures.append(
-                {
-                    "message": "Workers cannot be stopped on AWS ECS service in development environment",
-                    "challenge_pk": challenge.pk,
-                }
-            )
-        return {"count": 0, "failures": failures}
-
-    client = get_boto3_client("ecs", aws_keys)
-    count = 0
-    failures = []
-    for challenge in queryset:
-        if challenge.is_docker_based:
-            response = "Sorry. This feature is not available for code upload/docker based challenges."
-            failures.append(
-                {"message": response, "challenge_pk": challenge.pk}
-            )
-        elif (challenge.workers is not None) and (challenge.workers > 0):
-            response = service_manager(
-                client, challenge=challenge, num_of_tasks=0
-            )
-            if response["ResponseMetadata"]["HTTPStatusCode"] != HTTPStatus.OK:
-                failures.append(
-                    {
-                        "message": response["Error"],
-                        "challenge_pk": challenge.pk,
-                    }
-                )
-                continue
-            count += 1
-        else:
-            response = "Please select challenges with active workers only."
-            failures.append(
-                {"message": response, "challenge_pk": challenge.pk}
-            )
-    return {"count": count, "failures": failures}
+    return run_worker_operation("stop", queryset)
 
 
 def scale_workers(queryset, num_of_tasks):
@@ -730,45 +897,7 @@ def scale_workers(queryset, num_of_tasks):
     dict: keys-> 'count': the number of workers successfully started.
                  'failures': a dict of all the failures with their error messages and the challenge pk
     """
-    if settings.DEBUG:
-        failures = []
-        for challenge in queryset:
-            failures.append(
-                {
-                    "message": "Workers cannot be scaled on AWS ECS service in development environment",
-                    "challenge_pk": challenge.pk,
-                }
-            )
-        return {"count": 0, "failures": failures}
-
-    client = get_boto3_client("ecs", aws_keys)
-    count = 0
-    failures = []
-    for challenge in queryset:
-        if challenge.workers is None:
-            response = "Please start worker(s) before scaling."
-            failures.append(
-                {"message": response, "challenge_pk": challenge.pk}
-            )
-            continue
-        if num_of_tasks == challenge.workers:
-            response = "Please scale to a different number. Challenge has {} worker(s).".format(
-                num_of_tasks
-            )
-            failures.append(
-                {"message": response, "challenge_pk": challenge.pk}
-            )
-            continue
-        response = service_manager(
-            client, challenge=challenge, num_of_tasks=num_of_tasks
-        )
-        if response["ResponseMetadata"]["HTTPStatusCode"] != HTTPStatus.OK:
-            failures.append(
-                {"message": response["Error"], "challenge_pk": challenge.pk}
-            )
-            continue
-        count += 1
-    return {"count": count, "failures": failures}
+    return run_worker_operation("scale", queryset, num_of_tasks=num_of_tasks)
 
 
 def delete_workers(queryset):
@@ -784,44 +913,7 @@ def delete_workers(queryset):
     dict: keys-> 'count': the number of workers successfully stopped.
                  'failures': a dict of all the failures with their error messages and the challenge pk
     """
-    if settings.DEBUG:
-        failures = []
-        for challenge in queryset:
-            failures.append(
-                {
-                    "message": "Workers cannot be deleted on AWS ECS service in development environment",
-                    "challenge_pk": challenge.pk,
-                }
-            )
-        return {"count": 0, "failures": failures}
-
-    count = 0
-    failures = []
-    for challenge in queryset:
-        if challenge.is_docker_based:
-            response = "Sorry. This feature is not available for code upload/docker based challenges."
-            failures.append(
-                {"message": response, "challenge_pk": challenge.pk}
-            )
-        elif challenge.workers is not None:
-            response = delete_service_by_challenge_pk(challenge=challenge)
-            if response["ResponseMetadata"]["HTTPStatusCode"] != HTTPStatus.OK:
-                failures.append(
-                    {
-                        "message": response["Error"],
-                        "challenge_pk": challenge.pk,
-                    }
-                )
-                continue
-            count += 1
-            log_group_name = "challenge-pk-{}-workers".format(challenge.pk)
-            delete_log_group(log_group_name)
-        else:
-            response = "Please select challenges with active workers only."
-            failures.append(
-                {"message": response, "challenge_pk": challenge.pk}
-            )
-    return {"count": count, "failures": failures}
+    return run_worker_operation("delete", queryset)
 
 
 def restart_workers(queryset):
@@ -837,48 +929,70 @@ def restart_workers(queryset):
     dict: keys-> 'count': the number of workers successfully stopped.
                  'failures': a dict of all the failures with their error messages and the challenge pk
     """
-    if settings.DEBUG:
-        failures = []
-        for challenge in queryset:
-            failures.append(
-                {
-                    "message": "Workers cannot be restarted on AWS ECS service in development environment",
-                    "challenge_pk": challenge.pk,
-                }
-            )
-        return {"count": 0, "failures": failures}
+    return run_worker_operation("restart", queryset)
 
-    client = get_boto3_client("ecs", aws_keys)
-    count = 0
-    failures = []
-    for challenge in queryset:
-        if challenge.is_docker_based:
-            response = "Sorry. This feature is not available for code upload/docker based challenges."
-            failures.append(
-                {"message": response, "challenge_pk": challenge.pk}
-            )
-        elif (challenge.workers is not None) and (challenge.workers > 0):
-            response = service_manager(
-                client,
-                challenge=challenge,
-                num_of_tasks=challenge.workers,
-                force_new_deployment=True,
-            )
-            if response["ResponseMetadata"]["HTTPStatusCode"] != HTTPStatus.OK:
-                failures.append(
-                    {
-                        "message": response["Error"],
-                        "challenge_pk": challenge.pk,
-                    }
-                )
-                continue
-            count += 1
-        else:
-            response = "Please select challenges with active workers only."
-            failures.append(
-                {"message": response, "challenge_pk": challenge.pk}
-            )
-    return {"count": count, "failures": failures}
+
+def get_worker_operation_progress(operation_id):
+    """
+    Returns the progress of a worker operation started with
+    `run_worker_operation_in_background`, or None if it is unknown.
+    """
+    return cache.get(WORKER_OPERATION_CACHE_KEY.format(operation_id))
+
+
+def run_worker_operation_in_background(operation, challenge_pks, **kwargs):
+    """
+    Queues a worker operation for the challenges in a celery task.
+
+    Returns:
+    str: The id of the operation, to fetch its progress with get_worker_operation_progress
+    """
+    operation_id = uuid.uuid4().hex
+    cache.set(
+        WORKER_OPERATION_CACHE_KEY.format(operation_id),
+        {
+            "operation": operation,
+            "total": len(challenge_pks),
+            "results": [],
+            "finished": False,
+        },
+        WORKER_OPERATION_CACHE_TIMEOUT,
+    )
+    run_worker_operation_task.delay(
+        operation_id, operation, list(challenge_pks), **kwargs
+    )
+    return operation_id
+
+
+@app.task
+def run_worker_operation_task(operation_id, operation, challenge_pks, **kwargs):
+    """
+    Runs a worker operation for the challenges, and records its progress in
+    the cache as the result of every challenge comes in.
+    """
+    from .models import Challenge
+
+    cache_key = WORKER_OPERATION_CACHE_KEY.format(operation_id)
+    progress = {
+        "operation": operation,
+        "total": len(challenge_pks),
+        "results": [],
+        "finished": False,
+    }
+    progress_lock = threading.Lock()
+
+    def record_result(result):
+        with progress_lock:
+            progress["results"].append(result)
+            cache.set(cache_key, progress, WORKER_OPERATION_CACHE_TIMEOUT)
+
+    challenges = Challenge.objects.filter(pk__in=challenge_pks).order_by("pk")
+    response = run_worker_operation(
+        operation, challenges, progress_callback=record_result, **kwargs
+    )
+    progress["finished"] = True
+    progress["count"] = response["count"]
+    cache.set(cache_key, progress, WORKER_OPERATION_CACHE_TIMEOUT)
 
 
 def restart_workers_signal_callback(sender, instance, field_name, **kwargs):
@@ -957,28 +1071,75 @@ def restart_workers_signal_callback(sender, instance, field_name, **kwargs):
                 )
 
 
+def get_log_events_from_cloudwatch(
+    log_group_name, log_stream_prefix, start_time, end_time, pattern
+):
+    """
+    To fetch the log events of a container from cloudwatch within a specific
+    time frame, following the `nextToken` of every page of results.
+
+    Arguments:
+        log_group_name {str} -- Name of the log group
+        log_stream_prefix {str} -- Prefix of the log streams to search
+        start_time {int} -- Start of the time frame, in milliseconds
+        end_time {int} -- End of the time frame, in milliseconds, or None
+        pattern {str} -- Filter pattern of the events
+    Returns:
+        list -- Events with `eventId`, `timestamp` and `message` keys
+    """
+    return list(
+        iter_log_events_from_cloudwatch(
+            log_group_name, log_stream_prefix, start_time, end_time, pattern
+        )
+    )
+
+
+def iter_log_events_from_cloudwatch(
+    log_group_name, log_stream_prefix, start_time, end_time, pattern
+):
+    """
+    Yields the log events of `get_log_events_from_cloudwatch`, only reading
+    the next page of results once the events of the previous one are used.
+    """
+    client = get_boto3_client("logs", aws_keys)
+    kwargs = {
+        "logGroupName": log_group_name,
+        "logStreamNamePrefix": log_stream_prefix,
+        "startTime": start_time,
+        "filterPattern": pattern,
+        "limit": CLOUDWATCH_LOGS_PAGE_SIZE,
+    }
+    if end_time is not None:
+        kwargs["endTime"] = end_time
+    while True:
+        response = client.filter_log_events(**kwargs)
+        for event in response["events"]:
+            yield {
+                "eventId": event["eventId"],
+                "timestamp": event["timestamp"],
+                "message": event["message"],
+            }
+        next_token = response.get("nextToken")
+        if not next_token:
+            return
+        kwargs["nextToken"] = next_token
+
+
 def get_logs_from_cloudwatch(
     log_group_name, log_stream_prefix, start_time, end_time, pattern
 ):
     """
     To fetch logs of a container from cloudwatch within a specific time frame.
     """
-    client = get_boto3_client("logs", aws_keys)
     logs = []
     if settings.DEBUG:
-        logs = [
-            "The worker logs in the development environment are available on the terminal. Please use docker-compose worker -f to view the logs."
-        ]
+        logs = [DEVELOPMENT_WORKER_LOGS_MESSAGE]
     else:
         try:
-            response = client.filter_log_events(
-                logGroupName=log_group_name,
-                logStreamNamePrefix=log_stream_prefix,
-                startTime=start_time,
-                endTime=end_time,
-                filterPattern=pattern,
+            events = get_log_events_from_cloudwatch(
+                log_group_name, log_stream_prefix, start_time, end_time, pattern
             )
-            for event in response["events"]:
+            for event in events:
                 logs.append(event["message"])
         except Exception as e:
             if e.response["Error"]["Code"] == "ResourceNotFoundException":
@@ -991,6 +1152,185 @@ def get_logs_from_cloudwatch(
     return logs
 
 
+def encode_log_cursor(event):
+    return "{}:{}".format(event["timestamp"], event["eventId"])
+
+
+def decode_log_cursor(cursor):
+    """
+    Returns the timestamp and the event id of a cursor returned by
+    `tail_logs_from_cloudwatch`, or `(None, None)` if it is invalid.
+    """
+    try:
+        timestamp, event_id = cursor.split(":", 1)
+        return int(timestamp), event_id
+    except (AttributeError, ValueError):
+        return None, None
+
+
+def refresh_logs_tail(log_group_name, log_stream_prefix, pattern, tail, now):
+    """
+    Appends the events logged since the last refresh of a logs tail and drops
+    the ones which are out of the tail time frame.
+
+    Arguments:
+        tail {dict} -- The tail to refresh, or None
+        now {int} -- Current time, in milliseconds
+    Returns:
+        dict -- The refreshed tail, with `events` and `refreshed_at` keys,
+                and `dropped_until`, the timestamp of the last event dropped
+                to keep at most `WORKER_LOGS_MAX_EVENTS` events, or None
+    """
+    events = tail["events"] if tail else []
+    dropped_until = tail.get("dropped_until") if tail else None
+    window_start = now - WORKER_LOGS_TIMEFRAME
+    start_time = window_start
+    if events:
+        # Events can reach CloudWatch after later ones, so the time frame
+        # overlaps the last read and already seen events are skipped.
+        last_timestamp = max(event["timestamp"] for event in events)
+        start_time = max(
+            window_start, last_timestamp - WORKER_LOGS_INGESTION_DELAY
+        )
+    seen_event_ids = set(event["eventId"] for event in events)
+    new_events = get_log_events_from_cloudwatch(
+        log_group_name, log_stream_prefix, start_time, None, pattern
+    )
+    # The tail is kept in the order the events were read in, so that a
+    # cursor stays valid when late events are appended after it.
+    events = [
+        event for event in events if event["timestamp"] >= window_start
+    ] + [
+        event
+        for event in new_events
+        if event["eventId"] not in seen_event_ids
+        and (dropped_until is None or event["timestamp"] > dropped_until)
+    ]
+    if len(events) > WORKER_LOGS_MAX_EVENTS:
+        dropped_until = max(
+            [dropped_until or 0]
+            + [
+                event["timestamp"]
+                for event in events[:-WORKER_LOGS_MAX_EVENTS]
+            ]
+        )
+        events = events[-WORKER_LOGS_MAX_EVENTS:]
+    if dropped_until is not None and dropped_until < window_start:
+        dropped_until = None
+    return {
+        "events": events,
+        "refreshed_at": now,
+        "dropped_until": dropped_until,
+    }
+
+
+def read_logs_after_cursor(
+    log_group_name, log_stream_prefix, pattern, start_time, cursor_event_id
+):
+    """
+    Reads the events logged after a cursor directly from CloudWatch, at most
+    `WORKER_LOGS_MAX_EVENTS` of them, for the callers which are further
+    behind than the shared tail goes.
+
+    Returns:
+        tuple -- The events and whether more events follow them
+    """
+    events = []
+    for event in iter_log_events_from_cloudwatch(
+        log_group_name, log_stream_prefix, start_time, None, pattern
+    ):
+        if event["eventId"] == cursor_event_id:
+            # The events logged up to the cursor were already read
+            events = []
+        elif len(events) == WORKER_LOGS_MAX_EVENTS:
+            return events, True
+        else:
+            events.append(event)
+    return events, False
+
+
+def tail_logs_from_cloudwatch(
+    log_group_name, log_stream_prefix, pattern, cursor=None
+):
+    """
+    To fetch the logs of a container from cloudwatch which were not read yet.
+
+    The recent events of a log group are kept in a tail which is shared
+    through the cache, so that many hosts polling the logs of the same
+    challenge share one CloudWatch read every `WORKER_LOGS_CACHE_TIMEOUT`
+    seconds. Every refresh only reads the events logged since the previous
+    one. The tail keeps the last `WORKER_LOGS_MAX_EVENTS` events; callers
+    whose cursor is older than the tail read the events they missed from
+    CloudWatch, a page at a time.
+
+    Arguments:
+        log_group_name {str} -- Name of the log group
+        log_stream_prefix {str} -- Prefix of the log streams to search
+        pattern {str} -- Filter pattern of the events
+        cursor {str} -- Cursor returned by the previous call, or None to
+                        fetch the last events of the last 15 minutes
+    Returns:
+        tuple -- The new log messages, the cursor of the next call and
+                 whether the messages are truncated, i.e. more messages
+                 can be fetched right away with the cursor
+    Raises:
+        ClientError -- If the log events can not be read
+    """
+    if settings.DEBUG:
+        if cursor:
+            return [], cursor, False
+        return [DEVELOPMENT_WORKER_LOGS_MESSAGE], "0:development", False
+
+    cache_key = WORKER_LOGS_CACHE_KEY.format(log_group_name, log_stream_prefix)
+    now = int(round(time.time() * 1000))
+    tail = cache.get(cache_key)
+    if (
+        tail is None
+        or now - tail["refreshed_at"] >= WORKER_LOGS_CACHE_TIMEOUT * 1000
+    ):
+        try:
+            tail = refresh_logs_tail(
+                log_group_name, log_stream_prefix, pattern, tail, now
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ResourceNotFoundException":
+                raise
+            tail = {"events": [], "refreshed_at": now}
+        cache.set(cache_key, tail, WORKER_LOGS_TIMEFRAME // 1000)
+
+    events = tail["events"]
+    truncated = False
+    cursor_timestamp, cursor_event_id = decode_log_cursor(cursor)
+    event_ids = [event["eventId"] for event in events]
+    if cursor_event_id in event_ids:
+        events = events[event_ids.index(cursor_event_id) + 1:]
+    elif cursor_timestamp is not None:
+        dropped_until = tail.get("dropped_until")
+        if dropped_until is not None and cursor_timestamp <= dropped_until:
+            # Events logged after the cursor were dropped from the tail
+            try:
+                events, truncated = read_logs_after_cursor(
+                    log_group_name,
+                    log_stream_prefix,
+                    pattern,
+                    max(cursor_timestamp, now - WORKER_LOGS_TIMEFRAME),
+                    cursor_event_id,
+                )
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ResourceNotFoundException":
+                    raise
+                events = []
+        else:
+            events = [
+                event
+                for event in events
+                if event["timestamp"] > cursor_timestamp
+            ]
+    if events:
+        cursor = encode_log_cursor(events[-1])
+    return [event["message"] for event in events], cursor, truncated
+
+
 def delete_log_group(log_group_name):
     if settings.DEBUG:
         pass
@@ -1036,7 +1376,7 @@ def create_eks_nodegroup(challenge, cluster_name):
     waiter.wait(clusterName=cluster_name, nodegroupName=nodegroup_name)
     construct_and_send_eks_cluster_creation_mail(challenge_obj)
     # starting the code-upload-worker
-    client = get_boto3_client("ecs", aws_keys)
+    client = get_ecs_client()
     client_token = client_token_generator(challenge_obj.pk)
     create_service_by_challenge_pk(client, challenge_obj, client_token)
 
@@ -1,15 +1,40 @@
+import hashlib
 import logging
-import requests
+import os
+import random
+import shutil
+import tempfile
 import zipfile
 import yaml
 
+from django.conf import settings
+from django.contrib.auth.models import User
 from django.core.files.base import ContentFile
+from django.db import transaction
+from django.http import HttpRequest
 
 from os.path import basename, isfile, join
-from rest_framework import status
+from rest_framework.exceptions import ValidationError
 
 from yaml.scanner import ScannerError
 
+from base.utils import (
+    CHECKSUM_CHUNK_SIZE,
+    get_file_checksum,
+    get_queue_name,
+    get_slug,
+    send_slack_notification,
+)
+from participants.models import Participant, ParticipantTeam
+
+from .models import (
+    Challenge,
+    ChallengeConfiguration,
+    ChallengePhase,
+    ChallengePhaseSplit,
+    DatasetSplit,
+    Leaderboard,
+)
 from .serializers import (
     ChallengePhaseCreateSerializer,
     DatasetSplitSerializer,
@@ -20,18 +45,46 @@ from .serializers import (
 from .utils import (
     get_file_content,
     get_missing_keys_from_dict,
+    get_unique_alpha_numeric_key,
     read_file_data_as_content_file,
 )
 
 logger = logging.getLogger(__name__)
 
+# Fields of a challenge template that are filled in by the hosts
+TEMPLATE_CHALLENGE_FIELDS = ["title", "description", "start_date", "end_date"]
+TEMPLATE_CHALLENGE_PHASE_FIELDS = ["name", "start_date", "end_date"]
+# Fields of a challenge config which are paths of HTML files
+CHALLENGE_HTML_FIELDS = [
+    "description",
+    "evaluation_details",
+    "terms_and_conditions",
+    "submission_guidelines",
+]
 
-def write_file(output_path, mode, file_content):
-    with open(output_path, mode) as file:
-        file.write(file_content)
+# Files of a challenge config, as challenge field and key in the files
+# returned by `validate_challenge_config_util`
+CHALLENGE_CONFIG_FILES = [
+    ("image", "challenge_image_file"),
+    ("evaluation_script", "challenge_evaluation_script_file"),
+]
+# Objects of a challenge config, as keys of the summary of a sync
+CHALLENGE_CONFIG_OBJECTS = [
+    "leaderboards",
+    "challenge_phases",
+    "dataset_splits",
+    "challenge_phase_splits",
+]
+
+# Progress of the challenge creation after each of its steps, in percent
+CHALLENGE_CREATION_PROGRESS = {"downloaded": 20, "validated": 50}
 
 
 def extract_zip_file(file_path, mode, output_path):
+    """
+    Extracts a zip file, given either as a path or as a file object such as
+    an uploaded file
+    """
     zip_ref = zipfile.ZipFile(file_path, mode)
     zip_ref.extractall(output_path)
     logger.info("Zip file extracted to {}".format(output_path))
@@ -39,6 +92,33 @@ def extract_zip_file(file_path, mode, output_path):
     return zip_ref
 
 
+def get_directory_checksum(path):
+    """
+    Returns a SHA-256 checksum of the relative paths and the contents of
+    all the files of a directory, e.g. of an extracted challenge config.
+    Unlike the checksum of the zip file, it doesn't depend on the
+    timestamps of the files.
+    """
+    checksum = hashlib.sha256()
+    for root, dir_names, file_names in os.walk(path):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            file_path = join(root, file_name)
+            file_checksum = hashlib.sha256()
+            with open(file_path, "rb") as file_content:
+                for chunk in iter(
+                    lambda: file_content.read(CHECKSUM_CHUNK_SIZE), b""
+                ):
+                    file_checksum.update(chunk)
+            checksum.update(
+                "{}\0{}\n".format(
+                    os.path.relpath(file_path, path),
+                    file_checksum.hexdigest(),
+                ).encode("utf-8")
+            )
+    return checksum.hexdigest()
+
+
 def get_yaml_files_from_challenge_config(zip_ref):
     """
         Arguments:
@@ -143,37 +223,6 @@ def is_challenge_phase_config_yaml_html_field_valid(
     return is_valid, message
 
 
-def download_and_write_file(url, stream, output_path, mode):
-    """
-        Arguments:
-            url {string} -- source file url
-            stream {boolean} -- flag for download in stream mode
-            output_path {string} -- path to write file
-            model {string} -- access mode to write file
-        Returns:
-            is_success {boolean} -- flag for download and write is success
-            message {string} -- error message if any
-    """
-    is_success = False
-    message = None
-    try:
-        response = requests.get(url, stream=stream)
-        try:
-            if response and response.status_code == status.HTTP_200_OK:
-                write_file(output_path, mode, response.content)
-                is_success = True
-        except IOError:
-            message = (
-                "Unable to process the uploaded zip file. " "Please try again!"
-            )
-    except requests.exceptions.RequestException:
-        message = (
-            "A server error occured while processing zip file. "
-            "Please try again!"
-        )
-    return is_success, message
-
-
 def is_challenge_phase_split_mapping_valid(
     phase_ids, leaderboard_ids, dataset_split_ids, phase_split
 ):
@@ -209,7 +258,14 @@ def get_value_from_field(data, base_location, field_name):
 
 
 def validate_challenge_config_util(
-    request, challenge_host_team, BASE_LOCATION, unique_folder_name, zip_ref
+    request,
+    challenge_host_team,
+    BASE_LOCATION,
+    unique_folder_name,
+    zip_ref,
+    github_repository=None,
+    challenge_data_from_hosts=None,
+    allow_missing_html_fields=False,
 ):
     """
     Function to validate a challenge config
@@ -219,6 +275,12 @@ def validate_challenge_config_util(
         BASE_LOCATION {str} -- The temp base directory for storing all the files and folders while validating the zip file
         unique_folder_name {str} -- name of the challenge zip file and the parent dir of extracted folder
         zip_ref {zipfile.ZipFile} -- reference to challenge config zip
+        github_repository {str} -- GitHub repository of the challenge, if any
+        challenge_data_from_hosts {dict} -- Fields overriding the config of
+                                            a challenge template, if any
+        allow_missing_html_fields {bool} -- Whether the HTML files of the
+                                            challenge, e.g. its description,
+                                            are optional
     """
 
     error_messages = []
@@ -256,6 +318,11 @@ def validate_challenge_config_util(
         error_messages.append(message)
         return error_messages, yaml_file_data, files
 
+    if challenge_data_from_hosts:
+        apply_challenge_template_data(
+            yaml_file_data, challenge_data_from_hosts
+        )
+
     # Check for challenge title
     challenge_title = yaml_file_data.get("title")
     if not challenge_title or len(challenge_title) == 0:
@@ -282,52 +349,25 @@ def validate_challenge_config_util(
         challenge_image_file = None
     files["challenge_image_file"] = challenge_image_file
 
-    # Check for challenge description file
+    # Check for the HTML files of the challenge
     challenge_config_location = join(
         BASE_LOCATION, unique_folder_name, extracted_folder_name
     )
-    is_valid, message = is_challenge_config_yaml_html_field_valid(
-        yaml_file_data, "description", challenge_config_location
-    )
-    if not is_valid:
-        error_messages.append(message)
-    else:
-        yaml_file_data["description"] = get_value_from_field(
-            yaml_file_data, challenge_config_location, "description"
-        )
-
-    # Check for evaluation details file
-    is_valid, message = is_challenge_config_yaml_html_field_valid(
-        yaml_file_data, "evaluation_details", challenge_config_location
-    )
-    if not is_valid:
-        error_messages.append(message)
-    else:
-        yaml_file_data["evaluation_details"] = get_value_from_field(
-            yaml_file_data, challenge_config_location, "evaluation_details"
-        )
-
-    # Check for terms and conditions file
-    is_valid, message = is_challenge_config_yaml_html_field_valid(
-        yaml_file_data, "terms_and_conditions", challenge_config_location
-    )
-    if not is_valid:
-        error_messages.append(message)
-    else:
-        yaml_file_data["terms_and_conditions"] = get_value_from_field(
-            yaml_file_data, challenge_config_location, "terms_and_conditions"
-        )
-
-    # Check for submission guidelines file
-    is_valid, message = is_challenge_config_yaml_html_field_valid(
-        yaml_file_data, "submission_guidelines", challenge_config_location
-    )
-    if not is_valid:
-        error_messages.append(message)
-    else:
-        yaml_file_data["submission_guidelines"] = get_value_from_field(
-            yaml_file_data, challenge_config_location, "submission_guidelines"
+    for key in CHALLENGE_HTML_FIELDS:
+        if challenge_data_from_hosts and key in TEMPLATE_CHALLENGE_FIELDS:
+            # Filled in by the hosts instead of a file
+            continue
+        is_valid, message = is_challenge_config_yaml_html_field_valid(
+            yaml_file_data, key, challenge_config_location
         )
+        if is_valid:
+            yaml_file_data[key] = get_value_from_field(
+                yaml_file_data, challenge_config_location, key
+            )
+        elif allow_missing_html_fields:
+            yaml_file_data[key] = None
+        else:
+            error_messages.append(message)
 
     # Check for evaluation script path
     evaluation_script = yaml_file_data.get("evaluation_script")
@@ -358,7 +398,7 @@ def validate_challenge_config_util(
                 "challenge_host_team": challenge_host_team,
                 "image": challenge_image_file,
                 "evaluation_script": challenge_evaluation_script_file,
-                "github_repository": request.data["GITHUB_REPOSITORY"],
+                "github_repository": github_repository,
             },
         )
         if not serializer.is_valid():
@@ -584,3 +624,546 @@ def validate_challenge_config_util(
         error_messages.append(message)
 
     return error_messages, yaml_file_data, files
+
+
+def apply_challenge_template_data(yaml_file_data, challenge_data_from_hosts):
+    """
+    Overrides the fields of a challenge template with the values filled in
+    by the hosts.
+
+    Arguments:
+        yaml_file_data {dict} -- challenge config yaml dict of the template
+        challenge_data_from_hosts {dict} -- challenge fields, and the list of
+                                            the `challenge_phases` fields
+    """
+    for field in TEMPLATE_CHALLENGE_FIELDS:
+        yaml_file_data[field] = challenge_data_from_hosts.get(field)
+
+    for challenge_phase_data, challenge_phase_data_from_hosts in zip(
+        yaml_file_data.get("challenge_phases") or [],
+        challenge_data_from_hosts.get("challenge_phases", []),
+    ):
+        for field in TEMPLATE_CHALLENGE_PHASE_FIELDS:
+            challenge_phase_data[field] = challenge_phase_data_from_hosts.get(
+                field
+            )
+
+
+def add_challenge_hosts_as_participants(challenge, challenge_host_team):
+    """
+    Adds the hosts of a challenge as a test participant team
+    """
+    emails = challenge_host_team.get_all_challenge_host_email()
+    participant_host_team = ParticipantTeam.objects.create(
+        team_name="Host_{}_Team".format(random.randint(1, 100000)),
+        created_by=challenge_host_team.created_by,
+    )
+    Participant.objects.bulk_create(
+        [
+            Participant(
+                user=user,
+                status=Participant.ACCEPTED,
+                team=participant_host_team,
+            )
+            for user in User.objects.filter(email__in=emails)
+        ]
+    )
+    challenge.participant_teams.add(participant_host_team)
+
+
+def create_challenge_from_config(
+    request, challenge_host_team, yaml_file_data, files, github_repository=None
+):
+    """
+    Creates a challenge with its leaderboards, phases, dataset splits and
+    phase splits from a validated challenge config, in one transaction.
+    Everything but the phases, which have annotation files to upload, is
+    created in bulk.
+
+    Arguments:
+        request {HttpRequest} -- The request object
+        challenge_host_team {ChallengeHostTeam} -- Creator of the challenge
+        yaml_file_data {dict} -- challenge config yaml dict
+        files {dict} -- files of the config returned by `validate_challenge_config_util`
+        github_repository {str} -- GitHub repository of the challenge, if any
+    Returns:
+        Challenge -- The created challenge
+    Raises:
+        ValidationError -- If the config has schema errors
+    """
+    # The files are hashed before the storage consumes them
+    checksums = get_challenge_file_checksums(files)
+    test_annotation_checksums = {
+        str(data["id"]): get_file_checksum(challenge_test_annotation_file)
+        for data, challenge_test_annotation_file in zip(
+            yaml_file_data["challenge_phases"],
+            files["challenge_test_annotation_files"],
+        )
+        if challenge_test_annotation_file
+    }
+    with transaction.atomic():
+        serializer = ZipChallengeSerializer(
+            data=yaml_file_data,
+            context={
+                "request": request,
+                "challenge_host_team": challenge_host_team,
+                "image": files["challenge_image_file"],
+                "evaluation_script": files["challenge_evaluation_script_file"],
+                "github_repository": github_repository,
+            },
+        )
+        serializer.is_valid(raise_exception=True)
+        challenge = serializer.save()
+        challenge.queue = get_queue_name(challenge.title, challenge.pk)
+        challenge.save()
+
+        leaderboards_data = yaml_file_data["leaderboard"]
+        leaderboards = []
+        for data in leaderboards_data:
+            serializer = LeaderboardSerializer(
+                data=data, context={"config_id": data["id"]}
+            )
+            serializer.is_valid(raise_exception=True)
+            leaderboards.append(Leaderboard(**serializer.validated_data))
+        Leaderboard.objects.bulk_create(leaderboards)
+        leaderboard_ids = {
+            str(data["id"]): leaderboard.pk
+            for data, leaderboard in zip(leaderboards_data, leaderboards)
+        }
+
+        challenge_phase_ids = {}
+        for data, challenge_test_annotation_file in zip(
+            yaml_file_data["challenge_phases"],
+            files["challenge_test_annotation_files"],
+        ):
+            data["slug"] = "{}-{}-{}".format(
+                challenge.title.split(" ")[0].lower(),
+                get_slug(data["codename"]),
+                challenge.pk,
+            )[:198]
+            context = {"challenge": challenge, "config_id": data["id"]}
+            # The annotation file can also be uploaded later through CLI
+            if challenge_test_annotation_file:
+                context["test_annotation"] = challenge_test_annotation_file
+            serializer = ChallengePhaseCreateSerializer(
+                data=data, context=context
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            challenge_phase_ids[str(data["id"])] = serializer.instance.pk
+
+        dataset_splits_data = yaml_file_data["dataset_splits"]
+        dataset_splits = []
+        for data in dataset_splits_data:
+            serializer = DatasetSplitSerializer(
+                data=data, context={"config_id": data["id"]}
+            )
+            serializer.is_valid(raise_exception=True)
+            dataset_splits.append(DatasetSplit(**serializer.validated_data))
+        DatasetSplit.objects.bulk_create(dataset_splits)
+        dataset_split_ids = {
+            str(data["id"]): dataset_split.pk
+            for data, dataset_split in zip(dataset_splits_data, dataset_splits)
+        }
+
+        ChallengePhaseSplit.objects.bulk_create(
+            [
+                ChallengePhaseSplit(
+                    challenge_phase_id=challenge_phase_ids[
+                        str(data["challenge_phase_id"])
+                    ],
+                    leaderboard_id=leaderboard_ids[str(data["leaderboard_id"])],
+                    dataset_split_id=dataset_split_ids[
+                        str(data["dataset_split_id"])
+                    ],
+                    visibility=data["visibility"],
+                )
+                for data in yaml_file_data["challenge_phase_splits"]
+            ]
+        )
+
+        if not challenge.is_docker_based:
+            add_challenge_hosts_as_participants(challenge, challenge_host_team)
+
+        # Checksums let the syncs of the config skip the unchanged files
+        Challenge.objects.filter(pk=challenge.pk).update(**checksums)
+        for config_id, checksum in test_annotation_checksums.items():
+            ChallengePhase.objects.filter(
+                pk=challenge_phase_ids[config_id]
+            ).update(test_annotation_checksum=checksum)
+    return challenge
+
+
+def get_challenge_file_checksums(files):
+    """
+    Returns the checksums of the image and the evaluation script of a
+    challenge config, keyed by the name of their checksum field
+    """
+    checksums = {}
+    for field, file_key in CHALLENGE_CONFIG_FILES:
+        if files[file_key]:
+            checksums["{}_checksum".format(field)] = get_file_checksum(
+                files[file_key]
+            )
+    return checksums
+
+
+def get_changed_fields(instance, validated_data):
+    """
+    Returns the fields of a model instance which the validated data of a
+    serializer would change
+    """
+    return sorted(
+        field
+        for field, value in validated_data.items()
+        if getattr(instance, field) != value
+    )
+
+
+def save_challenge_config_object(serializer, changes, config_id):
+    """
+    Saves the object of a serializer unless it already exists unchanged, and
+    records the config id of the object under `created`, `updated` or
+    `unchanged` in `changes`
+
+    Raises:
+        ValidationError -- If the data of the serializer is invalid
+    """
+    serializer.is_valid(raise_exception=True)
+    if serializer.instance is None:
+        serializer.save()
+        changes["created"].append(config_id)
+    elif get_changed_fields(serializer.instance, serializer.validated_data):
+        serializer.save()
+        changes["updated"].append(config_id)
+    else:
+        changes["unchanged"].append(config_id)
+    return serializer.instance
+
+
+def sync_challenge_from_config(
+    request, challenge, challenge_host_team, yaml_file_data, files
+):
+    """
+    Updates a challenge with its leaderboards, phases, dataset splits and
+    phase splits from a validated challenge config, in one transaction.
+
+    Only the objects which the config changes are saved, and only the files
+    whose checksum changed are uploaded, so that an unchanged evaluation
+    script or annotation file doesn't restart the workers of the challenge.
+
+    Arguments:
+        request {HttpRequest} -- The request object
+        challenge {Challenge} -- The challenge to update
+        challenge_host_team {ChallengeHostTeam} -- Host team of the challenge
+        yaml_file_data {dict} -- challenge config yaml dict
+        files {dict} -- files of the config returned by `validate_challenge_config_util`
+    Returns:
+        dict -- The changed fields of the challenge, the uploaded files and
+                the config ids of the created, updated and unchanged objects
+    Raises:
+        ValidationError -- If the config has schema errors
+    """
+    changes = {"challenge": [], "files": []}
+    for key in CHALLENGE_CONFIG_OBJECTS:
+        changes[key] = {"created": [], "updated": [], "unchanged": []}
+
+    with transaction.atomic():
+        challenge_data = dict(yaml_file_data)
+        context = {
+            "request": request,
+            "challenge_host_team": challenge_host_team,
+        }
+        checksums = get_challenge_file_checksums(files)
+        for field, file_key in CHALLENGE_CONFIG_FILES:
+            challenge_data.pop(field, None)
+            checksum_field = "{}_checksum".format(field)
+            if files[file_key] and checksums[checksum_field] != getattr(
+                challenge, checksum_field
+            ):
+                context[field] = files[file_key]
+                changes["files"].append(field)
+            else:
+                checksums.pop(checksum_field, None)
+        serializer = ZipChallengeSerializer(
+            challenge, data=challenge_data, context=context
+        )
+        serializer.is_valid(raise_exception=True)
+        changes["challenge"] = get_changed_fields(
+            challenge, serializer.validated_data
+        )
+        if changes["challenge"]:
+            challenge = serializer.save()
+        if checksums:
+            Challenge.objects.filter(pk=challenge.pk).update(**checksums)
+
+        # Existing objects, by config id
+        phase_splits = ChallengePhaseSplit.objects.filter(
+            challenge_phase__challenge=challenge
+        ).select_related("dataset_split", "leaderboard")
+        leaderboards = {
+            phase_split.leaderboard.config_id: phase_split.leaderboard
+            for phase_split in phase_splits
+        }
+        dataset_splits = {
+            phase_split.dataset_split.config_id: phase_split.dataset_split
+            for phase_split in phase_splits
+        }
+        challenge_phase_splits = {
+            (
+                phase_split.challenge_phase_id,
+                phase_split.dataset_split_id,
+            ): phase_split
+            for phase_split in phase_splits
+        }
+        challenge_phases = {
+            challenge_phase.config_id: challenge_phase
+            for challenge_phase in ChallengePhase.objects.filter(
+                challenge=challenge
+            )
+        }
+
+        leaderboard_ids = {}
+        for data in yaml_file_data["leaderboard"]:
+            serializer = LeaderboardSerializer(
+                leaderboards.get(data["id"]),
+                data=data,
+                context={"config_id": data["id"]},
+            )
+            leaderboard = save_challenge_config_object(
+                serializer, changes["leaderboards"], data["id"]
+            )
+            leaderboard_ids[str(data["id"])] = leaderboard.pk
+
+        challenge_phase_ids = {}
+        for data, challenge_test_annotation_file in zip(
+            yaml_file_data["challenge_phases"],
+            files["challenge_test_annotation_files"],
+        ):
+            # Validating the config adds the annotation file to the data
+            data = dict(data)
+            data.pop("test_annotation", None)
+            challenge_phase = challenge_phases.get(data["id"])
+            context = {"challenge": challenge, "config_id": data["id"]}
+            test_annotation_checksum = None
+            if challenge_test_annotation_file:
+                test_annotation_checksum = get_file_checksum(
+                    challenge_test_annotation_file
+                )
+                if (
+                    challenge_phase is None
+                    or challenge_phase.test_annotation_checksum
+                    != test_annotation_checksum
+                ):
+                    context["test_annotation"] = challenge_test_annotation_file
+                    changes["files"].append(
+                        "challenge_phases/{}/test_annotation".format(
+                            data["id"]
+                        )
+                    )
+            serializer = ChallengePhaseCreateSerializer(
+                challenge_phase, data=data, context=context
+            )
+            challenge_phase = save_challenge_config_object(
+                serializer, changes["challenge_phases"], data["id"]
+            )
+            if "test_annotation" in context:
+                ChallengePhase.objects.filter(pk=challenge_phase.pk).update(
+                    test_annotation_checksum=test_annotation_checksum
+                )
+            challenge_phase_ids[str(data["id"])] = challenge_phase.pk
+
+        dataset_split_ids = {}
+        for data in yaml_file_data["dataset_splits"]:
+            serializer = DatasetSplitSerializer(
+                dataset_splits.get(data["id"]),
+                data=data,
+                context={"config_id": data["id"]},
+            )
+            dataset_split = save_challenge_config_object(
+                serializer, changes["dataset_splits"], data["id"]
+            )
+            dataset_split_ids[str(data["id"])] = dataset_split.pk
+
+        for index, data in enumerate(yaml_file_data["challenge_phase_splits"]):
+            challenge_phase = challenge_phase_ids[
+                str(data["challenge_phase_id"])
+            ]
+            dataset_split = dataset_split_ids[str(data["dataset_split_id"])]
+            serializer = ZipChallengePhaseSplitSerializer(
+                challenge_phase_splits.get((challenge_phase, dataset_split)),
+                data={
+                    "challenge_phase": challenge_phase,
+                    "leaderboard": leaderboard_ids[
+                        str(data["leaderboard_id"])
+                    ],
+                    "dataset_split": dataset_split,
+                    "visibility": data["visibility"],
+                },
+            )
+            # Phase splits have no id in the config
+            save_challenge_config_object(
+                serializer, changes["challenge_phase_splits"], index
+            )
+    return changes
+
+
+def update_challenge_configuration_status(
+    challenge_configuration, status, progress=None, error_message=None
+):
+    """
+    Records the status of the challenge creation of a challenge configuration
+    """
+    challenge_configuration.status = status
+    update_fields = ["status", "modified_at"]
+    if progress is not None:
+        challenge_configuration.progress = progress
+        update_fields.append("progress")
+    if error_message is not None:
+        challenge_configuration.error_message = error_message
+        update_fields.append("error_message")
+    challenge_configuration.save(update_fields=update_fields)
+
+
+def create_challenge_from_configuration(
+    challenge_configuration,
+    challenge_host_team,
+    challenge_data_from_hosts=None,
+    github_repository=None,
+):
+    """
+    Creates the challenge of a stored challenge configuration zip file and
+    records the progress of the creation on the configuration.
+
+    Arguments:
+        challenge_configuration {ChallengeConfiguration} -- The uploaded configuration
+        challenge_host_team {ChallengeHostTeam} -- Creator of the challenge
+        challenge_data_from_hosts {dict} -- Fields overriding the config of
+                                            a challenge template, if any
+        github_repository {str} -- GitHub repository of the challenge, if any
+    Returns:
+        Challenge -- The created challenge, None if the creation failed
+    """
+    update_challenge_configuration_status(
+        challenge_configuration, ChallengeConfiguration.PROCESSING, progress=0
+    )
+    # Serializers of the config need the user and the method of a request
+    request = HttpRequest()
+    request.method = "POST"
+    request.user = challenge_configuration.user
+
+    BASE_LOCATION = tempfile.mkdtemp()
+    unique_folder_name = get_unique_alpha_numeric_key(10)
+    zip_file_path = join(BASE_LOCATION, "{}.zip".format(unique_folder_name))
+    try:
+        zip_configuration = challenge_configuration.zip_configuration
+        with zip_configuration.storage.open(
+            zip_configuration.name, "rb"
+        ) as stored_zip_file, open(zip_file_path, "wb") as zip_file:
+            for chunk in stored_zip_file.chunks():
+                zip_file.write(chunk)
+        update_challenge_configuration_status(
+            challenge_configuration,
+            ChallengeConfiguration.PROCESSING,
+            progress=CHALLENGE_CREATION_PROGRESS["downloaded"],
+        )
+
+        try:
+            zip_ref = extract_zip_file(
+                zip_file_path, "r", join(BASE_LOCATION, unique_folder_name)
+            )
+        except zipfile.BadZipfile:
+            update_challenge_configuration_status(
+                challenge_configuration,
+                ChallengeConfiguration.FAILED,
+                error_message="The zip file contents cannot be extracted. Please check the format!",
+            )
+            return None
+        checksum = get_directory_checksum(
+            join(BASE_LOCATION, unique_folder_name)
+        )
+
+        error_messages, yaml_file_data, files = validate_challenge_config_util(
+            request,
+            challenge_host_team,
+            BASE_LOCATION,
+            unique_folder_name,
+            zip_ref,
+            github_repository=github_repository,
+            challenge_data_from_hosts=challenge_data_from_hosts,
+            # Uploaded zip files have always been allowed to omit them
+            allow_missing_html_fields=github_repository is None,
+        )
+        if error_messages:
+            update_challenge_configuration_status(
+                challenge_configuration,
+                ChallengeConfiguration.FAILED,
+                error_message="\n".join(error_messages),
+            )
+            return None
+        update_challenge_configuration_status(
+            challenge_configuration,
+            ChallengeConfiguration.PROCESSING,
+            progress=CHALLENGE_CREATION_PROGRESS["validated"],
+        )
+
+        try:
+            challenge = create_challenge_from_config(
+                request,
+                challenge_host_team,
+                yaml_file_data,
+                files,
+                github_repository=github_repository,
+            )
+        except ValidationError as e:
+            update_challenge_configuration_status(
+                challenge_configuration,
+                ChallengeConfiguration.FAILED,
+                error_message="Challenge config has following schema errors:\n {}".format(
+                    e.detail
+                ),
+            )
+            return None
+    except Exception:
+        logger.exception(
+            "Error in creating challenge from challenge configuration {}".format(
+                challenge_configuration.pk
+            )
+        )
+        update_challenge_configuration_status(
+            challenge_configuration,
+            ChallengeConfiguration.FAILED,
+            error_message="Error in creating challenge. Please check the yaml configuration!",
+        )
+        return None
+    finally:
+        shutil.rmtree(BASE_LOCATION, ignore_errors=True)
+
+    challenge_configuration.challenge = challenge
+    challenge_configuration.is_created = True
+    challenge_configuration.checksum = checksum
+    challenge_configuration.save(
+        update_fields=["challenge", "is_created", "checksum"]
+    )
+    update_challenge_configuration_status(
+        challenge_configuration, ChallengeConfiguration.FINISHED, progress=100
+    )
+
+    if not settings.DEBUG:
+        message = {
+            "text": "A *new challenge* has been uploaded to EvalAI.",
+            "fields": [
+                {
+                    "title": "Email",
+                    "value": challenge_configuration.user.email,
+                    "short": False,
+                },
+                {
+                    "title": "Challenge title",
+                    "value": challenge.title,
+                    "short": False,
+                },
+            ],
+        }
+        send_slack_notification(message=message)
+    return challenge
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0071_add_challenge_template_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challenge',
+            name='autoscale_workers',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='challenge',
+            name='max_workers',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='challenge',
+            name='min_workers',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='challenge',
+            name='workers_scaled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def mark_existing_configurations_as_processed(apps, schema_editor):
+    ChallengeConfiguration = apps.get_model(
+        "challenges", "ChallengeConfiguration"
+    )
+    ChallengeConfiguration.objects.filter(challenge__isnull=False).update(
+        status="finished", progress=100
+    )
+    ChallengeConfiguration.objects.filter(challenge__isnull=True).update(
+        status="failed"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0072_add_worker_autoscaling_fields_to_challenge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challengeconfiguration',
+            name='status',
+            field=models.CharField(choices=[('queued', 'queued'), ('processing', 'processing'), ('finished', 'finished'), ('failed', 'failed')], db_index=True, default='queued', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='challengeconfiguration',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='challengeconfiguration',
+            name='error_message',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(
+            mark_existing_configurations_as_processed,
+            migrations.RunPython.noop,
+        ),
+    ]
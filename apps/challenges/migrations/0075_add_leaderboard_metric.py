@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_leaderboard_metrics(apps, schema_editor):
+    LeaderboardData = apps.get_model("challenges", "LeaderboardData")
+    LeaderboardMetric = apps.get_model("challenges", "LeaderboardMetric")
+    metrics = []
+    leaderboard_data_list = LeaderboardData.objects.values_list(
+        "pk", "challenge_phase_split", "result", "leaderboard__schema"
+    )
+    for (
+        leaderboard_data_pk,
+        challenge_phase_split_pk,
+        result,
+        schema,
+    ) in leaderboard_data_list.iterator():
+        if not isinstance(schema, dict) or not isinstance(result, dict):
+            continue
+        for label in schema.get("labels", []):
+            value = result.get(label)
+            if isinstance(value, (int, float)) and not isinstance(
+                value, bool
+            ):
+                metrics.append(
+                    LeaderboardMetric(
+                        leaderboard_data_id=leaderboard_data_pk,
+                        challenge_phase_split_id=challenge_phase_split_pk,
+                        metric=label,
+                        value=value,
+                    )
+                )
+        if len(metrics) >= 1000:
+            LeaderboardMetric.objects.bulk_create(metrics)
+            metrics = []
+    LeaderboardMetric.objects.bulk_create(metrics)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0074_add_checksums_for_challenge_config_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardMetric',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=255)),
+                ('value', models.FloatField()),
+                ('challenge_phase_split', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='challenges.ChallengePhaseSplit')),
+                ('leaderboard_data', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='challenges.LeaderboardData')),
+            ],
+            options={
+                'db_table': 'leaderboard_metric',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='leaderboardmetric',
+            unique_together=set([('leaderboard_data', 'metric')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='leaderboardmetric',
+            index_together=set([('challenge_phase_split', 'metric', 'value')]),
+        ),
+        migrations.RunPython(
+            populate_leaderboard_metrics, migrations.RunPython.noop
+        ),
+    ]
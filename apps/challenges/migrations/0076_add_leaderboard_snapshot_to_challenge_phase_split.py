@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import base.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0075_add_leaderboard_metric'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challengephasesplit',
+            name='leaderboard_snapshot',
+            field=models.FileField(blank=True, null=True, upload_to=base.utils.RandomFileName('leaderboard_snapshots')),
+        ),
+        migrations.AddField(
+            model_name='challengephasesplit',
+            name='leaderboard_snapshot_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
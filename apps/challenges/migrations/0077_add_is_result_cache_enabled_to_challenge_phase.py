@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0076_add_leaderboard_snapshot_to_challenge_phase_split'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challengephase',
+            name='is_result_cache_enabled',
+            field=models.BooleanField(default=False),
+        ),
+    ]
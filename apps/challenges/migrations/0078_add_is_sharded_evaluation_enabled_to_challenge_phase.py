@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0077_add_is_result_cache_enabled_to_challenge_phase'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challengephase',
+            name='is_sharded_evaluation_enabled',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0078_add_is_sharded_evaluation_enabled_to_challenge_phase'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challenge',
+            name='is_fair_scheduling_enabled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='challenge',
+            name='scheduler_state',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict),
+        ),
+    ]
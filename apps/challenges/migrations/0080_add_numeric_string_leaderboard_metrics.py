@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import math
+
+from django.db import migrations
+
+
+def populate_numeric_string_metrics(apps, schema_editor):
+    LeaderboardData = apps.get_model("challenges", "LeaderboardData")
+    LeaderboardMetric = apps.get_model("challenges", "LeaderboardMetric")
+    metrics = []
+    leaderboard_data_list = LeaderboardData.objects.values_list(
+        "pk", "challenge_phase_split", "result", "leaderboard__schema"
+    )
+    for (
+        leaderboard_data_pk,
+        challenge_phase_split_pk,
+        result,
+        schema,
+    ) in leaderboard_data_list.iterator():
+        if not isinstance(schema, dict) or not isinstance(result, dict):
+            continue
+        for label in schema.get("labels", []):
+            # The numbers were copied by 0075, only the numeric strings are
+            # missing
+            value = result.get(label)
+            if not isinstance(value, str):
+                continue
+            try:
+                value = float(value)
+            except ValueError:
+                continue
+            if math.isfinite(value):
+                metrics.append(
+                    LeaderboardMetric(
+                        leaderboard_data_id=leaderboard_data_pk,
+                        challenge_phase_split_id=challenge_phase_split_pk,
+                        metric=label,
+                        value=value,
+                    )
+                )
+        if len(metrics) >= 1000:
+            LeaderboardMetric.objects.bulk_create(metrics)
+            metrics = []
+    LeaderboardMetric.objects.bulk_create(metrics)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0079_add_fair_scheduling_to_challenge'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            populate_numeric_string_metrics, migrations.RunPython.noop
+        ),
+    ]
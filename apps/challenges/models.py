@@ -1,5 +1,8 @@
 from __future__ import unicode_literals
 
+import copy
+import math
+
 from django.contrib.auth.models import User
 from django.core import serializers
 from django.db.models.signals import pre_save
@@ -22,6 +25,9 @@ from base.utils import RandomFileName, get_slug, is_model_field_changed
 from participants.models import ParticipantTeam
 from hosts.models import ChallengeHost
 
+# Number of leaderboard entries whose metrics are rebuilt at once
+LEADERBOARD_METRICS_BATCH_SIZE = 1000
+
 
 @receiver(pre_save, sender="challenges.Challenge")
 def save_challenge_slug(sender, instance, **kwargs):
@@ -36,6 +42,7 @@ class Challenge(TimeStampedModel):
     def __init__(self, *args, **kwargs):
         super(Challenge, self).__init__(*args, **kwargs)
         self._original_evaluation_script = self.evaluation_script
+        self._original_image = self.image
         self._original_approved_by_admin = self.approved_by_admin
 
     title = models.CharField(max_length=100, db_index=True)
@@ -72,6 +79,12 @@ class Challenge(TimeStampedModel):
     evaluation_script = models.FileField(
         default=False, upload_to=RandomFileName("evaluation_scripts")
     )  # should be zip format
+    # SHA-256 checksums of the files synced from a challenge config, reset
+    # when the files are changed in any other way
+    evaluation_script_checksum = models.CharField(
+        max_length=64, blank=True, default=""
+    )
+    image_checksum = models.CharField(max_length=64, blank=True, default="")
     approved_by_admin = models.BooleanField(
         default=False, verbose_name="Approved By Admin", db_index=True
     )
@@ -131,6 +144,18 @@ class Challenge(TimeStampedModel):
     task_def_arn = models.CharField(
         null=True, blank=True, max_length=2048, default=""
     )
+    # Whether the number of workers follows the submission queue depth,
+    # within the min_workers and max_workers bounds (see autoscaler.py).
+    autoscale_workers = models.BooleanField(default=False)
+    min_workers = models.PositiveIntegerField(default=0)
+    max_workers = models.PositiveIntegerField(default=1)
+    # The last time the autoscaler changed the number of workers.
+    workers_scaled_at = models.DateTimeField(null=True, blank=True)
+    # Whether the submissions wait in the fair share scheduler rather than
+    # being queued as they are made (see jobs/scheduler.py).
+    is_fair_scheduling_enabled = models.BooleanField(default=False)
+    # State of the round-robin of the scheduler across participant teams.
+    scheduler_state = JSONField(default=dict, blank=True)
     slack_webhook_url = models.URLField(max_length=200, blank=True, null=True)
     # Identifier for the github repository of a challenge in format: account_name/repository_name
     github_repository = models.CharField(
@@ -182,6 +207,14 @@ signals.post_save.connect(
 )
 
 
+@receiver(pre_save, sender="challenges.Challenge")
+def reset_challenge_file_checksums(sender, instance, **kwargs):
+    if is_model_field_changed(instance, "evaluation_script"):
+        instance.evaluation_script_checksum = ""
+    if is_model_field_changed(instance, "image"):
+        instance.image_checksum = ""
+
+
 @receiver(signals.post_save, sender="challenges.Challenge")
 def create_eks_cluster_for_challenge(sender, instance, created, **kwargs):
     field_name = "approved_by_admin"
@@ -234,6 +267,10 @@ class ChallengePhase(TimeStampedModel):
     test_annotation = models.FileField(
         upload_to=RandomFileName("test_annotations"), null=True, blank=True
     )
+    # SHA-256 checksum of the annotation file synced from a challenge config
+    test_annotation_checksum = models.CharField(
+        max_length=64, blank=True, default=""
+    )
     max_submissions_per_day = models.PositiveIntegerField(
         default=100000, db_index=True
     )
@@ -269,6 +306,13 @@ class ChallengePhase(TimeStampedModel):
     is_partial_submission_evaluation_enabled = models.BooleanField(
         default=False
     )
+    # Flag to reuse the results of an earlier submission with the same input
+    # file, evaluation script and test annotation rather than evaluating it
+    is_result_cache_enabled = models.BooleanField(default=False)
+    # Flag to evaluate the submissions as one shard per challenge phase split,
+    # in parallel on several workers. The evaluation scripts get the codename
+    # of the split to evaluate as the `dataset_split_codename` argument.
+    is_sharded_evaluation_enabled = models.BooleanField(default=False)
     # Id in the challenge config file. Needed to map the object to the value in the config file while updating through Github
     config_id = models.IntegerField(default=None, blank=True, null=True)
 
@@ -322,7 +366,16 @@ signals.post_save.connect(
 )
 
 
+@receiver(pre_save, sender="challenges.ChallengePhase")
+def reset_test_annotation_checksum(sender, instance, **kwargs):
+    if is_model_field_changed(instance, "test_annotation"):
+        instance.test_annotation_checksum = ""
+
+
 class Leaderboard(TimeStampedModel):
+    def __init__(self, *args, **kwargs):
+        super(Leaderboard, self).__init__(*args, **kwargs)
+        self._original_schema = copy.deepcopy(self.schema)
 
     schema = JSONField()
     # Id in the challenge config file. Needed to map the object to the value in the config file while updating through Github
@@ -358,6 +411,13 @@ class ChallengePhaseSplit(TimeStampedModel):
     leaderboard_decimal_precision = models.PositiveIntegerField(default=2)
     is_leaderboard_order_descending = models.BooleanField(default=True)
     show_leaderboard_by_latest_submission = models.BooleanField(default=False)
+    # Frozen ranking of the public leaderboard, served once the phase ended
+    leaderboard_snapshot = models.FileField(
+        upload_to=RandomFileName("leaderboard_snapshots"),
+        null=True,
+        blank=True,
+    )
+    leaderboard_snapshot_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return "{0} : {1}".format(
@@ -425,11 +485,139 @@ class LeaderboardData(TimeStampedModel):
         db_table = "leaderboard_data"
 
 
+class LeaderboardMetric(models.Model):
+    """
+    Typed copy of the metrics of the leaderboard entries, so that the
+    leaderboards can be ranked by any metric of their schema with an index
+    rather than by extracting the metric from the `result` JSON of every
+    entry. Kept in sync with `LeaderboardData` by `update_leaderboard_metrics`.
+    """
+
+    leaderboard_data = models.ForeignKey(
+        "LeaderboardData", related_name="metrics", on_delete=models.CASCADE
+    )
+    challenge_phase_split = models.ForeignKey("ChallengePhaseSplit")
+    metric = models.CharField(max_length=255)
+    value = models.FloatField()
+
+    def __str__(self):
+        return "{0} : {1} = {2}".format(
+            self.leaderboard_data_id, self.metric, self.value
+        )
+
+    class Meta:
+        app_label = "challenges"
+        db_table = "leaderboard_metric"
+        unique_together = ("leaderboard_data", "metric")
+        index_together = [("challenge_phase_split", "metric", "value")]
+
+
+def get_metric_value(value):
+    """
+    Returns the value of a metric of a leaderboard entry as a float, or None
+    if it isn't a finite number. Numeric strings are converted as well.
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def get_leaderboard_metrics(leaderboard_data):
+    """
+    Returns the `LeaderboardMetric` objects of the numeric metrics of a
+    leaderboard entry which are labels of its leaderboard schema
+    """
+    schema = leaderboard_data.leaderboard.schema
+    result = leaderboard_data.result
+    if not isinstance(schema, dict) or not isinstance(result, dict):
+        return []
+    metrics = []
+    for label in schema.get("labels", []):
+        value = get_metric_value(result.get(label))
+        if value is not None:
+            metrics.append(
+                LeaderboardMetric(
+                    leaderboard_data_id=leaderboard_data.pk,
+                    challenge_phase_split_id=(
+                        leaderboard_data.challenge_phase_split_id
+                    ),
+                    metric=label,
+                    value=value,
+                )
+            )
+    return metrics
+
+
+def update_leaderboard_metrics(leaderboard_data_list):
+    """
+    Replaces the typed metrics of leaderboard entries, e.g. after they were
+    bulk created, which does not send the `post_save` signal
+
+    Arguments:
+        leaderboard_data_list {[list]} -- Saved LeaderboardData objects
+    """
+    leaderboard_data_list = list(leaderboard_data_list)
+    LeaderboardMetric.objects.filter(
+        leaderboard_data__in=[
+            leaderboard_data.pk for leaderboard_data in leaderboard_data_list
+        ]
+    ).delete()
+    LeaderboardMetric.objects.bulk_create(
+        [
+            metric
+            for leaderboard_data in leaderboard_data_list
+            for metric in get_leaderboard_metrics(leaderboard_data)
+        ]
+    )
+
+
+@receiver(signals.post_save, sender="challenges.LeaderboardData")
+def update_leaderboard_data_metrics(sender, instance, **kwargs):
+    update_leaderboard_metrics([instance])
+
+
+@receiver(signals.post_save, sender="challenges.Leaderboard")
+def update_leaderboard_schema_metrics(sender, instance, created, **kwargs):
+    """
+    Rebuilds the typed metrics of the entries of a leaderboard when its
+    schema changes, e.g. when labels are added or renamed
+    """
+    if created or not is_model_field_changed(instance, "schema"):
+        return
+    batch = []
+    for leaderboard_data in LeaderboardData.objects.filter(
+        leaderboard=instance
+    ).iterator():
+        leaderboard_data.leaderboard = instance
+        batch.append(leaderboard_data)
+        if len(batch) >= LEADERBOARD_METRICS_BATCH_SIZE:
+            update_leaderboard_metrics(batch)
+            batch = []
+    update_leaderboard_metrics(batch)
+    instance._original_schema = copy.deepcopy(instance.schema)
+
+
 class ChallengeConfiguration(TimeStampedModel):
     """
     Model to store zip file for challenge creation.
     """
 
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    FINISHED = "finished"
+    FAILED = "failed"
+
+    STATUS_OPTIONS = (
+        (QUEUED, QUEUED),
+        (PROCESSING, PROCESSING),
+        (FINISHED, FINISHED),
+        (FAILED, FAILED),
+    )
+
     user = models.ForeignKey(User)
     challenge = models.OneToOneField(Challenge, null=True, blank=True)
     zip_configuration = models.FileField(
@@ -446,6 +634,15 @@ class ChallengeConfiguration(TimeStampedModel):
         null=True,
         blank=True,
     )
+    # Status of the challenge creation, which runs in a celery task
+    status = models.CharField(
+        max_length=30, choices=STATUS_OPTIONS, default=QUEUED, db_index=True
+    )
+    # Percentage of the challenge creation done
+    progress = models.PositiveSmallIntegerField(default=0)
+    error_message = models.TextField(blank=True, default="")
+    # SHA-256 checksum of the extracted files of the zip file
+    checksum = models.CharField(max_length=64, blank=True, default="")
 
     class Meta:
         app_label = "challenges"
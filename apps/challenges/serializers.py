@@ -95,6 +95,8 @@ class ChallengePhaseSerializer(serializers.ModelSerializer):
             "is_restricted_to_select_one_submission",
             "submission_meta_attributes",
             "is_partial_submission_evaluation_enabled",
+            "is_result_cache_enabled",
+            "is_sharded_evaluation_enabled",
         )
 
 
@@ -171,6 +173,16 @@ class ChallengeConfigSerializer(serializers.ModelSerializer):
         fields = ("zip_configuration", "user")
 
 
+class ChallengeConfigStatusSerializer(serializers.ModelSerializer):
+    """
+    Serialize the status of the challenge creation of a ChallengeConfiguration.
+    """
+
+    class Meta:
+        model = ChallengeConfiguration
+        fields = ("id", "challenge", "status", "progress", "error_message")
+
+
 class LeaderboardSerializer(serializers.ModelSerializer):
     """
     Serialize the Leaderboard Model.
@@ -324,6 +336,8 @@ class ChallengePhaseCreateSerializer(serializers.ModelSerializer):
             "is_restricted_to_select_one_submission",
             "submission_meta_attributes",
             "is_partial_submission_evaluation_enabled",
+            "is_result_cache_enabled",
+            "is_sharded_evaluation_enabled",
             "config_id",
         )
 
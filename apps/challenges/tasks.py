@@ -0,0 +1,41 @@
+from evalai.celery import app
+
+from hosts.models import ChallengeHostTeam
+
+from .autoscaler import run_autoscaler
+from .challenge_config_utils import create_challenge_from_configuration
+from .models import ChallengeConfiguration
+
+
+@app.task
+def autoscale_challenge_workers():
+    """
+    Periodic task scaling the challenge workers to their queue depth
+    """
+    run_autoscaler()
+
+
+@app.task
+def create_challenge_using_zip_configuration(
+    challenge_configuration_pk,
+    challenge_host_team_pk,
+    challenge_data_from_hosts=None,
+    github_repository=None,
+):
+    """
+    Creates the challenge of an uploaded challenge configuration zip file.
+    The status and progress of the creation are recorded on the
+    configuration.
+    """
+    challenge_configuration = ChallengeConfiguration.objects.get(
+        pk=challenge_configuration_pk
+    )
+    challenge_host_team = ChallengeHostTeam.objects.get(
+        pk=challenge_host_team_pk
+    )
+    create_challenge_from_configuration(
+        challenge_configuration,
+        challenge_host_team,
+        challenge_data_from_hosts=challenge_data_from_hosts,
+        github_repository=github_repository,
+    )
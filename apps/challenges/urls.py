@@ -74,6 +74,11 @@ urlpatterns = [
         views.create_challenge_using_zip_file,
         name="create_challenge_using_zip_file",
     ),
+    url(
+        r"^challenge/challenge_configuration/(?P<challenge_configuration_pk>[0-9]+)/status/$",
+        views.get_challenge_configuration_status,
+        name="get_challenge_configuration_status",
+    ),
     url(
         r"^(?P<challenge_pk>[0-9]+)/challenge_phase/(?P<challenge_phase_pk>[0-9]+)/submissions$",
         views.get_all_submissions_of_challenge,
@@ -146,6 +151,11 @@ urlpatterns = [
         views.get_challenge_by_queue_name,
         name="get_challenge_by_queue_name",
     ),
+    url(
+        r"^challenge/queues/(?P<queue_name>[\w-]+)/worker_bundle/$",
+        views.get_worker_bundle_by_queue_name,
+        name="get_worker_bundle_by_queue_name",
+    ),
     url(
         r"^(?P<challenge_pk>[0-9]+)/phases/$",
         views.get_challenge_phases_by_challenge_pk,
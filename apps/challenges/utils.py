@@ -1,3 +1,4 @@
+import hashlib
 import os
 import json
 import logging
@@ -326,3 +327,72 @@ def get_unique_alpha_numeric_key(length):
             for i in range(length)
         ]
     )
+
+
+def get_file_etag(file_name):
+    """
+    Returns an ETag for a file stored in a model FileField.
+
+    Uploaded files get a unique random name (see `base.utils.RandomFileName`),
+    so the stored name changes whenever the file content is replaced.
+
+    Arguments:
+        file_name {str} -- Name of the file in the storage
+    Returns:
+        str -- ETag of the file, or None if there is no file
+    """
+    if not file_name:
+        return None
+    return hashlib.sha1(str(file_name).encode("utf-8")).hexdigest()
+
+
+# Fields of a challenge used by the submission workers
+WORKER_BUNDLE_CHALLENGE_FIELDS = (
+    "title",
+    "queue",
+    "remote_evaluation",
+    "is_docker_based",
+)
+
+
+def get_worker_bundle_version(challenge):
+    """
+    Returns a version token of the metadata a submission worker needs to
+    evaluate the submissions of a challenge (see the
+    `get_worker_bundle_by_queue_name` view).
+
+    The token changes whenever one of the `WORKER_BUNDLE_CHALLENGE_FIELDS` of
+    the challenge, or one of its phases, phase splits, dataset splits or
+    leaderboards is modified. Other changes of the challenge, e.g. the
+    scaling of its workers, keep the token, so that the workers don't reload
+    the challenge for nothing.
+
+    Arguments:
+        challenge {Challenge} -- Challenge object
+    Returns:
+        str -- Version token
+    """
+    phases = ChallengePhase.objects.filter(challenge=challenge).values_list(
+        "pk", "modified_at", "test_annotation"
+    )
+    phase_splits = ChallengePhaseSplit.objects.filter(
+        challenge_phase__challenge=challenge
+    ).values_list(
+        "pk",
+        "modified_at",
+        "dataset_split__modified_at",
+        "leaderboard__modified_at",
+    )
+    version_data = [
+        challenge.pk,
+        [
+            getattr(challenge, field_name)
+            for field_name in WORKER_BUNDLE_CHALLENGE_FIELDS
+        ],
+        challenge.evaluation_script.name,
+        sorted(phases),
+        sorted(phase_splits),
+    ]
+    return hashlib.sha1(
+        json.dumps(version_data, default=str).encode("utf-8")
+    ).hexdigest()
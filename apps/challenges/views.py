@@ -2,23 +2,18 @@ import csv
 import json
 import logging
 import os
-import random
-import requests
 import shutil
 import tempfile
-import time
 import uuid
-import yaml
 import zipfile
 
-from os.path import basename, isfile, join
+from botocore.exceptions import ClientError
+from os.path import join
 
 from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.db import transaction
 from django.http import HttpResponse
 from django.utils import timezone
 
@@ -29,6 +24,7 @@ from rest_framework.decorators import (
     permission_classes,
     throttle_classes,
 )
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework_expiring_authtoken.authentication import (
     ExpiringTokenAuthentication,
@@ -37,18 +33,15 @@ from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
-from yaml.scanner import ScannerError
-
 from allauth.account.models import EmailAddress
 from accounts.permissions import HasVerifiedEmail
 from accounts.serializers import UserDetailsSerializer
+from base.db_router import use_read_replica
 from base.utils import (
-    get_queue_name,
-    get_slug,
     get_url_from_hostname,
     paginated_queryset,
     send_email,
-    send_slack_notification,
+    timed_serialization,
 )
 from challenges.utils import (
     generate_presigned_url,
@@ -63,8 +56,11 @@ from challenges.utils import (
     is_user_in_blocked_email_domains,
 )
 from challenges.challenge_config_utils import (
-    download_and_write_file,
+    TEMPLATE_CHALLENGE_FIELDS,
     extract_zip_file,
+    get_directory_checksum,
+    get_yaml_files_from_challenge_config,
+    sync_challenge_from_config,
     validate_challenge_config_util,
 )
 from hosts.models import ChallengeHost, ChallengeHostTeam
@@ -73,12 +69,14 @@ from hosts.utils import (
     is_user_a_host_of_challenge,
     get_challenge_host_team_model,
 )
+from jobs.events import publish_leaderboard_changed
 from jobs.filters import SubmissionFilter
 from jobs.models import Submission
 from jobs.serializers import (
     SubmissionSerializer,
     ChallengeSubmissionManagementSerializer,
 )
+from jobs.utils import is_artifact_url_generation_deferred
 from participants.models import Participant, ParticipantTeam
 from participants.serializers import ParticipantTeamDetailSerializer
 from participants.utils import (
@@ -101,6 +99,7 @@ from .models import (
 from .permissions import IsChallengeCreator
 from .serializers import (
     ChallengeConfigSerializer,
+    ChallengeConfigStatusSerializer,
     ChallengeEvaluationClusterSerializer,
     ChallengePhaseSerializer,
     ChallengePhaseCreateSerializer,
@@ -115,16 +114,17 @@ from .serializers import (
     ZipChallengePhaseSplitSerializer,
 )
 
+from .tasks import create_challenge_using_zip_configuration
 from .aws_utils import (
     start_workers,
     stop_workers,
     restart_workers,
-    get_logs_from_cloudwatch,
+    tail_logs_from_cloudwatch,
 )
 from .utils import (
     get_aws_credentials_for_submission,
-    get_file_content,
-    get_missing_keys_from_dict,
+    get_file_etag,
+    get_worker_bundle_version,
 )
 
 logger = logging.getLogger(__name__)
@@ -393,6 +393,7 @@ def disable_challenge(request, challenge_pk):
 
 @api_view(["GET"])
 @throttle_classes([AnonRateThrottle])
+@use_read_replica
 def get_all_challenges(request, challenge_time):
     """
     Returns the list of all challenges
@@ -428,6 +429,7 @@ def get_all_challenges(request, challenge_time):
 
 @api_view(["GET"])
 @throttle_classes([AnonRateThrottle])
+@use_read_replica
 def get_featured_challenges(request):
     """
     Returns the list of featured challenges
@@ -667,6 +669,7 @@ def challenge_phase_detail(request, challenge_pk, pk):
 
 @api_view(["GET"])
 @throttle_classes([AnonRateThrottle])
+@use_read_replica
 def challenge_phase_split_list(request, challenge_pk):
     """
     Returns the list of Challenge Phase Splits for a particular challenge
@@ -696,6 +699,26 @@ def challenge_phase_split_list(request, challenge_pk):
     return Response(response_data, status=status.HTTP_200_OK)
 
 
+def get_zip_configuration_error(zip_file):
+    """
+    Returns the error of a challenge configuration zip file which can be
+    found without extracting it, None if there isn't any.
+    """
+    try:
+        zip_ref = zipfile.ZipFile(zip_file, "r")
+    except zipfile.BadZipfile:
+        return "The zip file contents cannot be extracted. Please check the format!"
+    yaml_file_count, _, _ = get_yaml_files_from_challenge_config(zip_ref)
+    zip_ref.close()
+    if not yaml_file_count:
+        return "There is no YAML file in zip file you uploaded!"
+    if yaml_file_count > 1:
+        return "There are {0} YAML files instead of one in zip folder!".format(
+            yaml_file_count
+        )
+    return None
+
+
 @api_view(["POST"])
 @throttle_classes([UserRateThrottle])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
@@ -703,18 +726,15 @@ def challenge_phase_split_list(request, challenge_pk):
 def create_challenge_using_zip_file(request, challenge_host_team_pk):
     """
     Creates a challenge using a zip file.
+
+    The zip file is checked and stored, and the challenge is created by a
+    celery task. The status of the creation is returned by
+    `get_challenge_configuration_status`.
     """
     challenge_host_team = get_challenge_host_team_model(challenge_host_team_pk)
 
+    challenge_data_from_hosts = None
     if request.data.get("is_challenge_template"):
-        is_challenge_template = True
-    else:
-        is_challenge_template = False
-
-    # All files download and extract location.
-    BASE_LOCATION = tempfile.mkdtemp()
-
-    if is_challenge_template:
         template_id = int(request.data.get("template_id"))
         try:
             challenge_template = ChallengeTemplate.objects.get(
@@ -728,683 +748,86 @@ def create_challenge_using_zip_file(request, challenge_host_team_pk):
                 response_data, status=status.HTTP_406_NOT_ACCEPTABLE
             )
 
-        if settings.DEBUG:
-            template_zip_s3_url = settings.API_HOST_URL + challenge_template.template_file.url
-        else:
-            template_zip_s3_url = challenge_template.template_file.url
-
-        unique_folder_name = get_unique_alpha_numeric_key(10)
-        challenge_template_download_location = join(
-            BASE_LOCATION, "{}.zip".format(unique_folder_name)
-        )
-
         try:
-            response = requests.get(template_zip_s3_url, stream=True)
-        except Exception as e:
-            logger.error(
-                "Failed to fetch file from {}, error {}".format(
-                    template_zip_s3_url, e
-                )
+            challenge_phases_from_hosts = json.loads(
+                request.data.get("challenge_phases")
             )
+        except (TypeError, ValueError):
             response_data = {
-                "error": "Sorry, there was an error in the server"
+                "error": "Please add the challenge phases of the challenge template"
             }
             return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
-
-        if response and response.status_code == status.HTTP_200_OK:
-            with open(challenge_template_download_location, "wb") as f:
-                f.write(response.content)
-
-        try:
-            zip_file = open(challenge_template_download_location, "rb")
-        except Exception:
-            message = (
-                "A server error occured while processing zip file. "
-                "Please try again!"
-            )
-            response_data = {"error": message}
-            logger.exception(message)
-            return Response(
-                response_data, status=status.HTTP_406_NOT_ACCEPTABLE
+        challenge_data_from_hosts = {
+            field: request.data.get(field)
+            for field in TEMPLATE_CHALLENGE_FIELDS
+        }
+        challenge_data_from_hosts[
+            "challenge_phases"
+        ] = challenge_phases_from_hosts
+
+        # A copy of the template file, so that the configuration can be
+        # deleted without affecting the template
+        challenge_configuration = ChallengeConfiguration(user=request.user)
+        template_file = challenge_template.template_file
+        with template_file.storage.open(template_file.name, "rb") as zip_file:
+            challenge_configuration.zip_configuration.save(
+                os.path.basename(template_file.name), zip_file
             )
-
-        challenge_zip_file = SimpleUploadedFile(
-            zip_file.name, zip_file.read(), content_type="application/zip"
-        )
-
-        # Copy request data so that we can mutate it to add template
-        challenge_data_from_hosts = request.data.copy()
-        challenge_data_from_hosts["zip_configuration"] = challenge_zip_file
-        serializer = ChallengeConfigSerializer(
-            data=challenge_data_from_hosts, context={"request": request}
-        )
     else:
-        data = request.data.copy()
         serializer = ChallengeConfigSerializer(
-            data=data, context={"request": request}
+            data=request.data.copy(), context={"request": request}
         )
-
-    if serializer.is_valid():
-        uploaded_zip_file = serializer.save()
-        uploaded_zip_file_path = serializer.data["zip_configuration"]
-    else:
-        response_data = serializer.errors
-        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
-
-    try:
-        response = requests.get(uploaded_zip_file_path, stream=True)
-        unique_folder_name = get_unique_alpha_numeric_key(10)
-        CHALLENGE_ZIP_DOWNLOAD_LOCATION = join(
-            BASE_LOCATION, "{}.zip".format(unique_folder_name)
-        )
-        try:
-            if response and response.status_code == 200:
-                with open(CHALLENGE_ZIP_DOWNLOAD_LOCATION, "wb") as zip_file:
-                    zip_file.write(response.content)
-        except IOError:
-            message = (
-                "Unable to process the uploaded zip file. " "Please try again!"
-            )
-            response_data = {"error": message}
-            logger.exception(message)
+        if not serializer.is_valid():
+            response_data = serializer.errors
             return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
-    except requests.exceptions.RequestException:
-        message = (
-            "A server error occured while processing zip file. "
-            "Please try again!"
+        # Check the uploaded file before it is stored
+        error = get_zip_configuration_error(
+            request.FILES["zip_configuration"]
         )
-        response_data = {"error": message}
-        logger.exception(message)
-        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
-
-    # Extract zip file
-    try:
-        zip_ref = zipfile.ZipFile(CHALLENGE_ZIP_DOWNLOAD_LOCATION, "r")
-        zip_ref.extractall(join(BASE_LOCATION, unique_folder_name))
-        zip_ref.close()
-    except zipfile.BadZipfile:
-        message = (
-            "The zip file contents cannot be extracted. "
-            "Please check the format!"
-        )
-        response_data = {"error": message}
-        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
-
-    # Search for yaml file
-    yaml_file_count = 0
-    for name in zip_ref.namelist():
-        if (name.endswith(".yaml") or name.endswith(".yml")) and (
-            not name.startswith("__MACOSX")
-        ):  # Ignore YAML File in __MACOSX Directory
-            yaml_file = name
-            extracted_folder_name = yaml_file.split(basename(yaml_file))[0]
-            yaml_file_count += 1
-
-    if not yaml_file_count:
-        message = "There is no YAML file in zip file you uploaded!"
-        response_data = {"error": message}
-        logger.info(message)
-        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
-
-    if yaml_file_count > 1:
-        message = "There are {0} YAML files instead of one in zip folder!".format(
-            yaml_file_count
-        )
-        response_data = {"error": message}
-        logger.info(message)
-        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
-
-    try:
-        with open(
-            join(BASE_LOCATION, unique_folder_name, yaml_file), "r"
-        ) as stream:
-            yaml_file_data = yaml.safe_load(stream)
-    except (yaml.YAMLError, ScannerError) as exc:
-        # To get the problem description
-        if hasattr(exc, "problem"):
-            error_description = exc.problem
-            # To capitalize the first alphabet of the problem description as default is in lowercase
-            error_description = error_description[0:].capitalize()
-        # To get the error line and column number
-        if hasattr(exc, "problem_mark"):
-            mark = exc.problem_mark
-            line_number = mark.line + 1
-            column_number = mark.column + 1
-        message = "{} in line {}, column {}".format(
-            error_description, line_number, column_number
-        )
-        response_data = {"error": message}
-        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
-
-    # Check for evaluation script path in yaml file.
-    try:
-        evaluation_script = yaml_file_data["evaluation_script"]
-        evaluation_script_path = join(
-            BASE_LOCATION,
-            unique_folder_name,
-            extracted_folder_name,
-            evaluation_script,
-        )
-    except KeyError:
-        message = (
-            "There is no key for evaluation script in YAML file. "
-            "Please add it and then try again!"
-        )
-        response_data = {"error": message}
-        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
-
-    # Check for evaluation script file in extracted zip folder.
-    if isfile(evaluation_script_path):
-        with open(evaluation_script_path, "rb") as challenge_evaluation_script:
-            challenge_evaluation_script_file = ContentFile(
-                challenge_evaluation_script.read(), evaluation_script_path
-            )
-    else:
-        message = (
-            "No evaluation script is present in the zip file. "
-            "Please add it and then try again!"
-        )
-        response_data = {"error": message}
-        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
-
-    # Check for test annotation file path in yaml file.
-    try:
-        challenge_phases_data = yaml_file_data["challenge_phases"]
-    except KeyError:
-        message = (
-            "No challenge phase key found. "
-            "Please add challenge phases in YAML file and try again!"
-        )
-        response_data = {"error": message}
-        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
-
-    for data in challenge_phases_data:
-        test_annotation_file = data.get("test_annotation_file")
-        if test_annotation_file:
-            test_annotation_file_path = join(
-                BASE_LOCATION,
-                unique_folder_name,
-                extracted_folder_name,
-                test_annotation_file,
-            )
-            if not isfile(test_annotation_file_path):
-                message = (
-                    "No test annotation file found in zip file"
-                    " for challenge phase '{}'. Please add it and "
-                    " then try again!".format(data["name"])
-                )
-                response_data = {"error": message}
-                return Response(
-                    response_data, status=status.HTTP_406_NOT_ACCEPTABLE
-                )
-
-        if data.get("is_submission_public") and data.get(
-            "is_restricted_to_select_one_submission"
-        ):
-            message = (
-                "is_submission_public can't be 'True' for for challenge phase '{}'"
-                " with is_restricted_to_select_one_submission 'True'. "
-                " Please change is_submission_public to 'False'"
-                " then try again!".format(data["name"])
-            )
-            response_data = {"error": message}
+        if error:
+            response_data = {"error": error}
             return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+        challenge_configuration = serializer.save()
 
-        # To ensure that the schema for submission meta attributes is valid.
-        if data.get("submission_meta_attributes"):
-            for attribute in data["submission_meta_attributes"]:
-                keys = ["name", "description", "type"]
-                missing_keys = get_missing_keys_from_dict(attribute, keys)
-
-                if len(missing_keys) == 0:
-                    valid_attribute_types = [
-                        "boolean",
-                        "text",
-                        "radio",
-                        "checkbox",
-                    ]
-                    attribute_type = attribute["type"]
-                    if attribute_type in valid_attribute_types:
-                        if (
-                            attribute_type == "radio"
-                            or attribute_type == "checkbox"
-                        ):
-                            options = attribute.get("options")
-                            if not options or not len(options):
-                                message = "Please include at least one option in attribute for challenge_phase {}".format(
-                                    data["id"]
-                                )
-                                response_data = {"error": message}
-                                return Response(
-                                    response_data,
-                                    status=status.HTTP_406_NOT_ACCEPTABLE,
-                                )
-                else:
-                    missing_keys_string = ", ".join(missing_keys)
-                    message = "Please enter the following to the submission meta attribute in phase {}: {}.".format(
-                        data["id"], missing_keys_string
-                    )
-                    response_data = {"error": message}
-                    return Response(
-                        response_data, status=status.HTTP_406_NOT_ACCEPTABLE
-                    )
-
-    # Check for challenge image in yaml file.
-    image = yaml_file_data.get("image")
-    if image and (
-        image.endswith(".jpg")
-        or image.endswith(".jpeg")
-        or image.endswith(".png")
-    ):
-        challenge_image_path = join(
-            BASE_LOCATION, unique_folder_name, extracted_folder_name, image
-        )
-        if isfile(challenge_image_path):
-            challenge_image_file = ContentFile(
-                get_file_content(challenge_image_path, "rb"), image
-            )
-        else:
-            challenge_image_file = None
-    else:
-        challenge_image_file = None
-
-    # check for challenge description file
-    try:
-        challenge_description_file_path = join(
-            BASE_LOCATION,
-            unique_folder_name,
-            extracted_folder_name,
-            yaml_file_data["description"],
-        )
-        if challenge_description_file_path.endswith(".html") and isfile(
-            challenge_description_file_path
-        ):
-            yaml_file_data["description"] = get_file_content(
-                challenge_description_file_path, "rb"
-            ).decode("utf-8")
-        else:
-            yaml_file_data["description"] = None
-    except KeyError:
-        message = (
-            "There is no key for description. "
-            "Please add it and then try again!"
-        )
-        response_data = {"error": message}
-        return Response(response_data, status.HTTP_406_NOT_ACCEPTABLE)
-
-    # check for evaluation details file
-    try:
-        challenge_evaluation_details_file_path = join(
-            BASE_LOCATION,
-            unique_folder_name,
-            extracted_folder_name,
-            yaml_file_data["evaluation_details"],
-        )
-
-        if challenge_evaluation_details_file_path.endswith(".html") and isfile(
-            challenge_evaluation_details_file_path
-        ):
-            yaml_file_data["evaluation_details"] = get_file_content(
-                challenge_evaluation_details_file_path, "rb"
-            ).decode("utf-8")
-        else:
-            yaml_file_data["evaluation_details"] = None
-    except KeyError:
-        message = (
-            "There is no key for evalutaion details. "
-            "Please add it and then try again!"
-        )
-        response_data = {"error": message}
-        return Response(response_data, status.HTTP_406_NOT_ACCEPTABLE)
-
-    # check for terms and conditions file
-    try:
-        challenge_terms_and_cond_file_path = join(
-            BASE_LOCATION,
-            unique_folder_name,
-            extracted_folder_name,
-            yaml_file_data["terms_and_conditions"],
-        )
-        if challenge_terms_and_cond_file_path.endswith(".html") and isfile(
-            challenge_terms_and_cond_file_path
-        ):
-            yaml_file_data["terms_and_conditions"] = get_file_content(
-                challenge_terms_and_cond_file_path, "rb"
-            ).decode("utf-8")
-        else:
-            yaml_file_data["terms_and_conditions"] = None
-    except KeyError:
-        message = (
-            "There is no key for terms and conditions. "
-            "Please add it and then try again!"
-        )
-        response_data = {"error": message}
-        return Response(response_data, status.HTTP_406_NOT_ACCEPTABLE)
+    create_challenge_using_zip_configuration.delay(
+        challenge_configuration.pk,
+        challenge_host_team.pk,
+        challenge_data_from_hosts=challenge_data_from_hosts,
+    )
+    response_data = {
+        "success": "The challenge is being created. It will be sent for review to EvalAI Admin once it is created.",
+        "challenge_configuration": ChallengeConfigStatusSerializer(
+            challenge_configuration
+        ).data,
+    }
+    return Response(response_data, status=status.HTTP_201_CREATED)
 
-    # Check for submission guidelines file
-    try:
-        submission_guidelines_file_path = join(
-            BASE_LOCATION,
-            unique_folder_name,
-            extracted_folder_name,
-            yaml_file_data["submission_guidelines"],
-        )
-        if submission_guidelines_file_path.endswith(".html") and isfile(
-            submission_guidelines_file_path
-        ):
-            yaml_file_data["submission_guidelines"] = get_file_content(
-                submission_guidelines_file_path, "rb"
-            ).decode("utf-8")
-        else:
-            yaml_file_data["submission_guidelines"] = None
-    except KeyError:
-        message = (
-            "There is no key for submission guidelines. "
-            "Please add it and then try again!"
-        )
-        response_data = {"error": message}
-        return Response(response_data, status.HTTP_406_NOT_ACCEPTABLE)
 
-    # Check for leaderboard schema in YAML file
-    leaderboard_schema = yaml_file_data.get("leaderboard")
+@api_view(["GET"])
+@throttle_classes([UserRateThrottle])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((ExpiringTokenAuthentication,))
+def get_challenge_configuration_status(request, challenge_configuration_pk):
     """
-    Format of leaderboard data is:
-    [
-      {
-        'id': 1,
-        'schema': {
-          'default_order_by': 'bleu',
-          'labels': ['bleu']
-        }
-      }
-    ]
+    Returns the status and progress of the challenge creation from a
+    challenge configuration zip file uploaded by the user.
     """
-    if leaderboard_schema:
-        if "schema" not in leaderboard_schema[0]:
-            message = (
-                "There is no leaderboard schema in the YAML "
-                "configuration file. Please add it and then try again!"
-            )
-            response_data = {"error": message}
-            return Response(response_data, status.HTTP_406_NOT_ACCEPTABLE)
-        if "default_order_by" not in leaderboard_schema[0].get("schema"):
-            message = (
-                "There is no 'default_order_by' key in leaderboard "
-                "schema. Please add it and then try again!"
-            )
-            response_data = {"error": message}
-            return Response(response_data, status.HTTP_406_NOT_ACCEPTABLE)
-        if "labels" not in leaderboard_schema[0].get("schema"):
-            message = (
-                "There is no 'labels' key in leaderboard "
-                "schema. Please add it and then try again!"
-            )
-            response_data = {"error": message}
-            return Response(response_data, status.HTTP_406_NOT_ACCEPTABLE)
-    else:
-        message = (
-            "There is no key 'leaderboard' "
-            "in the YAML file. Please add it and then try again!"
-        )
-        response_data = {"error": message}
-        return Response(response_data, status.HTTP_406_NOT_ACCEPTABLE)
-
-    challenge_fields = [
-        "title",
-        "description",
-        "start_date",
-        "start_date",
-        "end_date",
-    ]
-    challenge_phase_fields = ["name", "start_date", "end_date"]
-    if is_challenge_template:
-        for field in challenge_fields:
-            yaml_file_data[field] = challenge_data_from_hosts.get(field)
-
-        # Mapping the challenge phase data to that in yaml_file_data
-        challenge_phases = yaml_file_data["challenge_phases"]
-        challenge_phases_from_hosts = challenge_data_from_hosts.get(
-            "challenge_phases"
-        )
-        challenge_phases_from_hosts = json.loads(challenge_phases_from_hosts)
-
-        for challenge_phase_data, challenge_phase_data_from_hosts in zip(
-            challenge_phases, challenge_phases_from_hosts
-        ):
-            for field in challenge_phase_fields:
-                challenge_phase_data[
-                    field
-                ] = challenge_phase_data_from_hosts.get(field)
-
     try:
-        with transaction.atomic():
-            serializer = ZipChallengeSerializer(
-                data=yaml_file_data,
-                context={
-                    "request": request,
-                    "challenge_host_team": challenge_host_team,
-                    "image": challenge_image_file,
-                    "evaluation_script": challenge_evaluation_script_file,
-                },
-            )
-            if serializer.is_valid():
-                serializer.save()
-                challenge = serializer.instance
-                queue_name = get_queue_name(challenge.title, challenge.pk)
-                challenge.queue = queue_name
-                challenge.save()
-            else:
-                response_data = serializer.errors
-                # transaction.set_rollback(True)
-                # return Response(response_data, status.HTTP_406_NOT_ACCEPTABLE)
-
-            # Create Leaderboard
-            yaml_file_data_of_leaderboard = yaml_file_data["leaderboard"]
-            leaderboard_ids = {}
-            for data in yaml_file_data_of_leaderboard:
-                serializer = LeaderboardSerializer(
-                    data=data, context={"config_id": data["id"]}
-                )
-                if serializer.is_valid():
-                    serializer.save()
-                    leaderboard_ids[str(data["id"])] = serializer.instance.pk
-                else:
-                    response_data = serializer.errors
-
-            # Create Challenge Phase
-            challenge_phase_ids = {}
-            for data in challenge_phases_data:
-                # Check for challenge phase description file
-                phase_description_file_path = join(
-                    BASE_LOCATION,
-                    unique_folder_name,
-                    extracted_folder_name,
-                    data["description"],
-                )
-                if phase_description_file_path.endswith(".html") and isfile(
-                    phase_description_file_path
-                ):
-                    data["description"] = get_file_content(
-                        phase_description_file_path, "rb"
-                    ).decode("utf-8")
-                else:
-                    data["description"] = None
-
-                data["slug"] = "{}-{}-{}".format(
-                    challenge.title.split(" ")[0].lower(),
-                    data["codename"].replace(" ", "-").lower(),
-                    challenge.pk,
-                )[:198]
-                test_annotation_file = data.get("test_annotation_file")
-                if test_annotation_file:
-                    test_annotation_file_path = join(
-                        BASE_LOCATION,
-                        unique_folder_name,
-                        extracted_folder_name,
-                        test_annotation_file,
-                    )
-                    if isfile(test_annotation_file_path):
-                        with open(
-                            test_annotation_file_path, "rb"
-                        ) as test_annotation_file:
-                            challenge_test_annotation_file = ContentFile(
-                                test_annotation_file.read(),
-                                test_annotation_file_path,
-                            )
-                if data.get("max_submissions_per_month", None) is None:
-                    data["max_submissions_per_month"] = data.get(
-                        "max_submissions", None
-                    )
-
-                if test_annotation_file:
-                    serializer = ChallengePhaseCreateSerializer(
-                        data=data,
-                        context={
-                            "challenge": challenge,
-                            "test_annotation": challenge_test_annotation_file,
-                            "config_id": data["id"],
-                        },
-                    )
-                else:
-                    # This is when the host wants to upload the annotation file later through CLI
-                    serializer = ChallengePhaseCreateSerializer(
-                        data=data,
-                        context={
-                            "challenge": challenge,
-                            "config_id": data["id"],
-                        },
-                    )
-                if serializer.is_valid():
-                    serializer.save()
-                    challenge_phase_ids[
-                        str(data["id"])
-                    ] = serializer.instance.pk
-                else:
-                    response_data = serializer.errors
-
-            # Create Dataset Splits
-            yaml_file_data_of_dataset_split = yaml_file_data["dataset_splits"]
-            dataset_split_ids = {}
-            for data in yaml_file_data_of_dataset_split:
-                serializer = DatasetSplitSerializer(
-                    data=data, context={"config_id": data["id"]}
-                )
-                if serializer.is_valid():
-                    serializer.save()
-                    dataset_split_ids[str(data["id"])] = serializer.instance.pk
-                else:
-                    # Return error when dataset split name is not unique.
-                    response_data = serializer.errors
-
-            # Create Challenge Phase Splits
-            try:
-                challenge_phase_splits_data = yaml_file_data[
-                    "challenge_phase_splits"
-                ]
-            except KeyError:
-                message = (
-                    "There is no key for challenge phase splits. "
-                    "Please add it and then try again!"
-                )
-                response_data = {"error": message}
-                return Response(response_data, status.HTTP_406_NOT_ACCEPTABLE)
-
-            for data in challenge_phase_splits_data:
-                challenge_phase = challenge_phase_ids[
-                    str(data["challenge_phase_id"])
-                ]
-                leaderboard = leaderboard_ids[str(data["leaderboard_id"])]
-                dataset_split = dataset_split_ids[
-                    str(data["dataset_split_id"])
-                ]
-                visibility = data["visibility"]
-
-                data = {
-                    "challenge_phase": challenge_phase,
-                    "leaderboard": leaderboard,
-                    "dataset_split": dataset_split,
-                    "visibility": visibility,
-                }
-
-                serializer = ZipChallengePhaseSplitSerializer(data=data)
-                if serializer.is_valid():
-                    serializer.save()
-                else:
-                    response_data = serializer.errors
-
-        zip_config = ChallengeConfiguration.objects.get(
-            pk=uploaded_zip_file.pk
+        challenge_configuration = ChallengeConfiguration.objects.get(
+            pk=challenge_configuration_pk, user=request.user
         )
-        if zip_config:
-            if not challenge.is_docker_based:
-                # Add the Challenge Host as a test participant.
-                emails = challenge_host_team.get_all_challenge_host_email()
-                team_name = "Host_{}_Team".format(random.randint(1, 100000))
-                participant_host_team = ParticipantTeam(
-                    team_name=team_name,
-                    created_by=challenge_host_team.created_by,
-                )
-                participant_host_team.save()
-                for email in emails:
-                    user = User.objects.get(email=email)
-                    host = Participant(
-                        user=user,
-                        status=Participant.ACCEPTED,
-                        team=participant_host_team,
-                    )
-                    host.save()
-                challenge.participant_teams.add(participant_host_team)
-
-            zip_config.challenge = challenge
-            zip_config.save()
-
-            if not settings.DEBUG:
-                message = {
-                    "text": "A *new challenge* has been uploaded to EvalAI.",
-                    "fields": [
-                        {
-                            "title": "Email",
-                            "value": request.user.email,
-                            "short": False,
-                        },
-                        {
-                            "title": "Challenge title",
-                            "value": challenge.title,
-                            "short": False,
-                        },
-                    ],
-                }
-                send_slack_notification(message=message)
-
-            response_data = {
-                "success": "Challenge {} has been created successfully and"
-                " sent for review to EvalAI Admin.".format(challenge.title)
-            }
-            return Response(response_data, status=status.HTTP_201_CREATED)
+    except ChallengeConfiguration.DoesNotExist:
+        response_data = {
+            "error": "Challenge configuration {} does not exist".format(
+                challenge_configuration_pk
+            )
+        }
+        return Response(response_data, status=status.HTTP_404_NOT_FOUND)
 
-    except:  # noqa: E722
-        try:
-            if response_data:
-                response_data = {"error": response_data}
-                return Response(
-                    response_data, status=status.HTTP_406_NOT_ACCEPTABLE
-                )
-        except:  # noqa: E722
-            response_data = {
-                "error": "Error in creating challenge. Please check the yaml configuration!"
-            }
-            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
-        finally:
-            try:
-                shutil.rmtree(BASE_LOCATION)
-                logger.info("Zip folder is removed")
-            except:  # noqa: E722
-                logger.exception(
-                    "Zip folder for challenge {} is not removed from {} location".format(
-                        challenge.pk, BASE_LOCATION
-                    )
-                )
+    serializer = ChallengeConfigStatusSerializer(challenge_configuration)
+    response_data = serializer.data
+    return Response(response_data, status=status.HTTP_200_OK)
 
 
 @swagger_auto_schema(
@@ -1542,6 +965,7 @@ def create_challenge_using_zip_file(request, challenge_host_team_pk):
 @throttle_classes([UserRateThrottle])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def get_all_submissions_of_challenge(
     request, challenge_pk, challenge_phase_pk
 ):
@@ -1581,9 +1005,17 @@ def get_all_submissions_of_challenge(
             filtered_submissions.qs, request
         )
         serializer = ChallengeSubmissionManagementSerializer(
-            result_page, many=True, context={"request": request}
+            result_page,
+            many=True,
+            context={
+                "request": request,
+                "defer_artifact_urls": is_artifact_url_generation_deferred(
+                    request
+                ),
+            },
         )
-        response_data = serializer.data
+        with timed_serialization():
+            response_data = serializer.data
         return paginator.get_paginated_response(response_data)
 
     # To check for the user as a participant of the challenge from the request and challenge_pk.
@@ -1603,9 +1035,17 @@ def get_all_submissions_of_challenge(
         ).order_by("-submitted_at")
         paginator, result_page = paginated_queryset(submissions, request)
         serializer = SubmissionSerializer(
-            result_page, many=True, context={"request": request}
+            result_page,
+            many=True,
+            context={
+                "request": request,
+                "defer_artifact_urls": is_artifact_url_generation_deferred(
+                    request
+                ),
+            },
         )
-        response_data = serializer.data
+        with timed_serialization():
+            response_data = serializer.data
         return paginator.get_paginated_response(response_data)
 
     # when user is neither host not participant of the challenge.
@@ -1620,6 +1060,7 @@ def get_all_submissions_of_challenge(
 @throttle_classes([UserRateThrottle])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def download_all_submissions(
     request, challenge_pk, challenge_phase_pk, file_type
 ):
@@ -1995,6 +1436,8 @@ def get_or_update_challenge_phase_split(request, challenge_phase_split_pk):
         )
         if serializer.is_valid():
             serializer.save()
+            # e.g. the order or the visibility of the leaderboard changed
+            publish_leaderboard_changed([challenge_phase_split.pk])
             response_data = serializer.data
             return Response(response_data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -2368,6 +1811,95 @@ def get_challenge_phases_by_challenge_pk(request, challenge_pk):
     return Response(response_data, status=status.HTTP_200_OK)
 
 
+@api_view(["GET"])
+@throttle_classes([UserRateThrottle])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((ExpiringTokenAuthentication,))
+def get_worker_bundle_by_queue_name(request, queue_name):
+    """
+    API endpoint to fetch everything a submission worker needs to evaluate the
+    submissions of a challenge in a single request, i.e. the challenge, all
+    its phases with their annotation file URLs and ETags, and the phase splits
+    with their dataset split codenames and leaderboard schemas.
+
+    The bundle carries a version token, which is also sent as its ETag and in
+    every submission message, so that workers only fetch it again when it has
+    changed. Requests with a matching `If-None-Match` header get a 304.
+    Arguments:
+        queue_name -- Challenge queue name for which the bundle is fetched
+    Returns:
+        Response Object -- An object containing the worker bundle
+    """
+    try:
+        challenge = Challenge.objects.get(queue=queue_name)
+    except Challenge.DoesNotExist:
+        response_data = {
+            "error": "Challenge with queue name {} does not exist".format(
+                queue_name
+            )
+        }
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    if not is_user_a_host_of_challenge(request.user, challenge.pk):
+        response_data = {
+            "error": "Sorry, you are not authorized to access this challenge."
+        }
+        return Response(response_data, status=status.HTTP_401_UNAUTHORIZED)
+
+    version = get_worker_bundle_version(challenge)
+    etag = '"{}"'.format(version)
+    if request.META.get("HTTP_IF_NONE_MATCH") == etag:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response["ETag"] = etag
+        return response
+
+    challenge_phases = ChallengePhase.objects.filter(
+        challenge=challenge
+    ).order_by("pk")
+    phases_data = ChallengePhaseCreateSerializer(
+        challenge_phases, context={"request": request}, many=True
+    ).data
+    for phase, phase_data in zip(challenge_phases, phases_data):
+        phase_data["test_annotation_etag"] = get_file_etag(
+            phase.test_annotation.name
+        )
+
+    challenge_phase_splits = (
+        ChallengePhaseSplit.objects.filter(
+            challenge_phase__challenge=challenge
+        )
+        .select_related("dataset_split", "leaderboard")
+        .order_by("pk")
+    )
+    phase_splits_data = ZipChallengePhaseSplitSerializer(
+        challenge_phase_splits, many=True
+    ).data
+    leaderboards = {}
+    for phase_split, phase_split_data in zip(
+        challenge_phase_splits, phase_splits_data
+    ):
+        phase_split_data[
+            "dataset_split_codename"
+        ] = phase_split.dataset_split.codename
+        leaderboards[phase_split.leaderboard.pk] = phase_split.leaderboard.schema
+
+    response_data = {
+        "version": version,
+        "challenge": ZipChallengeSerializer(
+            challenge, context={"request": request}
+        ).data,
+        "evaluation_script_etag": get_file_etag(
+            challenge.evaluation_script.name
+        ),
+        "phases": phases_data,
+        "phase_splits": phase_splits_data,
+        "leaderboards": leaderboards,
+    }
+    response = Response(response_data, status=status.HTTP_200_OK)
+    response["ETag"] = etag
+    return response
+
+
 @api_view(["GET"])
 @throttle_classes([AnonRateThrottle])
 def get_challenge_phase_by_pk(request, pk):
@@ -2487,35 +2019,18 @@ def validate_challenge_config(request, challenge_host_team_pk):
 
     BASE_LOCATION = tempfile.mkdtemp()
     unique_folder_name = get_unique_alpha_numeric_key(10)
-    CHALLENGE_ZIP_DOWNLOAD_LOCATION = join(
-        BASE_LOCATION, "{}.zip".format(unique_folder_name)
-    )
-
     data = request.data
     challenge_config_serializer = ChallengeConfigSerializer(
         data=data, context={"request": request}
     )
-    if challenge_config_serializer.is_valid():
-        challenge_config_serializer.save()
-        uploaded_zip_file_path = challenge_config_serializer.data[
-            "zip_configuration"
-        ]
-    else:
+    if not challenge_config_serializer.is_valid():
         response_data["error"] = challenge_config_serializer.errors
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
-    is_success, error_description = download_and_write_file(
-        uploaded_zip_file_path, True, CHALLENGE_ZIP_DOWNLOAD_LOCATION, "wb"
-    )
-
-    if not is_success:
-        response_data["error"] = error_description
-        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
-
-    # Extract zip file
+    # Extract the uploaded zip file before it is stored
     try:
         zip_ref = extract_zip_file(
-            CHALLENGE_ZIP_DOWNLOAD_LOCATION,
+            request.FILES["zip_configuration"],
             "r",
             join(BASE_LOCATION, unique_folder_name),
         )
@@ -2523,6 +2038,7 @@ def validate_challenge_config(request, challenge_host_team_pk):
         message = "The zip file contents cannot be extracted. Please check the format!"
         response_data["error"] = message
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+    challenge_config_serializer.save()
 
     error_messages, yaml_file_data, files = validate_challenge_config_util(
         request,
@@ -2530,6 +2046,7 @@ def validate_challenge_config(request, challenge_host_team_pk):
         BASE_LOCATION,
         unique_folder_name,
         zip_ref,
+        github_repository=request.data.get("GITHUB_REPOSITORY"),
     )
 
     shutil.rmtree(BASE_LOCATION)
@@ -2555,23 +2072,30 @@ def get_worker_logs(request, challenge_pk):
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
     challenge = get_challenge_model(challenge_pk)
-    response_data = []
 
     log_group_name = "challenge-pk-{}-workers".format(challenge.pk)
     log_stream_prefix = challenge.queue
     pattern = ""  # Empty string to get all logs including container logs.
+    # Cursor returned by the previous request, to only fetch the new logs.
+    cursor = request.query_params.get("cursor")
 
-    # This is to specify the time window for fetching logs: 15 minutes before from current time.
-    timeframe = 15
-    current_time = int(round(time.time() * 1000))
-    start_time = current_time - (timeframe * 60000)
-    end_time = current_time
-
-    logs = get_logs_from_cloudwatch(
-        log_group_name, log_stream_prefix, start_time, end_time, pattern
-    )
+    try:
+        logs, cursor, truncated = tail_logs_from_cloudwatch(
+            log_group_name, log_stream_prefix, pattern, cursor
+        )
+    except ClientError as e:
+        logger.exception(e)
+        response_data = {
+            "error": "There is an error in displaying logs. Please find the full error traceback here {}".format(
+                e
+            )
+        }
+        return Response(
+            response_data, status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
 
-    response_data = {"logs": logs}
+    # More logs can be fetched right away with the cursor when truncated
+    response_data = {"logs": logs, "cursor": cursor, "truncated": truncated}
     return Response(response_data, status=status.HTTP_200_OK)
 
 
@@ -2697,429 +2221,131 @@ def get_annotation_file_presigned_url(request, challenge_phase_pk):
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
 @authentication_classes((ExpiringTokenAuthentication,))
 def create_or_update_github_challenge(request, challenge_host_team_pk):
+    """
+    Creates the challenge of a GitHub repository, or syncs it with the
+    pushed challenge config. A sync only updates the objects and files which
+    the config changes, and is skipped if no file of the config changed.
+    """
     try:
         challenge_host_team = get_challenge_host_team_model(challenge_host_team_pk)
     except ChallengeHostTeam.DoesNotExist:
         response_data = {"error": "ChallengeHostTeam does not exist"}
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
-    challenge_queryset = Challenge.objects.filter(
-        github_repository=request.data["GITHUB_REPOSITORY"]
-    )
+    github_repository = request.data["GITHUB_REPOSITORY"]
+    challenge = Challenge.objects.filter(
+        github_repository=github_repository
+    ).first()
+    challenge_configuration = None
 
-    if challenge_queryset:
-        challenge = challenge_queryset[0]
+    if challenge:
         if not is_user_a_host_of_challenge(request.user, challenge.pk):
             response_data = {
                 "error": "Sorry, you are not a host for this challenge. Please check your user access token"
             }
             return Response(response_data, status=status.HTTP_403_FORBIDDEN)
+        challenge_configuration = ChallengeConfiguration.objects.filter(
+            challenge=challenge
+        ).first()
 
     response_data = {}
 
     BASE_LOCATION = tempfile.mkdtemp()
     unique_folder_name = get_unique_alpha_numeric_key(10)
-    CHALLENGE_ZIP_DOWNLOAD_LOCATION = join(
-        BASE_LOCATION, "{}.zip".format(unique_folder_name)
-    )
-
     data = request.data
     challenge_config_serializer = ChallengeConfigSerializer(
-        data=data, context={"request": request}
+        challenge_configuration, data=data, context={"request": request}
     )
-    if challenge_config_serializer.is_valid():
-        uploaded_zip_file = challenge_config_serializer.save()
-        uploaded_zip_file_path = challenge_config_serializer.data[
-            "zip_configuration"
-        ]
-    else:
+    if not challenge_config_serializer.is_valid():
         response_data["error"] = challenge_config_serializer.errors
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
-    is_success, error_description = download_and_write_file(
-        uploaded_zip_file_path, True, CHALLENGE_ZIP_DOWNLOAD_LOCATION, "wb"
-    )
-
-    if not is_success:
-        response_data["error"] = error_description
-        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
-
-    # Extract zip file
+    # Extract the uploaded zip file before it is stored
     try:
         zip_ref = extract_zip_file(
-            CHALLENGE_ZIP_DOWNLOAD_LOCATION,
+            request.FILES["zip_configuration"],
             "r",
             join(BASE_LOCATION, unique_folder_name),
         )
     except zipfile.BadZipfile:
+        shutil.rmtree(BASE_LOCATION)
         message = "The zip file contents cannot be extracted. Please check the format!"
         response_data["error"] = message
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
+    checksum = get_directory_checksum(join(BASE_LOCATION, unique_folder_name))
+    if (
+        challenge_configuration
+        and challenge_configuration.checksum == checksum
+    ):
+        shutil.rmtree(BASE_LOCATION)
+        response_data = {
+            "Success": "The challenge {} is already up to date".format(
+                challenge.title
+            ),
+            "changes": {},
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
     error_messages, yaml_file_data, files = validate_challenge_config_util(
         request,
         challenge_host_team,
         BASE_LOCATION,
         unique_folder_name,
         zip_ref,
+        github_repository=github_repository,
     )
-
-    if not len(error_messages):
-        if not challenge_queryset:
-            try:
-                with transaction.atomic():
-                    serializer = ZipChallengeSerializer(
-                        data=yaml_file_data,
-                        context={
-                            "request": request,
-                            "challenge_host_team": challenge_host_team,
-                            "image": files["challenge_image_file"],
-                            "evaluation_script": files[
-                                "challenge_evaluation_script_file"
-                            ],
-                            "github_repository": request.data[
-                                "GITHUB_REPOSITORY"
-                            ],
-                        },
-                    )
-                    if serializer.is_valid():
-                        serializer.save()
-                    challenge = serializer.instance
-                    queue_name = get_queue_name(challenge.title, challenge.pk)
-                    challenge.queue = queue_name
-                    challenge.save()
-
-                    # Create Leaderboard
-                    yaml_file_data_of_leaderboard = yaml_file_data[
-                        "leaderboard"
-                    ]
-                    leaderboard_ids = {}
-                    for data in yaml_file_data_of_leaderboard:
-                        serializer = LeaderboardSerializer(
-                            data=data, context={"config_id": data["id"]}
-                        )
-                        if serializer.is_valid():
-                            serializer.save()
-                        leaderboard_ids[
-                            str(data["id"])
-                        ] = serializer.instance.pk
-
-                    # Create Challenge Phase
-                    challenge_phase_ids = {}
-                    challenge_phases_data = yaml_file_data["challenge_phases"]
-                    for data, challenge_test_annotation_file in zip(
-                        challenge_phases_data,
-                        files["challenge_test_annotation_files"],
-                    ):
-                        data["slug"] = "{}-{}-{}".format(
-                            challenge.title.split(" ")[0].lower(),
-                            get_slug(data["codename"]),
-                            challenge.pk,
-                        )[:198]
-
-                        if challenge_test_annotation_file:
-                            serializer = ChallengePhaseCreateSerializer(
-                                data=data,
-                                context={
-                                    "challenge": challenge,
-                                    "test_annotation": challenge_test_annotation_file,
-                                    "config_id": data["id"],
-                                },
-                            )
-                        else:
-                            # This is when the host wants to upload the annotation file later
-                            serializer = ChallengePhaseCreateSerializer(
-                                data=data,
-                                context={
-                                    "challenge": challenge,
-                                    "config_id": data["id"],
-                                },
-                            )
-                        if serializer.is_valid():
-                            serializer.save()
-                        challenge_phase_ids[
-                            str(data["id"])
-                        ] = serializer.instance.pk
-
-                    # Create Dataset Splits
-                    yaml_file_data_of_dataset_split = yaml_file_data[
-                        "dataset_splits"
-                    ]
-                    dataset_split_ids = {}
-                    for data in yaml_file_data_of_dataset_split:
-                        serializer = DatasetSplitSerializer(
-                            data=data, context={"config_id": data["id"]}
-                        )
-                        if serializer.is_valid():
-                            serializer.save()
-                        dataset_split_ids[
-                            str(data["id"])
-                        ] = serializer.instance.pk
-
-                    # Create Challenge Phase Splits
-                    challenge_phase_splits_data = yaml_file_data[
-                        "challenge_phase_splits"
-                    ]
-                    for data in challenge_phase_splits_data:
-                        challenge_phase = challenge_phase_ids[
-                            str(data["challenge_phase_id"])
-                        ]
-                        leaderboard = leaderboard_ids[
-                            str(data["leaderboard_id"])
-                        ]
-                        dataset_split = dataset_split_ids[
-                            str(data["dataset_split_id"])
-                        ]
-                        visibility = data["visibility"]
-
-                        data = {
-                            "challenge_phase": challenge_phase,
-                            "leaderboard": leaderboard,
-                            "dataset_split": dataset_split,
-                            "visibility": visibility,
-                        }
-
-                        serializer = ZipChallengePhaseSplitSerializer(
-                            data=data,
-                        )
-                        if serializer.is_valid():
-                            serializer.save()
-
-                zip_config = ChallengeConfiguration.objects.get(
-                    pk=uploaded_zip_file.pk
-                )
-                if zip_config:
-                    if not challenge.is_docker_based:
-                        # Add the Challenge Host as a test participant.
-                        emails = (
-                            challenge_host_team.get_all_challenge_host_email()
-                        )
-                        team_name = "Host_{}_Team".format(
-                            random.randint(1, 100000)
-                        )
-                        participant_host_team = ParticipantTeam(
-                            team_name=team_name,
-                            created_by=challenge_host_team.created_by,
-                        )
-                        participant_host_team.save()
-                        for email in emails:
-                            user = User.objects.get(email=email)
-                            host = Participant(
-                                user=user,
-                                status=Participant.ACCEPTED,
-                                team=participant_host_team,
-                            )
-                            host.save()
-                        challenge.participant_teams.add(participant_host_team)
-
-                    zip_config.challenge = challenge
-                    zip_config.save()
-
-                    if not settings.DEBUG:
-                        message = {
-                            "text": "A *new challenge* has been created on EvalAI.",
-                            "fields": [
-                                {
-                                    "title": "Email",
-                                    "value": request.user.email,
-                                    "short": False,
-                                },
-                                {
-                                    "title": "Challenge title",
-                                    "value": challenge.title,
-                                    "short": False,
-                                },
-                            ],
-                        }
-                        send_slack_notification(message=message)
-
-                    response_data = {
-                        "Success": "Challenge {} has been created successfully and"
-                        " sent for review to EvalAI Admin.".format(
-                            challenge.title
-                        )
-                    }
-                    return Response(
-                        response_data, status=status.HTTP_201_CREATED
-                    )
-
-            except:  # noqa: E722
-                response_data = {
-                    "error": "Error in creating challenge. Please check the yaml configuration!"
-                }
-                return Response(
-                    response_data, status=status.HTTP_400_BAD_REQUEST
-                )
-            finally:
-                try:
-                    shutil.rmtree(BASE_LOCATION)
-                    logger.info("Zip folder is removed")
-                except:  # noqa: E722
-                    logger.exception(
-                        "Zip folder for challenge {} is not removed from {} location".format(
-                            challenge.pk, BASE_LOCATION
-                        )
-                    )
-
-        else:
-            # Updating ChallengeConfiguration object
-            challenge_configuration = ChallengeConfiguration.objects.filter(
-                challenge=challenge.pk
-            ).first()
-            serializer = ChallengeConfigSerializer(
-                challenge_configuration,
-                data=request.data,
-                context={"request": request},
-            )
-            if serializer.is_valid():
-                serializer.save()
-
-            # Updating Challenge object
-            serializer = ZipChallengeSerializer(
-                challenge,
-                data=yaml_file_data,
-                context={
-                    "request": request,
-                    "challenge_host_team": challenge_host_team,
-                    "image": files["challenge_image_file"],
-                    "evaluation_script": files[
-                        "challenge_evaluation_script_file"
-                    ],
-                },
-            )
-            if serializer.is_valid():
-                serializer.save()
-            challenge = serializer.instance
-
-            # Updating Leaderboard object
-            leaderboard_ids = {}
-            yaml_file_data_of_leaderboard = yaml_file_data["leaderboard"]
-            for data in yaml_file_data_of_leaderboard:
-                challenge_phase_split_qs = ChallengePhaseSplit.objects.filter(
-                    challenge_phase__challenge__pk=challenge.pk,
-                    leaderboard__config_id=data["config_id"],
-                )
-                if challenge_phase_split_qs:
-                    challenge_phase_split = challenge_phase_split_qs.first()
-                    leaderboard = challenge_phase_split.leaderboard
-                    serializer = LeaderboardSerializer(
-                        leaderboard,
-                        data=data,
-                        context={"config_id": data["id"]},
-                    )
-                else:
-                    serializer = LeaderboardSerializer(
-                        data=data, context={"config_id": data["id"]}
-                    )
-                if serializer.is_valid():
-                    serializer.save()
-                    leaderboard_ids[str(data["id"])] = serializer.instance.pk
-
-            # Updating ChallengePhase objects
-            challenge_phase_ids = {}
-            challenge_phases_data = yaml_file_data["challenge_phases"]
-            for data, challenge_test_annotation_file in zip(
-                challenge_phases_data, files["challenge_test_annotation_files"]
-            ):
-                challenge_phase = ChallengePhase.objects.filter(
-                    challenge__pk=challenge.pk, config_id=data["id"]
-                ).first()
-                if challenge_test_annotation_file:
-                    serializer = ChallengePhaseCreateSerializer(
-                        challenge_phase,
-                        data=data,
-                        context={
-                            "challenge": challenge,
-                            "test_annotation": challenge_test_annotation_file,
-                            "config_id": data["config_id"],
-                        },
-                    )
-                else:
-                    serializer = ChallengePhaseCreateSerializer(
-                        challenge_phase,
-                        data=data,
-                        context={
-                            "challenge": challenge,
-                            "config_id": data["config_id"],
-                        },
-                    )
-                if serializer.is_valid():
-                    serializer.save()
-                    challenge_phase_ids[
-                        str(data["id"])
-                    ] = serializer.instance.pk
-
-            # Updating DatasetSplit objects
-            yaml_file_data_of_dataset_split = yaml_file_data["dataset_splits"]
-            dataset_split_ids = {}
-            for data in yaml_file_data_of_dataset_split:
-                challenge_phase_split_qs = ChallengePhaseSplit.objects.filter(
-                    challenge_phase__challenge__pk=challenge.pk,
-                    dataset_split__config_id=data["id"],
-                )
-                if challenge_phase_split_qs:
-                    challenge_phase_split = challenge_phase_split_qs.first()
-                    dataset_split = challenge_phase_split.dataset_split
-                    serializer = DatasetSplitSerializer(
-                        dataset_split,
-                        data=data,
-                        context={"config_id": data["id"]},
-                    )
-                else:
-                    serializer = DatasetSplitSerializer(
-                        data=data, context={"config_id": data["id"]}
-                    )
-                if serializer.is_valid():
-                    serializer.save()
-                    dataset_split_ids[str(data["id"])] = serializer.instance.pk
-
-            # Update ChallengePhaseSplit objects
-            challenge_phase_splits_data = yaml_file_data[
-                "challenge_phase_splits"
-            ]
-            for data in challenge_phase_splits_data:
-                challenge_phase = challenge_phase_ids[
-                    str(data["challenge_phase_id"])
-                ]
-                leaderboard = leaderboard_ids[str(data["leaderboard_id"])]
-                dataset_split = dataset_split_ids[
-                    str(data["dataset_split_id"])
-                ]
-                visibility = data["visibility"]
-
-                data = {
-                    "challenge_phase": challenge_phase,
-                    "leaderboard": leaderboard,
-                    "dataset_split": dataset_split,
-                    "visibility": visibility,
-                }
-
-                challenge_phase_split_qs = ChallengePhaseSplit.objects.filter(
-                    challenge_phase__pk=challenge_phase,
-                    dataset_split__pk=dataset_split,
-                )
-                if challenge_phase_split_qs:
-                    challenge_phase_split = challenge_phase_split_qs.first()
-                    serializer = ZipChallengePhaseSplitSerializer(
-                        challenge_phase_split, data=data,
-                    )
-                else:
-                    serializer = ZipChallengePhaseSplitSerializer(data=data)
-                if serializer.is_valid():
-                    serializer.save()
-
-            response_data = {
-                "Success": "The challenge {} has been updated successfully".format(
-                    challenge.title
-                )
-            }
-            return Response(response_data, status=status.HTTP_200_OK)
-    else:
-        shutil.rmtree(BASE_LOCATION)
+    shutil.rmtree(BASE_LOCATION)
+    if error_messages:
         logger.info("Challenge config validation failed. Zip folder removed")
         response_data["error"] = "\n".join(error_messages)
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
+    if not challenge:
+        uploaded_zip_file = challenge_config_serializer.save()
+        create_challenge_using_zip_configuration.delay(
+            uploaded_zip_file.pk,
+            challenge_host_team.pk,
+            github_repository=github_repository,
+        )
+        response_data = {
+            "Success": "Challenge {} is being created. It will be sent for review to EvalAI Admin once it is created.".format(
+                yaml_file_data["title"]
+            ),
+            "challenge_configuration": ChallengeConfigStatusSerializer(
+                uploaded_zip_file
+            ).data,
+        }
+        return Response(response_data, status=status.HTTP_201_CREATED)
+
+    try:
+        changes = sync_challenge_from_config(
+            request, challenge, challenge_host_team, yaml_file_data, files
+        )
+    except ValidationError as e:
+        response_data[
+            "error"
+        ] = "Challenge config has following schema errors:\n {}".format(
+            e.detail
+        )
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    # The stored config is only replaced once the challenge is synced
+    challenge_config_serializer.save(
+        challenge=challenge,
+        is_created=True,
+        status=ChallengeConfiguration.FINISHED,
+        progress=100,
+        checksum=checksum,
+    )
+    response_data = {
+        "Success": "The challenge {} has been updated successfully".format(
+            challenge.title
+        ),
+        "changes": changes,
+    }
+    return Response(response_data, status=status.HTTP_200_OK)
+
 
 @api_view(["GET"])
 @throttle_classes([UserRateThrottle])
@@ -5,8 +5,8 @@ from django.contrib import admin
 from base.admin import ImportExportTimeStampedAdmin
 
 from .models import Submission
-from .sender import publish_submission_message
-from .utils import handle_submission_rerun
+from .sender import publish_submission_messages
+from .utils import handle_submissions_rerun
 
 logger = logging.getLogger(__name__)
 
@@ -62,9 +62,8 @@ class SubmissionAdmin(ImportExportTimeStampedAdmin):
     get_challenge_name_and_id.admin_order_field = "challenge_phase__challenge"
 
     def submit_job_to_worker(self, request, queryset):
-        for submission in queryset:
-            message = handle_submission_rerun(submission, Submission.CANCELLED)
-            publish_submission_message(message)
+        messages = handle_submissions_rerun(queryset, Submission.CANCELLED)
+        publish_submission_messages(messages)
 
     submit_job_to_worker.short_description = "Re-run selected submissions (will set the status to canceled for existing submissions)"
 
@@ -0,0 +1,55 @@
+"""
+Live events of the submissions, streamed to the clients so that they only
+refetch submissions and leaderboards when they actually changed:
+    - `submission_status` events are published on the channel of the phase
+      of a submission whenever its status changes,
+    - `leaderboard_changed` events are published on the channel of a
+      challenge phase split whenever entries of its leaderboard change.
+"""
+from base.events import publish_event
+
+from .utils import invalidate_leaderboard_caches
+
+SUBMISSION_STATUS_EVENT = "submission_status"
+LEADERBOARD_CHANGED_EVENT = "leaderboard_changed"
+
+
+def get_submissions_channel(challenge_phase_pk):
+    return "challenge_phase.{}.submissions".format(challenge_phase_pk)
+
+
+def get_leaderboard_channel(challenge_phase_split_pk):
+    return "challenge_phase_split.{}.leaderboard".format(
+        challenge_phase_split_pk
+    )
+
+
+def publish_submission_status(submission):
+    """
+    Publishes the current status of a submission
+    """
+    publish_event(
+        get_submissions_channel(submission.challenge_phase_id),
+        SUBMISSION_STATUS_EVENT,
+        {
+            "submission_id": submission.pk,
+            "challenge_phase_id": submission.challenge_phase_id,
+            "participant_team_id": submission.participant_team_id,
+            "status": submission.status,
+        },
+    )
+
+
+def publish_leaderboard_changed(challenge_phase_split_pks):
+    """
+    Invalidates the cached data of the leaderboards of challenge phase
+    splits, e.g. the rank indexes, and notifies their subscribers that the
+    leaderboards changed
+    """
+    invalidate_leaderboard_caches(challenge_phase_split_pks)
+    for challenge_phase_split_pk in set(challenge_phase_split_pks):
+        publish_event(
+            get_leaderboard_channel(challenge_phase_split_pk),
+            LEADERBOARD_CHANGED_EVENT,
+            {"challenge_phase_split_id": challenge_phase_split_pk},
+        )
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0018_add_field_to_store_input_file_url_for_large_submissions")
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="submission",
+            name="submitted_image_uri",
+            field=models.CharField(blank=True, max_length=1000, null=True),
+        )
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("jobs", "0021_add_result_cache_fields_to_submission")]
+
+    operations = [
+        migrations.AddField(
+            model_name="submission",
+            name="evaluation_shards",
+            field=django.contrib.postgres.fields.jsonb.JSONField(
+                blank=True, default=dict
+            ),
+        )
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("jobs", "0022_add_evaluation_shards_to_submission")]
+
+    operations = [
+        migrations.AddField(
+            model_name="submission",
+            name="dispatched_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="is_rerun",
+            field=models.BooleanField(default=False),
+        ),
+    ]
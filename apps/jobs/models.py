@@ -13,7 +13,7 @@ from django.utils import timezone
 
 
 from base.models import TimeStampedModel
-from base.utils import RandomFileName
+from base.utils import RandomFileName, get_file_checksum
 from challenges.models import ChallengePhase
 from jobs.constants import submission_status_to_exclude
 from participants.models import ParticipantTeam
@@ -40,6 +40,14 @@ def save_file(sender, instance, created, **kwargs):
         instance.save()
 
 
+@receiver(pre_save, sender="jobs.Submission")
+def save_input_file_checksum(sender, instance, **kwargs):
+    # Only hash the uploaded files, which are not stored yet
+    input_file = instance.input_file
+    if input_file and not input_file._committed:
+        instance.input_file_checksum = get_file_checksum(input_file)
+
+
 class Submission(TimeStampedModel):
 
     SUBMITTED = "submitted"
@@ -87,6 +95,11 @@ class Submission(TimeStampedModel):
     )
     # Model to store large submission file (> 400 MB's) URLs submitted by the user
     input_file_url = models.URLField(max_length=1000, null=True, blank=True)
+    # Docker image URI submitted to a code upload challenge, stored so that
+    # re-runs don't have to download the input file again
+    submitted_image_uri = models.CharField(
+        max_length=1000, null=True, blank=True
+    )
     stdout_file = models.FileField(
         upload_to=RandomFileName("submission_files/submission_{id}"),
         null=True,
@@ -107,6 +120,27 @@ class Submission(TimeStampedModel):
         null=True,
         blank=True,
     )
+    # SHA-256 checksum of the input file, to reuse the results of identical
+    # submissions when the result cache of the phase is enabled
+    input_file_checksum = models.CharField(
+        max_length=64, blank=True, default=""
+    )
+    # Identifies the input file and the versions of the evaluation script
+    # and test annotation which produced the results of the submission
+    result_cache_key = models.CharField(
+        max_length=64, blank=True, default="", db_index=True
+    )
+    # Indexes of the chunks of the log artifacts of `stdout_file` and
+    # `stderr_file`, see `jobs.submission_logs`
+    log_indexes = JSONField(default=dict, blank=True)
+    # Status and results of the shards of the submissions of the phases with
+    # sharded evaluation, by challenge phase split pk
+    evaluation_shards = JSONField(default=dict, blank=True)
+    # Set once the submission is sent to the queue of the challenge. The
+    # submissions of the challenges with fair scheduling wait in the
+    # scheduler until then, see `jobs.scheduler`.
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    is_rerun = models.BooleanField(default=False)
     execution_time_limit = models.PositiveIntegerField(default=300)
     method_name = models.CharField(
         max_length=1000, default="", db_index=True, blank=True
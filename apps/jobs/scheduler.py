@@ -0,0 +1,509 @@
+"""
+Fair share scheduling of the submissions of the challenges with
+`is_fair_scheduling_enabled` set.
+
+The submissions of these challenges are not sent to the SQS queue of the
+challenge when they are made. They wait in the scheduler, i.e. they are
+submitted but not `dispatched_at` yet, and only enough of them are sent to
+the queue to keep its workers busy (`SUBMISSIONS_PER_WORKER` per worker), so
+that the order of the evaluations is decided here rather than by the FIFO
+queue:
+    - the submissions of the priority lane, i.e. the baselines, the
+      submissions of the hosts and the re-runs, are dispatched first, but
+      they only get `PRIORITY_SHARE` of the free slots while participants
+      are waiting,
+    - the other submissions are dispatched by deficit round-robin across
+      the participant teams: every team is credited `QUANTUM` seconds of
+      evaluation per round, and a submission costs the recent average
+      evaluation time of its phase. A team bursting many submissions
+      near a deadline only delays its own submissions.
+
+The state of the round-robin is stored on the challenge, and is only updated
+while the challenge row is locked. The submissions are dispatched whenever
+submissions are made or evaluated, and by the periodic
+`dispatch_pending_submissions` task. Dispatched submissions which are still
+submitted after `DISPATCH_TIMEOUT` seconds, e.g. because their message was
+deleted after a failure of a worker, are dispatched again, and running
+submissions stop holding a slot `RUNNING_TIMEOUT` seconds after their start,
+e.g. when their worker crashed.
+"""
+import json
+import logging
+import math
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from base.sqs import send_messages
+from base.utils import get_sqs_queue_name
+from challenges.models import Challenge
+from challenges.utils import get_worker_bundle_version
+from hosts.models import ChallengeHost
+
+from .models import Submission
+
+logger = logging.getLogger(__name__)
+
+# Number of finished submissions of a phase its evaluation time is averaged on
+EVALUATION_TIME_SAMPLE_SIZE = 20
+
+
+def deficit_round_robin(queues, slots, state, quantum):
+    """
+    Picks up to `slots` items from per team queues by deficit round-robin.
+
+    Arguments:
+        queues {list} -- (team, items) tuples ordered by team, with items
+                         being (item, cost) tuples in the order of the team
+        slots {int} -- Maximum number of items to pick
+        state {dict} -- State returned by the previous call, `{}` at first
+        quantum {float} -- Cost credited to every team per round
+    Returns:
+        list -- The picked items, in order
+        dict -- The new state: the `deficits` of the teams with waiting
+                items, the `team` whose turn is next and whether it is
+                `in_turn`, i.e. already credited for its turn
+    """
+    queues = [(team, items) for team, items in queues if items]
+    if not queues:
+        return [], {"deficits": {}, "team": None, "in_turn": False}
+    teams = [team for team, _ in queues]
+    deficits = {
+        team: state.get("deficits", {}).get(team, 0) for team in teams
+    }
+    positions = {team: 0 for team in teams}
+
+    # Resume the turn of the team which was served last, or start the turn
+    # of the next team
+    in_turn = False
+    index = 0
+    if state.get("team") is not None:
+        following = [
+            i for i, team in enumerate(teams) if team >= state["team"]
+        ]
+        if following:
+            index = following[0]
+            in_turn = teams[index] == state["team"] and state.get("in_turn")
+    quantum = max(quantum, 1)
+
+    picked = []
+    remaining = sum(len(items) for _, items in queues)
+    while slots > 0 and remaining > 0:
+        team, items = queues[index]
+        position = positions[team]
+        if position < len(items):
+            if not in_turn:
+                deficits[team] += quantum
+            while (
+                slots > 0
+                and position < len(items)
+                and items[position][1] <= deficits[team]
+            ):
+                item, cost = items[position]
+                picked.append(item)
+                deficits[team] -= cost
+                position += 1
+                slots -= 1
+                remaining -= 1
+            positions[team] = position
+            if position == len(items):
+                # Idle teams don't accumulate credit
+                deficits[team] = 0
+            elif slots == 0 and items[position][1] <= deficits[team]:
+                # The turn of the team goes on when slots free up
+                return picked, {
+                    "deficits": deficits,
+                    "team": team,
+                    "in_turn": True,
+                }
+        in_turn = False
+        index = (index + 1) % len(queues)
+    return picked, {
+        "deficits": deficits,
+        "team": queues[index][0],
+        "in_turn": False,
+    }
+
+
+def get_evaluation_times(challenge_phase_pks):
+    """
+    Returns a dict of challenge phase pk: average evaluation time of its
+    recent finished submissions, in seconds
+    """
+    config = settings.SUBMISSION_SCHEDULER
+    evaluation_times = {}
+    for challenge_phase_pk in challenge_phase_pks:
+        durations = [
+            (completed_at - started_at).total_seconds()
+            for started_at, completed_at in Submission.objects.filter(
+                challenge_phase=challenge_phase_pk,
+                status=Submission.FINISHED,
+                started_at__isnull=False,
+                completed_at__isnull=False,
+            )
+            .order_by("-completed_at")
+            .values_list("started_at", "completed_at")[
+                :EVALUATION_TIME_SAMPLE_SIZE
+            ]
+        ]
+        evaluation_times[challenge_phase_pk] = (
+            sum(durations) / len(durations)
+            if durations
+            else config["DEFAULT_EVALUATION_TIME"]
+        )
+    return evaluation_times
+
+
+def is_priority_submission(submission, host_user_pks):
+    return (
+        submission.is_baseline
+        or submission.is_rerun
+        or submission.created_by_id in host_user_pks
+    )
+
+
+def get_dispatch_order(challenge, submissions, slots=None):
+    """
+    Orders the submissions waiting in the scheduler of a challenge
+
+    Arguments:
+        challenge {[Class object]} -- Challenge model object
+        submissions {list} -- Waiting submissions, ordered by pk
+        slots {int} -- Number of submissions to dispatch, all by default
+    Returns:
+        list -- (submission, estimated evaluation time) tuples, in the
+                order of their dispatch
+        dict -- The new state of the round-robin
+    """
+    config = settings.SUBMISSION_SCHEDULER
+    if slots is None:
+        slots = len(submissions)
+    evaluation_times = get_evaluation_times(
+        {submission.challenge_phase_id for submission in submissions}
+    )
+    host_user_pks = set(
+        ChallengeHost.objects.filter(
+            team_name=challenge.creator_id
+        ).values_list("user", flat=True)
+    )
+    priority_lane = []
+    team_queues = {}
+    for submission in submissions:
+        entry = (
+            (submission, evaluation_times[submission.challenge_phase_id]),
+            evaluation_times[submission.challenge_phase_id],
+        )
+        if is_priority_submission(submission, host_user_pks):
+            priority_lane.append(entry)
+        else:
+            team_queues.setdefault(submission.participant_team_id, []).append(
+                entry
+            )
+
+    priority_slots = len(priority_lane)
+    if team_queues:
+        priority_slots = min(
+            priority_slots, math.ceil(slots * config["PRIORITY_SHARE"])
+        )
+    priority_slots = min(priority_slots, slots)
+    order = [item for item, _ in priority_lane[:priority_slots]]
+    state = {
+        "deficits": {
+            int(team): deficit
+            for team, deficit in challenge.scheduler_state.get(
+                "deficits", {}
+            ).items()
+        },
+        "team": challenge.scheduler_state.get("team"),
+        "in_turn": challenge.scheduler_state.get("in_turn", False),
+    }
+    picked, state = deficit_round_robin(
+        sorted(team_queues.items()),
+        slots - priority_slots,
+        state,
+        config["QUANTUM"],
+    )
+    order.extend(picked)
+    # The priority lane takes the slots the participants leave
+    free_slots = slots - len(order)
+    order.extend(
+        item
+        for item, _ in priority_lane[
+            priority_slots:priority_slots + free_slots
+        ]
+    )
+    state["deficits"] = {
+        str(team): deficit for team, deficit in state["deficits"].items()
+    }
+    return order, state
+
+
+def get_waiting_submissions(challenge):
+    return list(
+        Submission.objects.filter(
+            challenge_phase__challenge=challenge,
+            status=Submission.SUBMITTED,
+            dispatched_at__isnull=True,
+        ).order_by("pk")
+    )
+
+
+def get_submission_message(submission, challenge, worker_bundle_version):
+    message = {
+        "challenge_pk": challenge.pk,
+        "phase_pk": submission.challenge_phase_id,
+        "submission_pk": submission.pk,
+        "worker_bundle_version": worker_bundle_version,
+    }
+    if challenge.is_docker_based:
+        message["submitted_image_uri"] = submission.submitted_image_uri
+    return message
+
+
+def reclaim_stale_submissions(challenge):
+    """
+    Hands the dispatched submissions of a challenge which are still
+    submitted after `DISPATCH_TIMEOUT` seconds back to the scheduler, so
+    that they don't hold the slots of the workers forever. Returns the
+    number of reclaimed submissions.
+    """
+    timeout = settings.SUBMISSION_SCHEDULER["DISPATCH_TIMEOUT"]
+    reclaimed = Submission.objects.filter(
+        challenge_phase__challenge=challenge,
+        status=Submission.SUBMITTED,
+        dispatched_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(dispatched_at=None)
+    if reclaimed:
+        logger.warning(
+            "{} submissions of challenge {} were not evaluated {} seconds "
+            "after their dispatch, dispatching them again".format(
+                reclaimed, challenge.pk, timeout
+            )
+        )
+    return reclaimed
+
+
+def count_busy_slots(challenge):
+    """
+    Returns the number of slots of the workers of a challenge held by its
+    dispatched submissions. The running submissions started more than
+    `RUNNING_TIMEOUT` seconds ago, e.g. whose worker crashed, don't hold a
+    slot anymore.
+    """
+    timeout = settings.SUBMISSION_SCHEDULER["RUNNING_TIMEOUT"]
+    started_before = timezone.now() - timedelta(seconds=timeout)
+    return (
+        Submission.objects.filter(
+            challenge_phase__challenge=challenge,
+            status__in=[Submission.SUBMITTED, Submission.RUNNING],
+            dispatched_at__isnull=False,
+        )
+        .exclude(
+            Q(status=Submission.RUNNING)
+            & (
+                Q(started_at__lt=started_before)
+                | Q(started_at__isnull=True, dispatched_at__lt=started_before)
+            )
+        )
+        .count()
+    )
+
+
+def send_dispatched_messages(queue_name, messages):
+    """
+    Sends the messages of dispatched submissions. The submissions whose
+    message couldn't be sent go back to the scheduler.
+    """
+    try:
+        failed = send_messages(
+            queue_name, [json.dumps(message) for message in messages]
+        )
+    except Exception:
+        logger.exception(
+            "Failed to send the messages to the queue {}".format(queue_name)
+        )
+        failed = [{"Id": str(index)} for index in range(len(messages))]
+    failed_pks = [
+        messages[int(entry["Id"])]["submission_pk"] for entry in failed
+    ]
+    if failed_pks:
+        Submission.objects.filter(pk__in=failed_pks).update(
+            dispatched_at=None
+        )
+    return failed_pks
+
+
+def dispatch_submissions(challenge_pk):
+    """
+    Dispatches the next submissions of a challenge to its queue, as many as
+    its workers have free slots for. The messages are sent once the
+    submissions are marked as dispatched, after the transaction commits.
+
+    Arguments:
+        challenge_pk {int} -- Pk of the challenge
+    Returns:
+        list -- Pks of the dispatched submissions
+    """
+    config = settings.SUBMISSION_SCHEDULER
+    with transaction.atomic():
+        challenge = Challenge.objects.select_for_update().get(pk=challenge_pk)
+        reclaim_stale_submissions(challenge)
+        slots = (
+            config["SUBMISSIONS_PER_WORKER"] * max(challenge.workers or 0, 1)
+            - count_busy_slots(challenge)
+        )
+        if slots <= 0:
+            return []
+        submissions = get_waiting_submissions(challenge)
+        if not submissions:
+            return []
+        order, state = get_dispatch_order(challenge, submissions, slots)
+        worker_bundle_version = get_worker_bundle_version(challenge)
+        messages = [
+            get_submission_message(
+                submission, challenge, worker_bundle_version
+            )
+            for submission, _ in order
+        ]
+        submission_pks = [message["submission_pk"] for message in messages]
+        Submission.objects.filter(pk__in=submission_pks).update(
+            dispatched_at=timezone.now()
+        )
+        Challenge.objects.filter(pk=challenge.pk).update(
+            scheduler_state=state
+        )
+        # Not sent while the challenge is locked
+        queue_name = get_sqs_queue_name(challenge.queue)
+        transaction.on_commit(
+            lambda: send_dispatched_messages(queue_name, messages)
+        )
+    return submission_pks
+
+
+def dispatch_next_submissions(submission):
+    """
+    Dispatches the next submissions of the challenge of a submission once
+    it is evaluated, if the challenge has fair scheduling, instead of
+    waiting for the periodic `dispatch_pending_submissions` task
+    """
+    if submission.status not in (
+        Submission.FINISHED,
+        Submission.FAILED,
+        Submission.CANCELLED,
+    ):
+        return []
+    challenge = submission.challenge_phase.challenge
+    if not challenge.is_fair_scheduling_enabled:
+        return []
+    challenge_pk = challenge.pk
+    try:
+        return dispatch_submissions(challenge_pk)
+    except Exception:
+        # The periodic task dispatches them later on
+        logger.exception(
+            "Failed to dispatch the submissions of challenge {}".format(
+                challenge_pk
+            )
+        )
+        return []
+
+
+def run_scheduler():
+    """
+    Dispatches the waiting submissions of all the challenges with fair
+    scheduling
+    """
+    challenge_pks = set(
+        Submission.objects.filter(
+            challenge_phase__challenge__is_fair_scheduling_enabled=True,
+            status=Submission.SUBMITTED,
+            dispatched_at__isnull=True,
+        ).values_list("challenge_phase__challenge", flat=True)
+    )
+    for challenge_pk in challenge_pks:
+        try:
+            dispatch_submissions(challenge_pk)
+        except Exception:
+            logger.exception(
+                "Scheduler failed to dispatch the submissions of challenge {}".format(
+                    challenge_pk
+                )
+            )
+
+
+def get_queue_position(submission):
+    """
+    Returns the position of a submission waiting for its evaluation and the
+    estimated times of its start and completion. The submissions of the
+    challenges without fair scheduling are evaluated in the order they
+    were made.
+
+    Arguments:
+        submission {[Class object]} -- Submitted submission
+    Returns:
+        dict -- `position` (0 for the next evaluated submission),
+                `waiting_submissions`, `estimated_start_time` and
+                `estimated_completion_time`
+    """
+    challenge = submission.challenge_phase.challenge
+    submissions = Submission.objects.filter(
+        challenge_phase__challenge=challenge, status=Submission.SUBMITTED
+    )
+    if challenge.is_fair_scheduling_enabled:
+        ahead = list(
+            submissions.filter(dispatched_at__isnull=False).order_by(
+                "dispatched_at", "pk"
+            )
+        )
+        order, _ = get_dispatch_order(
+            challenge, get_waiting_submissions(challenge)
+        )
+        ahead.extend(waiting for waiting, _ in order)
+    else:
+        ahead = list(submissions.order_by("pk"))
+    position = next(
+        (i for i, queued in enumerate(ahead) if queued.pk == submission.pk),
+        len(ahead),
+    )
+    ahead = ahead[:position]
+
+    evaluation_times = get_evaluation_times(
+        {queued.challenge_phase_id for queued in ahead}
+        | {submission.challenge_phase_id}
+    )
+    now = timezone.now()
+    # Remaining evaluation time of the running submissions
+    remaining_time = sum(
+        max(
+            evaluation_times.get(
+                running.challenge_phase_id,
+                settings.SUBMISSION_SCHEDULER["DEFAULT_EVALUATION_TIME"],
+            )
+            - (now - running.started_at).total_seconds(),
+            0,
+        )
+        for running in Submission.objects.filter(
+            challenge_phase__challenge=challenge,
+            status=Submission.RUNNING,
+            started_at__isnull=False,
+        ).only("challenge_phase", "started_at")
+    )
+    remaining_time += sum(
+        evaluation_times[queued.challenge_phase_id] for queued in ahead
+    )
+    start_time = now + timedelta(
+        seconds=remaining_time / max(challenge.workers or 0, 1)
+    )
+    return {
+        "position": position,
+        "waiting_submissions": submissions.count(),
+        "estimated_start_time": start_time,
+        "estimated_completion_time": start_time
+        + timedelta(
+            seconds=evaluation_times[submission.challenge_phase_id]
+        ),
+    }
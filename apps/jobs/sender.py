@@ -1,60 +1,37 @@
 from __future__ import absolute_import
 
-import boto3
-import botocore
 import json
 import logging
-import os
 
-from django.conf import settings
+from collections import defaultdict
 
-from base.utils import send_slack_notification
+from django.utils import timezone
+
+from base.sqs import send_messages
+from base.utils import (
+    get_or_create_sqs_queue_object,
+    get_sqs_queue_name,
+    send_slack_notification,
+)
 from challenges.models import Challenge
+from challenges.utils import get_worker_bundle_version
+from .models import Submission
+from .scheduler import dispatch_submissions
 from .utils import get_submission_model
 
 logger = logging.getLogger(__name__)
 
 
-def get_or_create_sqs_queue(queue_name):
+def is_scheduled(challenge, message):
     """
-    Args:
-        queue_name: Name of the SQS Queue
-    Returns:
-        Returns the SQS Queue object
+    Returns whether the submission of a message waits in the fair share
+    scheduler of its challenge. The shards of the submissions which are
+    evaluated already are queued right away.
     """
-    if settings.DEBUG or settings.TEST:
-        sqs = boto3.resource(
-            "sqs",
-            endpoint_url=os.environ.get("AWS_SQS_ENDPOINT", "http://sqs:9324"),
-            region_name=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
-            aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY", "x"),
-            aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID", "x"),
-        )
-        # Use default queue name in dev and test environment
-        queue_name = "evalai_submission_queue"
-    else:
-        sqs = boto3.resource(
-            "sqs",
-            region_name=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
-            aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
-            aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
-        )
-
-    if queue_name == "":
-        queue_name = "evalai_submission_queue"
-
-    # Check if the queue exists. If not, then create one.
-    try:
-        queue = sqs.get_queue_by_name(QueueName=queue_name)
-    except botocore.exceptions.ClientError as ex:
-        if (
-            ex.response["Error"]["Code"]
-            == "AWS.SimpleQueueService.NonExistentQueue"
-        ):
-            queue = sqs.create_queue(QueueName=queue_name)
-        else:
-            logger.exception("Cannot get or create Queue")
-    return queue
+    return (
+        challenge.is_fair_scheduling_enabled
+        and "challenge_phase_split_pk" not in message
+    )
 
 
 def publish_submission_message(message):
@@ -65,9 +42,12 @@ def publish_submission_message(message):
             - "phase_pk": int
             - "submission_pk": int
             - "submitted_image_uri": str, (only available when the challenge is a code upload challenge)
+        The version of the worker bundle of the challenge is added to the
+        message, so that workers know when their cached metadata is stale.
 
     Returns:
-        Returns SQS response
+        Returns SQS response, None if the submission waits in the fair
+        share scheduler of the challenge
     """
 
     try:
@@ -81,8 +61,19 @@ def publish_submission_message(message):
         return
     queue_name = challenge.queue
     slack_url = challenge.slack_webhook_url
-    queue = get_or_create_sqs_queue(queue_name)
-    response = queue.send_message(MessageBody=json.dumps(message))
+    if is_scheduled(challenge, message):
+        # The submission waits in the scheduler unless a worker is free
+        dispatch_submissions(challenge.pk)
+        response = None
+    else:
+        queue = get_or_create_sqs_queue_object(queue_name)
+        message["worker_bundle_version"] = get_worker_bundle_version(
+            challenge
+        )
+        response = queue.send_message(MessageBody=json.dumps(message))
+        Submission.objects.filter(pk=message["submission_pk"]).update(
+            dispatched_at=timezone.now()
+        )
     # send slack notification
     if slack_url:
         challenge_name = challenge.title
@@ -113,3 +104,63 @@ def publish_submission_message(message):
         }
         send_slack_notification(slack_url, message)
     return response
+
+
+def publish_submission_messages(messages):
+    """
+    Publishes many submission messages, e.g. of re-run submissions, in
+    batches per challenge queue. Unlike `publish_submission_message`, no
+    slack notification is sent.
+
+    Arguments:
+        messages {list} -- Submission messages, see `publish_submission_message`
+    Returns:
+        list -- The messages which couldn't be published
+    """
+    messages_by_challenge = defaultdict(list)
+    for message in messages:
+        messages_by_challenge[message["challenge_pk"]].append(message)
+
+    challenges = Challenge.objects.in_bulk(list(messages_by_challenge))
+    failed_messages = []
+    for challenge_pk, challenge_messages in messages_by_challenge.items():
+        challenge = challenges.get(challenge_pk)
+        if challenge is None:
+            logger.error(
+                "Challenge does not exist for the given id {}".format(
+                    challenge_pk
+                )
+            )
+            failed_messages.extend(challenge_messages)
+            continue
+        if any(
+            is_scheduled(challenge, message) for message in challenge_messages
+        ):
+            # The submissions wait in the scheduler unless workers are free
+            dispatch_submissions(challenge.pk)
+            challenge_messages = [
+                message
+                for message in challenge_messages
+                if not is_scheduled(challenge, message)
+            ]
+            if not challenge_messages:
+                continue
+        worker_bundle_version = get_worker_bundle_version(challenge)
+        for message in challenge_messages:
+            message["worker_bundle_version"] = worker_bundle_version
+        failed = send_messages(
+            get_sqs_queue_name(challenge.queue),
+            [json.dumps(message) for message in challenge_messages],
+        )
+        failed_indexes = {int(entry["Id"]) for entry in failed}
+        failed_messages.extend(
+            challenge_messages[index] for index in sorted(failed_indexes)
+        )
+        Submission.objects.filter(
+            pk__in=[
+                message["submission_pk"]
+                for index, message in enumerate(challenge_messages)
+                if index not in failed_indexes
+            ]
+        ).update(dispatched_at=timezone.now())
+    return failed_messages
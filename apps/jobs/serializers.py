@@ -6,9 +6,47 @@ from challenges.models import ChallengePhase, LeaderboardData
 from participants.models import Participant, ParticipantTeam
 
 from .models import Submission
+from .utils import SUBMISSION_ARTIFACT_FIELDS, get_artifact_identifier
 
 
-class SubmissionSerializer(serializers.ModelSerializer):
+class ArtifactIdentifierField(serializers.Field):
+    """
+    Read only field serializing a file of a submission as its artifact
+    identifier, or None if the submission has no such file
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super(ArtifactIdentifierField, self).__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, instance):
+        if not getattr(instance, self.field_name):
+            return None
+        return get_artifact_identifier(instance.pk, self.field_name)
+
+
+class DeferredArtifactURLMixin(object):
+    """
+    Lists the files of the submissions as artifact identifiers, which are
+    signed on demand, rather than as signed URLs when the serializer
+    context has `defer_artifact_urls`
+    """
+
+    def get_fields(self):
+        fields = super(DeferredArtifactURLMixin, self).get_fields()
+        if self.context.get("defer_artifact_urls"):
+            for field_name in SUBMISSION_ARTIFACT_FIELDS:
+                if field_name in fields:
+                    fields[field_name] = ArtifactIdentifierField()
+        return fields
+
+
+class SubmissionSerializer(
+    DeferredArtifactURLMixin, serializers.ModelSerializer
+):
 
     participant_team_name = serializers.SerializerMethodField()
     execution_time = serializers.SerializerMethodField()
@@ -93,7 +131,9 @@ class LeaderboardDataSerializer(serializers.ModelSerializer):
         return obj.leaderboard.schema
 
 
-class ChallengeSubmissionManagementSerializer(serializers.ModelSerializer):
+class ChallengeSubmissionManagementSerializer(
+    DeferredArtifactURLMixin, serializers.ModelSerializer
+):
 
     participant_team = serializers.SerializerMethodField()
     challenge_phase = serializers.SerializerMethodField()
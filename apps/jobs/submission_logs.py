@@ -0,0 +1,469 @@
+"""
+Storage of the stdout and stderr of the submissions as log artifacts.
+
+A log artifact is a gzip file whose deflate stream is fully flushed every
+`settings.SUBMISSION_LOGS["CHUNK_SIZE"]` bytes, so that any chunk can be
+decompressed on its own. The logs are capped to
+`settings.SUBMISSION_LOGS["MAX_SIZE"]` bytes by keeping their head and their
+tail. A small index of the chunks is stored in `Submission.log_indexes`, so
+that previews of a range of lines or bytes only read and decompress the
+chunks they need.
+
+The files are served with `Content-Encoding: gzip`, so that downloading them
+still returns the text of the logs.
+"""
+import struct
+import time
+import zlib
+
+from collections import deque
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+LOG_ARTIFACT_FIELDS = ("stdout_file", "stderr_file")
+LOG_ARTIFACT_INDEX_VERSION = 1
+# Size of the gzip header written by `compress_log`
+GZIP_HEADER_SIZE = 10
+READ_SIZE = 1024 * 1024
+
+
+def read_capped_log(log):
+    """
+    Returns the content of a log, keeping its head and its tail when it is
+    larger than `settings.SUBMISSION_LOGS["MAX_SIZE"]`, without loading the
+    whole log in memory
+
+    Arguments:
+        log {str, bytes or file} -- Content of the log, or a binary file
+
+    Returns:
+        bytes -- Capped content of the log
+        int -- Size of the log
+        int -- Number of bytes removed from the middle of the log
+    """
+    config = settings.SUBMISSION_LOGS
+    if isinstance(log, str):
+        log = log.encode("utf-8")
+    if isinstance(log, bytes):
+        read_chunks = (
+            log[offset:offset + READ_SIZE]
+            for offset in range(0, len(log), READ_SIZE)
+        )
+    else:
+        read_chunks = read_file_chunks(log)
+
+    head = bytearray()
+    tail = deque()
+    tail_size = 0
+    max_tail_size = config["MAX_SIZE"] - config["HEAD_SIZE"]
+    size = 0
+    for data in read_chunks:
+        size += len(data)
+        if len(head) < config["HEAD_SIZE"]:
+            missing = config["HEAD_SIZE"] - len(head)
+            head.extend(data[:missing])
+            data = data[missing:]
+        if data:
+            tail.append(data)
+            tail_size += len(data)
+            while tail_size - len(tail[0]) >= max_tail_size:
+                tail_size -= len(tail.popleft())
+
+    tail = b"".join(tail)
+    if size <= config["MAX_SIZE"]:
+        return bytes(head) + tail, size, 0
+
+    # Cut the log between lines, unless they are longer than the head or
+    # the tail
+    head = bytes(head)
+    if b"\n" in head:
+        head = head[:head.rindex(b"\n") + 1]
+    tail = tail[len(tail) - max_tail_size:]
+    if b"\n" in tail[:-1]:
+        tail = tail[tail.index(b"\n") + 1:]
+    truncated_bytes = size - len(head) - len(tail)
+    marker = "\n... {} bytes truncated ...\n".format(truncated_bytes)
+    return head + marker.encode("utf-8") + tail, size, truncated_bytes
+
+
+def read_file_chunks(log_file):
+    """
+    Yields the content of a file by chunks of `READ_SIZE` bytes, until a
+    read returns nothing or something else than bytes
+    """
+    while True:
+        data = log_file.read(READ_SIZE)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data or not isinstance(data, (bytes, bytearray)):
+            return
+        yield bytes(data)
+
+
+def compress_chunks(compressor, content, offset, compressed_offset, lines):
+    """
+    Compresses a content in chunks, with a full flush of the deflate stream
+    after every chunk
+
+    Arguments:
+        compressor {zlib.Compress} -- Raw deflate compressor
+        content {bytes} -- Content to compress
+        offset {int} -- Offset of the content in the log
+        compressed_offset {int} -- Offset of the content in the gzip file
+        lines {int} -- Number of lines before the content
+
+    Returns:
+        list -- Compressed data
+        list -- For each chunk, its offset in the log, its offset in the
+                gzip file and the number of lines before it
+    """
+    chunk_size = settings.SUBMISSION_LOGS["CHUNK_SIZE"]
+    output = []
+    chunks = []
+    for start in range(0, len(content), chunk_size):
+        chunk = content[start:start + chunk_size]
+        chunks.append([offset + start, compressed_offset, lines])
+        for data in (
+            compressor.compress(chunk),
+            compressor.flush(zlib.Z_FULL_FLUSH),
+        ):
+            output.append(data)
+            compressed_offset += len(data)
+        lines += chunk.count(b"\n")
+    return output, chunks
+
+
+def get_deflate_compressor():
+    return zlib.compressobj(
+        zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS
+    )
+
+
+def compress_log(content):
+    """
+    Compresses the content of a log into a gzip file with a full flush of
+    the deflate stream after every chunk
+
+    Arguments:
+        content {bytes} -- Content of the log
+
+    Returns:
+        bytes -- Content of the gzip file
+        list -- For each chunk, its offset in the content, its offset in the
+                gzip file and the number of lines before it
+    """
+    compressor = get_deflate_compressor()
+    # gzip header: magic, deflate method, no flags, mtime, no extra flags,
+    # unknown OS
+    output = [
+        b"\x1f\x8b\x08\x00"
+        + struct.pack("<I", int(time.time()))
+        + b"\x00\xff"
+    ]
+    compressed_chunks, chunks = compress_chunks(
+        compressor, content, 0, GZIP_HEADER_SIZE, 0
+    )
+    output.extend(compressed_chunks)
+    output.append(compressor.flush())
+    output.append(
+        struct.pack(
+            "<II", zlib.crc32(content) & 0xFFFFFFFF, len(content) & 0xFFFFFFFF
+        )
+    )
+    return b"".join(output), chunks
+
+
+def save_log_artifact(submission, field_name, log, save=True):
+    """
+    Stores a log of a submission as a log artifact, and its index
+
+    Arguments:
+        submission {[Class object]} -- Submission model object
+        field_name {str} -- `stdout_file` or `stderr_file`
+        log {str, bytes or file} -- Content of the log, or a binary file
+        save {bool} -- Whether to save the submission
+    """
+    content, size, truncated_bytes = read_capped_log(log)
+    compressed_content, chunks = compress_log(content)
+    lines = count_lines(content)
+    log_indexes = dict(submission.log_indexes or {})
+    log_indexes[field_name] = {
+        "version": LOG_ARTIFACT_INDEX_VERSION,
+        "size": len(content),
+        "original_size": size,
+        "truncated_bytes": truncated_bytes,
+        "lines": lines,
+        "compressed_size": len(compressed_content),
+        "chunk_size": settings.SUBMISSION_LOGS["CHUNK_SIZE"],
+        "chunks": chunks,
+    }
+    submission.log_indexes = log_indexes
+    store_log_file(submission, field_name, compressed_content, save=save)
+
+
+def store_log_file(submission, field_name, compressed_content, save=True):
+    compressed_file = ContentFile(compressed_content)
+    # Served as text, decompressed by the clients
+    compressed_file.content_type = "text/plain"
+    getattr(submission, field_name).save(
+        "{}.txt.gz".format(field_name.split("_")[0]),
+        compressed_file,
+        save=save,
+    )
+
+
+def count_lines(content):
+    lines = content.count(b"\n")
+    if content and not content.endswith(b"\n"):
+        lines += 1
+    return lines
+
+
+def get_log_content(submission, field_name):
+    """
+    Returns the content of a log of a submission, stored as a log artifact
+    or as text, or an empty string if it isn't stored
+    """
+    field_file = getattr(submission, field_name)
+    if not field_file:
+        return b""
+    with field_file.storage.open(field_file.name, "rb") as log_file:
+        content = log_file.read()
+    if field_name in (submission.log_indexes or {}):
+        content = zlib.decompress(content, 16 + zlib.MAX_WBITS)
+    return content
+
+
+def append_to_log_artifact(submission, field_name, log, save=True):
+    """
+    Appends a log, e.g. of a shard of the evaluation of a submission, to a
+    log of a submission
+
+    Only the last chunk of a log artifact is compressed again with the
+    appended log, the previous chunks are copied as they are. The log is
+    stored in a new file, so that the log of a submission whose changes are
+    rolled back stays readable.
+
+    Arguments:
+        submission {[Class object]} -- Submission model object
+        field_name {str} -- `stdout_file` or `stderr_file`
+        log {str or bytes} -- Content to append
+        save {bool} -- Whether to save the submission
+    """
+    config = settings.SUBMISSION_LOGS
+    if isinstance(log, str):
+        log = log.encode("utf-8")
+    field_file = getattr(submission, field_name)
+    index = (submission.log_indexes or {}).get(field_name)
+    if (
+        not field_file
+        or index is None
+        or index["version"] != LOG_ARTIFACT_INDEX_VERSION
+        or index["chunk_size"] != config["CHUNK_SIZE"]
+        or index["size"] + len(log) + 1 > config["MAX_SIZE"]
+    ):
+        # The log is stored as text, or has to be capped again
+        content = get_log_content(submission, field_name)
+        if content and not content.endswith(b"\n"):
+            content += b"\n"
+        save_log_artifact(submission, field_name, content + log, save=save)
+        return
+
+    chunks = index["chunks"]
+    if chunks:
+        offset, compressed_offset, lines = chunks[-1]
+        last_chunk = read_log_chunks(
+            field_file, index, len(chunks) - 1, len(chunks)
+        )
+        chunks = chunks[:-1]
+    else:
+        offset, compressed_offset, lines = 0, GZIP_HEADER_SIZE, 0
+        last_chunk = b""
+    if last_chunk and not last_chunk.endswith(b"\n"):
+        log = b"\n" + log
+    content = last_chunk + log
+
+    compressor = get_deflate_compressor()
+    output, new_chunks = compress_chunks(
+        compressor, content, offset, compressed_offset, lines
+    )
+    # The gzip trailer holds the CRC-32 and the size of the whole log
+    crc, _ = struct.unpack(
+        "<II",
+        read_file_range(
+            field_file, index["compressed_size"] - 8, index["compressed_size"]
+        ),
+    )
+    size = index["size"] + len(log)
+    output.append(compressor.flush())
+    output.append(
+        struct.pack(
+            "<II", zlib.crc32(log, crc) & 0xFFFFFFFF, size & 0xFFFFFFFF
+        )
+    )
+    compressed_content = read_file_range(
+        field_file, 0, compressed_offset
+    ) + b"".join(output)
+
+    log_indexes = dict(submission.log_indexes)
+    log_indexes[field_name] = dict(
+        index,
+        size=size,
+        original_size=index["original_size"] + len(log),
+        lines=lines + count_lines(content),
+        compressed_size=len(compressed_content),
+        chunks=chunks + new_chunks,
+    )
+    submission.log_indexes = log_indexes
+    store_log_file(submission, field_name, compressed_content, save=save)
+
+
+def read_file_range(field_file, start, end):
+    """
+    Returns the bytes of a stored file from offset `start` to `end`
+    (excluded). Only the range is downloaded from S3.
+    """
+    storage = field_file.storage
+    bucket = getattr(storage, "bucket", None)
+    if bucket is not None and hasattr(storage, "_normalize_name"):
+        key = bucket.get_key(
+            storage._normalize_name(storage._clean_name(field_file.name))
+        )
+        return key.get_contents_as_string(
+            headers={"Range": "bytes={}-{}".format(start, end - 1)}
+        )
+    with storage.open(field_file.name, "rb") as stored_file:
+        stored_file.seek(start)
+        return stored_file.read(end - start)
+
+
+def read_log_chunks(field_file, index, first_chunk, last_chunk):
+    """
+    Returns the decompressed content of the chunks `first_chunk` to
+    `last_chunk` (excluded) of a log artifact
+    """
+    chunks = index["chunks"]
+    start = chunks[first_chunk][1]
+    if last_chunk < len(chunks):
+        end = chunks[last_chunk][1]
+    else:
+        end = index["compressed_size"]
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    return decompressor.decompress(read_file_range(field_file, start, end))
+
+
+def get_log_lines(submission, field_name, start_line, num_lines):
+    """
+    Returns a range of lines of a log of a submission
+
+    Arguments:
+        submission {[Class object]} -- Submission model object
+        field_name {str} -- `stdout_file` or `stderr_file`
+        start_line {int} -- First line, counted from the end of the log
+                            when negative
+        num_lines {int} -- Number of lines
+
+    Returns:
+        dict -- The `content` of the lines, `start_line`, `end_line` and
+                the `total_lines` of the log
+    """
+    field_file = getattr(submission, field_name)
+    index = (submission.log_indexes or {}).get(field_name)
+    if index is None:
+        # Logs stored before the log artifacts
+        with field_file.storage.open(field_file.name, "rb") as log_file:
+            content, _, _ = read_capped_log(log_file)
+        lines = content.decode("utf-8", errors="replace").splitlines()
+        total_lines = len(lines)
+        start_line, end_line = get_range(
+            start_line, num_lines, total_lines
+        )
+        lines = lines[start_line:end_line]
+    else:
+        total_lines = index["lines"]
+        start_line, end_line = get_range(
+            start_line, num_lines, total_lines
+        )
+        chunks = index["chunks"]
+        # The chunk which contains the start of the first line, and the
+        # chunk after the end of the last line
+        first_chunk = 0
+        while (
+            first_chunk + 1 < len(chunks)
+            and chunks[first_chunk + 1][2] < start_line
+        ):
+            first_chunk += 1
+        last_chunk = first_chunk + 1
+        while last_chunk < len(chunks) and chunks[last_chunk][2] < end_line:
+            last_chunk += 1
+        content = b""
+        if start_line < end_line:
+            content = read_log_chunks(
+                field_file, index, first_chunk, last_chunk
+            )
+        skipped_lines = start_line - chunks[first_chunk][2] if chunks else 0
+        lines = content.decode("utf-8", errors="replace").split("\n")[
+            skipped_lines:skipped_lines + end_line - start_line
+        ]
+    return {
+        "content": "\n".join(lines),
+        "start_line": start_line,
+        "end_line": end_line,
+        "total_lines": total_lines,
+    }
+
+
+def get_range(start, count, total):
+    """
+    Returns the (start, end) range of `count` items from `start`, counted
+    from the end when negative, within `total` items
+    """
+    if start < 0:
+        start = max(total + start, 0)
+    start = min(start, total)
+    return start, min(start + max(count, 0), total)
+
+
+def get_log_bytes(submission, field_name, offset, length):
+    """
+    Returns a range of bytes of a log of a submission
+
+    Arguments:
+        submission {[Class object]} -- Submission model object
+        field_name {str} -- `stdout_file` or `stderr_file`
+        offset {int} -- Offset of the first byte, counted from the end of
+                        the log when negative
+        length {int} -- Number of bytes
+
+    Returns:
+        dict -- The `content` of the range, its `offset`, `length` and the
+                `size` of the log
+    """
+    field_file = getattr(submission, field_name)
+    index = (submission.log_indexes or {}).get(field_name)
+    if index is None:
+        with field_file.storage.open(field_file.name, "rb") as log_file:
+            content, _, _ = read_capped_log(log_file)
+        size = len(content)
+        offset, end = get_range(offset, length, size)
+        content = content[offset:end]
+    else:
+        size = index["size"]
+        offset, end = get_range(offset, length, size)
+        content = b""
+        if offset < end:
+            chunk_size = index["chunk_size"]
+            first_chunk = offset // chunk_size
+            last_chunk = (end - 1) // chunk_size + 1
+            content = read_log_chunks(
+                field_file, index, first_chunk, last_chunk
+            )
+            start = offset - first_chunk * chunk_size
+            content = content[start:start + end - offset]
+    return {
+        "content": content.decode("utf-8", errors="replace"),
+        "offset": offset,
+        "length": end - offset,
+        "size": size,
+    }
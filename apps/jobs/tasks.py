@@ -10,6 +10,7 @@ from evalai.celery import app
 from participants.models import ParticipantTeam
 from participants.utils import get_participant_team_id_of_user_for_a_challenge
 from .models import Submission
+from .scheduler import run_scheduler
 from .serializers import SubmissionSerializer
 from .utils import get_file_from_url
 from .sender import publish_submission_message
@@ -85,3 +86,12 @@ def download_file_and_publish_submission_message(
                 e
             )
         )
+
+
+@app.task
+def dispatch_pending_submissions():
+    """
+    Periodic task dispatching the submissions waiting in the fair share
+    scheduler
+    """
+    run_scheduler()
@@ -25,6 +25,12 @@ urlpatterns = [
         views.re_run_submission_by_host,
         name="re_run_submission_by_host",
     ),
+    url(
+        r"^challenge/(?P<challenge_pk>[0-9]+)/"
+        r"challenge_phase/(?P<challenge_phase_pk>[0-9]+)/submissions/re-run-by-host/$",
+        views.re_run_submissions_of_phase_by_host,
+        name="re_run_submissions_of_phase_by_host",
+    ),
     url(
         r"^challenge_phase_split/(?P<challenge_phase_split_id>[0-9]+)/leaderboard/$",
         views.leaderboard,
@@ -40,6 +46,18 @@ urlpatterns = [
         views.get_submission_by_pk,
         name="get_submission_by_pk",
     ),
+    url(
+        r"^challenge/(?P<challenge_pk>[0-9]+)/"
+        r"challenge_phase/(?P<challenge_phase_pk>[0-9]+)/events/$",
+        views.get_challenge_phase_events,
+        name="get_challenge_phase_events",
+    ),
+    url(
+        r"^challenge/(?P<challenge_pk>[0-9]+)/"
+        r"challenge_phase/(?P<challenge_phase_pk>[0-9]+)/events/token/$",
+        views.get_challenge_phase_events_token,
+        name="get_challenge_phase_events_token",
+    ),
     url(
         r"^challenge/(?P<challenge_pk>[0-9]+)/update_submission/$",
         views.update_submission,
@@ -85,6 +103,31 @@ urlpatterns = [
         views.get_github_badge_data,
         name="get_github_badge_data",
     ),
+    url(
+        r"^phase_splits/(?P<challenge_phase_split_pk>[0-9]+)/teams/(?P<participant_team_pk>[0-9]+)/rank/$",
+        views.get_participant_team_rank,
+        name="get_participant_team_rank",
+    ),
+    url(
+        r"^submission/(?P<submission_pk>[0-9]+)/logs/(?P<log_type>[a-z]+)/$",
+        views.get_submission_log_preview,
+        name="get_submission_log_preview",
+    ),
+    url(
+        r"^submission/(?P<submission_pk>[0-9]+)/queue_position/$",
+        views.get_submission_queue_position,
+        name="get_submission_queue_position",
+    ),
+    url(
+        r"^submission_artifacts/urls/$",
+        views.get_submission_artifact_urls,
+        name="get_submission_artifact_urls",
+    ),
+    url(
+        r"^phase_splits/(?P<challenge_phase_split_pk>[0-9]+)/leaderboard_snapshot/$",
+        views.regenerate_leaderboard_snapshot,
+        name="regenerate_leaderboard_snapshot",
+    ),
     url(
         r"^phases/(?P<challenge_phase_pk>[0-9]+)/send_submission_message/(?P<submission_pk>[0-9]+)/$",
         views.send_submission_message,
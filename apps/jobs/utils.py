@@ -1,17 +1,42 @@
 import datetime
+import functools
+import gzip
+import hashlib
+import itertools
+import json
 import logging
 import os
 import requests
 import tempfile
 import urllib.request
-
-from django.db.models import FloatField, Q
+import uuid
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import (
+    Exists,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce
 from django.db.models.expressions import RawSQL
 from django.utils import timezone
 from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
 
-from challenges.models import ChallengePhaseSplit, LeaderboardData
-from participants.models import ParticipantTeam
+from challenges.models import (
+    ChallengePhaseSplit,
+    LeaderboardData,
+    LeaderboardMetric,
+    update_leaderboard_metrics,
+)
+from participants.models import Participant
 
 from base.utils import get_model_object, suppress_autotime
 from challenges.utils import get_challenge_model, get_challenge_phase_model
@@ -20,11 +45,45 @@ from participants.utils import get_participant_team_id_of_user_for_a_challenge
 
 from .constants import submission_status_to_exclude
 from .models import Submission
-from .serializers import SubmissionSerializer
+from .submission_logs import append_to_log_artifact, save_log_artifact
 
 get_submission_model = get_model_object(Submission)
 get_challenge_phase_split_model = get_model_object(ChallengePhaseSplit)
 
+LEADERBOARD_CACHE_VERSION_KEY = "leaderboard_cache_version:{}"
+LEADERBOARD_RANK_INDEX_CACHE_KEY = "leaderboard_rank_index:{}:{}"
+# Bounds the staleness of the ranks when a leaderboard changes without
+# notification, e.g. when a team is banned
+LEADERBOARD_RANK_INDEX_CACHE_TIMEOUT = 5 * 60
+# The rank index is cached in items of this many entries, so that the items
+# of large leaderboards stay below the item size limit of memcached
+LEADERBOARD_RANK_INDEX_CHUNK_SIZE = 1000
+LEADERBOARD_SNAPSHOT_CACHE_KEY = "leaderboard_snapshot:{}:{}"
+LEADERBOARD_SNAPSHOT_CACHE_TIMEOUT = 24 * 60 * 60
+
+SUBMISSION_ARTIFACT_FIELDS = (
+    "input_file",
+    "stdout_file",
+    "stderr_file",
+    "submission_result_file",
+    "submission_metadata_file",
+)
+ARTIFACT_URL_CACHE_KEY = "artifact_url:{}"
+# Shorter than the expiry of the signed URLs of the media storage
+ARTIFACT_URL_CACHE_TIMEOUT = 5 * 60
+
+# Files of the results which are shared with the submissions reusing them
+# The logs of a submission are not reused, as they may contain details
+# printed for its participant team
+SUBMISSION_RESULT_FILE_FIELDS = (
+    "submission_result_file",
+    "submission_metadata_file",
+)
+REUSED_RESULTS_LOG = (
+    "The results of an identical submission were reused, this submission "
+    "was not evaluated again.\n"
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -183,6 +242,129 @@ def get_file_from_url(url):
     return file_obj
 
 
+def get_submitted_image_uri(submission):
+    """
+    Returns the docker image URI of a code upload challenge submission, or
+    None if it cannot be recovered from the input file of the submission.
+    """
+    if submission.submitted_image_uri:
+        return submission.submitted_image_uri
+    # The image URI isn't stored for submissions made before it was added
+    try:
+        response = requests.get(submission.input_file.url)
+    except Exception:
+        logger.exception("Failed to get input_file")
+        return None
+    if response and response.status_code == 200:
+        return response.json()["submitted_image_uri"]
+    return None
+
+
+def handle_submissions_rerun(submissions, updated_status):
+    """
+    Function to re-run submissions in bulk. It is handled in the following way -
+    1. Invalidate the old submissions with a single update
+    2. Create the new submission objects for the re-running submissions with
+       a single insert. The submission limits checked in `Submission.save` are
+       skipped, as re-runs are not new submissions of the participants.
+
+    Arguments:
+        submissions {QuerySet} -- Submissions to re-run
+        updated_status {str} -- Updated status for the old submissions
+    Returns:
+        list -- Messages of the new submissions to publish to the queues
+    """
+    submissions = list(
+        submissions.select_related("challenge_phase__challenge").order_by(
+            "pk"
+        )
+    )
+    submitted_image_uris = {}
+    for submission in submissions:
+        if submission.challenge_phase.challenge.is_docker_based:
+            submitted_image_uris[submission.pk] = get_submitted_image_uri(
+                submission
+            )
+    rerun_submissions = [
+        submission
+        for submission in submissions
+        if submitted_image_uris.get(submission.pk, True)
+    ]
+    if len(rerun_submissions) < len(submissions):
+        logger.error(
+            "Submissions {} are not re-run as their submitted image URI couldn't be found".format(
+                [
+                    submission.pk
+                    for submission in submissions
+                    if not submitted_image_uris.get(submission.pk, True)
+                ]
+            )
+        )
+    if not rerun_submissions:
+        return []
+
+    submission_numbers = (
+        Submission.objects.filter(
+            challenge_phase__in={
+                submission.challenge_phase_id
+                for submission in rerun_submissions
+            },
+            participant_team__in={
+                submission.participant_team_id
+                for submission in rerun_submissions
+            },
+        )
+        .values_list("challenge_phase", "participant_team")
+        .annotate(Max("submission_number"))
+    )
+    max_submission_numbers = {
+        (challenge_phase, participant_team): submission_number
+        for challenge_phase, participant_team, submission_number in submission_numbers
+    }
+
+    old_submission_pks = []
+    for submission in rerun_submissions:
+        old_submission_pks.append(submission.pk)
+        if submission.pk in submitted_image_uris:
+            submission.submitted_image_uri = submitted_image_uris[
+                submission.pk
+            ]
+        key = (submission.challenge_phase_id, submission.participant_team_id)
+        max_submission_numbers[key] = max_submission_numbers.get(key, 0) + 1
+        submission.submission_number = max_submission_numbers[key]
+        submission.pk = None
+        submission.status = Submission.SUBMITTED
+        submission.is_public = submission.challenge_phase.is_submission_public
+        submission.stdout_file = None
+        submission.stderr_file = None
+        submission.log_indexes = {}
+        submission.result_cache_key = ""
+        submission.evaluation_shards = {}
+        submission.dispatched_at = None
+        submission.is_rerun = True
+        submission.submission_result_file = None
+        submission.submission_metadata_file = None
+
+    with transaction.atomic():
+        Submission.objects.filter(pk__in=old_submission_pks).update(
+            status=updated_status
+        )
+        with suppress_autotime(Submission, ["submitted_at"]):
+            Submission.objects.bulk_create(rerun_submissions)
+
+    messages = []
+    for submission in rerun_submissions:
+        message = {
+            "challenge_pk": submission.challenge_phase.challenge.pk,
+            "phase_pk": submission.challenge_phase.pk,
+            "submission_pk": submission.pk,
+        }
+        if submission.challenge_phase.challenge.is_docker_based:
+            message["submitted_image_uri"] = submission.submitted_image_uri
+        messages.append(message)
+    return messages
+
+
 def handle_submission_rerun(submission, updated_status):
     """
     Function to handle the submission re-running. It is handled in the following way -
@@ -192,53 +374,284 @@ def handle_submission_rerun(submission, updated_status):
     Arguments:
         submission {Submission Model class object} -- submission object
         updated_status {str} -- Updated status for current submission
+    Returns:
+        dict -- Message of the new submission, None if it isn't re-run
+    """
+    messages = handle_submissions_rerun(
+        Submission.objects.filter(pk=submission.pk), updated_status
+    )
+    return messages[0] if messages else None
+
+
+def get_submission_result_cache_key(submission):
+    """
+    Returns the key of the results of a submission, identifying its phase,
+    the contents of its input file and the evaluation script and test
+    annotation which evaluate it. The stored files get a new random name
+    whenever they are updated, so their names identify their versions.
+
+    Arguments:
+        submission {[Class object]} -- Submission model object
+    Returns:
+        str -- Key of the results, empty when the checksum of the input file
+               is unknown
     """
+    if not submission.input_file_checksum:
+        return ""
+    challenge_phase = submission.challenge_phase
+    # The evaluation script defaults to False rather than an empty file
+    files = [
+        challenge_phase.challenge.evaluation_script,
+        challenge_phase.test_annotation,
+    ]
+    key = "\0".join(
+        [str(challenge_phase.pk), submission.input_file_checksum]
+        + [file.name if file else "" for file in files]
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def get_cached_submission(submission, result_cache_key):
+    """
+    Returns the latest finished submission of the phase of a submission with
+    the same results, or None
+    """
+    if not result_cache_key:
+        return None
+    return (
+        Submission.objects.filter(
+            challenge_phase=submission.challenge_phase_id,
+            result_cache_key=result_cache_key,
+            status=Submission.FINISHED,
+        )
+        .exclude(pk=submission.pk)
+        .order_by("-completed_at")
+        .first()
+    )
+
 
-    data = {"status": updated_status}
-    serializer = SubmissionSerializer(submission, data=data, partial=True)
-    if serializer.is_valid():
-        serializer.save()
+def copy_submission_results(cached_submission, submission):
+    """
+    Finishes a submission with the results of an identical submission: its
+    leaderboard entries, output and result files, which are shared rather
+    than copied in the storage. Its stdout only notes that the results were
+    reused.
 
-    submission.pk = None
-    submission.stdout_file = None
+    Arguments:
+        cached_submission {[Class object]} -- Finished submission
+        submission {[Class object]} -- Submission to finish
+    Returns:
+        list -- Challenge phase split pks of the new leaderboard entries
+    """
+    leaderboard_data_list = [
+        LeaderboardData(
+            challenge_phase_split_id=leaderboard_data.challenge_phase_split_id,
+            submission=submission,
+            leaderboard_id=leaderboard_data.leaderboard_id,
+            result=leaderboard_data.result,
+            error=leaderboard_data.error,
+        )
+        for leaderboard_data in LeaderboardData.objects.filter(
+            submission=cached_submission
+        )
+    ]
+    for field_name in SUBMISSION_RESULT_FILE_FIELDS:
+        setattr(
+            submission,
+            field_name,
+            getattr(cached_submission, field_name).name or None,
+        )
+    submission.output = cached_submission.output
     submission.stderr_file = None
-    submission.submission_result_file = None
-    submission.submission_metadata_file = None
-    with suppress_autotime(submission, ["submitted_at"]):
-        submission.submitted_at = submission.submitted_at
+    submission.log_indexes = {}
+    save_log_artifact(
+        submission, "stdout_file", REUSED_RESULTS_LOG, save=False
+    )
+    submission.result_cache_key = cached_submission.result_cache_key
+    submission.status = Submission.FINISHED
+    submission.started_at = submission.completed_at = timezone.now()
+    with transaction.atomic():
+        LeaderboardData.objects.bulk_create(leaderboard_data_list)
+        update_leaderboard_metrics(leaderboard_data_list)
         submission.save()
+    return [
+        leaderboard_data.challenge_phase_split_id
+        for leaderboard_data in leaderboard_data_list
+    ]
+
+
+def get_evaluation_shards(challenge_phase):
+    """
+    Returns the challenge phase splits evaluated as separate shards of the
+    submissions of a phase, or an empty list when they are evaluated at once
+    """
+    if not challenge_phase.is_sharded_evaluation_enabled:
+        return []
+    challenge_phase_splits = list(
+        ChallengePhaseSplit.objects.filter(challenge_phase=challenge_phase)
+        .select_related("dataset_split")
+        .order_by("pk")
+    )
+    if len(challenge_phase_splits) < 2:
+        return []
+    return challenge_phase_splits
 
-    message = {
-        "challenge_pk": submission.challenge_phase.challenge.pk,
-        "phase_pk": submission.challenge_phase.pk,
-        "submission_pk": submission.pk,
+
+def start_sharded_evaluation(submission, challenge_phase_splits):
+    """
+    Marks a submission as running, with a pending shard per challenge phase
+    split
+
+    Arguments:
+        submission {[Class object]} -- Submission model object
+        challenge_phase_splits {list} -- Returned by `get_evaluation_shards`
+    Returns:
+        list -- Messages of the shards to publish to the queue
+    """
+    submission.evaluation_shards = {
+        str(challenge_phase_split.pk): {
+            "status": Submission.SUBMITTED,
+            "dataset_split": challenge_phase_split.dataset_split.codename,
+        }
+        for challenge_phase_split in challenge_phase_splits
     }
+    submission.status = Submission.RUNNING
+    submission.started_at = timezone.now()
+    submission.save()
+    challenge_phase = submission.challenge_phase
+    return [
+        {
+            "challenge_pk": challenge_phase.challenge_id,
+            "phase_pk": challenge_phase.pk,
+            "submission_pk": submission.pk,
+            "challenge_phase_split_pk": challenge_phase_split.pk,
+        }
+        for challenge_phase_split in challenge_phase_splits
+    ]
 
-    if submission.challenge_phase.challenge.is_docker_based:
-        try:
-            response = requests.get(submission.input_file.url)
-        except Exception:
-            logger.exception("Failed to get input_file")
-            return
 
-        if response and response.status_code == 200:
-            message["submitted_image_uri"] = response.json()[
-                "submitted_image_uri"
-            ]
-    return message
+def merge_evaluation_shard(
+    submission_pk,
+    challenge_phase_split,
+    result=None,
+    error=None,
+    submission_result="",
+    submission_metadata="",
+    stdout="",
+    stderr="",
+):
+    """
+    Merges the results of a shard into its submission, which is partially
+    evaluated until all its shards are merged. The submission is locked, so
+    that the shards evaluated in parallel are merged one at a time.
+
+    Arguments:
+        submission_pk {int} -- Pk of the submission
+        challenge_phase_split {[Class object]} -- Split of the shard, only
+                                                 its pk is used if the shard
+                                                 failed
+        result {dict} -- Result of the split, None if the shard failed
+        error {dict} -- Error bars of the result
+        submission_result -- `submission_result` of the evaluation
+        submission_metadata -- `submission_metadata` of the evaluation
+        stdout {str} -- Standard output of the evaluation
+        stderr {str} -- Standard error of the evaluation, stored if the
+                        shard failed
+    Returns:
+        [Class object] -- The submission
+        bool -- Whether a leaderboard entry was created
+    """
+    shard_key = str(challenge_phase_split.pk)
+    with transaction.atomic():
+        submission = Submission.objects.select_for_update().get(
+            pk=submission_pk
+        )
+        shard = submission.evaluation_shards.get(shard_key)
+        if shard is None or shard["status"] != Submission.SUBMITTED:
+            # The shard was merged already, e.g. for a redelivered message
+            return submission, False
+        if submission.status not in (
+            Submission.RUNNING,
+            Submission.PARTIALLY_EVALUATED,
+        ):
+            # e.g. the submission was cancelled
+            return submission, False
+
+        header = "[{}]\n".format(shard["dataset_split"])
+        append_to_log_artifact(
+            submission, "stdout_file", header + stdout, save=False
+        )
+        if result is None:
+            shard["status"] = Submission.FAILED
+            append_to_log_artifact(
+                submission, "stderr_file", header + stderr, save=False
+            )
+        else:
+            shard.update(
+                status=Submission.FINISHED,
+                result=result,
+                submission_result=submission_result,
+                submission_metadata=submission_metadata,
+            )
+            LeaderboardData.objects.create(
+                challenge_phase_split=challenge_phase_split,
+                submission=submission,
+                leaderboard_id=challenge_phase_split.leaderboard_id,
+                result=result,
+                error=error,
+            )
+            # The output is stored as text, so it is rebuilt from the shards
+            submission.output = {
+                "result": [
+                    {shard["dataset_split"]: shard["result"]}
+                    for shard in submission.evaluation_shards.values()
+                    if shard["status"] == Submission.FINISHED
+                ]
+            }
+
+        statuses = [
+            shard["status"] for shard in submission.evaluation_shards.values()
+        ]
+        if Submission.SUBMITTED not in statuses:
+            submission.completed_at = timezone.now()
+            if Submission.FAILED in statuses:
+                submission.status = Submission.FAILED
+            else:
+                submission.status = Submission.FINISHED
+                # The results of the evaluations of the shards, by split
+                for key in ("submission_result", "submission_metadata"):
+                    content = {
+                        shard["dataset_split"]: shard[key]
+                        for shard in submission.evaluation_shards.values()
+                    }
+                    getattr(submission, "{}_file".format(key)).save(
+                        "{}.json".format(key),
+                        ContentFile(json.dumps(content)),
+                        save=False,
+                    )
+        elif Submission.FINISHED in statuses:
+            submission.status = Submission.PARTIALLY_EVALUATED
+        submission.save()
+    return submission, result is not None
 
 
 def calculate_distinct_sorted_leaderboard_data(
-    user, challenge_obj, challenge_phase_split, only_public_entries
+    user,
+    challenge_obj,
+    challenge_phase_split,
+    only_public_entries,
+    order_by=None,
 ):
     """
     Function to calculate and return the sorted leaderboard data
 
     Arguments:
-        user {[Class object]} -- User model object
+        user {[Class object]} -- User model object, None to skip the check of the visibility of the leaderboard
         challenge_obj {[Class object]} -- Challenge model object
         challenge_phase_split {[Class object]} -- Challenge phase split model object
         only_public_entries {[Boolean]} -- Boolean value to determine if the user wants to include private entries or not
+        order_by {[str]} -- Label of the metric to rank the entries by,
+                            defaults to the `default_order_by` of the schema
 
     Returns:
         [list] -- Ranked list of participant teams to be shown on leaderboard
@@ -256,6 +669,16 @@ def calculate_distinct_sorted_leaderboard_data(
         }
         return response_data, status.HTTP_400_BAD_REQUEST
 
+    if order_by is None:
+        order_by = default_order_by
+    elif order_by not in leaderboard.schema.get("labels", []):
+        response_data = {
+            "error": "Sorry, {} is not a metric of the leaderboard!".format(
+                order_by
+            )
+        }
+        return response_data, status.HTTP_400_BAD_REQUEST
+
     # Exclude the submissions done by members of the host team
     # while populating leaderboard
     challenge_hosts_emails = (
@@ -267,7 +690,9 @@ def calculate_distinct_sorted_leaderboard_data(
         [] if not is_challenge_phase_public else challenge_hosts_emails
     )
 
-    challenge_host_user = is_user_a_host_of_challenge(user, challenge_obj.pk)
+    challenge_host_user = user is None or is_user_a_host_of_challenge(
+        user, challenge_obj.pk
+    )
 
     all_banned_email_ids = challenge_obj.banned_email_ids
 
@@ -297,34 +722,6 @@ def calculate_distinct_sorted_leaderboard_data(
         challenge_phase_split=challenge_phase_split,
         submission__is_flagged=False,
         submission__status__in=all_valid_submission_status,
-    ).order_by("-created_at")
-
-    leaderboard_data = leaderboard_data.annotate(
-        filtering_score=RawSQL(
-            "result->>%s", (default_order_by,), output_field=FloatField()
-        ),
-        filtering_error=RawSQL(
-            "error->>%s",
-            ("error_{0}".format(default_order_by),),
-            output_field=FloatField(),
-        ),
-    ).values(
-        "id",
-        "submission__participant_team",
-        "submission__participant_team__team_name",
-        "submission__participant_team__team_url",
-        "submission__is_baseline",
-        "submission__is_public",
-        "challenge_phase_split",
-        "result",
-        "error",
-        "filtering_score",
-        "filtering_error",
-        "leaderboard__schema",
-        "submission__submitted_at",
-        "submission__method_name",
-        "submission__id",
-        "submission__submission_metadata",
     )
     if only_public_entries:
         if challenge_phase_split.visibility == ChallengePhaseSplit.PUBLIC:
@@ -332,38 +729,97 @@ def calculate_distinct_sorted_leaderboard_data(
                 submission__is_public=True
             )
 
-    all_banned_participant_team = []
-    for leaderboard_item in leaderboard_data:
-        participant_team_id = leaderboard_item["submission__participant_team"]
-        participant_team = ParticipantTeam.objects.get(id=participant_team_id)
-        all_participants_email_ids = (
-            participant_team.get_all_participants_email()
+    # Find the banned teams with a single query rather than one per entry
+    all_banned_participant_team = set()
+    if all_banned_email_ids:
+        all_banned_participant_team = set(
+            Participant.objects.filter(
+                team__in=leaderboard_data.values(
+                    "submission__participant_team"
+                ),
+                user__email__in=all_banned_email_ids,
+            ).values_list("team", flat=True)
         )
-        for participant_email in all_participants_email_ids:
-            if participant_email in all_banned_email_ids:
-                all_banned_participant_team.append(participant_team_id)
-                break
-        if leaderboard_item["error"] is None:
-            leaderboard_item.update(filtering_error=0)
-        if leaderboard_item["filtering_score"] is None:
-            leaderboard_item.update(filtering_score=0)
 
+    error_key = "error_{0}".format(order_by)
+    leaderboard_data = leaderboard_data.annotate(
+        filtering_error=Coalesce(
+            RawSQL(
+                "CASE WHEN jsonb_typeof(error->%s) = 'number' "
+                "THEN (error->>%s)::float END",
+                (error_key, error_key),
+                output_field=FloatField(),
+            ),
+            Value(0.0, output_field=FloatField()),
+        )
+    )
+    # The scores are read from the typed copies of the metrics, which hold
+    # the numbers and numeric strings of the results as floats
     if challenge_phase_split.show_leaderboard_by_latest_submission:
-        sorted_leaderboard_data = leaderboard_data
+        ranked_leaderboard_data = [
+            leaderboard_data.annotate(
+                filtering_score=Subquery(
+                    LeaderboardMetric.objects.filter(
+                        leaderboard_data=OuterRef("pk"), metric=order_by
+                    ).values("value")[:1],
+                    output_field=FloatField(),
+                )
+            ).order_by("-created_at")
+        ]
     else:
-        sorted_leaderboard_data = sorted(
-            leaderboard_data,
-            key=lambda k: (
-                float(k["filtering_score"]),
-                float(-k["filtering_error"]),
-            ),
-            reverse=True
-            if challenge_phase_split.is_leaderboard_order_descending
-            else False,
+        if challenge_phase_split.is_leaderboard_order_descending:
+            ordering = ("-filtering_score", "filtering_error", "-created_at")
+        else:
+            ordering = ("filtering_score", "-filtering_error", "-created_at")
+        # Ranked in the database, on the (challenge_phase_split, metric,
+        # value) index of the typed metrics. The entries without the
+        # metric, e.g. partially evaluated ones, come last. They are found
+        # with NOT EXISTS, as a NOT IN subquery too large to be hashed is
+        # scanned once per entry.
+        ranked_leaderboard_data = [
+            leaderboard_data.filter(
+                metrics__challenge_phase_split=challenge_phase_split,
+                metrics__metric=order_by,
+            )
+            .annotate(filtering_score=F("metrics__value"))
+            .order_by(*ordering),
+            leaderboard_data.annotate(
+                has_metric=Exists(
+                    LeaderboardMetric.objects.filter(
+                        leaderboard_data=OuterRef("pk"), metric=order_by
+                    )
+                )
+            )
+            .filter(has_metric=False)
+            .annotate(
+                filtering_score=Value(None, output_field=FloatField())
+            )
+            .order_by("-created_at"),
+        ]
+    sorted_leaderboard_data = itertools.chain.from_iterable(
+        queryset.values(
+            "id",
+            "submission__participant_team",
+            "submission__participant_team__team_name",
+            "submission__participant_team__team_url",
+            "submission__is_baseline",
+            "submission__is_public",
+            "challenge_phase_split",
+            "result",
+            "error",
+            "filtering_score",
+            "filtering_error",
+            "leaderboard__schema",
+            "submission__submitted_at",
+            "submission__method_name",
+            "submission__id",
+            "submission__submission_metadata",
         )
+        for queryset in ranked_leaderboard_data
+    )
 
     distinct_sorted_leaderboard_data = []
-    team_list = []
+    team_list = set()
     for data in sorted_leaderboard_data:
         if (
             data["submission__participant_team__team_name"] in team_list
@@ -371,11 +827,11 @@ def calculate_distinct_sorted_leaderboard_data(
             in all_banned_participant_team
         ):
             continue
-        elif data["submission__is_baseline"] is True:
-            distinct_sorted_leaderboard_data.append(data)
-        else:
-            distinct_sorted_leaderboard_data.append(data)
-            team_list.append(data["submission__participant_team__team_name"])
+        if data["filtering_score"] is None:
+            data.update(filtering_score=0)
+        distinct_sorted_leaderboard_data.append(data)
+        if data["submission__is_baseline"] is not True:
+            team_list.add(data["submission__participant_team__team_name"])
 
     leaderboard_labels = challenge_phase_split.leaderboard.schema["labels"]
     for item in distinct_sorted_leaderboard_data:
@@ -397,6 +853,433 @@ def calculate_distinct_sorted_leaderboard_data(
     return distinct_sorted_leaderboard_data, status.HTTP_200_OK
 
 
+def get_leaderboard_cache_version(challenge_phase_split_pk):
+    """
+    Returns the current version of the cached data of a leaderboard, which
+    is part of the cache keys so that invalidating a leaderboard never
+    serves stale entries
+
+    Arguments:
+        challenge_phase_split_pk {[int]} -- Challenge phase split primary key
+    """
+    version_key = LEADERBOARD_CACHE_VERSION_KEY.format(
+        challenge_phase_split_pk
+    )
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, None)
+        version = cache.get(version_key, "")
+    return version
+
+
+def invalidate_leaderboard_caches(challenge_phase_split_pks):
+    """
+    Invalidates the cached data of the leaderboards of challenge phase
+    splits, e.g. the rank indexes, github badges and leaderboard snapshots
+
+    Arguments:
+        challenge_phase_split_pks {[list]} -- Challenge phase split primary keys
+    """
+    challenge_phase_split_pks = set(challenge_phase_split_pks)
+    delete_leaderboard_snapshots(challenge_phase_split_pks)
+    cache.set_many(
+        {
+            LEADERBOARD_CACHE_VERSION_KEY.format(
+                challenge_phase_split_pk
+            ): uuid.uuid4().hex
+            for challenge_phase_split_pk in set(challenge_phase_split_pks)
+        },
+        None,
+    )
+
+
+def build_leaderboard_rank_index(challenge_phase_split, cache_key):
+    """
+    Function to compute the ranks of the participant teams on the public
+    leaderboard of a challenge phase split and to cache them, split in
+    items of `LEADERBOARD_RANK_INDEX_CHUNK_SIZE` entries:
+        - `cache_key`, the total number of entries and of rank buckets,
+        - `<cache_key>:entries:<n>`, the n-th chunk of the (participant
+          team pk, team name, score) tuples in rank order,
+        - `<cache_key>:ranks:<n>`, the rank of the participant teams whose
+          pk modulo the number of rank buckets is n.
+
+    Returns:
+        [dict] -- The cached items by cache key
+        [status] -- HTTP status code (200/400)
+    """
+    (
+        leaderboard_data,
+        http_status_code,
+    ) = calculate_distinct_sorted_leaderboard_data(
+        None,
+        challenge_phase_split.challenge_phase.challenge,
+        challenge_phase_split,
+        only_public_entries=True,
+    )
+    if http_status_code != status.HTTP_200_OK:
+        return leaderboard_data, http_status_code
+
+    chunk_size = LEADERBOARD_RANK_INDEX_CHUNK_SIZE
+    rank_buckets = max((len(leaderboard_data) - 1) // chunk_size + 1, 1)
+    items = {
+        cache_key: {
+            "total_entries": len(leaderboard_data),
+            "rank_buckets": rank_buckets,
+        }
+    }
+    for bucket in range(rank_buckets):
+        items["{}:ranks:{}".format(cache_key, bucket)] = {}
+    for rank, item in enumerate(leaderboard_data, start=1):
+        participant_team_pk = item["submission__participant_team"]
+        items.setdefault(
+            "{}:entries:{}".format(cache_key, (rank - 1) // chunk_size), []
+        ).append(
+            (
+                participant_team_pk,
+                item["submission__participant_team__team_name"],
+                item["filtering_score"],
+            )
+        )
+        items[
+            "{}:ranks:{}".format(
+                cache_key, participant_team_pk % rank_buckets
+            )
+        ].setdefault(participant_team_pk, rank)
+    cache.set_many(items, LEADERBOARD_RANK_INDEX_CACHE_TIMEOUT)
+    return items, status.HTTP_200_OK
+
+
+def get_leaderboard_rank(
+    challenge_phase_split, participant_team_pk, neighbours=0
+):
+    """
+    Function to get the rank of a participant team on the public leaderboard
+    of a challenge phase split, computed once per change of the leaderboard
+    and cached. Only the cached items of the team and of its neighbours are
+    read.
+
+    Arguments:
+        challenge_phase_split {[Class object]} -- Challenge phase split model object
+        participant_team_pk {[int]} -- Participant team primary key
+        neighbours {[int]} -- Number of entries to return above and below
+                              the team
+
+    Returns:
+        [dict] -- The `rank` of the team, None when it is not on the
+                  leaderboard, the `total_entries` of the leaderboard and
+                  the (rank, participant team pk, team name, score) tuples
+                  of the `entries` around the team
+        [status] -- HTTP status code (200/400)
+    """
+    cache_key = LEADERBOARD_RANK_INDEX_CACHE_KEY.format(
+        challenge_phase_split.pk,
+        get_leaderboard_cache_version(challenge_phase_split.pk),
+    )
+    built_items = None
+
+    def get_items(keys):
+        nonlocal built_items
+        if built_items is None:
+            items = cache.get_many(keys)
+            if len(items) == len(keys):
+                return items, status.HTTP_200_OK
+            # e.g. some of the items were evicted
+            built_items, http_status_code = build_leaderboard_rank_index(
+                challenge_phase_split, cache_key
+            )
+            if http_status_code != status.HTTP_200_OK:
+                return built_items, http_status_code
+        return (
+            {key: built_items.get(key, []) for key in keys},
+            status.HTTP_200_OK,
+        )
+
+    items, http_status_code = get_items([cache_key])
+    if http_status_code != status.HTTP_200_OK:
+        return items, http_status_code
+    index = items[cache_key]
+    rank_bucket_key = "{}:ranks:{}".format(
+        cache_key, participant_team_pk % index["rank_buckets"]
+    )
+    items, http_status_code = get_items([rank_bucket_key])
+    if http_status_code != status.HTTP_200_OK:
+        return items, http_status_code
+    rank = items[rank_bucket_key].get(participant_team_pk)
+
+    entries = []
+    if rank is not None:
+        chunk_size = LEADERBOARD_RANK_INDEX_CHUNK_SIZE
+        start = max(rank - 1 - neighbours, 0)
+        end = min(rank + neighbours, index["total_entries"])
+        chunk_keys = [
+            "{}:entries:{}".format(cache_key, chunk)
+            for chunk in range(
+                start // chunk_size, (end - 1) // chunk_size + 1
+            )
+        ]
+        items, http_status_code = get_items(chunk_keys)
+        if http_status_code != status.HTTP_200_OK:
+            return items, http_status_code
+        chunk_entries = [
+            entry for chunk_key in chunk_keys for entry in items[chunk_key]
+        ]
+        offset = start // chunk_size * chunk_size
+        for position, entry in enumerate(
+            chunk_entries[start - offset:end - offset], start=start + 1
+        ):
+            entries.append((position,) + tuple(entry))
+    return (
+        {
+            "rank": rank,
+            "total_entries": index["total_entries"],
+            "entries": entries,
+        },
+        status.HTTP_200_OK,
+    )
+
+
+def is_leaderboard_snapshot_servable(challenge_phase_split):
+    """
+    Returns whether the leaderboard of a challenge phase split is served
+    from its snapshot, i.e. it is public and its phase ended
+    """
+    end_date = challenge_phase_split.challenge_phase.end_date
+    return (
+        challenge_phase_split.visibility == ChallengePhaseSplit.PUBLIC
+        and end_date is not None
+        and end_date < timezone.now()
+    )
+
+
+def create_leaderboard_snapshot(challenge_phase_split):
+    """
+    Function to freeze the public leaderboard of a challenge phase split
+    into a new version of its compressed JSON snapshot
+
+    The snapshots of a split are created one at a time, with a lock on the
+    split in the primary database. When another request created a newer
+    version while this one waited for the lock, that version is served
+    instead of creating a new one.
+
+    Arguments:
+        challenge_phase_split {[Class object]} -- Challenge phase split model object
+
+    Returns:
+        [list] -- Ranked list of participant teams of the snapshot
+        [status] -- HTTP status code (200/400)
+    """
+    with transaction.atomic():
+        locked_challenge_phase_split = (
+            ChallengePhaseSplit.objects.select_for_update()
+            .select_related("challenge_phase__challenge")
+            .get(pk=challenge_phase_split.pk)
+        )
+        known_version = challenge_phase_split.leaderboard_snapshot_version
+        for field_name in (
+            "leaderboard_snapshot",
+            "leaderboard_snapshot_version",
+        ):
+            setattr(
+                challenge_phase_split,
+                field_name,
+                getattr(locked_challenge_phase_split, field_name),
+            )
+        if (
+            locked_challenge_phase_split.leaderboard_snapshot
+            and locked_challenge_phase_split.leaderboard_snapshot_version
+            != known_version
+        ):
+            leaderboard_data = read_leaderboard_snapshot(
+                locked_challenge_phase_split
+            )
+            if leaderboard_data is not None:
+                return leaderboard_data, status.HTTP_200_OK
+
+        (
+            leaderboard_data,
+            http_status_code,
+        ) = calculate_distinct_sorted_leaderboard_data(
+            None,
+            locked_challenge_phase_split.challenge_phase.challenge,
+            locked_challenge_phase_split,
+            only_public_entries=True,
+        )
+        if http_status_code != status.HTTP_200_OK:
+            return leaderboard_data, http_status_code
+
+        content = json.dumps(leaderboard_data, cls=JSONEncoder)
+        # Serve the snapshot as it is stored, e.g. with dates as strings
+        leaderboard_data = json.loads(content)
+        old_snapshot = locked_challenge_phase_split.leaderboard_snapshot
+        old_snapshot_name = old_snapshot.name if old_snapshot else None
+        version = locked_challenge_phase_split.leaderboard_snapshot_version + 1
+        locked_challenge_phase_split.leaderboard_snapshot.save(
+            "leaderboard_v{}.json.gz".format(version),
+            ContentFile(gzip.compress(content.encode("utf-8"))),
+            save=False,
+        )
+        snapshot = locked_challenge_phase_split.leaderboard_snapshot
+        locked_challenge_phase_split.leaderboard_snapshot_version = version
+        try:
+            locked_challenge_phase_split.save(
+                update_fields=[
+                    "leaderboard_snapshot",
+                    "leaderboard_snapshot_version",
+                ]
+            )
+        except Exception:
+            delete_stored_file(snapshot.storage, snapshot.name)
+            raise
+        if old_snapshot_name:
+            # The old version is served until the new one is committed
+            transaction.on_commit(
+                functools.partial(
+                    delete_stored_file, old_snapshot.storage, old_snapshot_name
+                )
+            )
+    challenge_phase_split.leaderboard_snapshot = snapshot
+    challenge_phase_split.leaderboard_snapshot_version = version
+    cache.set(
+        LEADERBOARD_SNAPSHOT_CACHE_KEY.format(challenge_phase_split.pk, version),
+        leaderboard_data,
+        LEADERBOARD_SNAPSHOT_CACHE_TIMEOUT,
+    )
+    return leaderboard_data, status.HTTP_200_OK
+
+
+def delete_stored_file(storage, name):
+    try:
+        storage.delete(name)
+    except Exception:
+        logger.exception(
+            "Failed to delete leaderboard snapshot {}".format(name)
+        )
+
+
+def read_leaderboard_snapshot(challenge_phase_split):
+    """
+    Returns the entries of the leaderboard snapshot of a challenge phase
+    split, cached by version, or None if it can't be read
+    """
+    snapshot = challenge_phase_split.leaderboard_snapshot
+    cache_key = LEADERBOARD_SNAPSHOT_CACHE_KEY.format(
+        challenge_phase_split.pk,
+        challenge_phase_split.leaderboard_snapshot_version,
+    )
+    leaderboard_data = cache.get(cache_key)
+    if leaderboard_data is not None:
+        return leaderboard_data
+
+    try:
+        with snapshot.storage.open(snapshot.name, "rb") as snapshot_file:
+            content = gzip.decompress(snapshot_file.read())
+        leaderboard_data = json.loads(content.decode("utf-8"))
+    except (IOError, OSError, ValueError):
+        logger.exception(
+            "Failed to read leaderboard snapshot {}".format(snapshot.name)
+        )
+        return None
+    cache.set(cache_key, leaderboard_data, LEADERBOARD_SNAPSHOT_CACHE_TIMEOUT)
+    return leaderboard_data
+
+
+def get_leaderboard_snapshot(challenge_phase_split):
+    """
+    Function to get the entries of the leaderboard snapshot of a challenge
+    phase split, created on first use
+
+    Arguments:
+        challenge_phase_split {[Class object]} -- Challenge phase split model object
+
+    Returns:
+        [list] -- Ranked list of participant teams of the snapshot
+        [status] -- HTTP status code (200/400)
+    """
+    if challenge_phase_split.leaderboard_snapshot:
+        leaderboard_data = read_leaderboard_snapshot(challenge_phase_split)
+        if leaderboard_data is not None:
+            return leaderboard_data, status.HTTP_200_OK
+    return create_leaderboard_snapshot(challenge_phase_split)
+
+
+def delete_leaderboard_snapshots(challenge_phase_split_pks):
+    """
+    Deletes the leaderboard snapshots of challenge phase splits, so that
+    they are created again from their current leaderboards
+
+    Arguments:
+        challenge_phase_split_pks {[list]} -- Challenge phase split primary keys
+    """
+    with transaction.atomic():
+        # Waits for the snapshots being created from the old leaderboards
+        challenge_phase_splits = list(
+            ChallengePhaseSplit.objects.select_for_update()
+            .filter(pk__in=challenge_phase_split_pks)
+            .exclude(
+                Q(leaderboard_snapshot="") | Q(leaderboard_snapshot=None)
+            )
+        )
+        ChallengePhaseSplit.objects.filter(
+            pk__in=[
+                challenge_phase_split.pk
+                for challenge_phase_split in challenge_phase_splits
+            ]
+        ).update(leaderboard_snapshot=None)
+        for challenge_phase_split in challenge_phase_splits:
+            snapshot = challenge_phase_split.leaderboard_snapshot
+            transaction.on_commit(
+                functools.partial(
+                    delete_stored_file, snapshot.storage, snapshot.name
+                )
+            )
+
+
+def is_artifact_url_generation_deferred(request):
+    """
+    Returns whether the files of the submissions should be listed as
+    artifact identifiers, to be signed on demand, rather than as URLs
+    """
+    return request.query_params.get("artifact_urls") == "deferred"
+
+
+def get_artifact_identifier(submission_pk, field_name):
+    return "{}:{}".format(submission_pk, field_name)
+
+
+def parse_artifact_identifier(artifact_identifier):
+    """
+    Returns the (submission pk, field name) tuple of an artifact identifier
+
+    Raises:
+        ValueError -- if the identifier is malformed
+    """
+    if not isinstance(artifact_identifier, str):
+        raise ValueError("The artifact identifier should be a string")
+    submission_pk, field_name = artifact_identifier.split(":")
+    if field_name not in SUBMISSION_ARTIFACT_FIELDS:
+        raise ValueError("Unknown artifact {}".format(field_name))
+    return int(submission_pk), field_name
+
+
+def get_artifact_url(field_file):
+    """
+    Returns the URL of a stored file, cached for a short time since the
+    URLs of the media storage are signed on every call
+
+    Arguments:
+        field_file {[FieldFile]} -- File of a model object
+    """
+    cache_key = ARTIFACT_URL_CACHE_KEY.format(
+        hashlib.md5(field_file.name.encode("utf-8")).hexdigest()
+    )
+    url = cache.get(cache_key)
+    if url is None:
+        url = field_file.url
+        cache.set(cache_key, url, ARTIFACT_URL_CACHE_TIMEOUT)
+    return url
+
+
 def get_leaderboard_data_model(submission_pk, challenge_phase_split_pk):
     """
         Function to calculate and return the sorted leaderboard data
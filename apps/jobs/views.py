@@ -10,30 +10,46 @@ from rest_framework.decorators import (
     api_view,
     authentication_classes,
     permission_classes,
+    renderer_classes,
     throttle_classes,
 )
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.urlresolvers import reverse
 from django.db import transaction, IntegrityError
 from django.db.models import Count
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
 
 from rest_framework_expiring_authtoken.authentication import (
     ExpiringTokenAuthentication,
 )
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
 from accounts.permissions import HasVerifiedEmail
+from base.db_router import use_read_replica
+from base.events import (
+    EventStreamRenderer,
+    EventStreamTokenAuthentication,
+    acquire_event_stream_slot,
+    get_event_stream_token,
+    stream_server_sent_events,
+    subscribe_to_events,
+)
 from base.utils import (
     StandardResultSetPagination,
     get_boto3_client,
     get_or_create_sqs_queue_object,
     paginated_queryset,
+    timed_serialization,
 )
 from challenges.models import (
     ChallengePhase,
@@ -51,7 +67,7 @@ from challenges.utils import (
 )
 from hosts.models import ChallengeHost
 from hosts.utils import is_user_a_host_of_challenge
-from participants.models import ParticipantTeam
+from participants.models import Participant, ParticipantTeam
 from participants.utils import (
     get_participant_team_model,
     get_participant_team_id_of_user_for_a_challenge,
@@ -59,22 +75,48 @@ from participants.utils import (
     is_user_part_of_participant_team,
 )
 from .aws_utils import generate_aws_eks_bearer_token
+from .events import (
+    SUBMISSION_STATUS_EVENT,
+    get_leaderboard_channel,
+    get_submissions_channel,
+    publish_leaderboard_changed,
+    publish_submission_status,
+)
 from .filters import SubmissionFilter
 from .models import Submission
-from .sender import publish_submission_message
+from .scheduler import dispatch_next_submissions, get_queue_position
+from .sender import (
+    publish_submission_message,
+    publish_submission_messages,
+)
 from .serializers import (
     CreateLeaderboardDataSerializer,
     LeaderboardDataSerializer,
     RemainingSubmissionDataSerializer,
     SubmissionSerializer,
 )
+from .submission_logs import (
+    LOG_ARTIFACT_FIELDS,
+    get_log_bytes,
+    get_log_lines,
+    save_log_artifact,
+)
 from .tasks import download_file_and_publish_submission_message
 from .utils import (
     calculate_distinct_sorted_leaderboard_data,
+    create_leaderboard_snapshot,
+    get_leaderboard_cache_version,
     get_leaderboard_data_model,
+    get_leaderboard_rank,
+    get_leaderboard_snapshot,
     get_remaining_submission_for_a_phase,
+    get_artifact_url,
     get_submission_model,
     handle_submission_rerun,
+    handle_submissions_rerun,
+    is_artifact_url_generation_deferred,
+    is_leaderboard_snapshot_servable,
+    parse_artifact_identifier,
     is_url_valid,
     reorder_submissions_comparator,
     reorder_submissions_comparator_to_key
@@ -82,6 +124,14 @@ from .utils import (
 
 logger = logging.getLogger(__name__)
 
+GITHUB_BADGE_CACHE_KEY = "github_badge:{}:{}:{}"
+GITHUB_BADGE_CACHE_TIMEOUT = 60
+MAX_RANK_NEIGHBOURS = 10
+LEADERBOARD_SNAPSHOT_MAX_AGE = 60 * 60
+MAX_ARTIFACTS_PER_REQUEST = 100
+MAX_LOG_PREVIEW_LINES = 1000
+MAX_LOG_PREVIEW_BYTES = 1024 * 1024
+
 
 @swagger_auto_schema(
     methods=["post"],
@@ -178,9 +228,17 @@ def challenge_submission(request, challenge_id, challenge_phase_id):
             reordered_submissions, request
         )
         serializer = SubmissionSerializer(
-            result_page, many=True, context={"request": request}
+            result_page,
+            many=True,
+            context={
+                "request": request,
+                "defer_artifact_urls": is_artifact_url_generation_deferred(
+                    request
+                ),
+            },
         )
-        response_data = serializer.data
+        with timed_serialization():
+            response_data = serializer.data
         return paginator.get_paginated_response(response_data)
 
     elif request.method == "POST":
@@ -324,7 +382,9 @@ def challenge_submission(request, challenge_id, challenge_phase_id):
                 )
 
         if serializer.is_valid():
-            serializer.save()
+            serializer.save(
+                submitted_image_uri=message.get("submitted_image_uri")
+            )
             response_data = serializer.data
             submission = serializer.instance
             message["submission_pk"] = submission.id
@@ -437,6 +497,12 @@ def change_submission_data_and_visibility(
 
     if serializer.is_valid():
         serializer.save()
+        # The visibility of a submission changes the leaderboards
+        publish_leaderboard_changed(
+            LeaderboardData.objects.filter(submission=submission).values_list(
+                "challenge_phase_split", flat=True
+            )
+        )
         response_data = serializer.data
         return Response(response_data, status=status.HTTP_200_OK)
     else:
@@ -452,7 +518,14 @@ def change_submission_data_and_visibility(
             type=openapi.TYPE_STRING,
             description="Challenge Phase Split ID",
             required=True,
-        )
+        ),
+        openapi.Parameter(
+            name="order_by",
+            in_=openapi.IN_QUERY,
+            type=openapi.TYPE_STRING,
+            description="Label of the metric to rank the entries by",
+            required=False,
+        ),
     ],
     operation_id="leaderboard",
     responses={
@@ -513,6 +586,7 @@ def change_submission_data_and_visibility(
 )
 @api_view(["GET"])
 @throttle_classes([AnonRateThrottle])
+@use_read_replica
 def leaderboard(request, challenge_phase_split_id):
     """
     Returns leaderboard for a corresponding Challenge Phase Split
@@ -520,6 +594,9 @@ def leaderboard(request, challenge_phase_split_id):
     - Arguments:
         ``challenge_phase_split_id``: Primary key for the challenge phase split for which leaderboard is to be fetched
 
+    - Query Parameters:
+        ``order_by``: Label of the metric to rank the entries by, defaults to the `default_order_by` of the leaderboard
+
     - Returns:
         Leaderboard entry objects in a list
     """
@@ -529,15 +606,26 @@ def leaderboard(request, challenge_phase_split_id):
         challenge_phase_split_id
     )
     challenge_obj = challenge_phase_split.challenge_phase.challenge
-    (
-        response_data,
-        http_status_code,
-    ) = calculate_distinct_sorted_leaderboard_data(
-        request.user,
-        challenge_obj,
-        challenge_phase_split,
-        only_public_entries=True,
+    order_by = request.query_params.get("order_by")
+    # The leaderboards of ended phases are served from their snapshots
+    is_snapshot = order_by is None and is_leaderboard_snapshot_servable(
+        challenge_phase_split
     )
+    if is_snapshot:
+        response_data, http_status_code = get_leaderboard_snapshot(
+            challenge_phase_split
+        )
+    else:
+        (
+            response_data,
+            http_status_code,
+        ) = calculate_distinct_sorted_leaderboard_data(
+            request.user,
+            challenge_obj,
+            challenge_phase_split,
+            only_public_entries=True,
+            order_by=order_by,
+        )
     # The response 400 will be returned if the leaderboard isn't public or `default_order_by` key is missing in leaderboard.
     if http_status_code == status.HTTP_400_BAD_REQUEST:
         return Response(response_data, status=http_status_code)
@@ -546,13 +634,19 @@ def leaderboard(request, challenge_phase_split_id):
         response_data, request, pagination_class=StandardResultSetPagination()
     )
     response_data = result_page
-    return paginator.get_paginated_response(response_data)
+    response = paginator.get_paginated_response(response_data)
+    if is_snapshot:
+        patch_cache_control(
+            response, public=True, max_age=LEADERBOARD_SNAPSHOT_MAX_AGE
+        )
+    return response
 
 
 @api_view(["GET"])
 @throttle_classes([AnonRateThrottle])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def get_all_entries_on_public_leaderboard(request, challenge_phase_split_pk):
     """
     Returns public/private leaderboard entries to corresponding challenge phase split for a challenge host
@@ -560,6 +654,9 @@ def get_all_entries_on_public_leaderboard(request, challenge_phase_split_pk):
     - Arguments:
         ``challenge_phase_split_pk``: Primary key for the challenge phase split for which leaderboard is to be fetched
 
+    - Query Parameters:
+        ``order_by``: Label of the metric to rank the entries by, defaults to the `default_order_by` of the leaderboard
+
     - Returns:
         All Leaderboard entry objects in a list
     """
@@ -585,6 +682,7 @@ def get_all_entries_on_public_leaderboard(request, challenge_phase_split_pk):
         challenge_obj,
         challenge_phase_split,
         only_public_entries=False,
+        order_by=request.query_params.get("order_by"),
     )
     # The response 400 will be returned if the leaderboard isn't public or `default_order_by` key is missing in leaderboard.
     if http_status_code == status.HTTP_400_BAD_REQUEST:
@@ -671,6 +769,121 @@ def get_remaining_submissions(request, challenge_pk):
     return Response(phases_data, status=status.HTTP_200_OK)
 
 
+@api_view(["GET"])
+@throttle_classes([UserRateThrottle])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((ExpiringTokenAuthentication,))
+def get_challenge_phase_events_token(
+    request, challenge_pk, challenge_phase_pk
+):
+    """
+    API endpoint returning a short-lived token to open the event stream of a
+    challenge phase with `EventSource`, which cannot send the
+    `Authorization` header:
+
+        new EventSource(url + "?token=" + token)
+    """
+    path = reverse(
+        "jobs:get_challenge_phase_events",
+        kwargs={
+            "challenge_pk": challenge_pk,
+            "challenge_phase_pk": challenge_phase_pk,
+        },
+    )
+    response_data = {
+        "token": get_event_stream_token(request.user, path),
+        "expires_in": settings.EVENT_STREAM["TOKEN_MAX_AGE"],
+    }
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@throttle_classes([UserRateThrottle])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes(
+    (ExpiringTokenAuthentication, EventStreamTokenAuthentication)
+)
+@renderer_classes((JSONRenderer, EventStreamRenderer))
+def get_challenge_phase_events(request, challenge_pk, challenge_phase_pk):
+    """
+    API endpoint streaming the live events of a challenge phase as
+    server-sent events, so that clients only refetch submissions and
+    leaderboards when they changed:
+        - `submission_status` events of the submissions of the participant
+          team of the user, or of all the submissions for challenge hosts,
+        - `leaderboard_changed` events of the public leaderboards of the
+          phase, or of all its leaderboards for challenge hosts.
+    Browsers authenticate with the `token` query parameter returned by
+    `get_challenge_phase_events_token`. The stream is closed after
+    `settings.EVENT_STREAM["MAX_DURATION"]` seconds, and the clients
+    reconnect to it.
+    """
+    challenge = get_challenge_model(challenge_pk)
+    challenge_phase = get_challenge_phase_model(challenge_phase_pk)
+    if challenge_phase.challenge_id != challenge.pk:
+        response_data = {
+            "error": "Challenge phase {} does not belong to challenge {}".format(
+                challenge_phase_pk, challenge_pk
+            )
+        }
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    is_host = is_user_a_host_of_challenge(request.user, challenge.pk)
+    challenge_phase_splits = ChallengePhaseSplit.objects.filter(
+        challenge_phase=challenge_phase
+    )
+    if not is_host:
+        if not challenge_phase.is_public:
+            response_data = {
+                "error": "Sorry, cannot accept events for a private challenge phase"
+            }
+            return Response(response_data, status=status.HTTP_403_FORBIDDEN)
+        challenge_phase_splits = challenge_phase_splits.filter(
+            visibility=ChallengePhaseSplit.PUBLIC
+        )
+    participant_team_pk = get_participant_team_id_of_user_for_a_challenge(
+        request.user, challenge.pk
+    )
+
+    channels = [get_submissions_channel(challenge_phase.pk)] + [
+        get_leaderboard_channel(challenge_phase_split_pk)
+        for challenge_phase_split_pk in challenge_phase_splits.values_list(
+            "pk", flat=True
+        )
+    ]
+
+    def is_event_visible(channel, event):
+        if event["type"] != SUBMISSION_STATUS_EVENT:
+            return True
+        return (
+            is_host
+            or event["data"]["participant_team_id"] == participant_team_pk
+        )
+
+    # Each open stream holds a server process
+    stream_slot = acquire_event_stream_slot()
+    if stream_slot is None:
+        response_data = {
+            "error": "Too many event streams are open, please retry later"
+        }
+        response = Response(
+            response_data, status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        response["Retry-After"] = settings.EVENT_STREAM["RETRY"]
+        return response
+
+    response = StreamingHttpResponse(
+        stream_server_sent_events(
+            subscribe_to_events(channels), is_event_visible, stream_slot
+        ),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Disables the buffering of the response by nginx
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 @api_view(["GET", "DELETE"])
 @throttle_classes([UserRateThrottle])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
@@ -1018,8 +1231,8 @@ def update_submission(request, challenge_pk):
 
         submission.status = submission_status
         submission.completed_at = timezone.now()
-        submission.stdout_file.save("stdout.txt", ContentFile(stdout_content))
-        submission.stderr_file.save("stderr.txt", ContentFile(stderr_content))
+        save_log_artifact(submission, "stdout_file", stdout_content)
+        save_log_artifact(submission, "stderr_file", stderr_content)
         submission.submission_result_file.save(
             "submission_result.json", ContentFile(str(public_results))
         )
@@ -1027,6 +1240,13 @@ def update_submission(request, challenge_pk):
             "submission_metadata_file.json", ContentFile(str(metadata))
         )
         submission.save()
+        publish_submission_status(submission)
+        dispatch_next_submissions(submission)
+        if successful_submission:
+            publish_leaderboard_changed(
+                serializer.instance.challenge_phase_split_id
+                for serializer in leaderboard_data_list
+            )
         response_data = {
             "success": "Submission result has been successfully updated"
         }
@@ -1054,6 +1274,7 @@ def update_submission(request, challenge_pk):
         )
         if serializer.is_valid():
             serializer.save()
+            publish_submission_status(serializer.instance)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -1365,8 +1586,8 @@ def update_partially_evaluated_submission(request, challenge_pk):
 
         submission.status = submission_status
         submission.completed_at = timezone.now()
-        submission.stdout_file.save("stdout.txt", ContentFile(stdout_content))
-        submission.stderr_file.save("stderr.txt", ContentFile(stderr_content))
+        save_log_artifact(submission, "stdout_file", stdout_content)
+        save_log_artifact(submission, "stderr_file", stderr_content)
         submission.submission_result_file.save(
             "submission_result.json", ContentFile(str(public_results))
         )
@@ -1374,6 +1595,13 @@ def update_partially_evaluated_submission(request, challenge_pk):
             "submission_metadata_file.json", ContentFile(str(metadata))
         )
         submission.save()
+        publish_submission_status(submission)
+        dispatch_next_submissions(submission)
+        if successful_submission:
+            publish_leaderboard_changed(
+                serializer.instance.challenge_phase_split_id
+                for serializer in leaderboard_data_list
+            )
         response_data = {
             "success": "Submission result has been successfully updated"
         }
@@ -1409,6 +1637,7 @@ def update_partially_evaluated_submission(request, challenge_pk):
             )
             if serializer.is_valid():
                 serializer.save()
+                publish_submission_status(serializer.instance)
                 return Response(serializer.data, status=status.HTTP_200_OK)
             else:
                 return Response(
@@ -1553,16 +1782,18 @@ def update_partially_evaluated_submission(request, challenge_pk):
 
             submission.status = submission_status
             submission.completed_at = timezone.now()
-            submission.stdout_file.save(
-                "stdout.txt", ContentFile(stdout_content)
-            )
-            submission.stderr_file.save(
-                "stderr.txt", ContentFile(stderr_content)
-            )
+            save_log_artifact(submission, "stdout_file", stdout_content)
+            save_log_artifact(submission, "stderr_file", stderr_content)
             submission.submission_result_file.save(
                 "submission_result.json", ContentFile(str(public_results))
             )
             submission.save()
+            publish_submission_status(submission)
+            dispatch_next_submissions(submission)
+            publish_leaderboard_changed(
+                serializer.instance.challenge_phase_split_id
+                for serializer in leaderboard_data_list
+            )
             response_data = {
                 "success": "Submission result has been successfully updated"
             }
@@ -1605,6 +1836,11 @@ def re_run_submission_by_host(request, submission_pk):
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
     message = handle_submission_rerun(submission, Submission.CANCELLED)
+    if message is None:
+        response_data = {
+            "error": "Submission {} couldn't be re-run".format(submission_pk)
+        }
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
     publish_submission_message(message)
     response_data = {
         "success": "Submission is successfully submitted for re-running"
@@ -1612,6 +1848,64 @@ def re_run_submission_by_host(request, submission_pk):
     return Response(response_data, status=status.HTTP_200_OK)
 
 
+@api_view(["POST"])
+@throttle_classes([UserRateThrottle])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((ExpiringTokenAuthentication,))
+def re_run_submissions_of_phase_by_host(
+    request, challenge_pk, challenge_phase_pk
+):
+    """
+    API endpoint to re-run the submissions of a challenge phase in bulk, e.g.
+    after the test annotations were fixed. The finished submissions of the
+    phase are re-run, unless `submission_pks` are given.
+    Only challenge host has access to this endpoint.
+    """
+    challenge = get_challenge_model(challenge_pk)
+    challenge_phase = get_challenge_phase_model(challenge_phase_pk)
+
+    if challenge_phase.challenge != challenge:
+        response_data = {
+            "error": "Challenge phase {} does not belong to challenge {}".format(
+                challenge_phase_pk, challenge_pk
+            )
+        }
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    if not is_user_a_host_of_challenge(request.user, challenge.pk):
+        response_data = {
+            "error": "Only challenge hosts are allowed to re-run submissions"
+        }
+        return Response(response_data, status=status.HTTP_403_FORBIDDEN)
+
+    if not challenge.is_active:
+        response_data = {
+            "error": "Challenge {} is not active".format(challenge.title)
+        }
+        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+    submissions = Submission.objects.filter(challenge_phase=challenge_phase)
+    submission_pks = request.data.get("submission_pks")
+    if submission_pks:
+        submissions = submissions.filter(pk__in=submission_pks)
+    else:
+        submissions = submissions.filter(
+            status=Submission.FINISHED, ignore_submission=False
+        )
+
+    messages = handle_submissions_rerun(submissions, Submission.CANCELLED)
+    failed_messages = publish_submission_messages(messages)
+    response_data = {
+        "success": "{} submissions are successfully submitted for re-running".format(
+            len(messages) - len(failed_messages)
+        ),
+        "failed_submission_pks": [
+            message["submission_pk"] for message in failed_messages
+        ],
+    }
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 @throttle_classes([UserRateThrottle])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
@@ -1698,6 +1992,10 @@ def get_submissions_for_challenge(request, challenge_pk):
                         type=openapi.TYPE_STRING,
                         description="SQS message receipt handle",
                     ),
+                    "sent_timestamp": openapi.Schema(
+                        type=openapi.TYPE_INTEGER,
+                        description="Time at which the message was sent to the queue, in milliseconds since epoch",
+                    ),
                 },
             ),
         ),
@@ -1720,6 +2018,8 @@ def get_submission_message_from_queue(request, queue_name):
     - Returns:
         ``body``: The message body content as a key-value pair
         ``receipt_handle``: The message receipt handle
+        ``sent_timestamp``: Time at which the message was sent to the queue,
+                            in milliseconds since epoch
     """
     try:
         challenge = Challenge.objects.get(queue=queue_name)  # noqa
@@ -1739,10 +2039,16 @@ def get_submission_message_from_queue(request, queue_name):
 
     queue = get_or_create_sqs_queue_object(queue_name)
     try:
-        messages = queue.receive_messages()
+        # The workers report how long the messages waited in the queue
+        messages = queue.receive_messages(AttributeNames=["SentTimestamp"])
         if len(messages):
             message_receipt_handle = messages[0].receipt_handle
             message_body = eval(messages[0].body)
+            message_sent_timestamp = (messages[0].attributes or {}).get(
+                "SentTimestamp"
+            )
+            if message_sent_timestamp is not None:
+                message_sent_timestamp = int(message_sent_timestamp)
             logger.info(
                 "A submission is received with pk {}".format(
                     message_body.get("submission_pk")
@@ -1752,10 +2058,12 @@ def get_submission_message_from_queue(request, queue_name):
             logger.info("No submission received")
             message_receipt_handle = None
             message_body = None
+            message_sent_timestamp = None
 
         response_data = {
             "body": message_body,
             "receipt_handle": message_receipt_handle,
+            "sent_timestamp": message_sent_timestamp,
         }
         return Response(response_data, status=status.HTTP_200_OK)
     except botocore.exceptions.ClientError as ex:
@@ -2061,6 +2369,7 @@ def get_bearer_token(request, challenge_pk):
 @throttle_classes([UserRateThrottle])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
 @authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
 def get_github_badge_data(
     request, challenge_phase_split_pk, participant_team_pk
 ):
@@ -2079,29 +2388,363 @@ def get_github_badge_data(
         challenge_phase_split_pk
     )
     challenge_obj = challenge_phase_split.challenge_phase.challenge
+    if (
+        challenge_phase_split.visibility != ChallengePhaseSplit.PUBLIC
+        and not is_user_a_host_of_challenge(request.user, challenge_obj.pk)
+    ):
+        response_data = {"error": "Sorry, the leaderboard is not public!"}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    # Badges are fetched on every view of a README, serve them from the cache
+    cache_key = GITHUB_BADGE_CACHE_KEY.format(
+        challenge_phase_split.pk,
+        participant_team_pk,
+        get_leaderboard_cache_version(challenge_phase_split.pk),
+    )
+    data = cache.get(cache_key)
+    if data is not None:
+        return Response(data, status=status.HTTP_200_OK)
+
+    rank_data, http_status_code = get_leaderboard_rank(
+        challenge_phase_split, int(participant_team_pk)
+    )
+    if http_status_code != status.HTTP_200_OK:
+        return Response(rank_data, status=http_status_code)
+
     data = {"schemaVersion": 1, "label": "EvalAI", "color": "blue"}
+    rank = rank_data["rank"]
+    if rank is None:
+        data["message"] = f"{challenge_obj.title}"
+    else:
+        data["message"] = f"{challenge_obj.title} Rank #{rank}"
+    cache.set(cache_key, data, GITHUB_BADGE_CACHE_TIMEOUT)
+    return Response(data, status=status.HTTP_200_OK)
 
-    (
-        response_data,
-        http_status_code,
-    ) = calculate_distinct_sorted_leaderboard_data(
-        request.user,
-        challenge_obj,
-        challenge_phase_split,
-        only_public_entries=True,
+
+@api_view(["GET"])
+@throttle_classes([UserRateThrottle])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((ExpiringTokenAuthentication,))
+@use_read_replica
+def get_participant_team_rank(
+    request, challenge_phase_split_pk, participant_team_pk
+):
+    """
+    API to get the rank of a participant team on the public leaderboard of
+    a challenge phase split, with the entries ranked around it
+
+    Arguments:
+        request {HttpRequest} -- The request object
+        challenge_phase_split_pk {[int]} -- Challenge phase split primary key
+        participant_team_pk {[int]} -- Participant team primary key
+
+    Query Parameters:
+        neighbours {[int]} -- Number of entries to return above and below
+                              the team, defaults to 2 and at most 10
+
+    Returns:
+        Response Object -- An object containing the rank of the team (null
+                           when it is not on the leaderboard), the total
+                           number of entries and the neighbouring entries
+    """
+    challenge_phase_split = get_challenge_phase_split_model(
+        challenge_phase_split_pk
     )
-    if http_status_code == status.HTTP_400_BAD_REQUEST:
+    challenge_obj = challenge_phase_split.challenge_phase.challenge
+    if (
+        challenge_phase_split.visibility != ChallengePhaseSplit.PUBLIC
+        and not is_user_a_host_of_challenge(request.user, challenge_obj.pk)
+    ):
+        response_data = {"error": "Sorry, the leaderboard is not public!"}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        neighbours = int(request.query_params.get("neighbours", 2))
+    except ValueError:
+        response_data = {"error": "neighbours should be an integer"}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+    neighbours = min(max(neighbours, 0), MAX_RANK_NEIGHBOURS)
+
+    rank_data, http_status_code = get_leaderboard_rank(
+        challenge_phase_split, int(participant_team_pk), neighbours
+    )
+    if http_status_code != status.HTTP_200_OK:
+        return Response(rank_data, status=http_status_code)
+
+    response_data = {
+        "rank": rank_data["rank"],
+        "total_entries": rank_data["total_entries"],
+        "entries": [
+            {
+                "rank": rank,
+                "participant_team": participant_team,
+                "team_name": team_name,
+                "score": score,
+            }
+            for rank, participant_team, team_name, score in rank_data[
+                "entries"
+            ]
+        ],
+    }
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+@throttle_classes([UserRateThrottle])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((ExpiringTokenAuthentication,))
+def regenerate_leaderboard_snapshot(request, challenge_phase_split_pk):
+    """
+    API for a challenge host to freeze the current public leaderboard of a
+    challenge phase split into a new version of its snapshot, e.g. after
+    banning a team
+
+    Arguments:
+        request {HttpRequest} -- The request object
+        challenge_phase_split_pk {[int]} -- Challenge phase split primary key
+
+    Returns:
+        Response Object -- An object containing the version of the snapshot
+    """
+    challenge_phase_split = get_challenge_phase_split_model(
+        challenge_phase_split_pk
+    )
+    challenge_obj = challenge_phase_split.challenge_phase.challenge
+    if not is_user_a_host_of_challenge(request.user, challenge_obj.pk):
+        response_data = {
+            "error": "Sorry, you are not authorized to make this request!"
+        }
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    response_data, http_status_code = create_leaderboard_snapshot(
+        challenge_phase_split
+    )
+    if http_status_code != status.HTTP_200_OK:
         return Response(response_data, status=http_status_code)
+    response_data = {
+        "leaderboard_snapshot_version": challenge_phase_split.leaderboard_snapshot_version,
+        "entries": len(response_data),
+    }
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+@throttle_classes([UserRateThrottle])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((ExpiringTokenAuthentication,))
+def get_submission_artifact_urls(request):
+    """
+    API to get the URLs of the files of submissions listed with
+    `artifact_urls=deferred`, e.g. when a user opens them. Only the members
+    of the participant team of a submission and the challenge hosts are
+    allowed.
+
+    Arguments:
+        request {HttpRequest} -- The request object containing the list
+                                 of `artifacts` identifiers
+
+    Returns:
+        Response Object -- An object containing the `urls` of the
+                           artifacts by identifier, and the `errors` of
+                           the artifacts which cannot be returned
+    """
+    artifacts = request.data.get("artifacts")
+    if not isinstance(artifacts, list) or not artifacts:
+        response_data = {"error": "artifacts should be a non empty list"}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+    if len(artifacts) > MAX_ARTIFACTS_PER_REQUEST:
+        response_data = {
+            "error": "At most {} artifacts can be requested at once".format(
+                MAX_ARTIFACTS_PER_REQUEST
+            )
+        }
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
-    for idx, team_data in enumerate(response_data):
-        if team_data["submission__participant_team"] == int(
-            participant_team_pk
+    urls = {}
+    errors = {}
+    requested_fields = {}
+    for artifact in artifacts:
+        # Identifiers are used as keys of the response, so anything but a
+        # string is skipped
+        if not isinstance(artifact, str):
+            continue
+        try:
+            requested_fields[artifact] = parse_artifact_identifier(artifact)
+        except ValueError:
+            errors[artifact] = "Invalid artifact identifier"
+
+    submissions = Submission.objects.select_related(
+        "challenge_phase__challenge"
+    ).in_bulk(
+        [submission_pk for submission_pk, _ in requested_fields.values()]
+    )
+    user_team_pks = set(
+        Participant.objects.filter(user=request.user).values_list(
+            "team", flat=True
+        )
+    )
+    hosted_challenges = {}
+    for artifact, (submission_pk, field_name) in requested_fields.items():
+        submission = submissions.get(submission_pk)
+        if submission is None:
+            errors[artifact] = "Submission {} does not exist".format(
+                submission_pk
+            )
+            continue
+        challenge_pk = submission.challenge_phase.challenge_id
+        if challenge_pk not in hosted_challenges:
+            hosted_challenges[challenge_pk] = is_user_a_host_of_challenge(
+                request.user, challenge_pk
+            )
+        if (
+            submission.participant_team_id not in user_team_pks
+            and not hosted_challenges[challenge_pk]
         ):
-            data["message"] = f"{challenge_obj.title} Rank #{idx+1}"
-            break
+            errors[
+                artifact
+            ] = "Sorry, you are not authorized to access this artifact"
+            continue
+        field_file = getattr(submission, field_name)
+        if not field_file:
+            errors[artifact] = "The artifact does not exist"
+            continue
+        urls[artifact] = request.build_absolute_uri(
+            get_artifact_url(field_file)
+        )
+
+    response_data = {"urls": urls, "errors": errors}
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@throttle_classes([UserRateThrottle])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((ExpiringTokenAuthentication,))
+def get_submission_log_preview(request, submission_pk, log_type):
+    """
+    API to preview a range of lines or bytes of the stdout or stderr of a
+    submission, e.g. its last lines, without downloading the whole log.
+    Only the members of the participant team of the submission and the
+    challenge hosts are allowed.
+
+    Arguments:
+        request {HttpRequest} -- The request object
+        submission_pk {[int]} -- Submission primary key
+        log_type {[str]} -- `stdout` or `stderr`
+
+    Query Parameters:
+        start_line {[int]} -- First line, counted from the end when
+                              negative, defaults to -100
+        num_lines {[int]} -- Number of lines, defaults to 100
+        offset {[int]} -- First byte, counted from the end when negative,
+                          to preview a range of bytes rather than lines
+        length {[int]} -- Number of bytes, defaults to 64 KB
+
+    Returns:
+        Response Object -- An object containing the `content` of the range
+                           and its position in the log
+    """
+    field_name = "{}_file".format(log_type)
+    if field_name not in LOG_ARTIFACT_FIELDS:
+        response_data = {"error": "log_type should be stdout or stderr"}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    submission = get_submission_model(submission_pk)
+    challenge_pk = submission.challenge_phase.challenge_id
+    if not (
+        Participant.objects.filter(
+            user=request.user, team=submission.participant_team_id
+        ).exists()
+        or is_user_a_host_of_challenge(request.user, challenge_pk)
+    ):
+        response_data = {
+            "error": "Sorry, you are not authorized to make this request!"
+        }
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    if not getattr(submission, field_name):
+        response_data = {
+            "error": "The submission has no {}".format(log_type)
+        }
+        return Response(response_data, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        if "offset" in request.query_params:
+            response_data = get_log_bytes(
+                submission,
+                field_name,
+                int(request.query_params["offset"]),
+                min(
+                    int(request.query_params.get("length", 64 * 1024)),
+                    MAX_LOG_PREVIEW_BYTES,
+                ),
+            )
         else:
-            data["message"] = f"{challenge_obj.title}"
-    return Response(data, status=http_status_code)
+            response_data = get_log_lines(
+                submission,
+                field_name,
+                int(request.query_params.get("start_line", -100)),
+                min(
+                    int(request.query_params.get("num_lines", 100)),
+                    MAX_LOG_PREVIEW_LINES,
+                ),
+            )
+    except ValueError:
+        response_data = {
+            "error": "start_line, num_lines, offset and length should be integers"
+        }
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    index = submission.log_indexes.get(field_name, {})
+    response_data["truncated_bytes"] = index.get("truncated_bytes", 0)
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@throttle_classes([UserRateThrottle])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((ExpiringTokenAuthentication,))
+def get_submission_queue_position(request, submission_pk):
+    """
+    API to get the position of a submission waiting for its evaluation, and
+    the estimated times of its start and completion. Only the members of the
+    participant team of the submission and the challenge hosts are allowed.
+
+    Arguments:
+        request {HttpRequest} -- The request object
+        submission_pk {[int]} -- Submission primary key
+
+    Returns:
+        Response Object -- An object containing the `position` of the
+                           submission (0 for the next evaluated submission),
+                           the number of `waiting_submissions` of the
+                           challenge, `estimated_start_time` and
+                           `estimated_completion_time`
+    """
+    submission = get_submission_model(submission_pk)
+    challenge_pk = submission.challenge_phase.challenge_id
+    if not (
+        Participant.objects.filter(
+            user=request.user, team=submission.participant_team_id
+        ).exists()
+        or is_user_a_host_of_challenge(request.user, challenge_pk)
+    ):
+        response_data = {
+            "error": "Sorry, you are not authorized to make this request!"
+        }
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    if submission.status != Submission.SUBMITTED:
+        response_data = {
+            "error": "Submission {} is not waiting for evaluation".format(
+                submission_pk
+            )
+        }
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    response_data = get_queue_position(submission)
+    response_data["submission_id"] = submission.pk
+    return Response(response_data, status=status.HTTP_200_OK)
 
 
 @api_view(["GET"])
@@ -0,0 +1,4 @@
+#!/bin/sh
+# A single beat process schedules the periodic tasks, run by the workers
+cd /code && \
+celery -A evalai beat --loglevel=INFO --schedule=/tmp/celerybeat-schedule
@@ -13,5 +13,16 @@ else:
 app.config_from_object("django.conf:settings")
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
+app.conf.beat_schedule = {
+    "autoscale-challenge-workers": {
+        "task": "challenges.tasks.autoscale_challenge_workers",
+        "schedule": settings.WORKER_AUTOSCALER["INTERVAL"],
+    },
+    "dispatch-pending-submissions": {
+        "task": "jobs.tasks.dispatch_pending_submissions",
+        "schedule": settings.SUBMISSION_SCHEDULER["INTERVAL"],
+    },
+}
+
 if __name__ == "__main__":
     app.start()
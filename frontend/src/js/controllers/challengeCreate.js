@@ -7,9 +7,9 @@
         .module('evalai')
         .controller('ChallengeCreateCtrl', ChallengeCreateCtrl);
 
-    ChallengeCreateCtrl.$inject = ['utilities', 'loaderService', '$rootScope', '$state'];
+    ChallengeCreateCtrl.$inject = ['utilities', 'loaderService', '$rootScope', '$state', '$timeout'];
 
-    function ChallengeCreateCtrl(utilities, loaderService, $rootScope, $state) {
+    function ChallengeCreateCtrl(utilities, loaderService, $rootScope, $state, $timeout) {
         var vm = this;
         var userKey = utilities.getData('userKey');
         vm.hostTeamId = utilities.getData('challengeHostTeamId');
@@ -20,6 +20,8 @@
         vm.input_file = null;
         vm.formError = {};
         vm.syntaxErrorInYamlFile = {};
+        // interval (in ms) between two checks of the challenge creation status
+        vm.challengeCreationStatusPollInterval = 3000;
 
         vm.isExistLoader = false;
         vm.loaderTitle = '';
@@ -69,9 +71,8 @@
                                 );
 
                                 angular.element(".file-path").val(null);
-                                $rootScope.notify("success", details.success);
-                                localStorage.removeItem('challengeHostTeamId');
-                                $state.go('home');
+                                // the challenge is created in the background
+                                vm.pollChallengeCreationStatus(details.challenge_configuration.id, details.success);
                             }
                         },
                         onError: function(response) {
@@ -93,6 +94,41 @@
                 $rootScope.notify("info", vm.infoMsg);
             }
         };
+
+        // function to wait for the challenge to be created from the uploaded zip file
+        vm.pollChallengeCreationStatus = function(challengeConfigurationId, successMessage) {
+            var parameters = {};
+            parameters.url = 'challenges/challenge/challenge_configuration/' + challengeConfigurationId + '/status/';
+            parameters.method = 'GET';
+            parameters.data = {};
+            parameters.token = userKey;
+            parameters.callback = {
+                onSuccess: function(response) {
+                    var details = response.data;
+                    if (details.status === 'finished') {
+                        $rootScope.notify("success", successMessage);
+                        localStorage.removeItem('challengeHostTeamId');
+                        $state.go('home');
+                    } else if (details.status === 'failed') {
+                        vm.stopLoader();
+                        vm.isSyntaxErrorInYamlFile = true;
+                        vm.syntaxErrorInYamlFile = details.error_message;
+                    } else {
+                        vm.loaderTitle = 'create challenge (' + details.progress + '%)';
+                        $timeout(function() {
+                            vm.pollChallengeCreationStatus(challengeConfigurationId, successMessage);
+                        }, vm.challengeCreationStatusPollInterval);
+                    }
+                },
+                onError: function(response) {
+                    var error = response.data;
+                    vm.stopLoader();
+                    vm.isSyntaxErrorInYamlFile = true;
+                    vm.syntaxErrorInYamlFile = error.error;
+                }
+            };
+            utilities.sendRequest(parameters);
+        };
     }
 })();
 
@@ -125,30 +125,43 @@
         };
 
         // Get the logs from worker if submissions are failing.
-        vm.startLoadingLogs = function() {
-            vm.logs_poller = $interval(function(){
-                parameters.url = 'challenges/' + vm.challengeId + '/get_worker_logs/';
-                parameters.method = 'GET';
-                parameters.data = {};
-                parameters.callback = {
-                    onSuccess: function(response) {
-                        var details = response.data;
-                        vm.workerLogs = [];
-                        for (var i = 0; i<details.logs.length; i++){
-                            vm.workerLogs.push(details.logs[i]);
-                        }
-                    },
-                    onError: function(response) {
-                        var error = response.data.error;
-                        vm.workerLogs.push(error);
+        vm.fetchWorkerLogs = function() {
+            parameters.url = 'challenges/' + vm.challengeId + '/get_worker_logs/';
+            if (vm.workerLogsCursor) {
+                parameters.url += '?cursor=' + encodeURIComponent(vm.workerLogsCursor);
+            }
+            parameters.method = 'GET';
+            parameters.data = {};
+            parameters.callback = {
+                onSuccess: function(response) {
+                    var details = response.data;
+                    for (var i = 0; i<details.logs.length; i++){
+                        vm.workerLogs.push(details.logs[i]);
                     }
-                };
-                utilities.sendRequest(parameters);
-            }, 5000);
+                    vm.workerLogsCursor = details.cursor;
+                    // the remaining logs are fetched right away
+                    if (details.truncated && vm.logs_poller) {
+                        vm.fetchWorkerLogs();
+                    }
+                },
+                onError: function(response) {
+                    var error = response.data.error;
+                    vm.workerLogs.push(error);
+                }
+            };
+            utilities.sendRequest(parameters);
+        };
+
+        vm.startLoadingLogs = function() {
+            vm.workerLogs = [];
+            // cursor of the last fetched log, so that only new logs are fetched
+            vm.workerLogsCursor = null;
+            vm.logs_poller = $interval(vm.fetchWorkerLogs, 5000);
         };
 
         vm.stopLoadingLogs = function(){
             $interval.cancel(vm.logs_poller);
+            vm.logs_poller = null;
         };
 
          // scroll to the specific entry of the leaderboard
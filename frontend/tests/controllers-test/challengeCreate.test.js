@@ -33,14 +33,28 @@ describe('Unit tests for challenge create controller', function() {
     });
 
     describe('Unit tests for challengeCreate function', function() {
-    	var success;
+    	var success, creationStatus;
 
     	beforeEach(function() {
+            creationStatus = 'finished';
             utilities.sendRequest = function(parameters) {
-                if (success) {
+                if (success && parameters.method === 'GET') {
+                    parameters.callback.onSuccess({
+                    	status: 200,
+                    	data: {
+                    		id: 1,
+                    		status: creationStatus,
+                    		progress: 50,
+                    		error_message: 'yaml error'
+                    	}
+                    });
+                } else if (success) {
                     parameters.callback.onSuccess({
                     	status: 201,
-                    	data: 'success'
+                    	data: {
+                    		success: 'success',
+                    		challenge_configuration: {id: 1}
+                    	}
                     });
                 } else {
                     parameters.callback.onError({
@@ -68,6 +82,19 @@ describe('Unit tests for challenge create controller', function() {
     		expect($state.go).toHaveBeenCalledWith('home');
     	});
 
+    	it('failure of `challenges/challenge/challenge_configuration/<challenge_configuration_id>/status/`', function() {
+    		success = true;
+    		creationStatus = 'failed';
+    		vm.hostTeamId = 1;
+    		vm.input_file = 'challenge_conf.zip'
+    		spyOn($state, 'go');
+    		vm.challengeCreate();
+    		expect(vm.isSyntaxErrorInYamlFile).toEqual(true);
+    		expect(vm.syntaxErrorInYamlFile).toEqual('yaml error');
+    		expect(vm.isExistLoader).toEqual(false);
+    		expect($state.go).not.toHaveBeenCalled();
+    	});
+
     	it('error of `challenges/challenge/challenge_host_team/<host_team_id>/zip_upload/`', function() {
     		success = false;
     		vm.hostTeamId = 1;
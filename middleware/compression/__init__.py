@@ -0,0 +1,3 @@
+from .gzip_request_middleware import GzipRequestMiddleware
+
+__all__ = [GzipRequestMiddleware]
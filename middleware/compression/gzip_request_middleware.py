@@ -0,0 +1,40 @@
+import zlib
+
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+
+
+class GzipRequestMiddleware(MiddlewareMixin):
+    """
+    Middleware to transparently decompress request bodies sent with
+    `Content-Encoding: gzip`, e.g. the submission results sent by workers.
+    """
+
+    def process_request(self, request):
+        content_encoding = request.META.get("HTTP_CONTENT_ENCODING", "")
+        if content_encoding.lower() != "gzip":
+            return None
+
+        # Guard against decompression bombs
+        max_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(request.body, max_size)
+        except zlib.error:
+            response_data = {"error": "Request body is not valid gzip"}
+            return JsonResponse(response_data, status=400)
+        except RequestDataTooBig:
+            body = None
+        if body is None or decompressor.unconsumed_tail:
+            response_data = {"error": "Request body is too large"}
+            return JsonResponse(response_data, status=413)
+
+        request._body = body
+        request._stream = BytesIO(body)
+        request.META["CONTENT_LENGTH"] = str(len(body))
+        del request.META["HTTP_CONTENT_ENCODING"]
+        return None
@@ -0,0 +1,66 @@
+import logging
+import threading
+
+from queue import Full, Queue
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedEventEmitter(object):
+    """
+    Sends events from a background thread so that the request which
+    generated them never waits on the network.
+
+    Events are buffered in a bounded in-memory queue. When the queue is full
+    (e.g. the events API is down) new events are dropped and counted instead
+    of blocking the request.
+
+    Arguments:
+        send {callable} -- function called with the keyword arguments of
+                           every emitted event, e.g. `api.Event.create`
+        max_buffer_size {int} -- maximum number of pending events
+    """
+
+    def __init__(self, send, max_buffer_size=1000):
+        self.send = send
+        self.queue = Queue(maxsize=max_buffer_size)
+        self.dropped_events = 0
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def emit(self, **event):
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait(event)
+        except Full:
+            self.dropped_events += 1
+            return False
+        return True
+
+    def flush(self):
+        """
+        Blocks until every buffered event has been sent.
+        """
+        self.queue.join()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run, name="metrics-event-emitter"
+            )
+            self._worker.daemon = True
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            try:
+                self.send(**event)
+            except Exception:
+                logger.exception("Unable to send metrics event")
+            finally:
+                self.queue.task_done()
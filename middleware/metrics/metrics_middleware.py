@@ -1,12 +1,18 @@
+import random
 import time
 import traceback
 
 from django.conf import settings
+from django.db import connections
 from django.utils.deprecation import MiddlewareMixin
 
 from datadog import initialize
 from datadog import statsd, api
 
+from base.utils import get_serialization_time, reset_serialization_time
+
+from .event_emitter import BufferedEventEmitter
+
 options = {
     "api_key": settings.DATADOG_API_KEY,
     "app_key": settings.DATADOG_APP_KEY,
@@ -14,17 +20,49 @@ options = {
 
 initialize(**options)
 
+event_emitter = BufferedEventEmitter(
+    api.Event.create,
+    max_buffer_size=getattr(settings, "DATADOG_EVENT_BUFFER_SIZE", 1000),
+)
+
 
 class DatadogMiddleware(MiddlewareMixin):
     """
     Middleware to submit some metrics to DataDog about each requests.
+
+    Metrics are tagged with the resolved URL name instead of the raw path so
+    that primary keys in URLs do not blow up the number of tag values.
+    Besides the request time, the serialization time measured by the views
+    with `timed_serialization` and the response size are reported for every
+    request.
+
+    The queries of a sample of the requests, `DATADOG_DB_QUERIES_SAMPLE_RATE`,
+    are recorded to report their number of DB queries and DB time. Slow
+    sampled requests can be dumped into events listing their slowest
+    queries by setting `DATADOG_SLOW_REQUEST_THRESHOLD` (in seconds) and
+    `DATADOG_SLOW_REQUEST_SAMPLE_RATE`.
     """
 
     DATADOG_TIMING_ATTRIBUTE = "_datadog_start_time"
+    DATADOG_DEBUG_CURSOR_ATTRIBUTE = "_datadog_force_debug_cursor"
     app_name = settings.DATADOG_APP_NAME
 
     def process_request(self, request):
         setattr(request, self.DATADOG_TIMING_ATTRIBUTE, time.time())
+        reset_serialization_time()
+        sample_rate = getattr(settings, "DATADOG_DB_QUERIES_SAMPLE_RATE", 0)
+        if random.random() < sample_rate:
+            # Record queries even when DEBUG is off, restored once done
+            force_debug_cursor = {}
+            for connection in connections.all():
+                force_debug_cursor[
+                    connection.alias
+                ] = connection.force_debug_cursor
+                connection.force_debug_cursor = True
+                connection.queries_log.clear()
+            setattr(
+                request, self.DATADOG_DEBUG_CURSOR_ATTRIBUTE, force_debug_cursor
+            )
 
     def process_response(self, request, response):
         if not hasattr(request, self.DATADOG_TIMING_ATTRIBUTE):
@@ -33,6 +71,7 @@ class DatadogMiddleware(MiddlewareMixin):
         request_time = time.time() - getattr(
             request, self.DATADOG_TIMING_ATTRIBUTE
         )
+        queries = self._collect_queries(request)
 
         timing_metric = "{0}.request_time".format(self.app_name)
         count_metric = "{0}.no_of_requests_metric".format(self.app_name)
@@ -44,6 +83,7 @@ class DatadogMiddleware(MiddlewareMixin):
         )
 
         tags = self._get_metric_tags(request)
+        tags.append("status_code:{0}".format(response.status_code))
 
         if 200 <= response.status_code < 400:
             statsd.increment(success_metric, tags=tags)
@@ -52,22 +92,104 @@ class DatadogMiddleware(MiddlewareMixin):
 
         statsd.increment(count_metric, tags=tags)
         statsd.histogram(timing_metric, request_time, tags=tags)
+        statsd.histogram(
+            "{0}.serializer_time".format(self.app_name),
+            get_serialization_time(),
+            tags=tags,
+        )
+
+        response_size = self._get_response_size(response)
+        if response_size is not None:
+            statsd.histogram(
+                "{0}.response_size".format(self.app_name),
+                response_size,
+                tags=tags,
+            )
+
+        if queries is not None:
+            db_time = sum(float(query["time"]) for query in queries)
+            statsd.histogram(
+                "{0}.db_query_count".format(self.app_name),
+                len(queries),
+                tags=tags,
+            )
+            statsd.histogram(
+                "{0}.db_time".format(self.app_name), db_time, tags=tags
+            )
+            self._sample_slow_request(request, request_time, queries)
 
         return response
 
     def process_exception(self, request, exception):
         exc = traceback.format_exc()
-        title = "Exception from {0}".format(request.path)
-        text = "Traceback: {0}".format(exc)
+        title = "Exception from {0}".format(self._get_route_name(request))
+        text = "Path: {0}\nTraceback: {1}".format(request.path, exc)
 
         tags = self._get_metric_tags(request)
         event_tags = [self.app_name, "unhandled_exception"]
-        app_error_metric = "{0}.unhandled_errors.{1}".format(
-            self.app_name, request.path
-        )
+        app_error_metric = "{0}.unhandled_errors".format(self.app_name)
 
         statsd.increment(app_error_metric, tags=tags)
-        api.Event.create(title=title, text=text, tags=event_tags)
+        event_emitter.emit(title=title, text=text, tags=event_tags)
+
+    def _collect_queries(self, request):
+        force_debug_cursor = getattr(
+            request, self.DATADOG_DEBUG_CURSOR_ATTRIBUTE, None
+        )
+        if force_debug_cursor is None:
+            return None
+        queries = []
+        for connection in connections.all():
+            if connection.alias not in force_debug_cursor:
+                continue
+            queries.extend(connection.queries)
+            connection.force_debug_cursor = force_debug_cursor[
+                connection.alias
+            ]
+        return queries
+
+    def _sample_slow_request(self, request, request_time, queries):
+        threshold = getattr(settings, "DATADOG_SLOW_REQUEST_THRESHOLD", None)
+        if threshold is None or request_time < threshold:
+            return
+        sample_rate = getattr(settings, "DATADOG_SLOW_REQUEST_SAMPLE_RATE", 0)
+        if random.random() >= sample_rate:
+            return
+
+        max_queries = getattr(settings, "DATADOG_SLOW_REQUEST_MAX_QUERIES", 10)
+        slowest_queries = sorted(
+            queries, key=lambda query: float(query["time"]), reverse=True
+        )[:max_queries]
+        text = "Path: {0}\nRequest time: {1:.3f}s\nQueries: {2}\n\n{3}".format(
+            request.path,
+            request_time,
+            len(queries),
+            "\n\n".join(
+                "[{0}s] {1}".format(query["time"], query["sql"])
+                for query in slowest_queries
+            ),
+        )
+        event_emitter.emit(
+            title="Slow request to {0}".format(self._get_route_name(request)),
+            text=text,
+            tags=[self.app_name, "slow_request"],
+            alert_type="warning",
+        )
+
+    def _get_response_size(self, response):
+        if response.streaming:
+            content_length = response.get("Content-Length")
+            return int(content_length) if content_length else None
+        return len(response.content)
+
+    def _get_route_name(self, request):
+        resolver_match = getattr(request, "resolver_match", None)
+        if resolver_match is None or not resolver_match.url_name:
+            return "unresolved"
+        return resolver_match.view_name
 
     def _get_metric_tags(self, request):
-        return ["path:{0}".format(request.path)]
+        return [
+            "route:{0}".format(self._get_route_name(request)),
+            "method:{0}".format(request.method),
+        ]
@@ -0,0 +1,3 @@
+from .replica_middleware import ReplicaStickinessMiddleware
+
+__all__ = [ReplicaStickinessMiddleware]
@@ -0,0 +1,18 @@
+from django.utils.deprecation import MiddlewareMixin
+
+from base.db_router import SAFE_METHODS, pin_user_to_primary
+
+
+class ReplicaStickinessMiddleware(MiddlewareMixin):
+    """
+    Middleware to keep serving the reads of a user from the primary database
+    for a short while after they successfully changed something, so that they
+    do not see stale data from a lagging read replica.
+    """
+
+    def process_response(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return response
+        # DRF sets the authenticated user back on the wrapped Django request
+        pin_user_to_primary(getattr(request, "user", None))
+        return response
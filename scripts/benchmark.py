@@ -0,0 +1,479 @@
+# Command to run : python manage.py benchmark -i 5 -r benchmark_report.json
+"""
+Measures latency and number of DB queries of the hot API endpoints and of a
+submission worker `run_submission` round against the challenge created by
+`scripts/scale_seed.py`.
+
+The results are written to a JSON report. The query count of every
+endpoint is checked against its budget in `scripts/benchmark_budgets.json`,
+and the run exits with a non-zero status if any budget is exceeded. Query
+counts only depend on the code and on the seeded dataset, so the budgets
+are only checked against the `dataset` they were recorded for. Use
+`--update-budgets` to record the current query counts as the new budgets.
+Latencies depend on the machine and are only reported.
+
+The submissions created by the benchmark are deleted once it completes, and
+the seeded submissions are left as they are.
+"""
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import types
+
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.urlresolvers import reverse_lazy
+from django.core.signals import request_started
+from django.db import connections, reset_queries
+from django.db.models import Max
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from challenges.models import Challenge, ChallengePhaseSplit
+from jobs.models import Submission
+
+from scripts.scale_seed import SCALE_CHALLENGE_TITLE, SCALE_HOST_USERNAME
+
+ITERATIONS = 5
+REPORT_PATH = "benchmark_report.json"
+BUDGETS_PATH = os.path.join(
+    settings.BASE_DIR, "scripts", "benchmark_budgets.json"
+)
+# Middleware running queries of its own, left out of the measurements
+PROFILING_MIDDLEWARE = ("silk.middleware.SilkyMiddleware",)
+BENCHMARK_INPUT_FILE = "submission_files/benchmark_input.txt"
+SUBMISSION_FILE_FIELDS = (
+    "input_file",
+    "stdout_file",
+    "stderr_file",
+    "submission_result_file",
+    "submission_metadata_file",
+)
+
+
+class QueryCounter(object):
+    """
+    Stands in for the query logs of the connections, and only counts the
+    queries instead of keeping them, as the CSV export runs millions of
+    queries at scale.
+    """
+
+    maxlen = None
+
+    def __init__(self):
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, query):
+        self.count += 1
+
+
+@contextlib.contextmanager
+def count_all_queries():
+    """
+    Counts the queries run on every configured database, so that reads
+    routed to a replica are counted as well. Unlike `CaptureQueriesContext`,
+    the count is not capped by the `queries_limit` of the connections.
+    """
+    counter = QueryCounter()
+    previous_states = [
+        (connection, connection.force_debug_cursor, connection.queries_log)
+        for connection in connections.all()
+    ]
+    # The test client resets the query logs on every request
+    request_started.disconnect(reset_queries)
+    for connection, _, _ in previous_states:
+        connection.force_debug_cursor = True
+        connection.queries_log = counter
+    try:
+        yield counter
+    finally:
+        for connection, force_debug_cursor, queries_log in previous_states:
+            connection.force_debug_cursor = force_debug_cursor
+            connection.queries_log = queries_log
+        request_started.connect(reset_queries)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def measure(name, func, iterations, setup=None):
+    """
+    Calls `func` `iterations` times and returns its latency and query count
+    statistics. `setup` is called before every iteration, outside of the
+    measurement.
+    """
+    latencies, query_counts, status_codes = [], [], set()
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        with count_all_queries() as counter:
+            start_time = time.time()
+            response = func()
+            latencies.append((time.time() - start_time) * 1000)
+        query_counts.append(counter.count)
+        if response is not None:
+            status_codes.add(response.status_code)
+    print(
+        "{}: p50 {:.1f}ms, p95 {:.1f}ms, {} queries".format(
+            name,
+            percentile(latencies, 0.5),
+            percentile(latencies, 0.95),
+            max(query_counts),
+        )
+    )
+    return {
+        "iterations": iterations,
+        "status_codes": sorted(status_codes),
+        "latency_ms": {
+            "min": min(latencies),
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "max": max(latencies),
+        },
+        "queries": max(query_counts),
+    }
+
+
+def get_benchmark_fixtures():
+    challenge = (
+        Challenge.objects.filter(title__startswith=SCALE_CHALLENGE_TITLE)
+        .order_by("-pk")
+        .first()
+    )
+    if challenge is None:
+        print("No scale seeded challenge found, run `scale_seed` first.")
+        sys.exit(1)
+    challenge_phase_split = (
+        ChallengePhaseSplit.objects.filter(
+            challenge_phase__challenge=challenge
+        )
+        .select_related("challenge_phase")
+        .order_by("pk")
+        .first()
+    )
+    participant_team = (
+        challenge.participant_teams.exclude(team_name__startswith="Host_")
+        .order_by("pk")
+        .first()
+    )
+    return {
+        "challenge": challenge,
+        # Submissions with a greater pk are created by the benchmark
+        "last_seeded_submission_pk": Submission.objects.aggregate(
+            Max("pk")
+        )["pk__max"]
+        or 0,
+        "challenge_phase": challenge_phase_split.challenge_phase,
+        "challenge_phase_split": challenge_phase_split,
+        "participant_team": participant_team,
+        "participant_user": participant_team.created_by,
+        "host_user": User.objects.get(username=SCALE_HOST_USERNAME),
+    }
+
+
+def get_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def benchmark_endpoints(fixtures, iterations):
+    challenge = fixtures["challenge"]
+    challenge_phase = fixtures["challenge_phase"]
+    participant_client = get_client(fixtures["participant_user"])
+    host_client = get_client(fixtures["host_user"])
+    submission_url = reverse_lazy(
+        "jobs:challenge_submission",
+        kwargs={
+            "challenge_id": challenge.pk,
+            "challenge_phase_id": challenge_phase.pk,
+        },
+    )
+
+    def submit():
+        input_file = SimpleUploadedFile(
+            "benchmark_input.txt", b"benchmark", content_type="text/plain"
+        )
+        return participant_client.post(
+            submission_url,
+            {"status": "submitting", "input_file": input_file},
+            format="multipart",
+        )
+
+    def finish_pending_submissions():
+        # Keeps the concurrent submissions limit from rejecting submissions
+        get_benchmark_submissions(fixtures).filter(
+            status=Submission.SUBMITTED
+        ).update(status=Submission.FINISHED)
+
+    results = {}
+    results["leaderboard"] = measure(
+        "leaderboard",
+        lambda: participant_client.get(
+            reverse_lazy(
+                "jobs:leaderboard",
+                kwargs={
+                    "challenge_phase_split_id": fixtures[
+                        "challenge_phase_split"
+                    ].pk
+                },
+            )
+        ),
+        iterations,
+    )
+    results["my_submissions"] = measure(
+        "my_submissions",
+        lambda: participant_client.get(submission_url),
+        iterations,
+    )
+    results["host_submissions"] = measure(
+        "host_submissions",
+        lambda: host_client.get(
+            reverse_lazy(
+                "challenges:get_all_submissions_of_challenge",
+                kwargs={
+                    "challenge_pk": challenge.pk,
+                    "challenge_phase_pk": challenge_phase.pk,
+                },
+            )
+        ),
+        iterations,
+    )
+    results["csv_export"] = measure(
+        "csv_export",
+        lambda: host_client.get(
+            reverse_lazy(
+                "challenges:download_all_submissions",
+                kwargs={
+                    "challenge_pk": challenge.pk,
+                    "challenge_phase_pk": challenge_phase.pk,
+                    "file_type": "csv",
+                },
+            )
+        ),
+        # The export walks every submission of the challenge
+        1,
+    )
+    results["remaining_submissions"] = measure(
+        "remaining_submissions",
+        lambda: participant_client.get(
+            reverse_lazy(
+                "jobs:get_remaining_submissions",
+                kwargs={"challenge_pk": challenge.pk},
+            )
+        ),
+        iterations,
+    )
+    with mock.patch("jobs.views.publish_submission_message"):
+        results["submit"] = measure(
+            "submit", submit, iterations, setup=finish_pending_submissions
+        )
+    return results
+
+
+def benchmark_worker(fixtures, iterations):
+    """
+    Benchmarks the bookkeeping of one `run_submission` round of the
+    submission worker, i.e. everything except the evaluation script itself,
+    which is replaced by a stub returning a result for every dataset split.
+    """
+    import scripts.workers.submission_worker as submission_worker
+
+    challenge = fixtures["challenge"]
+    challenge_phase = fixtures["challenge_phase"]
+    split_codenames = ChallengePhaseSplit.objects.filter(
+        challenge_phase=challenge_phase
+    ).values_list("dataset_split__codename", flat=True)
+
+    def evaluate(*args, **kwargs):
+        return {
+            "result": [
+                {codename: {"score": 50.0, "accuracy": 0.5}}
+                for codename in split_codenames
+            ],
+            "submission_metadata": "{}",
+            "submission_result": ["benchmark"],
+        }
+
+    submission_worker.EVALUATION_SCRIPTS[challenge.pk] = types.ModuleType(
+        "benchmark_evaluation_script"
+    )
+    submission_worker.EVALUATION_SCRIPTS[challenge.pk].evaluate = evaluate
+    submission_worker.PHASE_ANNOTATION_FILE_NAME_MAP[challenge.pk] = {
+        challenge_phase.pk: "annotation.txt"
+    }
+
+    submissions = []
+
+    def create_submission():
+        submission = Submission(
+            participant_team=fixtures["participant_team"],
+            challenge_phase=challenge_phase,
+            created_by=fixtures["participant_user"],
+            input_file=BENCHMARK_INPUT_FILE,
+        )
+        submission.save()
+        submissions.append(submission)
+
+    def run_submission():
+        submission_worker.run_submission(
+            challenge.pk,
+            challenge_phase,
+            submissions[-1],
+            "/dev/null",
+        )
+
+    # The next submissions of the challenge are not dispatched
+    with mock.patch.object(submission_worker, "dispatch_next_submissions"):
+        return {
+            "run_submission": measure(
+                "run_submission",
+                run_submission,
+                iterations,
+                setup=create_submission,
+            )
+        }
+
+
+def get_benchmark_submissions(fixtures):
+    return Submission.objects.filter(
+        pk__gt=fixtures["last_seeded_submission_pk"],
+        challenge_phase=fixtures["challenge_phase"],
+        participant_team=fixtures["participant_team"],
+    )
+
+
+def delete_benchmark_submissions(fixtures):
+    """
+    Deletes the submissions created by the benchmark, with their files and
+    leaderboard entries
+    """
+    submissions = get_benchmark_submissions(fixtures)
+    for submission in submissions:
+        for field_name in SUBMISSION_FILE_FIELDS:
+            field_file = getattr(submission, field_name)
+            # The worker round shares a single input file
+            if field_file and field_file.name != BENCHMARK_INPUT_FILE:
+                field_file.delete(save=False)
+    _, deleted = submissions.delete()
+    print(
+        "Deleted {} benchmark submissions".format(
+            deleted.get("jobs.Submission", 0)
+        )
+    )
+
+
+def load_budgets():
+    if not os.path.exists(BUDGETS_PATH):
+        return {"dataset": None, "max_queries": {}}
+    with open(BUDGETS_PATH, "r") as budgets_file:
+        return json.load(budgets_file)
+
+
+def check_budgets(dataset, results, budgets):
+    """
+    Returns the violations of the query budgets, the budgets of another
+    dataset cannot be checked
+    """
+    if dataset != budgets["dataset"]:
+        return [
+            "The budgets were recorded for the dataset {}, not {}".format(
+                budgets["dataset"], dataset
+            )
+        ]
+    violations = []
+    for name, result in sorted(results.items()):
+        max_queries = budgets["max_queries"].get(name)
+        if max_queries is None:
+            violations.append("{}: no query budget".format(name))
+        elif result["queries"] > max_queries:
+            violations.append(
+                "{}: {} queries exceed the budget of {}".format(
+                    name, result["queries"], max_queries
+                )
+            )
+    return violations
+
+
+def update_budgets(dataset, results):
+    budgets = {
+        "dataset": dataset,
+        "max_queries": {
+            name: result["queries"] for name, result in results.items()
+        },
+    }
+    with open(BUDGETS_PATH, "w") as budgets_file:
+        json.dump(budgets, budgets_file, indent=4, sort_keys=True)
+        budgets_file.write("\n")
+    print("Budgets updated in {}".format(BUDGETS_PATH))
+
+
+def run(*args):
+    """
+    Arguments:
+        args[0] {int} -- Number of iterations per endpoint
+        args[1] {str} -- Path of the JSON report
+        args[2] {str} -- Pass `update_budgets` to record the query counts as
+                         the new budgets
+    """
+    iterations = int(args[0]) if len(args) > 0 else ITERATIONS
+    report_path = args[1] if len(args) > 1 else REPORT_PATH
+    should_update_budgets = len(args) > 2 and args[2] == "update_budgets"
+
+    fixtures = get_benchmark_fixtures()
+    middleware = [
+        name
+        for name in settings.MIDDLEWARE
+        if name not in PROFILING_MIDDLEWARE
+    ]
+    try:
+        with override_settings(MIDDLEWARE=middleware):
+            results = benchmark_endpoints(fixtures, iterations)
+            results.update(benchmark_worker(fixtures, iterations))
+    finally:
+        delete_benchmark_submissions(fixtures)
+
+    dataset = {
+        "submissions": Submission.objects.filter(
+            challenge_phase__challenge=fixtures["challenge"]
+        ).count(),
+        "participant_teams": fixtures["challenge"].participant_teams.count(),
+    }
+    budgets = load_budgets()
+    violations = check_budgets(dataset, results, budgets)
+    report = {
+        "created_at": timezone.now().isoformat(),
+        "python_version": platform.python_version(),
+        "challenge_pk": fixtures["challenge"].pk,
+        "dataset": dataset,
+        "results": results,
+        "budgets": budgets,
+        "violations": violations,
+        "passed": not violations,
+    }
+    with open(report_path, "w") as report_file:
+        json.dump(report, report_file, indent=4, sort_keys=True)
+    print("Benchmark report written to {}".format(report_path))
+
+    if should_update_budgets:
+        update_budgets(dataset, results)
+        return
+    if violations:
+        print("Query budgets exceeded:")
+        for violation in violations:
+            print("  {}".format(violation))
+        sys.exit(1)
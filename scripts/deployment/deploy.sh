@@ -42,7 +42,7 @@ case $opt in
             eval $(aws ecr get-login --no-include-email) && \
             aws s3 cp s3://cloudcv-secrets/evalai/${env}/docker_${env}.env ./docker/prod/docker_${env}.env && \
             docker-compose -f docker-compose-${env}.yml pull && \
-            docker-compose -f docker-compose-${env}.yml up -d --force-recreate --remove-orphans django nodejs nodejs_v2 celery "
+            docker-compose -f docker-compose-${env}.yml up -d --force-recreate --remove-orphans django nodejs nodejs_v2 celery celery_beat "
             ;;
         pull)
             aws_login;
@@ -70,7 +70,7 @@ case $opt in
             ;;
         deploy-celery)
             echo "Deploying celery docker container..."
-            docker-compose -f docker-compose-${env}.yml up -d celery
+            docker-compose -f docker-compose-${env}.yml up -d celery celery_beat
             echo "Completed deploy operation."
             ;;
         deploy-worker)
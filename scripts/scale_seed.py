@@ -0,0 +1,268 @@
+# Command to run : python manage.py scale_seed -ns 100000 -nt 2000
+"""
+Seeds the database with a challenge at production scale (10^5 - 10^6
+submissions, thousands of participant teams) to benchmark the read and write
+paths of the API and the submission worker against. See `scripts/benchmark.py`.
+
+Rows are created with `bulk_create` in batches, so the model `save` methods
+and signals (e.g. submission quota checks) are bypassed on purpose.
+"""
+import random
+
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from allauth.account.models import EmailAddress
+
+from accounts.models import Profile
+from base.utils import suppress_autotime
+from challenges.models import (
+    ChallengePhase,
+    LeaderboardData,
+    update_leaderboard_metrics,
+)
+from jobs.models import Submission
+from participants.models import Participant, ParticipantTeam
+
+from scripts import seed
+
+NUMBER_OF_SUBMISSIONS = 100000
+NUMBER_OF_TEAMS = 2000
+NUMBER_OF_PHASES = 2
+NUMBER_OF_DATASET_SPLITS = 2
+BATCH_SIZE = 5000
+FAILED_SUBMISSION_RATIO = 0.2
+# Submissions and results are generated from a fixed seed, so that the same
+# arguments always seed the same dataset and the query counts measured by
+# the benchmark can be compared to its budgets
+RANDOM_SEED = 0
+
+SCALE_CHALLENGE_TITLE = "Scale Benchmark Challenge"
+SCALE_HOST_USERNAME = "scale_host"
+SCALE_PARTICIPANT_USERNAME = "scale_participant_{}"
+SCALE_TEAM_NAME = "Scale Team {} {}"
+SCALE_INPUT_FILE = "submission_files/scale_seed_input.txt"
+
+# Spread submissions over the phase so that daily/monthly quota and
+# latest-submission queries look at realistic date ranges.
+SUBMISSION_TIME_SPREAD = timedelta(days=90)
+
+
+def batches(iterable, batch_size=BATCH_SIZE):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def create_participant_teams(number_of_teams, run_id):
+    """
+    Creates `number_of_teams` users, each owning a participant team, and
+    returns the list of teams.
+    """
+    password = make_password("password")
+    usernames = [
+        SCALE_PARTICIPANT_USERNAME.format("{}_{}".format(run_id, i))
+        for i in range(number_of_teams)
+    ]
+    User.objects.bulk_create(
+        [
+            User(
+                username=username,
+                email="{}@example.com".format(username),
+                password=password,
+            )
+            for username in usernames
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    users = list(User.objects.filter(username__in=usernames).order_by("id"))
+    # `bulk_create` skips the signal creating the profile of a user
+    Profile.objects.bulk_create(
+        [Profile(user=user) for user in users], batch_size=BATCH_SIZE
+    )
+    EmailAddress.objects.bulk_create(
+        [
+            EmailAddress(
+                user=user, email=user.email, verified=True, primary=True
+            )
+            for user in users
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    ParticipantTeam.objects.bulk_create(
+        [
+            ParticipantTeam(
+                team_name=SCALE_TEAM_NAME.format(run_id, i), created_by=user
+            )
+            for i, user in enumerate(users)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    teams = list(
+        ParticipantTeam.objects.filter(created_by__in=users)
+        .select_related("created_by")
+        .order_by("id")
+    )
+    Participant.objects.bulk_create(
+        [
+            Participant(
+                user=team.created_by, team=team, status=Participant.SELF
+            )
+            for team in teams
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    print("{} participant teams created.".format(len(teams)))
+    return teams
+
+
+def create_submissions(challenge_phase, teams, number_of_submissions, rng):
+    """
+    Bulk creates submissions for a challenge phase, randomly distributed
+    among the teams, and returns the ids of the finished ones.
+    """
+    now = timezone.now()
+    submission_numbers = {team.pk: 0 for team in teams}
+
+    def generate():
+        for _ in range(number_of_submissions):
+            team = rng.choice(teams)
+            submission_numbers[team.pk] += 1
+            status = (
+                Submission.FAILED
+                if rng.random() < FAILED_SUBMISSION_RATIO
+                else Submission.FINISHED
+            )
+            submitted_at = now - SUBMISSION_TIME_SPREAD * rng.random()
+            yield Submission(
+                participant_team=team,
+                challenge_phase=challenge_phase,
+                created_by=team.created_by,
+                status=status,
+                submission_number=submission_numbers[team.pk],
+                input_file=SCALE_INPUT_FILE,
+                method_name="Method {}".format(submission_numbers[team.pk]),
+                submitted_at=submitted_at,
+                started_at=submitted_at,
+                completed_at=submitted_at + timedelta(minutes=5),
+                is_public=True,
+            )
+
+    finished_submission_ids = []
+    with suppress_autotime(Submission, ["submitted_at"]):
+        for batch in batches(generate()):
+            created = Submission.objects.bulk_create(batch)
+            finished_submission_ids.extend(
+                submission.pk
+                for submission in created
+                if submission.status == Submission.FINISHED
+            )
+    print(
+        "{} submissions created for phase {}.".format(
+            number_of_submissions, challenge_phase.name
+        )
+    )
+    return finished_submission_ids
+
+
+def create_leaderboard_data(challenge_phase_split, submission_ids, rng):
+    def generate():
+        for submission_id in submission_ids:
+            yield LeaderboardData(
+                challenge_phase_split=challenge_phase_split,
+                submission_id=submission_id,
+                leaderboard=challenge_phase_split.leaderboard,
+                result={
+                    "score": round(rng.uniform(0, 100), 4),
+                    "accuracy": round(rng.random(), 4),
+                },
+                error=None,
+            )
+
+    for batch in batches(generate()):
+        LeaderboardData.objects.bulk_create(batch)
+        update_leaderboard_metrics(batch)
+    print(
+        "{} leaderboard entries created for phase split {}.".format(
+            len(submission_ids), challenge_phase_split.pk
+        )
+    )
+
+
+def run(*args):
+    """
+    Arguments:
+        args[0] {int} -- Number of submissions per challenge phase
+        args[1] {int} -- Number of participant teams
+    """
+    number_of_submissions = (
+        int(args[0]) if len(args) > 0 else NUMBER_OF_SUBMISSIONS
+    )
+    number_of_teams = int(args[1]) if len(args) > 1 else NUMBER_OF_TEAMS
+    run_id = timezone.now().strftime("%Y%m%d%H%M%S")
+
+    print(
+        "Scale seeding {} submissions per phase from {} teams...".format(
+            number_of_submissions, number_of_teams
+        )
+    )
+    host_user = User.objects.filter(username=SCALE_HOST_USERNAME).first()
+    if host_user is None:
+        host_user = seed.create_user(
+            is_admin=False, username=SCALE_HOST_USERNAME
+        )
+    host_team = seed.create_challenge_host_team(user=host_user)
+    participant_host_team = seed.create_challenge_host_participant_team(
+        host_team
+    )
+    challenge = seed.create_challenge(
+        "{} {}".format(SCALE_CHALLENGE_TITLE, run_id),
+        timezone.now() - SUBMISSION_TIME_SPREAD,
+        timezone.now() + timedelta(days=365),
+        host_team,
+        participant_host_team,
+    )
+
+    teams = create_participant_teams(number_of_teams, run_id)
+    challenge.participant_teams.add(*teams)
+
+    leaderboard = seed.create_leaderboard()
+    leaderboard.schema = {
+        "labels": ["score", "accuracy"],
+        "default_order_by": "score",
+    }
+    leaderboard.save()
+    challenge_phases = seed.create_challenge_phases(
+        challenge, number_of_phases=NUMBER_OF_PHASES
+    )
+    ChallengePhase.objects.filter(challenge=challenge).update(
+        max_submissions=number_of_submissions * 10,
+        max_submissions_per_month=number_of_submissions * 10,
+        max_submissions_per_day=number_of_submissions * 10,
+    )
+    dataset_splits = seed.create_dataset_splits(
+        number_of_splits=NUMBER_OF_DATASET_SPLITS
+    )
+    rng = random.Random(RANDOM_SEED)
+    for challenge_phase in challenge_phases:
+        finished_submission_ids = create_submissions(
+            challenge_phase, teams, number_of_submissions, rng
+        )
+        for dataset_split in dataset_splits:
+            challenge_phase_split = seed.create_challenge_phase_splits(
+                challenge_phase, leaderboard, dataset_split
+            )
+            create_leaderboard_data(
+                challenge_phase_split, finished_submission_ids, rng
+            )
+
+    print("Challenge {} successfully scale seeded.".format(challenge.pk))
+    return challenge
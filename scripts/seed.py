@@ -268,6 +268,7 @@ def create_challenge(
             title, host_team.team_name, start_date, end_date
         )
     )
+    return challenge
 
 
 def create_challenge_phases(challenge, number_of_phases=1):
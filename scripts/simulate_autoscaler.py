@@ -0,0 +1,68 @@
+# Command to run : python manage.py simulate_autoscaler -t trace.log -min 0 -max 10
+"""
+Replays a recorded queue depth trace through the worker autoscaler, to tune
+`settings.WORKER_AUTOSCALER` without touching any worker service.
+
+The trace is a file of autoscaler observations, one per line, e.g. the log
+lines of the `autoscale_challenge_workers` task. Lines which are not
+observations are skipped.
+"""
+import json
+
+from challenges.autoscaler import (
+    OBSERVATION_LOG_PREFIX,
+    simulate_autoscaling,
+    summarize_simulation,
+)
+
+
+def load_trace(trace_path, challenge_pk=None):
+    trace = []
+    with open(trace_path, "r") as trace_file:
+        for line in trace_file:
+            if OBSERVATION_LOG_PREFIX in line:
+                line = line.split(OBSERVATION_LOG_PREFIX, 1)[1]
+            try:
+                observation = json.loads(line)
+            except ValueError:
+                continue
+            if (
+                challenge_pk is not None
+                and observation.get("challenge_pk") != challenge_pk
+            ):
+                continue
+            trace.append(observation)
+    return sorted(trace, key=lambda observation: observation["time"])
+
+
+def run(*args):
+    """
+    Arguments:
+        args[0] {str} -- Path of the trace
+        args[1] {int} -- Minimum number of workers
+        args[2] {int} -- Maximum number of workers
+        args[3] {int} -- Only replay the observations of this challenge
+    """
+    trace_path = args[0]
+    min_workers = int(args[1]) if len(args) > 1 else 0
+    max_workers = int(args[2]) if len(args) > 2 else 1
+    challenge_pk = int(args[3]) if len(args) > 3 else None
+
+    trace = load_trace(trace_path, challenge_pk)
+    if not trace:
+        print("No observations found in {}".format(trace_path))
+        return
+    steps = simulate_autoscaling(trace, min_workers, max_workers)
+    print("time\tqueue_depth\tin_flight\trunning\tworkers")
+    for step in steps:
+        print(
+            "{time}\t{queue_depth}\t{in_flight}\t{running_submissions}\t{workers}".format(
+                **step
+            )
+        )
+    summary = summarize_simulation(steps)
+    print(
+        "{scaling_events} scaling events, {worker_seconds:.0f} worker "
+        "seconds, max backlog of {max_backlog_per_worker:.1f} submissions "
+        "per worker".format(**summary)
+    )
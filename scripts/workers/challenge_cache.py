@@ -0,0 +1,196 @@
+import gc
+import importlib
+import logging
+import os
+import sys
+
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def get_memory_usage():
+    """
+    Returns the resident memory of the process in bytes, or None where
+    `/proc` is not available
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def get_directory_size(path):
+    """
+    Returns the size of the files of a directory in bytes
+    """
+    size = 0
+    for root, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                size += os.path.getsize(os.path.join(root, file_name))
+            except OSError:
+                pass
+    return size
+
+
+def unload_package(package_name, path=None):
+    """
+    Forgets a package and its submodules, so that their memory is freed once
+    nothing else refers to them, and importing the package again loads it
+    from the disk
+
+    Arguments:
+        package_name {str} -- e.g. `challenge_data.challenge_1`
+        path {str} -- Directory of the package, removed from `sys.path` if the
+                      package added itself or its subdirectories to it
+    """
+    for module_name in list(sys.modules):
+        if module_name == package_name or module_name.startswith(
+            package_name + "."
+        ):
+            del sys.modules[module_name]
+    if path is not None:
+        path = os.path.abspath(path)
+        sys.path[:] = [
+            entry
+            for entry in sys.path
+            if entry != path
+            and not os.path.abspath(entry).startswith(path + os.sep)
+        ]
+    importlib.invalidate_caches()
+    gc.collect()
+
+
+class ChallengeCache:
+    """
+    Keeps the challenges of a shared worker loaded, least recently used first
+
+    A shared worker evaluates the submissions of many challenges, so their
+    evaluation scripts and annotations are loaded on the first submission of
+    every challenge, and evicted once the worker holds more than
+    `max_challenges` challenges, or more than `max_disk_usage` bytes of
+    challenge data, or more than `max_memory_usage` bytes of memory taken by
+    the loaded challenges. The challenge being loaded is never evicted.
+
+    The memory of a challenge is estimated by the growth of the resident
+    memory of the process while it is loaded. The budget is checked against
+    the sum of these estimates rather than against the memory of the
+    process, which the allocator rarely gives back to the system once a
+    challenge is unloaded.
+
+    A challenge is loaded again when a submission message carries a
+    different version of its worker bundle than the loaded one.
+
+    Arguments:
+        load {callable} -- Loads a challenge, given its pk, and returns the
+                           version of the loaded worker bundle
+        unload {callable} -- Unloads a challenge, given its pk, and deletes
+                             its data
+        get_disk_usage {callable} -- Returns the size of the data of a loaded
+                                     challenge in bytes, given its pk
+        max_challenges {int} -- Maximum number of loaded challenges
+        max_disk_usage {int} -- Budget of the challenge data in bytes, None
+                                for no budget
+        max_memory_usage {int} -- Budget of the memory of the loaded
+                                  challenges in bytes, None for no budget
+        get_memory_usage {callable} -- Returns the memory of the process in
+                                       bytes, or None if it is unknown
+    """
+
+    def __init__(
+        self,
+        load,
+        unload,
+        get_disk_usage,
+        max_challenges=10,
+        max_disk_usage=None,
+        max_memory_usage=None,
+        get_memory_usage=get_memory_usage,
+    ):
+        self.load = load
+        self.unload = unload
+        self.get_disk_usage = get_disk_usage
+        self.max_challenges = max(max_challenges, 1)
+        self.max_disk_usage = max_disk_usage
+        self.max_memory_usage = max_memory_usage
+        self.get_memory_usage = get_memory_usage
+        # challenge pk: (bundle version, disk usage, memory usage), least
+        # recently used first
+        self.challenges = OrderedDict()
+
+    def __contains__(self, challenge_pk):
+        return challenge_pk in self.challenges
+
+    def get(self, challenge_pk, version=None):
+        """
+        Loads a challenge unless it is loaded already, in the given version
+        of its worker bundle if any, and marks it as the most recently used
+
+        Returns:
+            bool -- Whether the challenge was loaded
+        """
+        if challenge_pk in self.challenges:
+            loaded_version = self.challenges[challenge_pk][0]
+            if version is None or version == loaded_version:
+                self.challenges.move_to_end(challenge_pk)
+                return False
+            logger.info(
+                "Challenge {} changed from version {} to {}".format(
+                    challenge_pk, loaded_version, version
+                )
+            )
+            self.evict(challenge_pk)
+
+        while len(self.challenges) >= self.max_challenges:
+            self.evict_least_recently_used()
+        memory_usage_before = self.get_memory_usage()
+        try:
+            loaded_version = self.load(challenge_pk)
+        except Exception:
+            # Don't leave the data of a partially loaded challenge behind
+            self.unload(challenge_pk)
+            raise
+        memory_usage = self.get_memory_usage()
+        if memory_usage is None or memory_usage_before is None:
+            memory_usage = 0
+        else:
+            memory_usage = max(memory_usage - memory_usage_before, 0)
+        self.challenges[challenge_pk] = (
+            loaded_version,
+            self.get_disk_usage(challenge_pk),
+            memory_usage,
+        )
+        while len(self.challenges) > 1 and self.is_over_budget():
+            self.evict_least_recently_used()
+        return True
+
+    def get_total_disk_usage(self):
+        return sum(
+            disk_usage for _, disk_usage, _ in self.challenges.values()
+        )
+
+    def get_total_memory_usage(self):
+        return sum(
+            memory_usage for _, _, memory_usage in self.challenges.values()
+        )
+
+    def is_over_budget(self):
+        return (
+            self.max_disk_usage is not None
+            and self.get_total_disk_usage() > self.max_disk_usage
+        ) or (
+            self.max_memory_usage is not None
+            and self.get_total_memory_usage() > self.max_memory_usage
+        )
+
+    def evict_least_recently_used(self):
+        self.evict(next(iter(self.challenges)))
+
+    def evict(self, challenge_pk):
+        del self.challenges[challenge_pk]
+        self.unload(challenge_pk)
+        logger.info("Challenge {} unloaded".format(challenge_pk))
@@ -2,11 +2,43 @@ import json
 import logging
 import os
 import signal
+import threading
+import time
 import urllib.request
 import yaml
 
 
-from worker_utils import EvalAI_Interface
+try:
+    from job_reconciler import (
+        CHALLENGE_LABEL,
+        PHASE_LABEL,
+        SUBMISSION_LABEL,
+        JobReconciler,
+    )
+    from worker_metrics import (
+        configure_metrics,
+        observe_queue_age,
+        observe_submission_latency,
+        timed_stage,
+    )
+    from worker_utils import EvalAI_Interface, WorkerBundleCache
+except ImportError:
+    from scripts.workers.job_reconciler import (
+        CHALLENGE_LABEL,
+        PHASE_LABEL,
+        SUBMISSION_LABEL,
+        JobReconciler,
+    )
+    from scripts.workers.worker_metrics import (
+        configure_metrics,
+        observe_queue_age,
+        observe_submission_latency,
+        timed_stage,
+    )
+    from scripts.workers.worker_utils import (
+        EvalAI_Interface,
+        WorkerBundleCache,
+    )
 
 from kubernetes import client
 
@@ -33,6 +65,13 @@ EVALAI_API_SERVER = os.environ.get(
 )
 QUEUE_NAME = os.environ.get("QUEUE_NAME", "evalai_submission_queue")
 
+# Validity of the AWS EKS bearer token generated by EvalAI, in seconds
+EKS_BEARER_TOKEN_EXPIRY = 60
+# Refresh the token this many seconds before it expires
+EKS_BEARER_TOKEN_REFRESH_MARGIN = 15
+# Time to wait before polling the queue again when it is empty, in seconds
+QUEUE_POLL_INTERVAL = 5
+
 
 def create_job_object(message, environment_image):
     """Function to create the AWS EKS Job object
@@ -52,6 +91,13 @@ def create_job_object(message, environment_image):
     MESSAGE_BODY_ENV = client.V1EnvVar(name="BODY", value=json.dumps(message))
     submission_pk = message["submission_pk"]
     image = message["submitted_image_uri"]
+    # Used by the JobReconciler to map Job events to the submission
+    labels = {
+        "app": "evaluation",
+        SUBMISSION_LABEL: str(submission_pk),
+        CHALLENGE_LABEL: str(message["challenge_pk"]),
+        PHASE_LABEL: str(message["phase_pk"]),
+    }
     # Configureate Pod agent container
     agent_container = client.V1Container(
         name="agent", image=image, env=[PYTHONUNBUFFERED_ENV]
@@ -72,7 +118,7 @@ def create_job_object(message, environment_image):
     )
     # Create and configurate a spec section
     template = client.V1PodTemplateSpec(
-        metadata=client.V1ObjectMeta(labels={"app": "evaluation"}),
+        metadata=client.V1ObjectMeta(labels=labels),
         spec=client.V1PodSpec(
             containers=[environment_container, agent_container],
             restart_policy="Never",
@@ -85,7 +131,7 @@ def create_job_object(message, environment_image):
         api_version="batch/v1",
         kind="Job",
         metadata=client.V1ObjectMeta(
-            name="submission-{0}".format(submission_pk)
+            name="submission-{0}".format(submission_pk), labels=labels
         ),
         spec=spec,
     )
@@ -117,20 +163,29 @@ def delete_job(api_instance, job_name):
         api_instance {[AWS EKS API object]} -- API object for deleting job
         job_name {[string]} -- Name of the job to be terminated
     """
-    api_response = api_instance.delete_namespaced_job(
-        name=job_name,
-        namespace="default",
-        body=client.V1DeleteOptions(
-            propagation_policy="Foreground", grace_period_seconds=5
-        ),
-    )
+    try:
+        api_response = api_instance.delete_namespaced_job(
+            name=job_name,
+            namespace="default",
+            body=client.V1DeleteOptions(
+                propagation_policy="Foreground", grace_period_seconds=5
+            ),
+        )
+    except ApiException as e:
+        # The job might have already been cleaned up by the JobReconciler
+        if e.status == 404:
+            return
+        raise
     logger.info("Job deleted with status='%s'" % str(api_response.status))
 
 
-def process_submission_callback(api_instance, body, challenge_phase, evalai):
+def process_submission_callback(
+    eks_client_cache, body, challenge_phase, evalai
+):
     """Function to process submission message from SQS Queue
 
     Arguments:
+        eks_client_cache {[EKSClientCache]} -- Provides the Batch v1 API of the cluster
         body {[dict]} -- Submission message body from AWS SQS Queue
         evalai {[EvalAI class object]} -- EvalAI class object imported from worker_utils
     """
@@ -138,7 +193,11 @@ def process_submission_callback(api_instance, body, challenge_phase, evalai):
         logger.info("[x] Received submission message %s" % body)
         environment_image = challenge_phase.get("environment_image")
         job = create_job_object(body, environment_image)
-        response = create_job(api_instance, job)
+        # The evaluation itself runs in the job, the worker only schedules it
+        with timed_stage("create_job", challenge_pk=body["challenge_pk"]):
+            response = eks_client_cache.retry_on_unauthorized(
+                lambda: create_job(eks_client_cache.get_batch_v1_api(), job)
+            )
         submission_data = {
             "submission_status": "running",
             "submission": body["submission_pk"],
@@ -153,48 +212,94 @@ def process_submission_callback(api_instance, body, challenge_phase, evalai):
         )
 
 
-def get_api_object(cluster_name, cluster_endpoint, challenge, evalai):
-    configuration = client.Configuration()
-    aws_eks_api = evalai.get_aws_eks_bearer_token(challenge.get("id"))
-    configuration.host = cluster_endpoint
-    configuration.verify_ssl = True
-    configuration.ssl_ca_cert = '.certificate.txt'
-    configuration.api_key["authorization"] = aws_eks_api[
-        "aws_eks_bearer_token"
-    ]
-    configuration.api_key_prefix["authorization"] = "Bearer"
-    api_instance = client.BatchV1Api(client.ApiClient(configuration))
-    return api_instance
-
-
-def get_api_client(cluster_name, cluster_endpoint, challenge, evalai):
-    # TODO: Add SSL verification
-    configuration = client.Configuration()
-    aws_eks_api = evalai.get_aws_eks_bearer_token(challenge.get("id"))
-    configuration.host = cluster_endpoint
-    configuration.verify_ssl = True
-    configuration.ssl_ca_cert = '.certificate.txt'
-    configuration.api_key["authorization"] = aws_eks_api[
-        "aws_eks_bearer_token"
-    ]
-    configuration.api_key_prefix["authorization"] = "Bearer"
-    api_instance = client.ApiClient(configuration)
-    return api_instance
-
-
-def get_core_v1_api_object(cluster_name, cluster_endpoint, challenge, evalai):
-    # TODO: Add SSL verification
-    configuration = client.Configuration()
-    aws_eks_api = evalai.get_aws_eks_bearer_token(challenge.get("id"))
-    configuration.host = cluster_endpoint
-    configuration.verify_ssl = True
-    configuration.ssl_ca_cert = '.certificate.txt'
-    configuration.api_key["authorization"] = aws_eks_api[
-        "aws_eks_bearer_token"
-    ]
-    configuration.api_key_prefix["authorization"] = "Bearer"
-    api_instance = client.CoreV1Api(client.ApiClient(configuration))
-    return api_instance
+class EKSClientCache:
+    """Caches the Kubernetes API client of the challenge's AWS EKS cluster
+
+    The AWS EKS bearer token fetched from EvalAI expires after
+    `EKS_BEARER_TOKEN_EXPIRY` seconds. It is refreshed shortly before it
+    expires, or when the cluster rejects it, and the clients are built again
+    with the new token. The configuration of a client is never changed, so
+    the requests still using the previous client keep a consistent one.
+
+    Arguments:
+        cluster_endpoint {[string]} -- Endpoint of the AWS EKS cluster
+        challenge {[dict]} -- Challenge the worker is deployed for
+        evalai {[EvalAI class object]} -- EvalAI class object imported from worker_utils
+    """
+
+    def __init__(self, cluster_endpoint, challenge, evalai):
+        self.cluster_endpoint = cluster_endpoint
+        self.challenge = challenge
+        self.evalai = evalai
+        self.token_fetched_at = None
+        self.api_client = None
+        self.batch_v1_api = None
+        self.core_v1_api = None
+        self.lock = threading.Lock()
+
+    def is_token_expired(self):
+        if self.token_fetched_at is None:
+            return True
+        token_age = time.time() - self.token_fetched_at
+        return token_age >= (
+            EKS_BEARER_TOKEN_EXPIRY - EKS_BEARER_TOKEN_REFRESH_MARGIN
+        )
+
+    def refresh_token(self):
+        aws_eks_api = self.evalai.get_aws_eks_bearer_token(
+            self.challenge.get("id")
+        )
+        configuration = client.Configuration()
+        configuration.host = self.cluster_endpoint
+        configuration.verify_ssl = True
+        configuration.ssl_ca_cert = ".certificate.txt"
+        configuration.api_key = {
+            "authorization": aws_eks_api["aws_eks_bearer_token"]
+        }
+        configuration.api_key_prefix = {"authorization": "Bearer"}
+        # Swapped under the lock, the clients in use are left unchanged
+        self.api_client = client.ApiClient(configuration)
+        self.batch_v1_api = client.BatchV1Api(self.api_client)
+        self.core_v1_api = client.CoreV1Api(self.api_client)
+        self.token_fetched_at = time.time()
+
+    def invalidate(self):
+        """
+        Fetches a new token on the next request, e.g. when the cluster
+        rejected the current one
+        """
+        with self.lock:
+            self.token_fetched_at = None
+
+    def get_clients(self):
+        # The clients are shared with the threads of the JobReconciler
+        with self.lock:
+            if self.is_token_expired():
+                self.refresh_token()
+            return self.api_client, self.batch_v1_api, self.core_v1_api
+
+    def get_api_client(self):
+        return self.get_clients()[0]
+
+    def get_batch_v1_api(self):
+        return self.get_clients()[1]
+
+    def get_core_v1_api(self):
+        return self.get_clients()[2]
+
+    def retry_on_unauthorized(self, func):
+        """
+        Calls `func`, which gets its clients from the cache, and calls it
+        again with a new token if the cluster returned 401 Unauthorized
+        """
+        try:
+            return func()
+        except ApiException as e:
+            if e.status != 401:
+                raise
+            logger.info("AWS EKS bearer token rejected, fetching a new one")
+            self.invalidate()
+            return func()
 
 
 def get_running_jobs(api_instance):
@@ -223,56 +328,6 @@ def read_job(api_instance, job_name):
     return api_response
 
 
-def update_failed_jobs_and_send_logs(
-    api_instance,
-    core_v1_api_instance,
-    evalai,
-    job_name,
-    submission_pk,
-    challenge_pk,
-    phase_pk,
-):
-    job_def = read_job(api_instance, job_name)
-    controller_uid = job_def.metadata.labels["controller-uid"]
-    pod_label_selector = "controller-uid=" + controller_uid
-    pods_list = core_v1_api_instance.list_namespaced_pod(
-        namespace="default",
-        label_selector=pod_label_selector,
-        timeout_seconds=10,
-    )
-    for container in pods_list.items[0].status.container_statuses:
-        if container.name == "agent":
-            if container.state.terminated is not None:
-                if container.state.terminated.reason == "Error":
-                    pod_name = pods_list.items[0].metadata.name
-                    try:
-                        pod_log_response = core_v1_api_instance.read_namespaced_pod_log(
-                            name=pod_name,
-                            namespace="default",
-                            _return_http_data_only=True,
-                            _preload_content=False,
-                            container="agent",
-                        )
-                        pod_log = pod_log_response.data.decode("utf-8")
-                        submission_data = {
-                            "challenge_phase": phase_pk,
-                            "submission": submission_pk,
-                            "stdout": "",
-                            "stderr": pod_log,
-                            "submission_status": "FAILED",
-                            "result": "[]",
-                            "metadata": "",
-                        }
-                        response = evalai.update_submission_data(
-                            submission_data, challenge_pk, phase_pk
-                        )
-                        print(response)
-                    except client.rest.ApiException as e:
-                        logger.exception(
-                            "Exception while reading Job logs {}".format(e)
-                        )
-
-
 def install_gpu_drivers(api_instance):
     """Function to get the status of a running job on AWS EKS cluster
     Arguments:
@@ -298,74 +353,81 @@ def install_gpu_drivers(api_instance):
 
 def main():
     killer = GracefulKiller()
+    configure_metrics()
     evalai = EvalAI_Interface(
         AUTH_TOKEN=AUTH_TOKEN,
         EVALAI_API_SERVER=EVALAI_API_SERVER,
         QUEUE_NAME=QUEUE_NAME,
     )
-    logger.info(
-        "Deploying Worker for {}".format(
-            evalai.get_challenge_by_queue_name()["title"]
-        )
+    worker_bundle_cache = WorkerBundleCache(
+        evalai.get_worker_bundle_by_queue_name
     )
-    challenge = evalai.get_challenge_by_queue_name()
+    challenge = worker_bundle_cache.get_challenge()
+    logger.info("Deploying Worker for {}".format(challenge["title"]))
     cluster_details = evalai.get_aws_eks_cluster_details(challenge.get("id"))
-    cluster_name = cluster_details.get("name")
     cluster_endpoint = cluster_details.get("cluster_endpoint")
-    api_instance = get_api_client(
-        cluster_name, cluster_endpoint, challenge, evalai
-    )
-    install_gpu_drivers(api_instance)
+    eks_client_cache = EKSClientCache(cluster_endpoint, challenge, evalai)
+    install_gpu_drivers(eks_client_cache.get_api_client())
+    # Status transitions, logs and cleanup of running jobs are driven by
+    # Kubernetes events instead of SQS message redelivery
+    job_reconciler = JobReconciler(eks_client_cache, evalai)
+    job_reconciler.start()
     while True:
         message = evalai.get_message_from_sqs_queue()
         message_body = message.get("body")
         if message_body:
             submission_pk = message_body.get("submission_pk")
-            challenge_pk = message_body.get("challenge_pk")
             phase_pk = message_body.get("phase_pk")
             submission = evalai.get_submission_by_pk(submission_pk)
             if submission:
-                api_instance = get_api_object(
-                    cluster_name, cluster_endpoint, challenge, evalai
-                )
-                core_v1_api_instance = get_core_v1_api_object(
-                    cluster_name, cluster_endpoint, challenge, evalai
-                )
                 if (
                     submission.get("status") == "finished"
                     or submission.get("status") == "failed"
                     or submission.get("status") == "cancelled"
                 ):
+                    if submission.get("status") != "cancelled":
+                        observe_submission_latency(
+                            submission.get("submitted_at"),
+                            submission.get("completed_at"),
+                            challenge_pk=message_body.get("challenge_pk"),
+                            status=submission.get("status"),
+                        )
                     # Fetch the last job name from the list as it is the latest running job
                     job_name = submission.get("job_name")[-1]
-                    delete_job(api_instance, job_name)
+                    eks_client_cache.retry_on_unauthorized(
+                        lambda: delete_job(
+                            eks_client_cache.get_batch_v1_api(), job_name
+                        )
+                    )
                     message_receipt_handle = message.get("receipt_handle")
                     evalai.delete_message_from_sqs_queue(
                         message_receipt_handle
                     )
                 elif submission.get("status") == "running":
-                    job_name = submission.get("job_name")[-1]
-                    update_failed_jobs_and_send_logs(
-                        api_instance,
-                        core_v1_api_instance,
-                        evalai,
-                        job_name,
-                        submission_pk,
-                        challenge_pk,
-                        phase_pk,
-                    )
+                    # Handled by the JobReconciler
+                    pass
                 else:
                     logger.info(
                         "Processing message body: {0}".format(message_body)
                     )
-                    challenge_phase = evalai.get_challenge_phase_by_pk(
-                        challenge_pk, phase_pk
+                    # Redelivered messages of running submissions don't count
+                    observe_queue_age(
+                        message.get("sent_timestamp"), queue=QUEUE_NAME
+                    )
+                    challenge_phase = worker_bundle_cache.get_phase(
+                        phase_pk, message_body.get("worker_bundle_version")
                     )
                     process_submission_callback(
-                        api_instance, message_body, challenge_phase, evalai
+                        eks_client_cache,
+                        message_body,
+                        challenge_phase,
+                        evalai,
                     )
+        else:
+            time.sleep(QUEUE_POLL_INTERVAL)
 
         if killer.kill_now:
+            job_reconciler.stop()
             break
 
 
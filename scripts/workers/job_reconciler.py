@@ -0,0 +1,251 @@
+import logging
+import threading
+
+from kubernetes import client, watch
+from kubernetes.client.rest import ApiException
+
+logger = logging.getLogger(__name__)
+
+EVALUATION_LABEL_SELECTOR = "app=evaluation"
+# Labels set on evaluation Jobs and their Pods by `create_job_object`
+SUBMISSION_LABEL = "submission_pk"
+CHALLENGE_LABEL = "challenge_pk"
+PHASE_LABEL = "phase_pk"
+
+# Server side timeout of a watch request, after which it is re-established
+WATCH_TIMEOUT_SECONDS = 300
+# Time to wait before re-establishing a watch which failed
+WATCH_RETRY_INTERVAL = 5
+
+
+def is_job_failed(job):
+    """Returns True if a Job has the `Failed` condition, i.e. it won't run
+    Pods anymore
+    """
+    for condition in job.status.conditions or []:
+        if condition.type == "Failed" and condition.status == "True":
+            return True
+    return False
+
+
+def get_errored_agent_state(pod):
+    """Returns the terminated state of the agent container of a Pod if it
+    errored, or None
+    """
+    for container in (pod.status and pod.status.container_statuses) or []:
+        terminated = container.state and container.state.terminated
+        if (
+            container.name == "agent"
+            and terminated is not None
+            and terminated.reason == "Error"
+        ):
+            return terminated
+    return None
+
+
+class JobReconciler:
+    """Drives code upload submissions from Kubernetes Job events
+
+    Instead of polling the cluster whenever the SQS message of a running
+    submission is redelivered, the reconciler watches the Jobs labelled
+    `app=evaluation` and reacts to their state changes:
+        - when a Job fails, i.e. its failed Pods exceeded its backoff limit,
+          the logs of the agent container of its last errored Pod are sent
+          to EvalAI and the submission is marked as failed,
+        - when a Job completes (successfully or not), it is deleted.
+
+    A watch started without a resource version first lists every existing
+    object, so Jobs which changed while the worker was down are reconciled
+    as well.
+
+    Arguments:
+        api_cache {[EKSClientCache]} -- Provides the Batch and Core v1 API
+                                        objects with a valid bearer token
+        evalai {[EvalAI class object]} -- EvalAI class object imported from worker_utils
+        namespace {[string]} -- Namespace of the evaluation jobs
+        watch_factory {[callable]} -- Returns a `kubernetes.watch.Watch` like object
+    """
+
+    def __init__(
+        self,
+        api_cache,
+        evalai,
+        namespace="default",
+        watch_factory=watch.Watch,
+    ):
+        self.api_cache = api_cache
+        self.evalai = evalai
+        self.namespace = namespace
+        self.watch_factory = watch_factory
+        self.reported_submissions = set()
+        self.deleted_jobs = set()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def start(self):
+        thread = threading.Thread(
+            target=self.watch_jobs, name=self.watch_jobs.__name__
+        )
+        thread.daemon = True
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def watch_jobs(self):
+        self._watch(
+            lambda: self.api_cache.get_batch_v1_api().list_namespaced_job,
+            self.handle_job_event,
+        )
+
+    def _watch(self, get_list_func, handler):
+        resource_version = None
+        while not self.stopped:
+            kwargs = {
+                "namespace": self.namespace,
+                "label_selector": EVALUATION_LABEL_SELECTOR,
+                "timeout_seconds": WATCH_TIMEOUT_SECONDS,
+            }
+            if resource_version is not None:
+                kwargs["resource_version"] = resource_version
+            event_watch = self.watch_factory()
+            try:
+                # The bearer token is only checked when the watch connects
+                list_func = get_list_func()
+                for event in event_watch.stream(list_func, **kwargs):
+                    if event["type"] == "ERROR":
+                        # e.g. 410 Gone when the resource version is too old
+                        logger.info(
+                            "Watch error {}, listing again".format(
+                                event.get("raw_object")
+                            )
+                        )
+                        resource_version = None
+                        break
+                    resource_version = event["object"].metadata.resource_version
+                    try:
+                        handler(event)
+                    except Exception:
+                        logger.exception(
+                            "Exception while handling {} event".format(
+                                event["type"]
+                            )
+                        )
+                    if self.stopped:
+                        event_watch.stop()
+                        break
+            except ApiException as e:
+                if e.status == 410:
+                    # The resource version is too old, list everything again
+                    resource_version = None
+                    continue
+                if e.status == 401:
+                    # The bearer token was rejected, connect with a new one
+                    self.api_cache.invalidate()
+                logger.exception("Exception while watching {}".format(e))
+                self._stop_event.wait(WATCH_RETRY_INTERVAL)
+            except Exception as e:
+                logger.exception("Exception while watching {}".format(e))
+                self._stop_event.wait(WATCH_RETRY_INTERVAL)
+
+    def handle_job_event(self, event):
+        job = event["object"]
+        if event["type"] == "DELETED":
+            self.deleted_jobs.discard(job.metadata.name)
+            return
+        if job.status is None:
+            return
+        # A failed Pod is retried until the backoff limit of the Job
+        if is_job_failed(job):
+            self.report_failed_submission(
+                job.metadata.labels,
+                pod_name=self.get_errored_pod_name(job.metadata.name),
+            )
+            self.delete_job(job.metadata.name)
+        elif job.status.succeeded:
+            self.delete_job(job.metadata.name)
+
+    def get_errored_pod_name(self, job_name):
+        """Returns the name of the last Pod of a Job whose agent container
+        errored, or None
+        """
+        try:
+            pods = self.api_cache.get_core_v1_api().list_namespaced_pod(
+                namespace=self.namespace,
+                label_selector="job-name={}".format(job_name),
+            )
+        except ApiException as e:
+            logger.exception("Exception while listing Job Pods {}".format(e))
+            return None
+        errored_pods = []
+        for pod in pods.items:
+            terminated = get_errored_agent_state(pod)
+            if terminated is not None:
+                finished_at = terminated.finished_at
+                errored_pods.append(
+                    ((finished_at is not None, finished_at), pod.metadata.name)
+                )
+        if not errored_pods:
+            return None
+        return max(errored_pods, key=lambda errored_pod: errored_pod[0])[1]
+
+    def report_failed_submission(self, labels, pod_name=None):
+        """Marks the submission of an evaluation Job as failed in EvalAI
+
+        Arguments:
+            labels {[dict]} -- Labels of the Job of the submission
+            pod_name {[string]} -- Pod to send the agent logs of, if any
+        """
+        labels = labels or {}
+        submission_pk = labels.get(SUBMISSION_LABEL)
+        if submission_pk is None or submission_pk in self.reported_submissions:
+            return
+        pod_log = ""
+        if pod_name is not None:
+            try:
+                core_v1_api = self.api_cache.get_core_v1_api()
+                pod_log_response = core_v1_api.read_namespaced_pod_log(
+                    name=pod_name,
+                    namespace=self.namespace,
+                    _return_http_data_only=True,
+                    _preload_content=False,
+                    container="agent",
+                )
+                pod_log = pod_log_response.data.decode("utf-8")
+            except ApiException as e:
+                logger.exception("Exception while reading Job logs {}".format(e))
+        submission_data = {
+            "challenge_phase": labels.get(PHASE_LABEL),
+            "submission": submission_pk,
+            "stdout": "",
+            "stderr": pod_log,
+            "submission_status": "FAILED",
+            "result": "[]",
+            "metadata": "",
+        }
+        self.evalai.update_submission_data(
+            submission_data, labels.get(CHALLENGE_LABEL), submission_pk
+        )
+        self.reported_submissions.add(submission_pk)
+
+    def delete_job(self, job_name):
+        if job_name in self.deleted_jobs:
+            return
+        try:
+            self.api_cache.get_batch_v1_api().delete_namespaced_job(
+                name=job_name,
+                namespace=self.namespace,
+                body=client.V1DeleteOptions(
+                    propagation_policy="Foreground", grace_period_seconds=5
+                ),
+            )
+        except ApiException as e:
+            if e.status != 404:
+                raise
+        self.deleted_jobs.add(job_name)
+        logger.info("Job {} deleted".format(job_name))
@@ -19,6 +19,23 @@ import zipfile
 
 from os.path import join
 
+try:
+    from worker_metrics import (
+        configure_metrics,
+        observe_queue_age,
+        observe_submission_latency,
+        timed_stage,
+    )
+    from worker_utils import WorkerBundleCache, create_session
+except ImportError:
+    from scripts.workers.worker_metrics import (
+        configure_metrics,
+        observe_queue_age,
+        observe_submission_latency,
+        timed_stage,
+    )
+    from scripts.workers.worker_utils import WorkerBundleCache, create_session
+
 # all challenge and submission will be stored in temp directory
 BASE_TEMP_DIR = tempfile.mkdtemp()
 COMPUTE_DIRECTORY_PATH = join(BASE_TEMP_DIR, "compute")
@@ -48,11 +65,15 @@ URLS = {
     "get_submission_by_pk": "/api/jobs/submission/{}",
     "get_challenge_phases_by_challenge_pk": "/api/challenges/{}/phases/",
     "get_challenge_by_queue_name": "/api/challenges/challenge/queues/{}/",
+    "get_worker_bundle_by_queue_name": "/api/challenges/challenge/queues/{}/worker_bundle/",
     "get_challenge_phase_by_pk": "/api/challenges/challenge/{}/challenge_phase/{}",
     "update_submission_data": "/api/jobs/challenge/{}/update_submission/",
 }
 EVALAI_ERROR_CODES = [400, 401, 406]
 
+# Keep-alive connections to EvalAI shared by all the requests of the worker
+session = create_session()
+
 # map of challenge id : phase id : phase annotation file name
 # Use: On arrival of submission message, lookup here to fetch phase file name
 # this saves db query just to fetch phase annotation file name
@@ -102,7 +123,7 @@ def download_and_extract_file(url, download_location):
         * `download_location` should include name of file as well.
     """
     try:
-        response = requests.get(url)
+        response = session.get(url)
     except Exception as e:
         logger.error("Failed to fetch file from {}, error {}".format(url, e))
         traceback.print_exc()
@@ -119,7 +140,7 @@ def download_and_extract_zip_file(url, download_location, extract_location):
         * `download_location` should include name of file as well.
     """
     try:
-        response = requests.get(url)
+        response = session.get(url)
     except Exception as e:
         logger.error("Failed to fetch file from {}, error {}".format(url, e))
         response = None
@@ -176,31 +197,53 @@ def load_challenge():
     # make sure that the challenge base directory exists
     create_dir_as_python_package(CHALLENGE_DATA_BASE_DIR)
     try:
-        challenge = get_challenge_by_queue_name()
+        worker_bundle_cache.get()
     except Exception:
         logger.exception(
             "Challenge with queue name %s does not exists" % (QUEUE_NAME)
         )
         raise
-    challenge_pk = challenge.get("id")
-    phases = get_challenge_phases_by_challenge_pk(challenge_pk)
-    extract_challenge_data(challenge, phases)
 
 
-def extract_challenge_data(challenge, phases):
+def extract_bundle_data(previous_bundle, bundle):
     """
-        * Expects a challenge object and an array of phase object
-        * Extracts `evaluation_script` for challenge and `annotation_file` for each phase
+        * Called whenever the worker bundle is fetched from EvalAI
+        * Downloads the `evaluation_script` and the `annotation_file` of the
+          phases whose ETag changed since `previous_bundle`
     """
+    with timed_stage("import", challenge_pk=bundle["challenge"].get("id")):
+        if previous_bundle is None:
+            extract_challenge_data(bundle["challenge"], bundle["phases"])
+        else:
+            update_challenge_data(previous_bundle, bundle)
+
+
+def update_challenge_data(previous_bundle, bundle):
+    challenge = bundle["challenge"]
+    if (
+        bundle["evaluation_script_etag"]
+        != previous_bundle["evaluation_script_etag"]
+    ):
+        download_evaluation_script(challenge)
+        import_evaluation_script(challenge.get("id"))
+
+    previous_etags = {
+        phase.get("id"): phase.get("test_annotation_etag")
+        for phase in previous_bundle["phases"]
+    }
+    for phase in bundle["phases"]:
+        if phase.get("test_annotation_etag") != previous_etags.get(
+            phase.get("id")
+        ):
+            download_annotation_file(challenge.get("id"), phase)
+
+
+def download_evaluation_script(challenge):
     challenge_data_directory = CHALLENGE_DATA_DIR.format(
         challenge_id=challenge.get("id")
     )
     evaluation_script_url = challenge.get("evaluation_script")
     create_dir_as_python_package(challenge_data_directory)
-
-    # set entry in map
-    PHASE_ANNOTATION_FILE_NAME_MAP[challenge.get("id")] = {}
-
     challenge_zip_file = join(
         challenge_data_directory,
         "challenge_{}.zip".format(challenge.get("id")),
@@ -209,42 +252,70 @@ def extract_challenge_data(challenge, phases):
         evaluation_script_url, challenge_zip_file, challenge_data_directory
     )
 
-    phase_data_base_directory = PHASE_DATA_BASE_DIR.format(
-        challenge_id=challenge.get("id")
+
+def download_annotation_file(challenge_pk, phase):
+    phase_data_directory = PHASE_DATA_DIR.format(
+        challenge_id=challenge_pk, phase_id=phase.get("id")
     )
-    create_dir(phase_data_base_directory)
+    # create phase directory
+    create_dir(phase_data_directory)
+    annotation_file_url = phase.get("test_annotation")
+    annotation_file_name = os.path.basename(phase.get("test_annotation"))
+    PHASE_ANNOTATION_FILE_NAME_MAP.setdefault(challenge_pk, {})[
+        phase.get("id")
+    ] = annotation_file_name
+    annotation_file_path = PHASE_ANNOTATION_FILE_PATH.format(
+        challenge_id=challenge_pk,
+        phase_id=phase.get("id"),
+        annotation_file=annotation_file_name,
+    )
+    download_and_extract_file(annotation_file_url, annotation_file_path)
 
-    for phase in phases:
-        phase_data_directory = PHASE_DATA_DIR.format(
-            challenge_id=challenge.get("id"), phase_id=phase.get("id")
-        )
-        # create phase directory
-        create_dir(phase_data_directory)
-        annotation_file_url = phase.get("test_annotation")
-        annotation_file_name = os.path.basename(phase.get("test_annotation"))
-        PHASE_ANNOTATION_FILE_NAME_MAP[challenge.get("id")][
-            phase.get("id")
-        ] = annotation_file_name
-        annotation_file_path = PHASE_ANNOTATION_FILE_PATH.format(
-            challenge_id=challenge.get("id"),
-            phase_id=phase.get("id"),
-            annotation_file=annotation_file_name,
-        )
-        download_and_extract_file(annotation_file_url, annotation_file_path)
+
+def import_evaluation_script(challenge_pk):
+    """
+        Imports (or imports again, when the evaluation script was updated)
+        the python package of a challenge
+    """
+    import_string = CHALLENGE_IMPORT_STRING.format(challenge_id=challenge_pk)
+    for module_name in list(sys.modules):
+        if module_name == import_string or module_name.startswith(
+            import_string + "."
+        ):
+            del sys.modules[module_name]
     try:
-        # import the challenge after everything is finished
-        challenge_module = importlib.import_module(
-            CHALLENGE_IMPORT_STRING.format(challenge_id=challenge.get("id"))
-        )
-        EVALUATION_SCRIPTS[challenge.get("id")] = challenge_module
+        importlib.invalidate_caches()
+        challenge_module = importlib.import_module(import_string)
+        EVALUATION_SCRIPTS[challenge_pk] = challenge_module
     except Exception:
         logger.exception(
             "Exception raised while creating Python module for challenge_id: %s"
-            % (challenge.get("id"))
+            % (challenge_pk)
         )
         raise
 
 
+def extract_challenge_data(challenge, phases):
+    """
+        * Expects a challenge object and an array of phase object
+        * Extracts `evaluation_script` for challenge and `annotation_file` for each phase
+    """
+    # set entry in map
+    PHASE_ANNOTATION_FILE_NAME_MAP[challenge.get("id")] = {}
+
+    download_evaluation_script(challenge)
+
+    phase_data_base_directory = PHASE_DATA_BASE_DIR.format(
+        challenge_id=challenge.get("id")
+    )
+    create_dir(phase_data_base_directory)
+
+    for phase in phases:
+        download_annotation_file(challenge.get("id"), phase)
+    # import the challenge after everything is finished
+    import_evaluation_script(challenge.get("id"))
+
+
 def process_submission_callback(body):
     try:
         logger.info("[x] Received submission message %s" % body)
@@ -265,21 +336,28 @@ def process_submission_message(message):
     challenge_pk = int(message.get("challenge_pk"))
     phase_pk = message.get("phase_pk")
     submission_pk = message.get("submission_pk")
-    submission_instance = extract_submission_data(submission_pk)
+    with timed_stage("download", challenge_pk=challenge_pk):
+        submission_instance = extract_submission_data(submission_pk)
 
     # so that the further execution does not happen
     if not submission_instance:
         return
-    challenge = get_challenge_by_queue_name()
-    remote_evaluation = challenge.get("remote_evaluation")
-    challenge_phase = get_challenge_phase_by_pk(challenge_pk, phase_pk)
-    if not challenge_phase:
+    # Challenge and phase metadata only get fetched from EvalAI when the
+    # message carries a different worker bundle version than the cached one
+    worker_bundle_version = message.get("worker_bundle_version")
+    try:
+        challenge_phase = worker_bundle_cache.get_phase(
+            phase_pk, worker_bundle_version
+        )
+    except KeyError:
         logger.exception(
             "Challenge Phase {} does not exist for queue {}".format(
                 phase_pk, QUEUE_NAME
             )
         )
         raise
+    challenge = worker_bundle_cache.get_challenge()
+    remote_evaluation = challenge.get("remote_evaluation")
     user_annotation_file_path = join(
         SUBMISSION_DATA_DIR.format(submission_id=submission_pk),
         os.path.basename(submission_instance.get("input_file")),
@@ -332,65 +410,24 @@ def get_request_headers():
 
 def make_request(url, method, data=None):
     headers = get_request_headers()
-    if method == "GET":
-        try:
-            response = requests.get(url=url, headers=headers)
-            response.raise_for_status()
-        except requests.exceptions.RequestException:
-            logger.info(
-                "The worker is not able to establish connection with EvalAI"
-            )
-            raise
-        return response.json()
-
-    elif method == "PUT":
-        try:
-            response = requests.put(url=url, headers=headers, data=data)
-            response.raise_for_status()
-        except requests.exceptions.RequestException:
-            logger.exception(
-                "The worker is not able to establish connection with EvalAI due to {}"
-                % (response.json())
-            )
-            raise
-        except requests.exceptions.HTTPError:
-            logger.exception(
-                f"The request to URL {url} is failed due to {response.json()}"
-            )
-            raise
-        return response.json()
-
-    elif method == "PATCH":
-        try:
-            response = requests.patch(url=url, headers=headers, data=data)
-            response.raise_for_status()
-        except requests.exceptions.RequestException:
-            logger.info(
-                "The worker is not able to establish connection with EvalAI"
-            )
-            raise
-        except requests.exceptions.HTTPError:
-            logger.info(
-                f"The request to URL {url} is failed due to {response.json()}"
-            )
-            raise
-        return response.json()
-
-    elif method == "POST":
-        try:
-            response = requests.post(url=url, headers=headers, data=data)
-            response.raise_for_status()
-        except requests.exceptions.RequestException:
-            logger.info(
-                "The worker is not able to establish connection with EvalAI"
-            )
-            raise
-        except requests.exceptions.HTTPError:
-            logger.info(
-                f"The request to URL {url} is failed due to {response.json()}"
+    try:
+        response = session.request(
+            method=method, url=url, headers=headers, data=data
+        )
+        response.raise_for_status()
+    except requests.exceptions.HTTPError:
+        logger.info(
+            "The request to URL {} is failed due to {}".format(
+                url, response.text
             )
-            raise
-        return response.json()
+        )
+        raise
+    except requests.exceptions.RequestException:
+        logger.info(
+            "The worker is not able to establish connection with EvalAI"
+        )
+        raise
+    return response.json()
 
 
 def get_message_from_sqs_queue():
@@ -430,6 +467,13 @@ def get_challenge_by_queue_name():
     return response
 
 
+def get_worker_bundle_by_queue_name():
+    url = URLS.get("get_worker_bundle_by_queue_name").format(QUEUE_NAME)
+    url = return_url_per_environment(url)
+    response = make_request(url, "GET")
+    return response
+
+
 def get_challenge_phase_by_pk(challenge_pk, challenge_phase_pk):
     url = URLS.get("get_challenge_phase_by_pk").format(
         challenge_pk, challenge_phase_pk
@@ -453,6 +497,11 @@ def update_submission_status(data, challenge_pk):
     return response
 
 
+worker_bundle_cache = WorkerBundleCache(
+    get_worker_bundle_by_queue_name, on_refresh=extract_bundle_data
+)
+
+
 def read_file_content(file_path):
     with open(file_path, "r") as obj:
         file_content = obj.read()
@@ -517,7 +566,9 @@ def run_submission(
         logger.info(
             "Sending submission {} for evaluation".format(submission_pk)
         )
-        with stdout_redirect(stdout), stderr_redirect(stderr):
+        with stdout_redirect(stdout), stderr_redirect(stderr), timed_stage(
+            "evaluate", challenge_pk=challenge_pk
+        ):
             submission_output = EVALUATION_SCRIPTS[challenge_pk].evaluate(
                 annotation_file_path,
                 user_annotation_file_path,
@@ -542,7 +593,16 @@ def run_submission(
             "stdout": stdout_content,
             "stderr": stderr_content,
         }
-        update_submission_data(submission_data, challenge_pk, submission_pk)
+        with timed_stage("upload", challenge_pk=challenge_pk):
+            update_submission_data(
+                submission_data, challenge_pk, submission_pk
+            )
+        # EvalAI sets `completed_at` when the submission data is updated
+        observe_submission_latency(
+            submission.get("submitted_at"),
+            challenge_pk=challenge_pk,
+            status=status,
+        )
 
         shutil.rmtree(temp_run_dir)
         return
@@ -571,13 +631,21 @@ def run_submission(
     else:
         status = "failed"
         submission_data["submission_status"] = status
-    update_submission_data(submission_data, challenge_pk, submission_pk)
+    # The leaderboard entries are written by EvalAI with the submission data
+    with timed_stage("upload", challenge_pk=challenge_pk):
+        update_submission_data(submission_data, challenge_pk, submission_pk)
+    observe_submission_latency(
+        submission.get("submitted_at"),
+        challenge_pk=challenge_pk,
+        status=status,
+    )
     shutil.rmtree(temp_run_dir)
     return
 
 
 def main():
     killer = GracefulKiller()
+    configure_metrics()
     logger.info(
         "Using {0} as temp directory to store data".format(BASE_TEMP_DIR)
     )
@@ -608,6 +676,10 @@ def main():
                     logger.info(
                         "Processing message body: {}".format(message_body)
                     )
+                    # Redelivered messages of running submissions don't count
+                    observe_queue_age(
+                        message.get("sent_timestamp"), queue=QUEUE_NAME
+                    )
                     process_submission_callback(message_body)
                     # Let the queue know that the message is processed
                     delete_message_from_sqs_queue(message_receipt_handle)
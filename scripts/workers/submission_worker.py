@@ -3,8 +3,6 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-import boto3
-import botocore
 import contextlib
 import django
 import importlib
@@ -23,9 +21,34 @@ import zipfile
 
 from os.path import join
 
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.utils import timezone
 
+try:
+    from challenge_cache import (
+        ChallengeCache,
+        get_directory_size,
+        unload_package,
+    )
+    from worker_metrics import (
+        configure_metrics,
+        observe_queue_age,
+        observe_submission_latency,
+        timed_stage,
+    )
+except ImportError:
+    from scripts.workers.challenge_cache import (
+        ChallengeCache,
+        get_directory_size,
+        unload_package,
+    )
+    from scripts.workers.worker_metrics import (
+        configure_metrics,
+        observe_queue_age,
+        observe_submission_latency,
+        timed_stage,
+    )
+
 # all challenge and submission will be stored in temp directory
 BASE_TEMP_DIR = tempfile.mkdtemp()
 COMPUTE_DIRECTORY_PATH = join(BASE_TEMP_DIR, "compute")
@@ -47,10 +70,34 @@ from challenges.models import (  # noqa:E402
     ChallengePhase,
     ChallengePhaseSplit,
     LeaderboardData,
+    update_leaderboard_metrics,
 )
 
+from challenges.utils import get_worker_bundle_version  # noqa:E402
+from base.sqs import (  # noqa:E402
+    MAX_BATCH_SIZE,
+    delete_messages,
+    get_or_create_sqs_queue,
+    receive_messages,
+)
+from base.utils import get_file_checksum  # noqa:E402
+from jobs.events import (  # noqa:E402
+    publish_leaderboard_changed,
+    publish_submission_status,
+)
 from jobs.models import Submission  # noqa:E402
+from jobs.scheduler import dispatch_next_submissions  # noqa:E402
+from jobs.sender import publish_submission_messages  # noqa:E402
+from jobs.submission_logs import save_log_artifact  # noqa:E402
 from jobs.serializers import SubmissionSerializer  # noqa:E402
+from jobs.utils import (  # noqa:E402
+    copy_submission_results,
+    get_cached_submission,
+    get_evaluation_shards,
+    get_submission_result_cache_key,
+    merge_evaluation_shard,
+    start_sharded_evaluation,
+)
 
 LIMIT_CONCURRENT_SUBMISSION_PROCESSING = os.environ.get(
     "LIMIT_CONCURRENT_SUBMISSION_PROCESSING"
@@ -78,6 +125,15 @@ EVALUATION_SCRIPTS = {}
 PHASE_ANNOTATION_FILE_NAME_MAP = {}
 WORKER_LOGS_PREFIX = "WORKER_LOG"
 SUBMISSION_LOGS_PREFIX = "SUBMISSION_LOG"
+# Challenges loaded on demand by a shared worker, see `run_shared_worker`
+CHALLENGE_CACHE = None
+# Seconds to wait when all the queues of a shared worker are empty
+SHARED_WORKER_IDLE_SLEEP = 1
+# Messages received per poll of a queue, the processed ones are deleted from
+# the queue with a single SQS API call
+RECEIVE_BATCH_SIZE = min(
+    int(os.environ.get("SQS_RECEIVE_BATCH_SIZE", 1)), MAX_BATCH_SIZE
+)
 
 django.db.close_old_connections()
 
@@ -313,7 +369,54 @@ def load_challenge(challenge):
     # make sure that the challenge base directory exists
     create_dir_as_python_package(CHALLENGE_DATA_BASE_DIR)
     phases = challenge.challengephase_set.all()
-    extract_challenge_data(challenge, phases)
+    with timed_stage("import", challenge_pk=challenge.pk):
+        extract_challenge_data(challenge, phases)
+
+
+def load_challenge_by_pk(challenge_pk):
+    """
+        Loads a challenge on a shared worker and returns the version of its
+        worker bundle
+    """
+    try:
+        challenge = Challenge.objects.get(pk=challenge_pk)
+    except Challenge.DoesNotExist:
+        logger.exception(
+            "{} Challenge {} does not exist".format(
+                WORKER_LOGS_PREFIX, challenge_pk
+            )
+        )
+        raise
+    # Computed before loading, so that a challenge modified meanwhile is
+    # loaded again on its next submission
+    version = get_worker_bundle_version(challenge)
+    load_challenge(challenge)
+    logger.info(
+        "{} Challenge {} loaded".format(WORKER_LOGS_PREFIX, challenge_pk)
+    )
+    return version
+
+
+def unload_challenge(challenge_pk):
+    """
+        Forgets the evaluation script of a challenge and deletes its data
+    """
+    EVALUATION_SCRIPTS.pop(challenge_pk, None)
+    PHASE_ANNOTATION_FILE_NAME_MAP.pop(challenge_pk, None)
+    challenge_data_directory = CHALLENGE_DATA_DIR.format(
+        challenge_id=challenge_pk
+    )
+    unload_package(
+        CHALLENGE_IMPORT_STRING.format(challenge_id=challenge_pk),
+        challenge_data_directory,
+    )
+    shutil.rmtree(challenge_data_directory, ignore_errors=True)
+
+
+def get_challenge_disk_usage(challenge_pk):
+    return get_directory_size(
+        CHALLENGE_DATA_DIR.format(challenge_id=challenge_pk)
+    )
 
 
 def extract_submission_data(submission_id):
@@ -385,6 +488,7 @@ def run_submission(
     submission.status = Submission.RUNNING
     submission.started_at = timezone.now()
     submission.save()
+    publish_submission_status(submission)
 
     # create a temporary run directory under submission directory, so that
     # main directory does not gets polluted
@@ -409,7 +513,9 @@ def run_submission(
             )
             with stdout_redirect(stdout) as new_stdout, stderr_redirect(
                 stderr
-            ) as new_stderr:
+            ) as new_stderr, timed_stage(
+                "evaluate", challenge_pk=challenge_id
+            ):
                 submission_output = EVALUATION_SCRIPTS[challenge_id].evaluate(
                     annotation_file_path,
                     user_annotation_file_path,
@@ -424,16 +530,12 @@ def run_submission(
             submission.status = Submission.FAILED
             submission.completed_at = timezone.now()
             submission.save()
-            with open(stdout_file, "r") as stdout:
-                stdout_content = stdout.read()
-                submission.stdout_file.save(
-                    "stdout.txt", ContentFile(stdout_content)
-                )
-            with open(stderr_file, "r") as stderr:
-                stderr_content = stderr.read()
-                submission.stderr_file.save(
-                    "stderr.txt", ContentFile(stderr_content)
-                )
+            publish_submission_status(submission)
+            dispatch_next_submissions(submission)
+            with open(stdout_file, "rb") as stdout:
+                save_log_artifact(submission, "stdout_file", stdout)
+            with open(stderr_file, "rb") as stderr:
+                save_log_artifact(submission, "stderr_file", stderr)
 
             # delete the complete temp run directory
             shutil.rmtree(temp_run_dir)
@@ -444,7 +546,9 @@ def run_submission(
         successful_submission_flag = True
         with stdout_redirect(stdout) as new_stdout, stderr_redirect(  # noqa
             stderr
-        ) as new_stderr:  # noqa
+        ) as new_stderr, timed_stage(  # noqa
+            "evaluate", challenge_pk=challenge_id
+        ):
             submission_output = EVALUATION_SCRIPTS[challenge_id].evaluate(
                 annotation_file_path,
                 user_annotation_file_path,
@@ -537,7 +641,9 @@ def run_submission(
                 leaderboard_data_list.append(leaderboard_data)
 
             if successful_submission_flag:
-                LeaderboardData.objects.bulk_create(leaderboard_data_list)
+                with timed_stage("leaderboard", challenge_pk=challenge_id):
+                    LeaderboardData.objects.bulk_create(leaderboard_data_list)
+                    update_leaderboard_metrics(leaderboard_data_list)
 
         # Once the submission_output is processed, then save the submission object with appropriate status
         else:
@@ -555,57 +661,315 @@ def run_submission(
     submission.status = submission_status
     submission.completed_at = timezone.now()
     submission.save()
-
-    # after the execution is finished, set `status` to finished and hence `completed_at`
-    if submission_output:
-        output = {}
-        output["result"] = submission_output.get("result", "")
-        submission.output = output
-
-        # Save submission_result_file
-        submission_result = submission_output.get("submission_result", "")
-        submission_result = json.dumps(submission_result)
-        submission.submission_result_file.save(
-            "submission_result.json", ContentFile(submission_result)
-        )
-
-        # Save submission_metadata_file
-        submission_metadata = submission_output.get("submission_metadata", "")
-        submission.submission_metadata_file.save(
-            "submission_metadata.json", ContentFile(submission_metadata)
+    publish_submission_status(submission)
+    dispatch_next_submissions(submission)
+    observe_submission_latency(
+        submission.submitted_at,
+        submission.completed_at,
+        challenge_pk=challenge_id,
+        status=submission_status,
+    )
+    if successful_submission_flag:
+        publish_leaderboard_changed(
+            leaderboard_data.challenge_phase_split_id
+            for leaderboard_data in leaderboard_data_list
         )
 
-    submission.save()
-
     stderr.close()
     stdout.close()
-    stderr_content = open(stderr_file, "r").read()
-    stdout_content = open(stdout_file, "r").read()
-
-    # TODO :: see if two updates can be combine into a single update.
-    with open(stdout_file, "r") as stdout:
-        stdout_content = stdout.read()
-        submission.stdout_file.save("stdout.txt", ContentFile(stdout_content))
-    if submission_status is Submission.FAILED:
-        with open(stderr_file, "r") as stderr:
-            stderr_content = stderr.read()
-            submission.stderr_file.save(
-                "stderr.txt", ContentFile(stderr_content)
+
+    with timed_stage("upload", challenge_pk=challenge_id):
+        # after the execution is finished, set `status` to finished and hence `completed_at`
+        if submission_output:
+            output = {}
+            output["result"] = submission_output.get("result", "")
+            submission.output = output
+
+            # Save submission_result_file
+            submission_result = submission_output.get("submission_result", "")
+            submission_result = json.dumps(submission_result)
+            submission.submission_result_file.save(
+                "submission_result.json", ContentFile(submission_result)
+            )
+
+            # Save submission_metadata_file
+            submission_metadata = submission_output.get(
+                "submission_metadata", ""
+            )
+            submission.submission_metadata_file.save(
+                "submission_metadata.json", ContentFile(submission_metadata)
             )
 
+        submission.save()
+
+        # TODO :: see if two updates can be combine into a single update.
+        # The logs are streamed from the files, which can be very large
+        with open(stdout_file, "rb") as stdout:
+            save_log_artifact(submission, "stdout_file", stdout)
+        if submission_status is Submission.FAILED:
+            with open(stderr_file, "rb") as stderr:
+                save_log_artifact(submission, "stderr_file", stderr)
+
+    if successful_submission_flag and challenge_phase.is_result_cache_enabled:
+        # Lets the identical submissions of the phase reuse the results
+        store_result_cache_key(submission, user_annotation_file_path)
+
     # delete the complete temp run directory
     shutil.rmtree(temp_run_dir)
 
 
+def run_submission_shard(
+    challenge_id,
+    challenge_phase,
+    submission,
+    user_annotation_file_path,
+    challenge_phase_split_id,
+):
+    """
+        * evaluates a shard of a submission, i.e. a single challenge phase split
+        * the evaluation script gets the codename of the split as `dataset_split_codename`
+        * merges the result of the split into the submission
+    """
+    challenge_phase_split = ChallengePhaseSplit.objects.select_related(
+        "dataset_split"
+    ).get(id=challenge_phase_split_id)
+    split_code_name = challenge_phase_split.dataset_split.codename
+    submission_serializer = SubmissionSerializer(submission)
+
+    phase_id = challenge_phase.id
+    annotation_file_name = PHASE_ANNOTATION_FILE_NAME_MAP.get(
+        challenge_id
+    ).get(phase_id)
+    annotation_file_path = PHASE_ANNOTATION_FILE_PATH.format(
+        challenge_id=challenge_id,
+        phase_id=phase_id,
+        annotation_file=annotation_file_name,
+    )
+    temp_run_dir = join(
+        SUBMISSION_DATA_DIR.format(submission_id=submission.id),
+        "run_{}".format(challenge_phase_split_id),
+    )
+    create_dir(temp_run_dir)
+    stdout_file = join(temp_run_dir, "temp_stdout.txt")
+    stderr_file = join(temp_run_dir, "temp_stderr.txt")
+    stdout = open(stdout_file, "a+")
+    stderr = open(stderr_file, "a+")
+
+    result = error = None
+    submission_output = {}
+    try:
+        with stdout_redirect(stdout), stderr_redirect(stderr), timed_stage(
+            "evaluate", challenge_pk=challenge_id
+        ):
+            submission_output = EVALUATION_SCRIPTS[challenge_id].evaluate(
+                annotation_file_path,
+                user_annotation_file_path,
+                challenge_phase.codename,
+                submission_metadata=submission_serializer.data,
+                dataset_split_codename=split_code_name,
+            )
+        for split_result in submission_output.get("result", []):
+            if split_code_name in split_result:
+                result = split_result[split_code_name]
+        for split_error in submission_output.get("error", []):
+            if split_code_name in split_error:
+                error = split_error[split_code_name]
+        if result is None:
+            stderr.write(
+                "The evaluation script returned no result for the split"
+                " {}\n".format(split_code_name)
+            )
+    except Exception:
+        stderr.write(traceback.format_exc())
+    stderr.close()
+    stdout.close()
+
+    with open(stdout_file, errors="replace") as stdout, open(
+        stderr_file, errors="replace"
+    ) as stderr, timed_stage("leaderboard", challenge_pk=challenge_id):
+        submission, leaderboard_changed = merge_evaluation_shard(
+            submission.pk,
+            challenge_phase_split,
+            result=result,
+            error=error,
+            submission_result=submission_output.get("submission_result", ""),
+            submission_metadata=submission_output.get(
+                "submission_metadata", ""
+            ),
+            stdout=stdout.read(),
+            stderr=stderr.read(),
+        )
+    publish_submission_status(submission)
+    if submission.status in (Submission.FINISHED, Submission.FAILED):
+        # The last shard completed the submission
+        dispatch_next_submissions(submission)
+        observe_submission_latency(
+            submission.submitted_at,
+            submission.completed_at,
+            challenge_pk=challenge_id,
+            status=submission.status,
+        )
+    if leaderboard_changed:
+        publish_leaderboard_changed([challenge_phase_split.pk])
+
+    shutil.rmtree(temp_run_dir)
+
+
+def store_result_cache_key(submission, input_file_path):
+    """
+    Stores the key of the results of a finished submission. The input files
+    uploaded directly to the storage are hashed once downloaded.
+    """
+    if not submission.input_file_checksum:
+        with open(input_file_path, "rb") as input_file:
+            submission.input_file_checksum = get_file_checksum(
+                File(input_file)
+            )
+    submission.result_cache_key = get_submission_result_cache_key(submission)
+    submission.save()
+
+
+def finish_with_cached_results(submission_id):
+    """
+    Finishes a submission with the results of an identical submission of
+    its phase, without downloading and evaluating it, when the result cache
+    of the phase is enabled. Returns True if the submission is finished.
+    """
+    try:
+        submission = Submission.objects.select_related(
+            "challenge_phase__challenge"
+        ).get(id=submission_id)
+    except Submission.DoesNotExist:
+        return False
+    challenge_phase = submission.challenge_phase
+    if (
+        not challenge_phase.is_result_cache_enabled
+        or challenge_phase.challenge.remote_evaluation
+    ):
+        return False
+    cached_submission = get_cached_submission(
+        submission, get_submission_result_cache_key(submission)
+    )
+    if cached_submission is None:
+        return False
+    logger.info(
+        "{} Reusing the results of submission {} for submission {}".format(
+            SUBMISSION_LOGS_PREFIX, cached_submission.id, submission.id
+        )
+    )
+    challenge_phase_split_pks = copy_submission_results(
+        cached_submission, submission
+    )
+    publish_submission_status(submission)
+    dispatch_next_submissions(submission)
+    observe_submission_latency(
+        submission.submitted_at,
+        submission.completed_at,
+        challenge_pk=challenge_phase.challenge_id,
+        status=submission.status,
+        cached=True,
+    )
+    publish_leaderboard_changed(challenge_phase_split_pks)
+    return True
+
+
+def fan_out_submission(submission_id):
+    """
+    Publishes a message per shard of a submission of a phase with sharded
+    evaluation, so that the workers evaluate its shards in parallel.
+    Returns True if the submission is evaluated as shards.
+    """
+    try:
+        submission = Submission.objects.select_related(
+            "challenge_phase__challenge"
+        ).get(id=submission_id)
+    except Submission.DoesNotExist:
+        return False
+    if submission.challenge_phase.challenge.remote_evaluation:
+        return False
+    challenge_phase_splits = get_evaluation_shards(submission.challenge_phase)
+    if not challenge_phase_splits:
+        return False
+    if submission.evaluation_shards:
+        # The shards were published already, e.g. for a redelivered message
+        return True
+    messages = start_sharded_evaluation(submission, challenge_phase_splits)
+    publish_submission_status(submission)
+    logger.info(
+        "{} Evaluating submission {} as {} shards".format(
+            SUBMISSION_LOGS_PREFIX, submission.id, len(messages)
+        )
+    )
+    challenge_phase_splits = {
+        challenge_phase_split.pk: challenge_phase_split
+        for challenge_phase_split in challenge_phase_splits
+    }
+    for message in publish_submission_messages(messages):
+        submission, _ = merge_evaluation_shard(
+            submission.pk,
+            challenge_phase_splits[message["challenge_phase_split_pk"]],
+            stderr="The shard couldn't be queued for evaluation\n",
+        )
+        publish_submission_status(submission)
+    return True
+
+
+def is_redispatched_submission(submission_id):
+    """
+    Returns True if the submission of a message of a challenge with fair
+    scheduling is not submitted anymore, i.e. its message is a duplicate
+    sent when the scheduler dispatched it again after its
+    `DISPATCH_TIMEOUT`
+    """
+    return (
+        Submission.objects.filter(
+            id=submission_id,
+            challenge_phase__challenge__is_fair_scheduling_enabled=True,
+        )
+        .exclude(status=Submission.SUBMITTED)
+        .exists()
+    )
+
+
 def process_submission_message(message):
     """
     Extracts the submission related metadata from the message
     and send the submission object for evaluation
     """
+    submission_id = message.get("submission_pk")
+    challenge_phase_split_id = message.get("challenge_phase_split_pk")
+    if challenge_phase_split_id is None and (
+        is_redispatched_submission(submission_id)
+        or finish_with_cached_results(submission_id)
+        or fan_out_submission(submission_id)
+    ):
+        return
+    if challenge_phase_split_id is None:
+        evaluate_submission_message(message)
+        return
+    try:
+        evaluate_submission_message(message)
+    except Exception:
+        # Otherwise the submission would never complete
+        fail_submission_shard(
+            submission_id, challenge_phase_split_id, traceback.format_exc()
+        )
+        raise
+
+
+def evaluate_submission_message(message):
+    """
+    Downloads the submission of a message and evaluates it, or the shard of
+    the message
+    """
     challenge_id = message.get("challenge_pk")
     phase_id = message.get("phase_pk")
     submission_id = message.get("submission_pk")
-    submission_instance = extract_submission_data(submission_id)
+    challenge_phase_split_id = message.get("challenge_phase_split_pk")
+    if CHALLENGE_CACHE is not None:
+        CHALLENGE_CACHE.get(challenge_id, message.get("worker_bundle_version"))
+    with timed_stage("download", challenge_pk=challenge_id):
+        submission_instance = extract_submission_data(submission_id)
 
     # so that the further execution does not happen
     if not submission_instance:
@@ -621,17 +985,46 @@ def process_submission_message(message):
         SUBMISSION_DATA_DIR.format(submission_id=submission_id),
         os.path.basename(submission_instance.input_file.name),
     )
-    run_submission(
-        challenge_id,
-        challenge_phase,
-        submission_instance,
-        user_annotation_file_path,
-    )
+    if challenge_phase_split_id is None:
+        run_submission(
+            challenge_id,
+            challenge_phase,
+            submission_instance,
+            user_annotation_file_path,
+        )
+    else:
+        run_submission_shard(
+            challenge_id,
+            challenge_phase,
+            submission_instance,
+            user_annotation_file_path,
+            challenge_phase_split_id,
+        )
     # Delete submission data after processing submission
     delete_submission_data_directory(
         SUBMISSION_DATA_DIR.format(submission_id=submission_id))
 
 
+def fail_submission_shard(submission_id, challenge_phase_split_id, stderr):
+    """
+    Merges a shard whose message couldn't be evaluated as failed, e.g. when
+    its submission couldn't be downloaded
+    """
+    # Only the pk is used to merge a failed shard, whose split might not
+    # exist anymore
+    submission, _ = merge_evaluation_shard(
+        submission_id,
+        ChallengePhaseSplit(pk=challenge_phase_split_id),
+        stderr=stderr,
+    )
+    publish_submission_status(submission)
+    if submission.status == Submission.FAILED:
+        dispatch_next_submissions(submission)
+    delete_submission_data_directory(
+        SUBMISSION_DATA_DIR.format(submission_id=submission_id)
+    )
+
+
 def process_add_challenge_message(message):
     challenge_id = message.get("challenge_id")
 
@@ -648,7 +1041,9 @@ def process_submission_callback(body):
     try:
         logger.info("{} [x] Received submission message {}" .format(SUBMISSION_LOGS_PREFIX, body))
         body = yaml.safe_load(body)
-        body = dict((k, int(v)) for k, v in body.items())
+        body = dict(
+            (k, int(v) if k.endswith("_pk") else v) for k, v in body.items()
+        )
         process_submission_message(body)
     except Exception as e:
         logger.exception(
@@ -659,41 +1054,6 @@ def process_submission_callback(body):
         )
 
 
-def get_or_create_sqs_queue(queue_name):
-    """
-    Returns:
-        Returns the SQS Queue object
-    """
-    if settings.DEBUG or settings.TEST:
-        sqs = boto3.resource(
-            "sqs",
-            endpoint_url=os.environ.get("AWS_SQS_ENDPOINT", "http://sqs:9324"),
-            region_name=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
-            aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
-            aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
-        )
-    else:
-        sqs = boto3.resource(
-            "sqs",
-            region_name=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
-            aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
-            aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
-        )
-    if queue_name == "":
-        queue_name = "evalai_submission_queue"
-    # Check if the queue exists. If no, then create one
-    try:
-        queue = sqs.get_queue_by_name(QueueName=queue_name)
-    except botocore.exceptions.ClientError as ex:
-        if (
-            ex.response["Error"]["Code"]
-            != "AWS.SimpleQueueService.NonExistentQueue"
-        ):
-            logger.exception("Cannot get queue: {}".format(queue_name))
-        queue = sqs.create_queue(QueueName=queue_name)
-    return queue
-
-
 def load_challenge_and_return_max_submissions(q_params):
     try:
         challenge = Challenge.objects.get(**q_params)
@@ -709,14 +1069,93 @@ def load_challenge_and_return_max_submissions(q_params):
     return maximum_concurrent_submissions, challenge
 
 
+def get_megabytes_from_env(name):
+    value = os.environ.get(name)
+    return int(value) * 1024 * 1024 if value else None
+
+
+def receive_submission_messages(queue_name):
+    return receive_messages(
+        queue_name,
+        AttributeNames=["SentTimestamp"],
+        MaxNumberOfMessages=RECEIVE_BATCH_SIZE,
+    )
+
+
+def run_shared_worker(queue_names, killer):
+    """
+        Evaluates the submissions of several challenges, polling their queues
+        in turn. A challenge is only loaded on its first submission, and the
+        least recently used challenges are evicted to stay within
+        `MAX_LOADED_CHALLENGES` and the `CHALLENGE_DISK_BUDGET_MB` and
+        `CHALLENGE_MEMORY_BUDGET_MB` budgets.
+
+        Arguments:
+            queue_names {list} -- Names of the queues of the challenges
+            killer {GracefulKiller} -- Stops the worker between messages
+    """
+    global CHALLENGE_CACHE
+    CHALLENGE_CACHE = ChallengeCache(
+        load_challenge_by_pk,
+        unload_challenge,
+        get_challenge_disk_usage,
+        max_challenges=int(os.environ.get("MAX_LOADED_CHALLENGES", 10)),
+        max_disk_usage=get_megabytes_from_env("CHALLENGE_DISK_BUDGET_MB"),
+        max_memory_usage=get_megabytes_from_env("CHALLENGE_MEMORY_BUDGET_MB"),
+    )
+    create_dir_as_python_package(CHALLENGE_DATA_BASE_DIR)
+    create_dir_as_python_package(SUBMISSION_DATA_BASE_DIR)
+    for queue_name in queue_names:
+        get_or_create_sqs_queue(queue_name)
+    logger.info(
+        "{} Shared worker listening to {}".format(
+            WORKER_LOGS_PREFIX, ", ".join(queue_names)
+        )
+    )
+    while not killer.kill_now:
+        received = False
+        for queue_name in queue_names:
+            processed = []
+            for message in receive_submission_messages(queue_name):
+                received = True
+                observe_queue_age(
+                    (message.attributes or {}).get("SentTimestamp"),
+                    queue=queue_name,
+                )
+                logger.info(
+                    "{} Processing message body: {}".format(
+                        WORKER_LOGS_PREFIX, message.body
+                    )
+                )
+                process_submission_callback(message.body)
+                processed.append(message.receipt_handle)
+            # Let the queue know that the messages are processed
+            if processed:
+                delete_messages(queue_name, processed)
+            if killer.kill_now:
+                break
+        if not received:
+            time.sleep(SHARED_WORKER_IDLE_SLEEP)
+
+
 def main():
     killer = GracefulKiller()
+    configure_metrics()
     logger.info(
         "{} Using {} as temp directory to store data".format(WORKER_LOGS_PREFIX, BASE_TEMP_DIR)
     )
     create_dir_as_python_package(COMPUTE_DIRECTORY_PATH)
     sys.path.append(COMPUTE_DIRECTORY_PATH)
 
+    # A shared worker evaluates the submissions of several challenges
+    queue_names = os.environ.get("CHALLENGE_QUEUES")
+    if queue_names:
+        run_shared_worker(
+            [name.strip() for name in queue_names.split(",") if name.strip()],
+            killer,
+        )
+        return
+
     q_params = {"approved_by_admin": True}
     q_params["start_date__lt"] = timezone.now()
     q_params["end_date__gt"] = timezone.now()
@@ -749,9 +1188,14 @@ def main():
     # create submission base data directory
     create_dir_as_python_package(SUBMISSION_DATA_BASE_DIR)
     queue_name = os.environ.get("CHALLENGE_QUEUE", "evalai_submission_queue")
-    queue = get_or_create_sqs_queue(queue_name)
+    get_or_create_sqs_queue(queue_name)
     while True:
-        for message in queue.receive_messages():
+        processed = []
+        for message in receive_submission_messages(queue_name):
+            observe_queue_age(
+                (message.attributes or {}).get("SentTimestamp"),
+                queue=queue_name,
+            )
             if settings.DEBUG or settings.TEST:
                 if eval(LIMIT_CONCURRENT_SUBMISSION_PROCESSING):
                     current_running_submissions_count = Submission.objects.filter(
@@ -768,15 +1212,13 @@ def main():
                             "{} Processing message body: {}".format(WORKER_LOGS_PREFIX, message.body)
                         )
                         process_submission_callback(message.body)
-                        # Let the queue know that the message is processed
-                        message.delete()
+                        processed.append(message.receipt_handle)
                 else:
                     logger.info(
                         "{} Processing message body: {}".format(WORKER_LOGS_PREFIX, message.body)
                     )
                     process_submission_callback(message.body)
-                    # Let the queue know that the message is processed
-                    message.delete()
+                    processed.append(message.receipt_handle)
             else:
                 current_running_submissions_count = Submission.objects.filter(
                     challenge_phase__challenge=challenge.id, status="running"
@@ -791,8 +1233,10 @@ def main():
                         "{} Processing message body: {}".format(WORKER_LOGS_PREFIX, message.body)
                     )
                     process_submission_callback(message.body)
-                    # Let the queue know that the message is processed
-                    message.delete()
+                    processed.append(message.receipt_handle)
+        # Let the queue know that the messages are processed
+        if processed:
+            delete_messages(queue_name, processed)
         if killer.kill_now:
             break
         time.sleep(0.1)
@@ -0,0 +1,361 @@
+"""
+Metrics of the submission workers.
+
+The workers report:
+    - `stage_duration_seconds`, the time spent in each stage of a submission
+      (`download`, `import`, `evaluate`, `leaderboard`, `upload`, ...),
+      tagged with the `stage` and whether it succeeded (`status`),
+    - `queue_age_seconds`, the time a message waited in SQS before a worker
+      received it,
+    - `submission_latency_seconds`, the time from the submission of a
+      submission to its completion, tagged with its final `status`,
+    - `messages_received`, the number of received messages.
+
+The backend is chosen with the `WORKER_METRICS_BACKEND` environment
+variable:
+    - `statsd` sends the metrics as statsd histograms and counters with the
+      `datadog` client, to `STATSD_HOST`:`STATSD_PORT`,
+    - `prometheus` serves them in the Prometheus text format on
+      `WORKER_METRICS_PORT`,
+    - by default, no metrics are reported.
+Metric names are prefixed with `WORKER_METRICS_PREFIX`.
+"""
+import bisect
+import contextlib
+import datetime
+import logging
+import os
+import re
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFIX = "evalai.worker"
+DEFAULT_PROMETHEUS_PORT = 9102
+# Upper bounds of the buckets of the Prometheus histograms, in seconds
+DEFAULT_BUCKETS = (
+    0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600,
+)
+TIMESTAMP_REGEX = re.compile(
+    r"^(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(\.\d+)?"
+    r"(Z|[+-]\d{2}:?\d{2})?$"
+)
+
+
+class NullMetricsBackend:
+    """Drops the metrics"""
+
+    def observe(self, name, value, tags):
+        pass
+
+    def increment(self, name, tags):
+        pass
+
+
+class StatsdMetricsBackend:
+    """Sends the metrics to a statsd agent, e.g. the Datadog agent
+
+    Arguments:
+        prefix {str} -- Prefix of the metric names
+        host {str} -- Host of the statsd agent
+        port {int} -- Port of the statsd agent
+    """
+
+    def __init__(self, prefix=DEFAULT_PREFIX, host="localhost", port=8125):
+        # Only the workers reporting to statsd need the datadog client
+        from datadog.dogstatsd import DogStatsd
+
+        self.prefix = prefix
+        self.statsd = DogStatsd(host=host, port=port)
+
+    def get_tags(self, tags):
+        return ["{}:{}".format(key, value) for key, value in tags.items()]
+
+    def observe(self, name, value, tags):
+        self.statsd.histogram(
+            "{}.{}".format(self.prefix, name), value, tags=self.get_tags(tags)
+        )
+
+    def increment(self, name, tags):
+        self.statsd.increment(
+            "{}.{}".format(self.prefix, name), tags=self.get_tags(tags)
+        )
+
+
+class PrometheusMetricsBackend:
+    """Aggregates the metrics in memory and serves them in the Prometheus
+    text format
+
+    Arguments:
+        prefix {str} -- Prefix of the metric names, whose dots are replaced
+                        by underscores
+        port {int} -- Port of the HTTP endpoint, None to not serve it
+        buckets {tuple} -- Upper bounds of the buckets of the histograms
+    """
+
+    def __init__(
+        self, prefix=DEFAULT_PREFIX, port=None, buckets=DEFAULT_BUCKETS
+    ):
+        self.prefix = re.sub(r"[^a-zA-Z0-9_]", "_", prefix)
+        self.buckets = tuple(sorted(buckets))
+        # (name, tags): [bucket counts, sum, count]
+        self.histograms = {}
+        # (name, tags): count
+        self.counters = {}
+        self.lock = threading.Lock()
+        if port is not None:
+            self.start_server(port)
+
+    def get_key(self, name, tags):
+        return (
+            "{}_{}".format(self.prefix, name),
+            tuple(sorted((key, str(value)) for key, value in tags.items())),
+        )
+
+    def observe(self, name, value, tags):
+        key = self.get_key(name, tags)
+        with self.lock:
+            histogram = self.histograms.setdefault(
+                key, [[0] * len(self.buckets), 0, 0]
+            )
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def increment(self, name, tags):
+        key = self.get_key(name, tags)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def render(self):
+        """
+        Returns the metrics in the Prometheus text exposition format
+        """
+        lines = []
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        declared = set()
+        for (name, tags), (bucket_counts, total, count) in histograms:
+            if name not in declared:
+                lines.append("# TYPE {} histogram".format(name))
+                declared.add(name)
+            cumulative_count = 0
+            for bucket, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative_count += bucket_count
+                lines.append(
+                    "{}_bucket{} {}".format(
+                        name,
+                        format_labels(tags + (("le", repr(float(bucket))),)),
+                        cumulative_count,
+                    )
+                )
+            lines.append(
+                "{}_bucket{} {}".format(
+                    name, format_labels(tags + (("le", "+Inf"),)), count
+                )
+            )
+            lines.append(
+                "{}_sum{} {}".format(name, format_labels(tags), total)
+            )
+            lines.append(
+                "{}_count{} {}".format(name, format_labels(tags), count)
+            )
+        for (name, tags), count in counters:
+            if name not in declared:
+                lines.append("# TYPE {} counter".format(name))
+                declared.add(name)
+            lines.append("{}{} {}".format(name, format_labels(tags), count))
+        return "\n".join(lines) + "\n"
+
+    def start_server(self, port):
+        backend = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                content = backend.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type", "text/plain; version=0.0.4; charset=utf-8"
+                )
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = HTTPServer(("", port), MetricsHandler)
+        thread = threading.Thread(
+            target=self.server.serve_forever, name="worker_metrics"
+        )
+        thread.daemon = True
+        thread.start()
+        logger.info("Serving worker metrics on port {}".format(port))
+
+
+def format_labels(tags):
+    if not tags:
+        return ""
+    return "{{{}}}".format(
+        ",".join(
+            '{}="{}"'.format(
+                key,
+                value.replace("\\", "\\\\")
+                .replace('"', '\\"')
+                .replace("\n", "\\n"),
+            )
+            for key, value in tags
+        )
+    )
+
+
+def get_metrics_backend_from_env():
+    """
+    Returns the metrics backend configured by the environment variables
+    """
+    backend = os.environ.get("WORKER_METRICS_BACKEND", "").lower()
+    prefix = os.environ.get("WORKER_METRICS_PREFIX", DEFAULT_PREFIX)
+    if backend == "statsd":
+        return StatsdMetricsBackend(
+            prefix,
+            host=os.environ.get("STATSD_HOST", "localhost"),
+            port=int(os.environ.get("STATSD_PORT", 8125)),
+        )
+    if backend == "prometheus":
+        return PrometheusMetricsBackend(
+            prefix,
+            port=int(
+                os.environ.get("WORKER_METRICS_PORT", DEFAULT_PROMETHEUS_PORT)
+            ),
+        )
+    if backend:
+        logger.warning("Unknown worker metrics backend {}".format(backend))
+    return NullMetricsBackend()
+
+
+_backend = NullMetricsBackend()
+
+
+def configure_metrics(backend=None):
+    """
+    Sets the backend of the metrics of the worker, the one configured by the
+    environment variables by default
+    """
+    global _backend
+    if backend is None:
+        backend = get_metrics_backend_from_env()
+    _backend = backend
+    return _backend
+
+
+def observe(name, value, **tags):
+    # Reporting a metric must never fail a submission
+    try:
+        _backend.observe(name, value, tags)
+    except Exception:
+        logger.exception("Failed to report metric {}".format(name))
+
+
+def increment(name, **tags):
+    try:
+        _backend.increment(name, tags)
+    except Exception:
+        logger.exception("Failed to report metric {}".format(name))
+
+
+@contextlib.contextmanager
+def timed_stage(stage, **tags):
+    """
+    Reports the duration of a stage of a submission, e.g.
+
+        with timed_stage("evaluate", challenge_pk=challenge_pk):
+            output = evaluate(...)
+    """
+    start_time = time.time()
+    status = "success"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        observe(
+            "stage_duration_seconds",
+            time.time() - start_time,
+            stage=stage,
+            status=status,
+            **tags
+        )
+
+
+def parse_timestamp(value):
+    """
+    Returns an aware datetime, in UTC unless specified otherwise, from a
+    datetime or an ISO 8601 string, as serialized by EvalAI, or None
+    """
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=datetime.timezone.utc)
+        return value
+    if not isinstance(value, str):
+        return None
+    match = TIMESTAMP_REGEX.match(value)
+    if match is None:
+        return None
+    date, clock, fraction, offset = match.groups()
+    timestamp = datetime.datetime.strptime(
+        "{} {}".format(date, clock), "%Y-%m-%d %H:%M:%S"
+    )
+    if fraction:
+        timestamp += datetime.timedelta(seconds=float(fraction))
+    tzinfo = datetime.timezone.utc
+    if offset and offset != "Z":
+        offset = offset.replace(":", "")
+        minutes = int(offset[1:3]) * 60 + int(offset[3:5])
+        if offset[0] == "-":
+            minutes = -minutes
+        tzinfo = datetime.timezone(datetime.timedelta(minutes=minutes))
+    return timestamp.replace(tzinfo=tzinfo)
+
+
+def observe_queue_age(sent_timestamp, **tags):
+    """
+    Reports the time a message waited in its queue
+
+    Arguments:
+        sent_timestamp {int or str} -- `SentTimestamp` attribute of the SQS
+                                       message, in milliseconds since epoch
+    """
+    increment("messages_received", **tags)
+    if sent_timestamp is None:
+        return
+    age = max(time.time() - int(sent_timestamp) / 1000.0, 0)
+    observe("queue_age_seconds", age, **tags)
+
+
+def observe_submission_latency(submitted_at, completed_at=None, **tags):
+    """
+    Reports the time from the submission of a submission to its completion
+
+    Arguments:
+        submitted_at {datetime or str} -- `submitted_at` of the submission
+        completed_at {datetime or str} -- `completed_at` of the submission,
+                                          now by default
+    """
+    submitted_at = parse_timestamp(submitted_at)
+    if completed_at is None:
+        completed_at = datetime.datetime.now(datetime.timezone.utc)
+    completed_at = parse_timestamp(completed_at)
+    if submitted_at is None or completed_at is None:
+        return
+    observe(
+        "submission_latency_seconds",
+        (completed_at - submitted_at).total_seconds(),
+        **tags
+    )
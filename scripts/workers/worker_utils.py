@@ -1,8 +1,31 @@
+import asyncio
+import functools
+import gzip
 import logging
+import random
 import requests
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+# Connection pool and retry configuration of the worker HTTP session
+POOL_MAXSIZE = 10
+MAX_RETRIES = 5
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+# Only these methods are retried after a response or a read error, since
+# e.g. updating the data of a submission creates its leaderboard entries.
+# Every method is retried after a connection error.
+RETRY_METHODS = frozenset(["GET", "HEAD"])
+# Request bodies larger than this (in bytes) are gzip compressed
+COMPRESSION_MIN_SIZE = 1024
+
 
 URLS = {
     "get_message_from_sqs_queue": "/api/jobs/challenge/queues/{}/",
@@ -10,6 +33,7 @@ URLS = {
     "get_submission_by_pk": "/api/jobs/submission/{}",
     "get_challenge_phases_by_challenge_pk": "/api/challenges/{}/phases/",
     "get_challenge_by_queue_name": "/api/challenges/challenge/queues/{}/",
+    "get_worker_bundle_by_queue_name": "/api/challenges/challenge/queues/{}/worker_bundle/",
     "get_challenge_phase_by_pk": "/api/challenges/challenge/{}/challenge_phase/{}",
     "update_submission_data": "/api/jobs/challenge/{}/update_submission/",
     "get_aws_eks_bearer_token": "/api/jobs/challenge/{}/eks_bearer_token/",
@@ -17,11 +41,85 @@ URLS = {
 }
 
 
+class JitteredRetry(Retry):
+    """
+    Retry with "full jitter" exponential backoff, so that workers which
+    failed at the same time (e.g. during a deployment) do not retry in
+    lockstep.
+    """
+
+    def get_backoff_time(self):
+        backoff_time = super(JitteredRetry, self).get_backoff_time()
+        return random.uniform(0, backoff_time)
+
+
+def create_session(
+    pool_maxsize=POOL_MAXSIZE,
+    max_retries=MAX_RETRIES,
+    backoff_factor=RETRY_BACKOFF_FACTOR,
+):
+    """
+    Creates a `requests.Session` which keeps connections to EvalAI alive
+    and retries failed connections, and the throttled or unavailable
+    responses of `RETRY_METHODS`, with a jittered exponential backoff.
+
+    Arguments:
+        pool_maxsize {int} -- Number of connections kept alive per host
+        max_retries {int} -- Maximum number of retries of a request
+        backoff_factor {float} -- Base of the exponential backoff in seconds
+    Returns:
+        requests.Session -- The pooled session
+    """
+    retry_kwargs = {
+        "total": max_retries,
+        "backoff_factor": backoff_factor,
+        "status_forcelist": RETRY_STATUS_CODES,
+        "raise_on_status": False,
+    }
+    if "allowed_methods" in Retry.DEFAULT.__dict__:
+        retry_kwargs["allowed_methods"] = RETRY_METHODS
+    else:
+        retry_kwargs["method_whitelist"] = RETRY_METHODS
+    adapter = HTTPAdapter(
+        pool_connections=pool_maxsize,
+        pool_maxsize=pool_maxsize,
+        max_retries=JitteredRetry(**retry_kwargs),
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def compress_request_data(data, headers):
+    """
+    Gzip compresses form data larger than `COMPRESSION_MIN_SIZE` and sets the
+    matching headers. Returns the (possibly compressed) request body.
+    """
+    if not isinstance(data, dict):
+        return data
+    body = urlencode(data, doseq=True).encode("utf-8")
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return data
+    headers["Content-Type"] = "application/x-www-form-urlencoded"
+    headers["Content-Encoding"] = "gzip"
+    return gzip.compress(body)
+
+
 class EvalAI_Interface:
-    def __init__(self, AUTH_TOKEN, EVALAI_API_SERVER, QUEUE_NAME):
+    def __init__(
+        self,
+        AUTH_TOKEN,
+        EVALAI_API_SERVER,
+        QUEUE_NAME,
+        session=None,
+        compress_requests=False,
+    ):
         self.AUTH_TOKEN = AUTH_TOKEN
         self.EVALAI_API_SERVER = EVALAI_API_SERVER
         self.QUEUE_NAME = QUEUE_NAME
+        self.session = session or create_session()
+        self.compress_requests = compress_requests
 
     def get_request_headers(self):
         headers = {"Authorization": "Token {}".format(self.AUTH_TOKEN)}
@@ -29,8 +127,10 @@ class EvalAI_Interface:
 
     def make_request(self, url, method, data=None):
         headers = self.get_request_headers()
+        if self.compress_requests:
+            data = compress_request_data(data, headers)
         try:
-            response = requests.request(
+            response = self.session.request(
                 method=method, url=url, headers=headers, data=data
             )
             response.raise_for_status()
@@ -79,6 +179,14 @@ class EvalAI_Interface:
         response = self.make_request(url, "GET")
         return response
 
+    def get_worker_bundle_by_queue_name(self):
+        url = URLS.get("get_worker_bundle_by_queue_name").format(
+            self.QUEUE_NAME
+        )
+        url = self.return_url_per_environment(url)
+        response = self.make_request(url, "GET")
+        return response
+
     def get_challenge_phase_by_pk(self, challenge_pk, challenge_phase_pk):
         url = URLS.get("get_challenge_phase_by_pk").format(
             challenge_pk, challenge_phase_pk
@@ -110,3 +218,113 @@ class EvalAI_Interface:
         url = self.return_url_per_environment(url)
         response = self.make_request(url, "GET")
         return response
+
+
+class WorkerBundleCache:
+    """
+    Caches the worker bundle of a challenge, i.e. the challenge, its phases
+    and phase splits, so that a worker does not fetch them from EvalAI for
+    every submission it evaluates.
+
+    The bundle is fetched again only when a submission message carries a
+    different bundle version, or refers to a phase which is not in the cached
+    bundle.
+
+    Arguments:
+        fetch_bundle {callable} -- Returns the current worker bundle
+        on_refresh {callable} -- Called with the previous (or None) and the
+                                 new bundle whenever the bundle is fetched
+    """
+
+    def __init__(self, fetch_bundle, on_refresh=None):
+        self.fetch_bundle = fetch_bundle
+        self.on_refresh = on_refresh
+        self.bundle = None
+        self.phases = {}
+        self.lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self.bundle["version"] if self.bundle else None
+
+    def is_stale(self, version=None, phase_pk=None):
+        if self.bundle is None:
+            return True
+        if version is not None and version != self.version:
+            return True
+        return phase_pk is not None and int(phase_pk) not in self.phases
+
+    def refresh(self):
+        bundle = self.fetch_bundle()
+        previous_bundle = self.bundle
+        self.bundle = bundle
+        self.phases = {phase["id"]: phase for phase in bundle["phases"]}
+        logger.info("Worker bundle {} loaded".format(bundle["version"]))
+        if self.on_refresh is not None:
+            self.on_refresh(previous_bundle, bundle)
+
+    def get(self, version=None, phase_pk=None):
+        """
+        Returns the cached bundle, fetching it first if it is stale.
+
+        Arguments:
+            version {str} -- Bundle version of a submission message
+            phase_pk {int} -- Phase of a submission message
+        """
+        with self.lock:
+            if self.is_stale(version, phase_pk):
+                self.refresh()
+            return self.bundle
+
+    def get_challenge(self, version=None):
+        return self.get(version)["challenge"]
+
+    def get_phase(self, phase_pk, version=None):
+        self.get(version, phase_pk)
+        return self.phases[int(phase_pk)]
+
+    def get_phase_splits(self, phase_pk, version=None):
+        bundle = self.get(version, phase_pk)
+        return [
+            phase_split
+            for phase_split in bundle["phase_splits"]
+            if phase_split["challenge_phase"] == int(phase_pk)
+        ]
+
+
+class AsyncEvalAI_Interface:
+    """
+    asyncio variant of `EvalAI_Interface`, to overlap independent API calls,
+    e.g.
+
+        submission, phase = await asyncio.gather(
+            evalai.get_submission_by_pk(submission_pk),
+            evalai.get_challenge_phase_by_pk(challenge_pk, phase_pk),
+        )
+
+    Every method of the wrapped interface is available as a coroutine. The
+    calls run in a thread pool and share the pooled session of the wrapped
+    interface.
+
+    Arguments:
+        evalai {EvalAI_Interface} -- The interface to wrap
+        max_workers {int} -- Maximum number of concurrent calls
+    """
+
+    def __init__(self, evalai, max_workers=POOL_MAXSIZE):
+        self.evalai = evalai
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.evalai, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def run_in_executor(*args, **kwargs):
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self.executor, functools.partial(attribute, *args, **kwargs)
+            )
+
+        return run_in_executor
@@ -79,12 +79,14 @@ INSTALLED_APPS = DEFAULT_APPS + OUR_APPS + THIRD_PARTY_APPS
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "middleware.compression.GzipRequestMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "middleware.replica.ReplicaStickinessMiddleware",
 ]
 
 ROOT_URLCONF = "evalai.urls"
@@ -108,6 +110,21 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "evalai.wsgi.application"
 
+# Read-heavy views decorated with `base.db_router.use_read_replica` are served
+# from the `replica` database whenever one is configured in DATABASES.
+DATABASE_ROUTERS = ["base.db_router.ReplicaRouter"]
+
+REPLICA_DATABASE_ALIAS = "replica"
+
+# Maximum replication lag (in seconds) after which reads go to the primary.
+REPLICA_MAX_LAG_SECONDS = int(os.environ.get("REPLICA_MAX_LAG_SECONDS", 5))
+
+# Interval (in seconds) between two replication lag measurements.
+REPLICA_LAG_CHECK_INTERVAL = 5
+
+# Time (in seconds) for which a user reads from the primary after a write.
+REPLICA_STICKY_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.10/ref/settings/#auth-password-validators
@@ -205,6 +222,72 @@ AWS_REGION = os.environ.get("AWS_DEFAULT_REGION", "us-east-1")
 # Broker url for celery
 CELERY_BROKER_URL = "sqs://%s:%s@" % (AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY)
 
+# Queue depth driven autoscaling of challenge workers, see
+# `challenges/autoscaler.py`. Times are in seconds.
+WORKER_AUTOSCALER = {
+    # How often the autoscaler runs
+    "INTERVAL": 60,
+    # Number of queued or running submissions one worker is sized for
+    "SUBMISSIONS_PER_WORKER": 5,
+    # Workers are only removed once the load would fit in fewer workers at
+    # this utilization, so that the count doesn't flap around a boundary
+    "SCALE_DOWN_UTILIZATION": 0.5,
+    "SCALE_UP_COOLDOWN": 60,
+    "SCALE_DOWN_COOLDOWN": 600,
+}
+
+# Fair share scheduling of the submissions of the challenges with
+# `is_fair_scheduling_enabled`, see `jobs/scheduler.py`
+SUBMISSION_SCHEDULER = {
+    # How often the waiting submissions are dispatched
+    "INTERVAL": 10,
+    # Number of dispatched submissions waiting in the queue or being
+    # evaluated per worker
+    "SUBMISSIONS_PER_WORKER": 2,
+    # Seconds of evaluation credited to every participant team per round
+    "QUANTUM": 300,
+    # Share of the free slots of the baselines, host submissions and
+    # re-runs while participants are waiting
+    "PRIORITY_SHARE": 0.5,
+    # Evaluation time of a phase without finished submissions, in seconds
+    "DEFAULT_EVALUATION_TIME": 300,
+    # Seconds after which a dispatched submission which is still submitted,
+    # e.g. whose message was deleted after a failure of a worker, is
+    # dispatched again
+    "DISPATCH_TIMEOUT": 1800,
+    # Seconds after which a running submission, e.g. whose worker crashed,
+    # doesn't hold a slot of the workers anymore
+    "RUNNING_TIMEOUT": 6 * 60 * 60,
+}
+
+# Publish/subscribe of live events, see `base/events.py`. The in memory
+# broker only reaches the subscribers of the publishing process.
+EVENT_BROKER = {"BACKEND": "base.events.InMemoryBroker"}
+
+# Server-sent event streams. Times are in seconds.
+EVENT_STREAM = {
+    # Comments sent while no event is published, to keep the connection open
+    "HEARTBEAT_INTERVAL": 15,
+    # Streams are closed after this time, and reopened by the clients, so
+    # that they don't hold a server process forever
+    "MAX_DURATION": 300,
+    # Time after which the clients reconnect
+    "RETRY": 3,
+    # Maximum number of streams open at once on all the web servers
+    "MAX_STREAMS": 20,
+    # Validity of the tokens authenticating the streams
+    "TOKEN_MAX_AGE": 60,
+}
+
+# Storage of the stdout and stderr of the submissions. Sizes are in bytes.
+SUBMISSION_LOGS = {
+    # Larger logs only keep their head and their tail
+    "MAX_SIZE": 10 * 1024 * 1024,
+    "HEAD_SIZE": 1024 * 1024,
+    # Logs are compressed in chunks which can be decompressed on their own
+    "CHUNK_SIZE": 64 * 1024,
+}
+
 # CORS Settings
 CORS_ORIGIN_ALLOW_ALL = True
 
@@ -26,6 +26,13 @@ DATABASES = {
     }
 }
 
+# Set POSTGRES_REPLICA_HOST to try out read-replica routing locally
+if os.environ.get("POSTGRES_REPLICA_HOST"):  # noqa: ignore=F405
+    DATABASES["replica"] = dict(
+        DATABASES["default"],
+        HOST=os.environ.get("POSTGRES_REPLICA_HOST"),  # noqa: ignore=F405
+    )
+
 # E-Mail Settings
 EMAIL_HOST = "localhost"
 EMAIL_PORT = 1025
@@ -3,6 +3,8 @@ from .common import *  # noqa: ignore=F405
 import os
 import raven
 
+from django.core.exceptions import ImproperlyConfigured
+
 DEBUG = False
 
 ALLOWED_HOSTS = [
@@ -33,10 +35,31 @@ DATABASES = {
     }
 }
 
+if os.environ.get("RDS_REPLICA_HOSTNAME"):
+    DATABASES["replica"] = dict(
+        DATABASES["default"],
+        HOST=os.environ.get("RDS_REPLICA_HOSTNAME"),
+        PORT=os.environ.get("RDS_REPLICA_PORT", os.environ.get("RDS_PORT")),
+    )
+
 DATADOG_APP_NAME = "EvalAI"
 DATADOG_APP_KEY = os.environ.get("DATADOG_APP_KEY")
 DATADOG_API_KEY = os.environ.get("DATADOG_API_KEY")
 
+# Fraction of the requests whose DB query count and DB time are reported
+DATADOG_DB_QUERIES_SAMPLE_RATE = float(
+    os.environ.get("DATADOG_DB_QUERIES_SAMPLE_RATE", 0.01)
+)
+
+# Sampled requests slower than this (in seconds) are dumped into Datadog
+# events listing their slowest queries. `None` disables the dumps.
+DATADOG_SLOW_REQUEST_THRESHOLD = os.environ.get("DATADOG_SLOW_REQUEST_THRESHOLD")
+if DATADOG_SLOW_REQUEST_THRESHOLD is not None:
+    DATADOG_SLOW_REQUEST_THRESHOLD = float(DATADOG_SLOW_REQUEST_THRESHOLD)
+DATADOG_SLOW_REQUEST_SAMPLE_RATE = float(
+    os.environ.get("DATADOG_SLOW_REQUEST_SAMPLE_RATE", 0.01)
+)
+
 MIDDLEWARE += ["middleware.metrics.DatadogMiddleware"]  # noqa
 
 INSTALLED_APPS += ("storages", "raven.contrib.django.raven_compat")  # noqa
@@ -80,6 +103,18 @@ CACHES["default"]["LOCATION"] = os.environ.get(  # noqa: ignore=F405
     "MEMCACHED_LOCATION"
 )  # noqa: ignore=F405
 
+# Redis pub/sub delivers the live events of the workers to all web servers,
+# the in memory broker would never deliver them
+if not os.environ.get("EVENT_BROKER_REDIS_URL"):
+    raise ImproperlyConfigured(
+        "EVENT_BROKER_REDIS_URL must be set to the URL of the Redis server "
+        "of the live events"
+    )
+EVENT_BROKER = {
+    "BACKEND": "base.events.RedisBroker",
+    "OPTIONS": {"url": os.environ.get("EVENT_BROKER_REDIS_URL")},
+}
+
 RAVEN_CONFIG = {
     "dsn": os.environ.get("SENTRY_URL"),
     # If you are using git, you can also automatically configure the
@@ -1,3 +1,4 @@
+import io
 import json
 import mock
 import os
@@ -399,6 +400,10 @@ class RunSubmissionTestClass(BaseTestClass):
         patcher = mock.patch("scripts.workers.submission_worker.ContentFile")
         mock_cf = patcher.start()
         mock_cf.return_value = ContentFile("")
+        # The logs are read back from the files to be stored
+        mock_open.return_value.__enter__.side_effect = lambda: io.BytesIO(
+            b"log\n"
+        )
 
         submission_worker.run_submission(
             challenge_pk,
@@ -468,6 +473,10 @@ class RunSubmissionTestClass(BaseTestClass):
         patcher = mock.patch("scripts.workers.submission_worker.ContentFile")
         mock_cf = patcher.start()
         mock_cf.return_value = ContentFile("")
+        # The logs are read back from the files to be stored
+        mock_open.return_value.__enter__.side_effect = lambda: io.BytesIO(
+            b"log\n"
+        )
 
         submission_worker.run_submission(
             challenge_pk,
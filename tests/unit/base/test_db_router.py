@@ -0,0 +1,86 @@
+import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, override_settings
+
+from base import db_router
+from base.db_router import ReplicaRouter, use_read_replica
+from jobs.models import Submission
+
+
+DATABASES_WITH_REPLICA = {
+    "default": {"ENGINE": "django.db.backends.sqlite3"},
+    "replica": {"ENGINE": "django.db.backends.sqlite3"},
+}
+
+
+class FakeRequest(object):
+    def __init__(self, method="GET", user=None):
+        self.method = method
+        self.user = user or AnonymousUser()
+
+
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        db_router._replica_lag.clear()
+
+    def route_inside_view(self, method="GET"):
+        @use_read_replica
+        def view(request):
+            return self.router.db_for_read(Submission)
+
+        return view(FakeRequest(method=method))
+
+    def test_reads_go_to_primary_outside_decorated_views(self):
+        self.assertEqual(self.router.db_for_read(Submission), "default")
+
+    def test_reads_go_to_primary_when_no_replica_is_configured(self):
+        self.assertEqual(self.route_inside_view(), "default")
+
+    @override_settings(DATABASES=DATABASES_WITH_REPLICA)
+    @mock.patch("base.db_router.get_replication_lag", return_value=0)
+    def test_reads_go_to_replica_in_decorated_views(self, _):
+        self.assertEqual(self.route_inside_view(), "replica")
+        # State is restored once the view returns
+        self.assertEqual(self.router.db_for_read(Submission), "default")
+
+    @override_settings(DATABASES=DATABASES_WITH_REPLICA)
+    @mock.patch("base.db_router.get_replication_lag", return_value=0)
+    def test_unsafe_methods_read_from_primary(self, _):
+        self.assertEqual(self.route_inside_view(method="POST"), "default")
+
+    @override_settings(
+        DATABASES=DATABASES_WITH_REPLICA, REPLICA_MAX_LAG_SECONDS=5
+    )
+    @mock.patch("base.db_router.get_replication_lag", return_value=30)
+    def test_lagging_replica_falls_back_to_primary(self, _):
+        self.assertEqual(self.route_inside_view(), "default")
+
+    @override_settings(DATABASES=DATABASES_WITH_REPLICA)
+    @mock.patch("base.db_router.get_replication_lag", return_value=None)
+    def test_unknown_lag_falls_back_to_primary(self, _):
+        self.assertEqual(self.route_inside_view(), "default")
+
+    @override_settings(DATABASES=DATABASES_WITH_REPLICA)
+    @mock.patch("base.db_router.get_replication_lag", return_value=0)
+    def test_reads_after_a_write_go_to_primary(self, _):
+        @use_read_replica
+        def view(request):
+            self.router.db_for_write(Submission)
+            return self.router.db_for_read(Submission)
+
+        self.assertEqual(view(FakeRequest()), "default")
+
+    @override_settings(DATABASES=DATABASES_WITH_REPLICA)
+    @mock.patch("base.db_router.get_replication_lag", return_value=0)
+    @mock.patch(
+        "base.db_router.is_user_pinned_to_primary", return_value=True
+    )
+    def test_pinned_user_reads_from_primary(self, *args):
+        self.assertEqual(self.route_inside_view(), "default")
+
+    def test_writes_and_migrations_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Submission), "default")
+        self.assertTrue(self.router.allow_migrate("default", "jobs"))
+        self.assertFalse(self.router.allow_migrate("replica", "jobs"))
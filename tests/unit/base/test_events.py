@@ -0,0 +1,84 @@
+import mock
+
+from django.test import TestCase, override_settings
+
+from base.events import (
+    InMemoryBroker,
+    publish_event,
+    reset_event_broker,
+    stream_server_sent_events,
+    subscribe_to_events,
+)
+
+
+class InMemoryBrokerTest(TestCase):
+    def setUp(self):
+        self.broker = InMemoryBroker(max_pending_events=2)
+
+    def test_events_are_delivered_to_the_subscribers_of_the_channel(self):
+        subscription = self.broker.subscribe(["channel_1", "channel_2"])
+        other_subscription = self.broker.subscribe(["channel_3"])
+        self.broker.publish("channel_2", {"type": "test", "data": {}})
+        self.assertEqual(
+            subscription.get_event(timeout=0),
+            ("channel_2", {"type": "test", "data": {}}),
+        )
+        self.assertIsNone(subscription.get_event(timeout=0))
+        self.assertIsNone(other_subscription.get_event(timeout=0))
+
+    def test_closed_subscriptions_get_no_events(self):
+        subscription = self.broker.subscribe(["channel_1"])
+        subscription.close()
+        self.broker.publish("channel_1", {"type": "test", "data": {}})
+        self.assertIsNone(subscription.get_event(timeout=0))
+        self.assertEqual(dict(self.broker.subscriptions), {})
+
+    def test_events_are_dropped_when_too_many_are_pending(self):
+        subscription = self.broker.subscribe(["channel_1"])
+        for i in range(3):
+            self.broker.publish("channel_1", {"type": "test", "data": i})
+        self.assertEqual(subscription.get_event(timeout=0)[1]["data"], 0)
+        self.assertEqual(subscription.get_event(timeout=0)[1]["data"], 1)
+        self.assertIsNone(subscription.get_event(timeout=0))
+
+
+@override_settings(
+    EVENT_BROKER={"BACKEND": "base.events.InMemoryBroker"},
+    EVENT_STREAM={
+        "HEARTBEAT_INTERVAL": 0.05,
+        "MAX_DURATION": 0.2,
+        "RETRY": 3,
+        "MAX_STREAMS": 1,
+        "TOKEN_MAX_AGE": 60,
+    },
+)
+class StreamServerSentEventsTest(TestCase):
+    def setUp(self):
+        reset_event_broker()
+        self.addCleanup(reset_event_broker)
+
+    def test_events_are_streamed_until_the_max_duration(self):
+        subscription = subscribe_to_events(["channel_1"])
+        publish_event("channel_1", "first", {"id": 1})
+        publish_event("channel_1", "second", {"id": 2})
+        chunks = list(
+            stream_server_sent_events(
+                subscription,
+                lambda channel, event: event["type"] != "second",
+            )
+        )
+        self.assertEqual(chunks[0], "retry: 3000\n\n")
+        self.assertEqual(chunks[1], 'event: first\ndata: {"id": 1}\n\n')
+        self.assertTrue(
+            all(chunk == ": heartbeat\n\n" for chunk in chunks[2:])
+        )
+        # The subscription is closed with the stream
+        publish_event("channel_1", "third", {"id": 3})
+        self.assertIsNone(subscription.get_event(timeout=0))
+
+    def test_publishing_errors_are_not_raised(self):
+        with mock.patch(
+            "base.events.get_event_broker",
+            side_effect=Exception("Broker is down"),
+        ):
+            publish_event("channel_1", "first", {"id": 1})
@@ -0,0 +1,123 @@
+import botocore
+import mock
+
+from django.test import TestCase
+
+from base.sqs import (
+    DEFAULT_QUEUE_NAME,
+    NON_EXISTENT_QUEUE_ERROR_CODE,
+    clear_sqs_cache,
+    delete_messages,
+    get_or_create_sqs_queue,
+    receive_messages,
+    send_messages,
+)
+
+
+class BaseSQSTestClass(TestCase):
+    def setUp(self):
+        clear_sqs_cache()
+        patcher = mock.patch("base.sqs.get_sqs_resource")
+        self.sqs = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clear_sqs_cache)
+        self.sqs_client = self.sqs.meta.client
+        self.sqs_client.get_queue_url.side_effect = lambda QueueName: {
+            "QueueUrl": "http://sqs/{}".format(QueueName)
+        }
+        self.queue = self.sqs.Queue.return_value
+        self.queue.send_messages.return_value = {"Successful": []}
+        self.queue.delete_messages.return_value = {"Successful": []}
+
+
+class GetOrCreateSQSQueueTest(BaseSQSTestClass):
+    def test_queue_url_is_looked_up_once(self):
+        get_or_create_sqs_queue("test_queue")
+        get_or_create_sqs_queue("test_queue")
+        self.sqs_client.get_queue_url.assert_called_once_with(
+            QueueName="test_queue"
+        )
+        self.sqs.Queue.assert_called_with("http://sqs/test_queue")
+
+    def test_empty_queue_name_uses_default_queue(self):
+        get_or_create_sqs_queue("")
+        self.sqs_client.get_queue_url.assert_called_once_with(
+            QueueName=DEFAULT_QUEUE_NAME
+        )
+
+    def test_non_existing_queue_is_created(self):
+        self.sqs_client.get_queue_url.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": NON_EXISTENT_QUEUE_ERROR_CODE}}, "GetQueueUrl"
+        )
+        self.sqs_client.create_queue.return_value = {
+            "QueueUrl": "http://sqs/test_queue_2"
+        }
+        get_or_create_sqs_queue("test_queue_2")
+        get_or_create_sqs_queue("test_queue_2")
+        self.sqs_client.create_queue.assert_called_once_with(
+            QueueName="test_queue_2"
+        )
+        self.sqs.Queue.assert_called_with("http://sqs/test_queue_2")
+
+    def test_deleted_queue_is_looked_up_again(self):
+        self.queue.receive_messages.side_effect = [
+            botocore.exceptions.ClientError(
+                {"Error": {"Code": "QueueDoesNotExist"}}, "ReceiveMessage"
+            ),
+            ["message"],
+        ]
+        messages = receive_messages("test_queue", MaxNumberOfMessages=10)
+        self.assertEqual(messages, ["message"])
+        self.assertEqual(self.sqs_client.get_queue_url.call_count, 2)
+        self.queue.receive_messages.assert_called_with(MaxNumberOfMessages=10)
+
+    def test_other_receive_errors_are_raised(self):
+        self.queue.receive_messages.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "AccessDenied"}}, "ReceiveMessage"
+        )
+        with self.assertRaises(botocore.exceptions.ClientError):
+            receive_messages("test_queue")
+        self.sqs_client.get_queue_url.assert_called_once_with(
+            QueueName="test_queue"
+        )
+
+
+class BatchOperationsTest(BaseSQSTestClass):
+    def test_messages_are_sent_in_batches(self):
+        bodies = ["message {}".format(i) for i in range(25)]
+        failed = send_messages("test_queue", bodies)
+        self.assertEqual(failed, [])
+        batches = [
+            call[1]["Entries"]
+            for call in self.queue.send_messages.call_args_list
+        ]
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual(
+            [entry["Id"] for entry in batches[2]],
+            ["20", "21", "22", "23", "24"],
+        )
+        self.assertEqual(batches[2][0]["MessageBody"], "message 20")
+
+    def test_failed_deletes_are_returned(self):
+        failed_entry = {"Id": "11", "Code": "ReceiptHandleIsInvalid"}
+        self.queue.delete_messages.side_effect = [
+            {"Successful": []},
+            {"Successful": [], "Failed": [failed_entry]},
+        ]
+        failed = delete_messages(
+            "test_queue", ["handle {}".format(i) for i in range(12)]
+        )
+        self.assertEqual(failed, [failed_entry])
+        self.assertEqual(self.queue.delete_messages.call_count, 2)
+
+    def test_deletes_from_a_deleted_queue_fail(self):
+        self.queue.delete_messages.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "QueueDoesNotExist"}}, "DeleteMessageBatch"
+        )
+        failed = delete_messages(
+            "test_queue", ["handle {}".format(i) for i in range(12)]
+        )
+        self.assertEqual([entry["Id"] for entry in failed], [str(i) for i in range(12)])
+        self.assertEqual(self.queue.delete_messages.call_count, 1)
+        get_or_create_sqs_queue("test_queue")
+        self.assertEqual(self.sqs_client.get_queue_url.call_count, 2)
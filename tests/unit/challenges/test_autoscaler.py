@@ -0,0 +1,84 @@
+from django.test import TestCase
+
+from challenges.autoscaler import (
+    get_desired_workers,
+    simulate_autoscaling,
+    summarize_simulation,
+)
+
+CONFIG = {
+    "SUBMISSIONS_PER_WORKER": 5,
+    "SCALE_DOWN_UTILIZATION": 0.5,
+    "SCALE_UP_COOLDOWN": 60,
+    "SCALE_DOWN_COOLDOWN": 600,
+}
+
+
+def observation(queue_depth, in_flight=0, running_submissions=0, time=0):
+    return {
+        "time": time,
+        "queue_depth": queue_depth,
+        "in_flight": in_flight,
+        "running_submissions": running_submissions,
+    }
+
+
+class GetDesiredWorkersTest(TestCase):
+    def test_scales_up_to_the_load(self):
+        self.assertEqual(
+            get_desired_workers(1, observation(12, 3), 0, 10, None, CONFIG), 3
+        )
+
+    def test_scale_up_is_bounded_by_max_workers(self):
+        self.assertEqual(
+            get_desired_workers(1, observation(100), 0, 4, None, CONFIG), 4
+        )
+
+    def test_scale_up_waits_for_the_cooldown(self):
+        self.assertEqual(
+            get_desired_workers(1, observation(20), 0, 10, 30, CONFIG), 1
+        )
+
+    def test_scale_down_has_hysteresis(self):
+        # 8 submissions would fit in 2 workers, but only in 4 at half
+        # utilization
+        self.assertEqual(
+            get_desired_workers(3, observation(8), 0, 10, 3600, CONFIG), 3
+        )
+        self.assertEqual(
+            get_desired_workers(3, observation(4), 0, 10, 3600, CONFIG), 2
+        )
+
+    def test_scale_down_waits_for_the_cooldown(self):
+        self.assertEqual(
+            get_desired_workers(3, observation(0), 0, 10, 300, CONFIG), 3
+        )
+
+    def test_scale_down_is_bounded_by_min_workers(self):
+        self.assertEqual(
+            get_desired_workers(3, observation(0), 1, 10, 3600, CONFIG), 1
+        )
+
+    def test_running_submissions_count_as_load(self):
+        self.assertEqual(
+            get_desired_workers(
+                1, observation(0, 2, running_submissions=10), 0, 10, None, CONFIG
+            ),
+            2,
+        )
+
+
+class SimulateAutoscalingTest(TestCase):
+    def test_replays_a_deadline_spike(self):
+        trace = [
+            observation(0, time=0),
+            observation(30, time=60),
+            observation(40, time=120),
+            observation(10, time=180),
+            observation(0, time=900),
+        ]
+        steps = simulate_autoscaling(trace, 0, 10, config=CONFIG)
+        self.assertEqual([step["workers"] for step in steps], [0, 6, 8, 8, 0])
+        summary = summarize_simulation(steps)
+        self.assertEqual(summary["scaling_events"], 3)
+        self.assertEqual(summary["worker_seconds"], 6 * 60 + 8 * 60 + 8 * 720)
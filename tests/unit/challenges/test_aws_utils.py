@@ -0,0 +1,237 @@
+import mock
+import time
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from moto import mock_ecs, mock_logs
+
+from base.utils import get_boto3_client
+from challenges.aws_utils import (
+    COMMON_SETTINGS_DICT,
+    aws_keys,
+    get_ecs_client,
+    get_log_events_from_cloudwatch,
+    reset_ecs_client,
+    run_worker_operation,
+    scale_workers,
+    stop_workers,
+    tail_logs_from_cloudwatch,
+)
+from challenges.models import Challenge
+from hosts.models import ChallengeHostTeam
+
+LOG_GROUP_NAME = "challenge-pk-1-workers"
+LOG_STREAM_NAME = "test-queue/worker/1"
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+        }
+    }
+)
+class TailLogsFromCloudwatchTest(TestCase):
+    def setUp(self):
+        # Started here, as the class decorator keeps the logs of the
+        # previous tests
+        logs = mock_logs()
+        logs.start()
+        self.addCleanup(logs.stop)
+        cache.clear()
+        self.client = get_boto3_client("logs", aws_keys)
+        self.client.create_log_group(logGroupName=LOG_GROUP_NAME)
+        self.client.create_log_stream(
+            logGroupName=LOG_GROUP_NAME, logStreamName=LOG_STREAM_NAME
+        )
+
+    def put_logs(self, *messages):
+        timestamp = int(round(time.time() * 1000))
+        self.client.put_log_events(
+            logGroupName=LOG_GROUP_NAME,
+            logStreamName=LOG_STREAM_NAME,
+            logEvents=[
+                {"timestamp": timestamp, "message": message}
+                for message in messages
+            ],
+        )
+
+    def tail(self, cursor=None):
+        return tail_logs_from_cloudwatch(
+            LOG_GROUP_NAME, "test-queue", "", cursor
+        )
+
+    def test_only_new_logs_are_returned_for_a_cursor(self):
+        self.put_logs("first", "second")
+        logs, cursor, truncated = self.tail()
+        self.assertEqual(logs, ["first", "second"])
+        self.assertFalse(truncated)
+
+        self.put_logs("third")
+        with mock.patch("challenges.aws_utils.WORKER_LOGS_CACHE_TIMEOUT", 0):
+            logs, next_cursor, _ = self.tail(cursor)
+        self.assertEqual(logs, ["third"])
+
+        with mock.patch("challenges.aws_utils.WORKER_LOGS_CACHE_TIMEOUT", 0):
+            logs, last_cursor, _ = self.tail(next_cursor)
+        self.assertEqual(logs, [])
+        self.assertEqual(last_cursor, next_cursor)
+
+    def test_logs_dropped_from_the_tail_are_read_a_page_at_a_time(self):
+        self.put_logs("first")
+        _, cursor, _ = self.tail()
+        self.put_logs("second", "third", "fourth")
+        with mock.patch(
+            "challenges.aws_utils.WORKER_LOGS_CACHE_TIMEOUT", 0
+        ), mock.patch("challenges.aws_utils.WORKER_LOGS_MAX_EVENTS", 2):
+            logs, cursor, truncated = self.tail(cursor)
+            self.assertEqual(logs, ["second", "third"])
+            self.assertTrue(truncated)
+
+            logs, cursor, truncated = self.tail(cursor)
+            self.assertEqual(logs, ["fourth"])
+            self.assertFalse(truncated)
+
+    def test_cloudwatch_is_read_once_per_cache_timeout(self):
+        self.put_logs("first")
+        with mock.patch(
+            "challenges.aws_utils.get_log_events_from_cloudwatch",
+            wraps=get_log_events_from_cloudwatch,
+        ) as mock_get_log_events:
+            first_logs, _, _ = self.tail()
+            second_logs, _, _ = self.tail()
+        self.assertEqual(first_logs, ["first"])
+        self.assertEqual(second_logs, ["first"])
+        self.assertEqual(mock_get_log_events.call_count, 1)
+
+    def test_missing_log_group_returns_no_logs(self):
+        logs, cursor, truncated = tail_logs_from_cloudwatch(
+            "challenge-pk-2-workers", "test-queue", ""
+        )
+        self.assertEqual(logs, [])
+        self.assertIsNone(cursor)
+        self.assertFalse(truncated)
+
+
+class GetLogEventsFromCloudwatchTest(TestCase):
+    @mock.patch("challenges.aws_utils.get_boto3_client")
+    def test_all_pages_are_fetched(self, mock_get_boto3_client):
+        client = mock_get_boto3_client.return_value
+        client.filter_log_events.side_effect = [
+            {
+                "events": [
+                    {"eventId": "1", "timestamp": 1, "message": "first"}
+                ],
+                "nextToken": "token",
+            },
+            {"events": [{"eventId": "2", "timestamp": 2, "message": "second"}]},
+        ]
+        events = get_log_events_from_cloudwatch(
+            LOG_GROUP_NAME, "test-queue", 0, None, ""
+        )
+        self.assertEqual(
+            [event["message"] for event in events], ["first", "second"]
+        )
+        self.assertEqual(
+            client.filter_log_events.call_args[1]["nextToken"], "token"
+        )
+
+
+@mock_ecs
+class RunWorkerOperationTest(TransactionTestCase):
+    def setUp(self):
+        reset_ecs_client()
+        self.client = get_ecs_client()
+        self.client.create_cluster(
+            clusterName=COMMON_SETTINGS_DICT["CLUSTER"]
+        )
+        task_def_arn = self.client.register_task_definition(
+            family="worker",
+            containerDefinitions=[
+                {"name": "worker", "image": "worker", "memory": 512}
+            ],
+        )["taskDefinition"]["taskDefinitionArn"]
+
+        user = User.objects.create(
+            username="someuser",
+            email="user@test.com",
+            password="secret_password",
+        )
+        challenge_host_team = ChallengeHostTeam.objects.create(
+            team_name="Test Challenge Host Team", created_by=user
+        )
+        self.challenges = []
+        for i in range(3):
+            challenge = Challenge.objects.create(
+                title="Test Challenge {}".format(i),
+                creator=challenge_host_team,
+                start_date=timezone.now() - timedelta(days=2),
+                end_date=timezone.now() + timedelta(days=1),
+                queue="test-queue-{}".format(i),
+                workers=1,
+                task_def_arn=task_def_arn,
+            )
+            self.client.create_service(
+                cluster=COMMON_SETTINGS_DICT["CLUSTER"],
+                serviceName="{}_service".format(challenge.queue),
+                taskDefinition=task_def_arn,
+                desiredCount=1,
+            )
+            self.challenges.append(challenge)
+
+    def tearDown(self):
+        reset_ecs_client()
+
+    def test_scale_workers_updates_every_service(self):
+        response = scale_workers(Challenge.objects.order_by("pk"), 2)
+        self.assertEqual(response["count"], 3)
+        self.assertEqual(response["failures"], [])
+        self.assertEqual(
+            [result["challenge_pk"] for result in response["results"]],
+            [challenge.pk for challenge in self.challenges],
+        )
+        services = self.client.describe_services(
+            cluster=COMMON_SETTINGS_DICT["CLUSTER"],
+            services=[
+                "{}_service".format(challenge.queue)
+                for challenge in self.challenges
+            ],
+        )["services"]
+        self.assertEqual(
+            [service["desiredCount"] for service in services], [2, 2, 2]
+        )
+        self.assertEqual(
+            list(
+                Challenge.objects.order_by("pk").values_list(
+                    "workers", flat=True
+                )
+            ),
+            [2, 2, 2],
+        )
+
+    def test_failures_are_reported_per_challenge(self):
+        Challenge.objects.filter(pk=self.challenges[1].pk).update(workers=0)
+        response = stop_workers(Challenge.objects.order_by("pk"))
+        self.assertEqual(response["count"], 2)
+        self.assertEqual(
+            response["failures"],
+            [
+                {
+                    "message": "Please select challenges with active workers only.",
+                    "challenge_pk": self.challenges[1].pk,
+                }
+            ],
+        )
+
+    def test_progress_callback_is_called_for_every_challenge(self):
+        progress_callback = mock.Mock()
+        run_worker_operation(
+            "stop",
+            Challenge.objects.order_by("pk"),
+            progress_callback=progress_callback,
+        )
+        self.assertEqual(progress_callback.call_count, 3)
@@ -16,6 +16,8 @@ from challenges.models import (
     DatasetSplit,
     Leaderboard,
     LeaderboardData,
+    LeaderboardMetric,
+    update_leaderboard_metrics,
 )
 from hosts.models import ChallengeHostTeam
 from jobs.models import Submission
@@ -263,3 +265,62 @@ class LeaderboardDataTestCase(BaseTestCase):
             "{0} : {1}".format(self.challenge_phase_split, self.submission),
             self.leaderboard_data.__str__(),
         )
+
+
+class LeaderboardMetricTestCase(LeaderboardDataTestCase):
+    def setUp(self):
+        super(LeaderboardMetricTestCase, self).setUp()
+        self.leaderboard.schema = {
+            "labels": ["score", "accuracy", "name"],
+            "default_order_by": "score",
+        }
+        self.leaderboard.save()
+        self.leaderboard_data.result = {
+            "score": 50,
+            "accuracy": 0.75,
+            "name": "baseline",
+        }
+        self.leaderboard_data.save()
+
+    def get_metrics(self):
+        return dict(
+            LeaderboardMetric.objects.filter(
+                leaderboard_data=self.leaderboard_data
+            ).values_list("metric", "value")
+        )
+
+    def test_numeric_metrics_are_copied_when_leaderboard_data_is_saved(self):
+        self.assertEqual(self.get_metrics(), {"score": 50.0, "accuracy": 0.75})
+        self.assertTrue(
+            all(
+                metric.challenge_phase_split == self.challenge_phase_split
+                for metric in self.leaderboard_data.metrics.all()
+            )
+        )
+
+    def test_metrics_are_replaced_when_results_change(self):
+        self.leaderboard_data.result = {"score": 60}
+        self.leaderboard_data.save()
+        self.assertEqual(self.get_metrics(), {"score": 60.0})
+
+    def test_update_leaderboard_metrics_of_bulk_created_data(self):
+        LeaderboardMetric.objects.all().delete()
+        update_leaderboard_metrics([self.leaderboard_data])
+        self.assertEqual(self.get_metrics(), {"score": 50.0, "accuracy": 0.75})
+
+    def test_numeric_strings_are_copied_as_floats(self):
+        self.leaderboard_data.result = {
+            "score": "50.5",
+            "accuracy": "nan",
+            "name": "baseline",
+        }
+        self.leaderboard_data.save()
+        self.assertEqual(self.get_metrics(), {"score": 50.5})
+
+    def test_metrics_are_rebuilt_when_the_schema_labels_change(self):
+        self.leaderboard.schema = {
+            "labels": ["accuracy"],
+            "default_order_by": "accuracy",
+        }
+        self.leaderboard.save()
+        self.assertEqual(self.get_metrics(), {"accuracy": 0.75})
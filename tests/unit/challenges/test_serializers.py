@@ -211,6 +211,8 @@ class ChallengePhaseCreateSerializerTest(BaseTestCase):
                     "is_restricted_to_select_one_submission",
                     "submission_meta_attributes",
                     "is_partial_submission_evaluation_enabled",
+                    "is_result_cache_enabled",
+                    "is_sharded_evaluation_enabled",
                     "config_id",
                 ]
             ),
@@ -291,6 +293,8 @@ class ChallengePhaseCreateSerializerTest(BaseTestCase):
                     "is_restricted_to_select_one_submission",
                     "submission_meta_attributes",
                     "is_partial_submission_evaluation_enabled",
+                    "is_result_cache_enabled",
+                    "is_sharded_evaluation_enabled",
                     "config_id",
                 ]
             ),
@@ -367,6 +371,8 @@ class ChallengePhaseCreateSerializerTest(BaseTestCase):
                     "is_restricted_to_select_one_submission",
                     "submission_meta_attributes",
                     "is_partial_submission_evaluation_enabled",
+                    "is_result_cache_enabled",
+                    "is_sharded_evaluation_enabled",
                     "config_id",
                 ]
             ),
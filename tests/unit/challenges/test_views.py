@@ -4,6 +4,7 @@ import json
 import os
 import responses
 import shutil
+import zipfile
 
 from datetime import timedelta
 from os.path import join
@@ -25,6 +26,7 @@ from challenges.models import (
     ChallengeConfiguration,
     ChallengePhase,
     ChallengePhaseSplit,
+    ChallengeTemplate,
     DatasetSplit,
     Leaderboard,
     StarChallenge,
@@ -33,6 +35,7 @@ from participants.models import Participant, ParticipantTeam
 from hosts.models import ChallengeHost, ChallengeHostTeam
 from jobs.models import Submission
 from jobs.serializers import ChallengeSubmissionManagementSerializer
+from challenges.tasks import create_challenge_using_zip_configuration
 
 
 class BaseAPITestClass(APITestCase):
@@ -1958,6 +1961,8 @@ class GetChallengePhaseTest(BaseChallengePhaseClass):
                 "is_restricted_to_select_one_submission": self.challenge_phase.is_restricted_to_select_one_submission,
                 "submission_meta_attributes": None,
                 "is_partial_submission_evaluation_enabled": self.challenge_phase.is_partial_submission_evaluation_enabled,
+                "is_result_cache_enabled": self.challenge_phase.is_result_cache_enabled,
+                "is_sharded_evaluation_enabled": self.challenge_phase.is_sharded_evaluation_enabled,
             },
             {
                 "id": self.private_challenge_phase.id,
@@ -1982,6 +1987,8 @@ class GetChallengePhaseTest(BaseChallengePhaseClass):
                 "is_restricted_to_select_one_submission": self.challenge_phase.is_restricted_to_select_one_submission,
                 "submission_meta_attributes": None,
                 "is_partial_submission_evaluation_enabled": self.challenge_phase.is_partial_submission_evaluation_enabled,
+                "is_result_cache_enabled": self.challenge_phase.is_result_cache_enabled,
+                "is_sharded_evaluation_enabled": self.challenge_phase.is_sharded_evaluation_enabled,
             },
         ]
 
@@ -2014,6 +2021,8 @@ class GetChallengePhaseTest(BaseChallengePhaseClass):
                 "is_restricted_to_select_one_submission": self.challenge_phase.is_restricted_to_select_one_submission,
                 "submission_meta_attributes": None,
                 "is_partial_submission_evaluation_enabled": self.challenge_phase.is_partial_submission_evaluation_enabled,
+                "is_result_cache_enabled": self.challenge_phase.is_result_cache_enabled,
+                "is_sharded_evaluation_enabled": self.challenge_phase.is_sharded_evaluation_enabled,
             }
         ]
         self.client.force_authenticate(user=None)
@@ -2056,6 +2065,8 @@ class GetChallengePhaseTest(BaseChallengePhaseClass):
                 "is_restricted_to_select_one_submission": self.challenge_phase.is_restricted_to_select_one_submission,
                 "submission_meta_attributes": None,
                 "is_partial_submission_evaluation_enabled": self.challenge_phase.is_partial_submission_evaluation_enabled,
+                "is_result_cache_enabled": self.challenge_phase.is_result_cache_enabled,
+                "is_sharded_evaluation_enabled": self.challenge_phase.is_sharded_evaluation_enabled,
             },
             {
                 "id": self.private_challenge_phase.id,
@@ -2080,6 +2091,8 @@ class GetChallengePhaseTest(BaseChallengePhaseClass):
                 "is_restricted_to_select_one_submission": self.challenge_phase.is_restricted_to_select_one_submission,
                 "submission_meta_attributes": None,
                 "is_partial_submission_evaluation_enabled": self.challenge_phase.is_partial_submission_evaluation_enabled,
+                "is_result_cache_enabled": self.challenge_phase.is_result_cache_enabled,
+                "is_sharded_evaluation_enabled": self.challenge_phase.is_sharded_evaluation_enabled,
             },
         ]
 
@@ -2182,14 +2195,13 @@ class CreateChallengePhaseTest(BaseChallengePhaseClass):
             "challenges:create_challenge_using_zip_file",
             kwargs={"challenge_host_team_pk": self.challenge_host_team.pk},
         )
-        with mock.patch("challenges.views.requests.get") as m:
-            resp = mock.Mock()
-            resp.content = self.test_zip_file.read()
-            resp.status_code = 200
-            m.return_value = resp
+        with mock.patch(
+            "challenges.views.create_challenge_using_zip_configuration.delay",
+            side_effect=create_challenge_using_zip_configuration,
+        ):
             response = self.client.post(
                 self.url,
-                {"zip_configuration": self.input_zip_file},
+                {"zip_configuration": self.test_zip_file},
                 format="multipart",
             )
             self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -2240,14 +2252,13 @@ class CreateChallengePhaseTest(BaseChallengePhaseClass):
             "challenges:create_challenge_using_zip_file",
             kwargs={"challenge_host_team_pk": self.challenge_host_team.pk},
         )
-        with mock.patch("challenges.views.requests.get") as m:
-            resp = mock.Mock()
-            resp.content = self.test_zip_file.read()
-            resp.status_code = 200
-            m.return_value = resp
+        with mock.patch(
+            "challenges.views.create_challenge_using_zip_configuration.delay",
+            side_effect=create_challenge_using_zip_configuration,
+        ):
             response = self.client.post(
                 self.url,
-                {"zip_configuration": self.input_zip_file},
+                {"zip_configuration": self.test_zip_file},
                 format="multipart",
             )
             self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -2426,6 +2437,8 @@ class GetParticularChallengePhase(BaseChallengePhaseClass):
             "is_restricted_to_select_one_submission": self.challenge_phase.is_restricted_to_select_one_submission,
             "submission_meta_attributes": None,
             "is_partial_submission_evaluation_enabled": self.challenge_phase.is_partial_submission_evaluation_enabled,
+            "is_result_cache_enabled": self.challenge_phase.is_result_cache_enabled,
+            "is_sharded_evaluation_enabled": self.challenge_phase.is_sharded_evaluation_enabled,
         }
         self.client.force_authenticate(user=self.participant_user)
         response = self.client.get(self.url, {})
@@ -2460,6 +2473,8 @@ class GetParticularChallengePhase(BaseChallengePhaseClass):
             "is_restricted_to_select_one_submission": self.challenge_phase.is_restricted_to_select_one_submission,
             "submission_meta_attributes": None,
             "is_partial_submission_evaluation_enabled": self.challenge_phase.is_partial_submission_evaluation_enabled,
+            "is_result_cache_enabled": self.challenge_phase.is_result_cache_enabled,
+            "is_sharded_evaluation_enabled": self.challenge_phase.is_sharded_evaluation_enabled,
             "config_id": None
         }
         self.client.force_authenticate(user=self.user)
@@ -2519,6 +2534,8 @@ class GetParticularChallengePhase(BaseChallengePhaseClass):
             "is_restricted_to_select_one_submission": self.challenge_phase.is_restricted_to_select_one_submission,
             "submission_meta_attributes": None,
             "is_partial_submission_evaluation_enabled": self.challenge_phase.is_partial_submission_evaluation_enabled,
+            "is_result_cache_enabled": self.challenge_phase.is_result_cache_enabled,
+            "is_sharded_evaluation_enabled": self.challenge_phase.is_sharded_evaluation_enabled,
         }
         response = self.client.put(
             self.url, {"name": new_name, "description": new_description}
@@ -2616,6 +2633,8 @@ class UpdateParticularChallengePhase(BaseChallengePhaseClass):
             "is_restricted_to_select_one_submission": self.challenge_phase.is_restricted_to_select_one_submission,
             "submission_meta_attributes": None,
             "is_partial_submission_evaluation_enabled": self.challenge_phase.is_partial_submission_evaluation_enabled,
+            "is_result_cache_enabled": self.challenge_phase.is_result_cache_enabled,
+            "is_sharded_evaluation_enabled": self.challenge_phase.is_sharded_evaluation_enabled,
         }
         response = self.client.patch(self.url, self.partial_update_data)
         self.assertEqual(response.data, expected)
@@ -2986,14 +3005,14 @@ class CreateChallengeUsingZipFile(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     @responses.activate
-    def test_create_challenge_using_zip_file_when_server_error_occurs(self):
+    def test_create_challenge_using_zip_file_when_zip_file_is_invalid(self):
         responses.add(responses.POST, settings.SLACK_WEB_HOOK_URL, status=200)
         self.url = reverse_lazy(
             "challenges:create_challenge_using_zip_file",
             kwargs={"challenge_host_team_pk": self.challenge_host_team.pk},
         )
         expected = {
-            "error": "A server error occured while processing zip file. Please try again!"
+            "error": "The zip file contents cannot be extracted. Please check the format!"
         }
         response = self.client.post(
             self.url,
@@ -3001,7 +3020,12 @@ class CreateChallengeUsingZipFile(APITestCase):
             format="multipart",
         )
         self.assertEqual(response.data, expected)
-        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(
+            ChallengeConfiguration.objects.exclude(
+                pk=self.zip_configuration.pk
+            ).exists()
+        )
 
     @responses.activate
     def test_create_challenge_using_zip_file_when_challenge_host_team_does_not_exists(
@@ -3071,14 +3095,13 @@ class CreateChallengeUsingZipFile(APITestCase):
         self.assertEqual(Leaderboard.objects.count(), 1)
         self.assertEqual(ChallengePhaseSplit.objects.count(), 1)
 
-        with mock.patch("challenges.views.requests.get") as m:
-            resp = mock.Mock()
-            resp.content = self.test_zip_file.read()
-            resp.status_code = 200
-            m.return_value = resp
+        with mock.patch(
+            "challenges.views.create_challenge_using_zip_configuration.delay",
+            side_effect=create_challenge_using_zip_configuration,
+        ):
             response = self.client.post(
                 self.url,
-                {"zip_configuration": self.input_zip_file},
+                {"zip_configuration": self.test_zip_file},
                 format="multipart",
             )
             self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -3088,6 +3111,350 @@ class CreateChallengeUsingZipFile(APITestCase):
         self.assertEqual(Leaderboard.objects.count(), 2)
         self.assertEqual(ChallengePhaseSplit.objects.count(), 2)
 
+        challenge_configuration = ChallengeConfiguration.objects.get(
+            pk=response.data["challenge_configuration"]["id"]
+        )
+        self.assertEqual(
+            challenge_configuration.status, ChallengeConfiguration.FINISHED
+        )
+        self.assertEqual(challenge_configuration.progress, 100)
+        self.assertEqual(
+            challenge_configuration.challenge,
+            Challenge.objects.latest("pk"),
+        )
+
+        self.url = reverse_lazy(
+            "challenges:get_challenge_configuration_status",
+            kwargs={"challenge_configuration_pk": challenge_configuration.pk},
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], ChallengeConfiguration.FINISHED)
+
+    @responses.activate
+    def test_create_challenge_using_zip_file_records_validation_errors(self):
+        self.url = reverse_lazy(
+            "challenges:create_challenge_using_zip_file",
+            kwargs={"challenge_host_team_pk": self.challenge_host_team.pk},
+        )
+        with mock.patch(
+            "challenges.views.create_challenge_using_zip_configuration.delay"
+        ) as mock_delay:
+            response = self.client.post(
+                self.url,
+                {"zip_configuration": self.test_zip_file},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        challenge_configuration = ChallengeConfiguration.objects.get(
+            pk=response.data["challenge_configuration"]["id"]
+        )
+        self.assertEqual(
+            challenge_configuration.status, ChallengeConfiguration.QUEUED
+        )
+        mock_delay.assert_called_once_with(
+            challenge_configuration.pk,
+            self.challenge_host_team.pk,
+            challenge_data_from_hosts=None,
+        )
+
+        with mock.patch(
+            "challenges.challenge_config_utils.validate_challenge_config_util",
+            return_value=(["ERROR: There is no key leaderboard in the YAML file."], {}, {}),
+        ):
+            create_challenge_using_zip_configuration(
+                challenge_configuration.pk, self.challenge_host_team.pk
+            )
+        challenge_configuration.refresh_from_db()
+        self.assertEqual(
+            challenge_configuration.status, ChallengeConfiguration.FAILED
+        )
+        self.assertEqual(
+            challenge_configuration.error_message,
+            "ERROR: There is no key leaderboard in the YAML file.",
+        )
+        self.assertEqual(Challenge.objects.count(), 1)
+
+    def get_zip_file_content(self, replacements):
+        with open(
+            join(
+                settings.BASE_DIR, "examples", "example1", "test_zip_file.zip"
+            ),
+            "rb",
+        ) as zip_file:
+            input_zip_file = zipfile.ZipFile(io.BytesIO(zip_file.read()))
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, "w") as output_zip_file:
+            for name in input_zip_file.namelist():
+                content = input_zip_file.read(name)
+                if name.endswith(".yaml"):
+                    for old, new in replacements:
+                        content = content.replace(old, new)
+                output_zip_file.writestr(name, content)
+        return output.getvalue()
+
+    @responses.activate
+    def test_create_challenge_using_zip_file_without_html_files(self):
+        responses.add(responses.POST, settings.SLACK_WEB_HOOK_URL, status=200)
+        self.url = reverse_lazy(
+            "challenges:create_challenge_using_zip_file",
+            kwargs={"challenge_host_team_pk": self.challenge_host_team.pk},
+        )
+        zip_file_content = self.get_zip_file_content(
+            [
+                (b"description: description.html\n", b""),
+                (b"evaluation_details: evaluation_details.html\n", b""),
+            ]
+        )
+        with self.settings(MEDIA_ROOT="/tmp/evalai"), mock.patch(
+            "challenges.views.create_challenge_using_zip_configuration.delay",
+            side_effect=create_challenge_using_zip_configuration,
+        ):
+            response = self.client.post(
+                self.url,
+                {
+                    "zip_configuration": SimpleUploadedFile(
+                        "challenge_config.zip",
+                        zip_file_content,
+                        content_type="application/zip",
+                    )
+                },
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        challenge_configuration = ChallengeConfiguration.objects.get(
+            pk=response.data["challenge_configuration"]["id"]
+        )
+        self.assertEqual(
+            challenge_configuration.status, ChallengeConfiguration.FINISHED
+        )
+        challenge = challenge_configuration.challenge
+        self.assertIsNone(challenge.description)
+        self.assertIsNone(challenge.evaluation_details)
+        self.assertIsNotNone(challenge.terms_and_conditions)
+
+    def create_challenge_using_template(self, title):
+        with self.settings(MEDIA_ROOT="/tmp/evalai"):
+            challenge_template = ChallengeTemplate.objects.create(
+                title="Template",
+                template_file=SimpleUploadedFile(
+                    "template.zip",
+                    self.get_zip_file_content([]),
+                    content_type="application/zip",
+                ),
+                is_active=True,
+            )
+            self.url = reverse_lazy(
+                "challenges:create_challenge_using_zip_file",
+                kwargs={
+                    "challenge_host_team_pk": self.challenge_host_team.pk
+                },
+            )
+            with mock.patch(
+                "challenges.views.create_challenge_using_zip_configuration.delay",
+                side_effect=create_challenge_using_zip_configuration,
+            ):
+                response = self.client.post(
+                    self.url,
+                    {
+                        "is_challenge_template": True,
+                        "template_id": challenge_template.pk,
+                        "title": title,
+                        "description": "<p>Challenge of the hosts</p>",
+                        "start_date": "2017-06-09T20:00:00Z",
+                        "end_date": "2017-06-19T20:00:00Z",
+                        "challenge_phases": json.dumps(
+                            [
+                                {
+                                    "name": "Phase of the hosts",
+                                    "start_date": "2017-06-09T20:00:00Z",
+                                    "end_date": "2017-06-19T20:00:00Z",
+                                }
+                            ]
+                        ),
+                    },
+                    format="multipart",
+                )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        challenge_configuration = ChallengeConfiguration.objects.get(
+            pk=response.data["challenge_configuration"]["id"]
+        )
+        return challenge_template, challenge_configuration
+
+    @responses.activate
+    def test_create_challenge_using_zip_file_of_a_template(self):
+        responses.add(responses.POST, settings.SLACK_WEB_HOOK_URL, status=200)
+        (
+            challenge_template,
+            challenge_configuration,
+        ) = self.create_challenge_using_template("Challenge of the hosts")
+        self.assertEqual(
+            challenge_configuration.status, ChallengeConfiguration.FINISHED
+        )
+        # The configuration has its own copy of the template file
+        self.assertNotEqual(
+            challenge_configuration.zip_configuration.name,
+            challenge_template.template_file.name,
+        )
+        challenge = challenge_configuration.challenge
+        self.assertEqual(challenge.title, "Challenge of the hosts")
+        self.assertEqual(challenge.description, "<p>Challenge of the hosts</p>")
+        self.assertEqual(
+            ChallengePhase.objects.get(challenge=challenge).name,
+            "Phase of the hosts",
+        )
+
+    def test_create_challenge_using_zip_file_of_a_template_validates_it(self):
+        _, challenge_configuration = self.create_challenge_using_template("")
+        self.assertEqual(
+            challenge_configuration.status, ChallengeConfiguration.FAILED
+        )
+        self.assertIn(
+            "Please add the challenge title",
+            challenge_configuration.error_message,
+        )
+
+
+class CreateOrUpdateGithubChallengeTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient(enforce_csrf_checks=True)
+
+        self.user = User.objects.create(
+            username="host", email="host@test.com", password="secret_password"
+        )
+
+        EmailAddress.objects.create(
+            user=self.user, email="host@test.com", primary=True, verified=True
+        )
+
+        self.challenge_host_team = ChallengeHostTeam.objects.create(
+            team_name="Test Challenge Host Team", created_by=self.user
+        )
+
+        self.challenge_host = ChallengeHost.objects.create(
+            user=self.user,
+            team_name=self.challenge_host_team,
+            status=ChallengeHost.ACCEPTED,
+            permissions=ChallengeHost.ADMIN,
+        )
+
+        with open(
+            join(
+                settings.BASE_DIR, "examples", "example1", "test_zip_file.zip"
+            ),
+            "rb",
+        ) as zip_file:
+            self.zip_file_content = zip_file.read()
+
+        self.url = reverse_lazy(
+            "challenges:create_or_update_github_challenge",
+            kwargs={"challenge_host_team_pk": self.challenge_host_team.pk},
+        )
+        self.client.force_authenticate(user=self.user)
+
+        with mock.patch(
+            "challenges.views.create_challenge_using_zip_configuration.delay",
+            side_effect=create_challenge_using_zip_configuration,
+        ):
+            response = self.push_challenge_config(self.zip_file_content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.challenge = Challenge.objects.get(
+            github_repository="https://github.com/host/challenge"
+        )
+
+    def push_challenge_config(self, zip_file_content):
+        with self.settings(MEDIA_ROOT="/tmp/evalai"):
+            return self.client.post(
+                self.url,
+                {
+                    "zip_configuration": SimpleUploadedFile(
+                        "challenge_config.zip",
+                        zip_file_content,
+                        content_type="application/zip",
+                    ),
+                    "GITHUB_REPOSITORY": "https://github.com/host/challenge",
+                },
+                format="multipart",
+            )
+
+    def get_zip_file_content_with_title(self, title):
+        input_zip_file = zipfile.ZipFile(io.BytesIO(self.zip_file_content))
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, "w") as output_zip_file:
+            for name in input_zip_file.namelist():
+                content = input_zip_file.read(name)
+                if name.endswith(".yaml"):
+                    content = content.replace(
+                        b"title: Challenge Title",
+                        "title: {}".format(title).encode("utf-8"),
+                    )
+                output_zip_file.writestr(name, content)
+        return output.getvalue()
+
+    def test_created_challenge_records_checksums(self):
+        challenge_configuration = ChallengeConfiguration.objects.get(
+            challenge=self.challenge
+        )
+        self.assertEqual(len(challenge_configuration.checksum), 64)
+        self.assertEqual(len(self.challenge.evaluation_script_checksum), 64)
+        self.assertEqual(len(self.challenge.image_checksum), 64)
+        challenge_phase = ChallengePhase.objects.get(challenge=self.challenge)
+        self.assertEqual(len(challenge_phase.test_annotation_checksum), 64)
+
+    @mock.patch("challenges.aws_utils.restart_workers")
+    def test_sync_with_unchanged_config_is_skipped(self, mock_restart_workers):
+        response = self.push_challenge_config(self.zip_file_content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {
+                "Success": "The challenge Challenge Title is already up to date",
+                "changes": {},
+            },
+        )
+        self.assertEqual(ChallengeConfiguration.objects.count(), 1)
+        mock_restart_workers.assert_not_called()
+
+    @mock.patch("challenges.aws_utils.restart_workers")
+    def test_sync_only_updates_changed_objects(self, mock_restart_workers):
+        evaluation_script = self.challenge.evaluation_script.name
+        challenge_phase = ChallengePhase.objects.get(challenge=self.challenge)
+
+        response = self.push_challenge_config(
+            self.get_zip_file_content_with_title("New Challenge Title")
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        changes = response.data["changes"]
+        self.assertEqual(changes["challenge"], ["title"])
+        self.assertEqual(changes["files"], [])
+        for key in [
+            "leaderboards",
+            "challenge_phases",
+            "dataset_splits",
+            "challenge_phase_splits",
+        ]:
+            self.assertEqual(changes[key]["created"], [])
+            self.assertEqual(changes[key]["updated"], [])
+        self.assertEqual(changes["challenge_phases"]["unchanged"], [1])
+
+        self.challenge.refresh_from_db()
+        self.assertEqual(self.challenge.title, "New Challenge Title")
+        self.assertEqual(self.challenge.evaluation_script.name, evaluation_script)
+        self.assertEqual(
+            ChallengePhase.objects.get(pk=challenge_phase.pk).test_annotation,
+            challenge_phase.test_annotation,
+        )
+        mock_restart_workers.assert_not_called()
+        self.assertEqual(ChallengeConfiguration.objects.count(), 1)
+
+        # The new config is recorded, so pushing it again is a no-op
+        response = self.push_challenge_config(
+            self.get_zip_file_content_with_title("New Challenge Title")
+        )
+        self.assertEqual(response.data["changes"], {})
+
 
 class GetAllSubmissionsTest(BaseAPITestClass):
     def setUp(self):
@@ -4115,6 +4482,8 @@ class GetChallengePhaseByPkTest(BaseChallengePhaseClass):
             "is_restricted_to_select_one_submission": self.challenge_phase.is_restricted_to_select_one_submission,
             "submission_meta_attributes": None,
             "is_partial_submission_evaluation_enabled": self.challenge_phase.is_partial_submission_evaluation_enabled,
+            "is_result_cache_enabled": self.challenge_phase.is_result_cache_enabled,
+            "is_sharded_evaluation_enabled": self.challenge_phase.is_sharded_evaluation_enabled,
         }
         response = self.client.get(self.url, {})
         self.assertEqual(response.data, expected)
@@ -4340,3 +4709,85 @@ class GetAWSCredentialsForParticipantTeamTest(BaseChallengePhaseClass):
         self.assertTrue("AccessKeyId" in federated_user["Credentials"])
         self.assertTrue("SecretAccessKey" in federated_user["Credentials"])
         self.assertTrue("SessionToken" in federated_user["Credentials"])
+
+
+class GetWorkerBundleByQueueNameTest(BaseChallengePhaseSplitClass):
+    def setUp(self):
+        super(GetWorkerBundleByQueueNameTest, self).setUp()
+        self.challenge.queue = "test-queue"
+        self.challenge.save()
+        self.url = reverse_lazy(
+            "challenges:get_worker_bundle_by_queue_name",
+            kwargs={"queue_name": self.challenge.queue},
+        )
+
+    def test_get_worker_bundle(self):
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["challenge"]["id"], self.challenge.pk)
+        self.assertEqual(
+            [phase["id"] for phase in response.data["phases"]],
+            [self.challenge_phase.pk],
+        )
+        self.assertIsNotNone(
+            response.data["phases"][0]["test_annotation_etag"]
+        )
+        self.assertEqual(
+            [
+                phase_split["dataset_split_codename"]
+                for phase_split in response.data["phase_splits"]
+            ],
+            [self.dataset_split.codename, self.dataset_split_host.codename],
+        )
+        self.assertEqual(
+            response.data["leaderboards"],
+            {self.leaderboard.pk: self.leaderboard.schema},
+        )
+        self.assertEqual(
+            response["ETag"], '"{}"'.format(response.data["version"])
+        )
+
+    def test_get_worker_bundle_when_not_modified(self):
+        etag = self.client.get(self.url, {})["ETag"]
+        response = self.client.get(self.url, {}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_worker_bundle_version_changes_when_phase_is_modified(self):
+        version = self.client.get(self.url, {}).data["version"]
+        self.challenge_phase.max_submissions = 10
+        self.challenge_phase.save()
+        response = self.client.get(self.url, {})
+        self.assertNotEqual(response.data["version"], version)
+
+    def test_worker_bundle_version_ignores_unrelated_challenge_changes(self):
+        version = self.client.get(self.url, {}).data["version"]
+        self.challenge.workers = 2
+        self.challenge.save()
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.data["version"], version)
+
+        self.challenge.remote_evaluation = True
+        self.challenge.save()
+        response = self.client.get(self.url, {})
+        self.assertNotEqual(response.data["version"], version)
+
+    def test_get_worker_bundle_when_challenge_does_not_exist(self):
+        self.url = reverse_lazy(
+            "challenges:get_worker_bundle_by_queue_name",
+            kwargs={"queue_name": "non-existent-queue"},
+        )
+        expected = {
+            "error": "Challenge with queue name non-existent-queue does not exist"
+        }
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.data, expected)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_worker_bundle_when_user_is_not_challenge_host(self):
+        self.client.force_authenticate(user=self.participant_user)
+        expected = {
+            "error": "Sorry, you are not authorized to access this challenge."
+        }
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.data, expected)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
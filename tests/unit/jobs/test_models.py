@@ -1,3 +1,4 @@
+import hashlib
 import os
 import shutil
 
@@ -8,9 +9,26 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from django.utils import timezone
 
-from challenges.models import Challenge, ChallengePhase
+from challenges.models import (
+    Challenge,
+    ChallengePhase,
+    ChallengePhaseSplit,
+    DatasetSplit,
+    Leaderboard,
+    LeaderboardData,
+)
 from hosts.models import ChallengeHostTeam
 from jobs.models import Submission
+from jobs.submission_logs import get_log_content, save_log_artifact
+from jobs.utils import (
+    REUSED_RESULTS_LOG,
+    copy_submission_results,
+    get_cached_submission,
+    get_evaluation_shards,
+    get_submission_result_cache_key,
+    merge_evaluation_shard,
+    start_sharded_evaluation,
+)
 from participants.models import ParticipantTeam
 
 
@@ -80,3 +98,202 @@ class SubmissionTestCase(BaseTestCase):
         self.assertEqual(
             "{}".format(self.submission.id), self.submission.__str__()
         )
+
+
+class SubmissionResultCacheTestCase(BaseTestCase):
+    def setUp(self):
+        super(SubmissionResultCacheTestCase, self).setUp()
+        self.challenge_phase.is_result_cache_enabled = True
+        self.challenge_phase.save()
+        self.leaderboard = Leaderboard.objects.create(
+            schema={"labels": ["score"], "default_order_by": "score"}
+        )
+        self.dataset_split = DatasetSplit.objects.create(
+            name="Test Split", codename="test_split"
+        )
+        self.challenge_phase_split = ChallengePhaseSplit.objects.create(
+            dataset_split=self.dataset_split,
+            challenge_phase=self.challenge_phase,
+            leaderboard=self.leaderboard,
+            visibility=ChallengePhaseSplit.PUBLIC,
+        )
+
+    def create_submission(self, content, status=Submission.SUBMITTED):
+        with self.settings(MEDIA_ROOT="/tmp/evalai"):
+            submission = Submission.objects.create(
+                participant_team=self.participant_team,
+                challenge_phase=self.challenge_phase,
+                created_by=self.user,
+                input_file=SimpleUploadedFile(
+                    "submission.json", content, content_type="text/plain"
+                ),
+            )
+        # New submissions are always saved as submitted
+        submission.status = status
+        submission.save()
+        return submission
+
+    def test_checksum_of_the_uploaded_input_file(self):
+        submission = self.create_submission(b"predictions")
+        self.assertEqual(
+            submission.input_file_checksum,
+            hashlib.sha256(b"predictions").hexdigest(),
+        )
+
+    def test_identical_submissions_have_the_same_result_cache_key(self):
+        submission = self.create_submission(b"predictions")
+        identical_submission = self.create_submission(b"predictions")
+        other_submission = self.create_submission(b"other predictions")
+        result_cache_key = get_submission_result_cache_key(submission)
+        self.assertEqual(
+            get_submission_result_cache_key(identical_submission),
+            result_cache_key,
+        )
+        self.assertNotEqual(
+            get_submission_result_cache_key(other_submission),
+            result_cache_key,
+        )
+
+    def test_results_of_a_finished_identical_submission_are_copied(self):
+        cached_submission = self.create_submission(
+            b"predictions", status=Submission.FINISHED
+        )
+        cached_submission.output = {"result": [{"test_split": {"score": 1}}]}
+        cached_submission.result_cache_key = get_submission_result_cache_key(
+            cached_submission
+        )
+        with self.settings(MEDIA_ROOT="/tmp/evalai"):
+            save_log_artifact(
+                cached_submission, "stdout_file", "Team secret\n", save=False
+            )
+            save_log_artifact(
+                cached_submission, "stderr_file", "Team error\n", save=False
+            )
+        cached_submission.save()
+        LeaderboardData.objects.create(
+            challenge_phase_split=self.challenge_phase_split,
+            submission=cached_submission,
+            leaderboard=self.leaderboard,
+            result={"score": 1},
+        )
+        submission = self.create_submission(b"predictions")
+
+        self.assertEqual(
+            get_cached_submission(
+                submission, get_submission_result_cache_key(submission)
+            ),
+            cached_submission,
+        )
+        with self.settings(MEDIA_ROOT="/tmp/evalai"):
+            self.assertEqual(
+                copy_submission_results(cached_submission, submission),
+                [self.challenge_phase_split.pk],
+            )
+            submission.refresh_from_db()
+            cached_submission.refresh_from_db()
+            self.assertEqual(submission.status, Submission.FINISHED)
+            self.assertEqual(submission.output, cached_submission.output)
+            # The logs of the other team's submission are not shared
+            self.assertNotEqual(
+                submission.stdout_file.name, cached_submission.stdout_file.name
+            )
+            self.assertEqual(
+                get_log_content(submission, "stdout_file"),
+                REUSED_RESULTS_LOG.encode("utf-8"),
+            )
+            self.assertFalse(submission.stderr_file)
+            self.assertEqual(list(submission.log_indexes), ["stdout_file"])
+        self.assertEqual(
+            LeaderboardData.objects.get(submission=submission).result,
+            {"score": 1},
+        )
+
+    def test_unfinished_submissions_are_not_reused(self):
+        failed_submission = self.create_submission(
+            b"predictions", status=Submission.FAILED
+        )
+        failed_submission.result_cache_key = get_submission_result_cache_key(
+            failed_submission
+        )
+        failed_submission.save()
+        submission = self.create_submission(b"predictions")
+        self.assertIsNone(
+            get_cached_submission(
+                submission, get_submission_result_cache_key(submission)
+            )
+        )
+
+
+class SubmissionShardsTestCase(BaseTestCase):
+    def setUp(self):
+        super(SubmissionShardsTestCase, self).setUp()
+        self.challenge_phase.is_sharded_evaluation_enabled = True
+        self.challenge_phase.save()
+        self.leaderboard = Leaderboard.objects.create(
+            schema={"labels": ["score"], "default_order_by": "score"}
+        )
+        self.challenge_phase_splits = [
+            ChallengePhaseSplit.objects.create(
+                dataset_split=DatasetSplit.objects.create(
+                    name="Split {}".format(i), codename="split_{}".format(i)
+                ),
+                challenge_phase=self.challenge_phase,
+                leaderboard=self.leaderboard,
+                visibility=ChallengePhaseSplit.PUBLIC,
+            )
+            for i in range(2)
+        ]
+        self.submission = Submission.objects.create(
+            participant_team=self.participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=self.user,
+            status=Submission.SUBMITTED,
+        )
+        self.messages = start_sharded_evaluation(
+            self.submission, get_evaluation_shards(self.challenge_phase)
+        )
+
+    def merge(self, index, result=None):
+        with self.settings(MEDIA_ROOT="/tmp/evalai"):
+            return merge_evaluation_shard(
+                self.submission.pk,
+                self.challenge_phase_splits[index],
+                result=result,
+                stdout="output of split {}".format(index),
+            )
+
+    def test_a_message_is_published_per_split(self):
+        self.assertEqual(
+            [message["challenge_phase_split_pk"] for message in self.messages],
+            [split.pk for split in self.challenge_phase_splits],
+        )
+        self.assertEqual(self.submission.status, Submission.RUNNING)
+
+    def test_no_shards_when_the_phase_is_not_sharded(self):
+        self.challenge_phase.is_sharded_evaluation_enabled = False
+        self.assertEqual(get_evaluation_shards(self.challenge_phase), [])
+
+    def test_submission_is_partially_evaluated_until_all_shards_are_merged(
+        self
+    ):
+        submission, leaderboard_changed = self.merge(0, {"score": 1})
+        self.assertTrue(leaderboard_changed)
+        self.assertEqual(submission.status, Submission.PARTIALLY_EVALUATED)
+        # Merging a shard twice has no effect
+        _, leaderboard_changed = self.merge(0, {"score": 1})
+        self.assertFalse(leaderboard_changed)
+
+        submission, _ = self.merge(1, {"score": 2})
+        self.assertEqual(submission.status, Submission.FINISHED)
+        self.assertEqual(
+            submission.output["result"],
+            [{"split_0": {"score": 1}}, {"split_1": {"score": 2}}],
+        )
+        self.assertEqual(
+            LeaderboardData.objects.filter(submission=submission).count(), 2
+        )
+
+    def test_submission_fails_if_a_shard_fails(self):
+        self.merge(0)
+        submission, _ = self.merge(1, {"score": 2})
+        self.assertEqual(submission.status, Submission.FAILED)
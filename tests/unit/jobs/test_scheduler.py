@@ -0,0 +1,235 @@
+import os
+import shutil
+
+from datetime import timedelta
+
+import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+
+from challenges.models import Challenge, ChallengePhase
+from hosts.models import ChallengeHost, ChallengeHostTeam
+from jobs.models import Submission
+from jobs.scheduler import (
+    deficit_round_robin,
+    dispatch_next_submissions,
+    dispatch_submissions,
+)
+from participants.models import ParticipantTeam
+
+
+SUBMISSION_SCHEDULER = dict(
+    QUANTUM=300,
+    DEFAULT_EVALUATION_TIME=300,
+    PRIORITY_SHARE=0.5,
+    SUBMISSIONS_PER_WORKER=1,
+    DISPATCH_TIMEOUT=1800,
+    RUNNING_TIMEOUT=3600,
+)
+
+
+def team_queue(team, count, cost=1):
+    return (team, [("{}-{}".format(team, i), cost) for i in range(count)])
+
+
+class DeficitRoundRobinTest(TestCase):
+    def test_bursting_team_does_not_starve_the_others(self):
+        picked, _ = deficit_round_robin(
+            [team_queue(1, 10), team_queue(2, 2), team_queue(3, 1)], 5, {}, 1
+        )
+        self.assertEqual(picked, ["1-0", "2-0", "3-0", "1-1", "2-1"])
+
+    def test_round_robin_resumes_after_the_last_served_team(self):
+        _, state = deficit_round_robin(
+            [team_queue(1, 3), team_queue(2, 3), team_queue(3, 3)], 2, {}, 1
+        )
+        picked, _ = deficit_round_robin(
+            [team_queue(1, 2), team_queue(2, 2), team_queue(3, 3)], 2, state, 1
+        )
+        self.assertEqual(picked, ["3-0", "1-0"])
+
+    def test_costly_submissions_get_fewer_turns(self):
+        picked, state = deficit_round_robin(
+            [team_queue(1, 3, cost=3), team_queue(2, 6)], 6, {}, 1
+        )
+        self.assertEqual(picked, ["2-0", "2-1", "1-0", "2-2", "2-3", "2-4"])
+        self.assertEqual(state["deficits"], {1: 2, 2: 0})
+
+    def test_no_waiting_submissions(self):
+        self.assertEqual(
+            deficit_round_robin([], 5, {}, 1),
+            ([], {"deficits": {}, "team": None, "in_turn": False}),
+        )
+
+
+class DispatchSubmissionsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="user", email="user@test.com", password="password"
+        )
+        self.host = User.objects.create(
+            username="host", email="host@test.com", password="password"
+        )
+        challenge_host_team = ChallengeHostTeam.objects.create(
+            team_name="Test Challenge Host Team", created_by=self.host
+        )
+        ChallengeHost.objects.create(
+            user=self.host,
+            team_name=challenge_host_team,
+            status=ChallengeHost.ACCEPTED,
+            permissions=ChallengeHost.ADMIN,
+        )
+        self.challenge = Challenge.objects.create(
+            title="Test Challenge",
+            creator=challenge_host_team,
+            start_date=timezone.now() - timedelta(days=2),
+            end_date=timezone.now() + timedelta(days=1),
+            is_fair_scheduling_enabled=True,
+        )
+        try:
+            os.makedirs("/tmp/evalai")
+        except OSError:
+            pass
+        with self.settings(MEDIA_ROOT="/tmp/evalai"):
+            self.challenge_phase = ChallengePhase.objects.create(
+                name="Challenge Phase",
+                challenge=self.challenge,
+                start_date=timezone.now() - timedelta(days=2),
+                end_date=timezone.now() + timedelta(days=1),
+                test_annotation=SimpleUploadedFile(
+                    "test_sample_file.txt",
+                    b"Dummy file content",
+                    content_type="text/plain",
+                ),
+            )
+        self.teams = [
+            ParticipantTeam.objects.create(
+                team_name="Team {}".format(i), created_by=self.user
+            )
+            for i in range(2)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree("/tmp/evalai")
+
+    def submit(self, team, created_by=None):
+        return Submission.objects.create(
+            participant_team=team,
+            challenge_phase=self.challenge_phase,
+            created_by=created_by or self.user,
+            status=Submission.SUBMITTED,
+            input_file=self.challenge_phase.test_annotation,
+        )
+
+    @mock.patch("jobs.scheduler.send_messages", return_value=[])
+    def test_submissions_are_dispatched_fairly_up_to_the_free_slots(
+        self, send_messages
+    ):
+        burst = [self.submit(self.teams[0]) for _ in range(4)]
+        other = self.submit(self.teams[1])
+        with self.settings(
+            SUBMISSION_SCHEDULER=dict(
+                SUBMISSION_SCHEDULER, SUBMISSIONS_PER_WORKER=2
+            )
+        ):
+            self.assertEqual(
+                dispatch_submissions(self.challenge.pk),
+                [burst[0].pk, other.pk],
+            )
+            # No slot is free until the dispatched submissions are evaluated
+            self.assertEqual(dispatch_submissions(self.challenge.pk), [])
+        self.assertEqual(
+            Submission.objects.filter(dispatched_at__isnull=True).count(), 3
+        )
+
+    @mock.patch("jobs.scheduler.send_messages", return_value=[])
+    def test_host_submissions_are_dispatched_first(self, send_messages):
+        participant_submission = self.submit(self.teams[0])
+        host_submission = self.submit(self.teams[1], created_by=self.host)
+        with self.settings(SUBMISSION_SCHEDULER=SUBMISSION_SCHEDULER):
+            self.assertEqual(
+                dispatch_submissions(self.challenge.pk), [host_submission.pk]
+            )
+        participant_submission.refresh_from_db()
+        self.assertIsNone(participant_submission.dispatched_at)
+
+    @mock.patch("jobs.scheduler.transaction.on_commit")
+    @mock.patch("jobs.scheduler.send_messages", return_value=[])
+    def test_messages_are_sent_after_the_commit(
+        self, send_messages, on_commit
+    ):
+        submission = self.submit(self.teams[0])
+        with self.settings(SUBMISSION_SCHEDULER=SUBMISSION_SCHEDULER):
+            dispatch_submissions(self.challenge.pk)
+        send_messages.assert_not_called()
+        on_commit.call_args[0][0]()
+        self.assertEqual(len(send_messages.call_args[0][1]), 1)
+        submission.refresh_from_db()
+        self.assertIsNotNone(submission.dispatched_at)
+
+    @mock.patch("jobs.scheduler.transaction.on_commit")
+    @mock.patch(
+        "jobs.scheduler.send_messages",
+        return_value=[{"Id": "0", "Message": "Throttled"}],
+    )
+    def test_unsent_submissions_go_back_to_the_scheduler(
+        self, send_messages, on_commit
+    ):
+        submission = self.submit(self.teams[0])
+        with self.settings(SUBMISSION_SCHEDULER=SUBMISSION_SCHEDULER):
+            dispatch_submissions(self.challenge.pk)
+        on_commit.call_args[0][0]()
+        submission.refresh_from_db()
+        self.assertIsNone(submission.dispatched_at)
+
+    @mock.patch("jobs.scheduler.send_messages", return_value=[])
+    def test_stale_dispatched_submissions_are_dispatched_again(
+        self, send_messages
+    ):
+        stale = self.submit(self.teams[0])
+        Submission.objects.filter(pk=stale.pk).update(
+            dispatched_at=timezone.now() - timedelta(hours=1)
+        )
+        with self.settings(SUBMISSION_SCHEDULER=SUBMISSION_SCHEDULER):
+            self.assertEqual(
+                dispatch_submissions(self.challenge.pk), [stale.pk]
+            )
+
+    @mock.patch("jobs.scheduler.send_messages", return_value=[])
+    def test_stale_running_submissions_do_not_hold_a_slot(
+        self, send_messages
+    ):
+        running = self.submit(self.teams[0])
+        waiting = self.submit(self.teams[1])
+        Submission.objects.filter(pk=running.pk).update(
+            status=Submission.RUNNING,
+            dispatched_at=timezone.now() - timedelta(hours=2),
+            started_at=timezone.now() - timedelta(minutes=30),
+        )
+        with self.settings(SUBMISSION_SCHEDULER=SUBMISSION_SCHEDULER):
+            self.assertEqual(dispatch_submissions(self.challenge.pk), [])
+            Submission.objects.filter(pk=running.pk).update(
+                started_at=timezone.now() - timedelta(hours=2)
+            )
+            self.assertEqual(
+                dispatch_submissions(self.challenge.pk), [waiting.pk]
+            )
+
+    @mock.patch("jobs.scheduler.send_messages", return_value=[])
+    def test_next_submissions_are_dispatched_when_one_is_evaluated(
+        self, send_messages
+    ):
+        evaluated = self.submit(self.teams[0])
+        waiting = self.submit(self.teams[1])
+        with self.settings(SUBMISSION_SCHEDULER=SUBMISSION_SCHEDULER):
+            dispatch_submissions(self.challenge.pk)
+            evaluated.status = Submission.RUNNING
+            self.assertEqual(dispatch_next_submissions(evaluated), [])
+            evaluated.status = Submission.FINISHED
+            evaluated.save()
+            self.assertEqual(
+                dispatch_next_submissions(evaluated), [waiting.pk]
+            )
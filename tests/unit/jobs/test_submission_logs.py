@@ -0,0 +1,181 @@
+import gzip
+import io
+import mock
+import shutil
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from challenges.models import Challenge, ChallengePhase
+from hosts.models import ChallengeHostTeam
+from jobs.models import Submission
+from jobs.submission_logs import (
+    append_to_log_artifact,
+    compress_log,
+    get_log_bytes,
+    get_log_lines,
+    read_capped_log,
+    save_log_artifact,
+)
+from participants.models import ParticipantTeam
+
+
+@override_settings(
+    MEDIA_ROOT="/tmp/evalai",
+    SUBMISSION_LOGS={"MAX_SIZE": 3000, "HEAD_SIZE": 1000, "CHUNK_SIZE": 256},
+)
+class SubmissionLogsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="someuser",
+            email="user@test.com",
+            password="secret_password",
+        )
+        self.challenge_host_team = ChallengeHostTeam.objects.create(
+            team_name="Test Challenge Host Team", created_by=self.user
+        )
+        self.participant_team = ParticipantTeam.objects.create(
+            team_name="Participant Team", created_by=self.user
+        )
+        self.challenge = Challenge.objects.create(
+            title="Test Challenge",
+            creator=self.challenge_host_team,
+            start_date=timezone.now() - timedelta(days=2),
+            end_date=timezone.now() + timedelta(days=1),
+        )
+        self.challenge_phase = ChallengePhase.objects.create(
+            name="Challenge Phase",
+            challenge=self.challenge,
+            start_date=timezone.now() - timedelta(days=2),
+            end_date=timezone.now() + timedelta(days=1),
+            test_annotation=SimpleUploadedFile(
+                "test_sample_file.txt", b"Dummy file content"
+            ),
+        )
+        self.submission = Submission.objects.create(
+            participant_team=self.participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=self.user,
+            status=Submission.FINISHED,
+            input_file=self.challenge_phase.test_annotation,
+        )
+        self.lines = ["line {}".format(i) for i in range(100)]
+        self.log = "".join("{}\n".format(line) for line in self.lines)
+
+    def tearDown(self):
+        shutil.rmtree("/tmp/evalai")
+
+    def get_stored_log(self, field_name="stdout_file"):
+        with getattr(self.submission, field_name).storage.open(
+            getattr(self.submission, field_name).name, "rb"
+        ) as stored_file:
+            return gzip.decompress(stored_file.read()).decode("utf-8")
+
+    def test_log_is_stored_compressed_with_its_index(self):
+        save_log_artifact(self.submission, "stdout_file", self.log)
+        self.submission.refresh_from_db()
+        self.assertTrue(self.submission.stdout_file.name.endswith(".gz"))
+        self.assertEqual(self.get_stored_log(), self.log)
+        index = self.submission.log_indexes["stdout_file"]
+        self.assertEqual(index["lines"], 100)
+        self.assertEqual(index["size"], len(self.log))
+        self.assertEqual(index["truncated_bytes"], 0)
+        self.assertEqual(len(index["chunks"]), len(self.log) // 256 + 1)
+
+    def test_large_log_keeps_its_head_and_tail(self):
+        log = "".join("line {}\n".format(i) for i in range(1000))
+        content, size, truncated_bytes = read_capped_log(
+            io.BytesIO(log.encode("utf-8"))
+        )
+        head, tail = content.decode("utf-8").split(
+            "\n... {} bytes truncated ...\n".format(truncated_bytes)
+        )
+        self.assertEqual(size, len(log))
+        self.assertEqual(len(head) + truncated_bytes + len(tail), size)
+        self.assertLessEqual(len(head), 1000)
+        self.assertLessEqual(len(tail), 2000)
+        self.assertTrue(head.startswith("line 0\n"))
+        self.assertTrue(head.endswith("\n"))
+        self.assertTrue(tail.startswith("line "))
+        self.assertTrue(tail.endswith("line 999\n"))
+
+    def test_get_log_lines(self):
+        save_log_artifact(self.submission, "stdout_file", self.log)
+        preview = get_log_lines(self.submission, "stdout_file", -10, 5)
+        self.assertEqual(
+            preview,
+            {
+                "content": "\n".join(self.lines[90:95]),
+                "start_line": 90,
+                "end_line": 95,
+                "total_lines": 100,
+            },
+        )
+        preview = get_log_lines(self.submission, "stdout_file", 40, 1000)
+        self.assertEqual(preview["content"], "\n".join(self.lines[40:]))
+
+    def test_get_log_bytes(self):
+        save_log_artifact(self.submission, "stdout_file", self.log)
+        preview = get_log_bytes(self.submission, "stdout_file", 250, 20)
+        self.assertEqual(
+            preview,
+            {
+                "content": self.log[250:270],
+                "offset": 250,
+                "length": 20,
+                "size": len(self.log),
+            },
+        )
+
+    def test_get_log_lines_of_log_stored_without_index(self):
+        self.submission.stderr_file.save(
+            "stderr.txt", SimpleUploadedFile("stderr.txt", b"a\nb\nc\n")
+        )
+        preview = get_log_lines(self.submission, "stderr_file", -2, 2)
+        self.assertEqual(preview["content"], "b\nc")
+        self.assertEqual(preview["total_lines"], 3)
+
+    def test_read_capped_log_stops_when_a_read_returns_no_bytes(self):
+        self.assertEqual(read_capped_log(mock.MagicMock()), (b"", 0, 0))
+
+    def test_append_to_log_artifact(self):
+        save_log_artifact(self.submission, "stdout_file", self.log[:-1])
+        log = self.log[:-1]
+        for i in range(5):
+            append = "[split{}]\n{}".format(i, "x" * 100 * i)
+            append_to_log_artifact(self.submission, "stdout_file", append)
+            # The logs are separated by a newline unless they end with one
+            if not log.endswith("\n"):
+                log += "\n"
+            log += append
+        self.submission.refresh_from_db()
+        self.assertEqual(self.get_stored_log(), log)
+        index = self.submission.log_indexes["stdout_file"]
+        _, chunks = compress_log(log.encode("utf-8"))
+        self.assertEqual(index["chunks"][0], chunks[0])
+        self.assertEqual(
+            [chunk[0] for chunk in index["chunks"]],
+            [chunk[0] for chunk in chunks],
+        )
+        self.assertEqual(
+            [chunk[2] for chunk in index["chunks"]],
+            [chunk[2] for chunk in chunks],
+        )
+        self.assertEqual(index["size"], len(log))
+        self.assertEqual(index["lines"], log.count("\n") + 1)
+        preview = get_log_lines(self.submission, "stdout_file", -2, 2)
+        self.assertEqual(preview["content"], "\n".join(log.split("\n")[-2:]))
+        preview = get_log_bytes(self.submission, "stdout_file", 700, 300)
+        self.assertEqual(preview["content"], log[700:1000])
+
+    def test_append_to_log_stored_without_index(self):
+        self.submission.stderr_file.save(
+            "stderr.txt", SimpleUploadedFile("stderr.txt", b"a\nb")
+        )
+        append_to_log_artifact(self.submission, "stderr_file", "c\n")
+        self.assertEqual(self.get_stored_log("stderr_file"), "a\nb\nc\n")
+        self.assertIn("stderr_file", self.submission.log_indexes)
@@ -1,13 +1,17 @@
 import collections
 import json
+import mock
 import os
 import shutil
 
 from datetime import timedelta
 
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.core.urlresolvers import reverse_lazy
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth.models import User
+from django.test import override_settings
 from django.utils import timezone
 
 from allauth.account.models import EmailAddress
@@ -23,11 +27,30 @@ from challenges.models import (
     LeaderboardData,
 )
 from hosts.models import ChallengeHostTeam, ChallengeHost
+from jobs.events import (
+    LEADERBOARD_CHANGED_EVENT,
+    SUBMISSION_STATUS_EVENT,
+    publish_leaderboard_changed,
+    publish_submission_status,
+)
 from jobs.models import Submission
+from jobs.submission_logs import save_log_artifact
+from jobs.utils import create_leaderboard_snapshot
 from participants.models import ParticipantTeam, Participant
 
 
-class BaseAPITestClass(APITestCase):
+# The throttles use the "throttling" cache of the test settings
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "throttling": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+    },
+}
+
+
+class BaseAPITestFixture(APITestCase):
+    """Challenge, phases, teams and users, without any test"""
+
     def setUp(self):
         self.client = APIClient(enforce_csrf_checks=True)
 
@@ -199,6 +222,8 @@ class BaseAPITestClass(APITestCase):
     def tearDown(self):
         shutil.rmtree("/tmp/evalai")
 
+
+class BaseAPITestClass(BaseAPITestFixture):
     def test_challenge_submission_when_challenge_does_not_exist(self):
         self.url = reverse_lazy(
             "jobs:challenge_submission",
@@ -2137,6 +2162,56 @@ class ChallengeLeaderboardTest(BaseAPITestClass):
         self.assertEqual(response.data, expected)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_get_leaderboard_ordered_by_another_metric(self):
+        self.url = reverse_lazy(
+            "jobs:leaderboard",
+            kwargs={"challenge_phase_split_id": self.challenge_phase_split.id},
+        )
+        self.leaderboard_data_2.result = {"score": 10.0, "test-score": 90.0}
+        self.leaderboard_data_2.save()
+
+        response = self.client.get(self.url, {"order_by": "test-score"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(
+            response.data["results"][0]["id"], self.leaderboard_data_2.id
+        )
+        self.assertEqual(response.data["results"][0]["filtering_score"], 90.0)
+
+    def test_get_leaderboard_ranks_numeric_strings_as_numbers(self):
+        self.url = reverse_lazy(
+            "jobs:leaderboard",
+            kwargs={"challenge_phase_split_id": self.challenge_phase_split.id},
+        )
+        self.leaderboard_data_2.result = {"score": "60.0", "test-score": "9"}
+        self.leaderboard_data_2.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"][0]["id"], self.leaderboard_data_2.id
+        )
+        self.assertEqual(response.data["results"][0]["filtering_score"], 60.0)
+
+        response = self.client.get(self.url, {"order_by": "test-score"})
+        self.assertEqual(
+            response.data["results"][0]["id"], self.leaderboard_data.id
+        )
+        self.assertEqual(response.data["results"][0]["filtering_score"], 75.0)
+
+    def test_get_leaderboard_ordered_by_unknown_metric(self):
+        self.url = reverse_lazy(
+            "jobs:leaderboard",
+            kwargs={"challenge_phase_split_id": self.challenge_phase_split.id},
+        )
+
+        response = self.client.get(self.url, {"order_by": "unknown"})
+        self.assertEqual(
+            response.data,
+            {"error": "Sorry, unknown is not a metric of the leaderboard!"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_get_leaderboard_with_default_order_by_key_missing(self):
         self.url = reverse_lazy(
             "jobs:leaderboard",
@@ -2506,3 +2581,909 @@ class UpdateSubmissionTest(BaseAPITestClass):
         response = self.client.put(self.url, self.data)
         self.assertEqual(response.data, expected)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ReRunSubmissionsOfPhaseByHostTest(BaseAPITestFixture):
+    def setUp(self):
+        super(ReRunSubmissionsOfPhaseByHostTest, self).setUp()
+        self.challenge_host = ChallengeHost.objects.create(
+            user=self.user,
+            team_name=self.challenge_host_team,
+            status=ChallengeHost.ACCEPTED,
+            permissions=ChallengeHost.ADMIN,
+        )
+        self.submissions = [
+            Submission.objects.create(
+                participant_team=self.participant_team,
+                challenge_phase=self.challenge_phase,
+                created_by=self.user1,
+                status="submitted",
+                input_file=self.challenge_phase.test_annotation,
+                method_name="Test Method {}".format(i),
+            )
+            for i in range(3)
+        ]
+        Submission.objects.filter(
+            pk__in=[submission.pk for submission in self.submissions[:2]]
+        ).update(status=Submission.FINISHED)
+        self.url = reverse_lazy(
+            "jobs:re_run_submissions_of_phase_by_host",
+            kwargs={
+                "challenge_pk": self.challenge.pk,
+                "challenge_phase_pk": self.challenge_phase.pk,
+            },
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_re_run_submissions_when_user_is_not_a_host(self):
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.post(self.url, {})
+        self.assertEqual(
+            response.data,
+            {"error": "Only challenge hosts are allowed to re-run submissions"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @mock.patch("jobs.views.publish_submission_messages")
+    def test_re_run_finished_submissions(self, mock_publish):
+        mock_publish.return_value = []
+        response = self.client.post(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["failed_submission_pks"], [])
+
+        old_submissions = Submission.objects.filter(
+            pk__in=[submission.pk for submission in self.submissions]
+        ).order_by("pk")
+        self.assertEqual(
+            [submission.status for submission in old_submissions],
+            [Submission.CANCELLED, Submission.CANCELLED, "submitted"],
+        )
+        new_submissions = Submission.objects.exclude(
+            pk__in=[submission.pk for submission in self.submissions]
+        ).order_by("pk")
+        self.assertEqual(
+            [
+                (submission.method_name, submission.submission_number)
+                for submission in new_submissions
+            ],
+            [("Test Method 0", 4), ("Test Method 1", 5)],
+        )
+        self.assertEqual(
+            [submission.submitted_at for submission in new_submissions],
+            [submission.submitted_at for submission in self.submissions[:2]],
+        )
+        messages = mock_publish.call_args[0][0]
+        self.assertEqual(
+            [message["submission_pk"] for message in messages],
+            [submission.pk for submission in new_submissions],
+        )
+
+    @mock.patch("jobs.views.publish_submission_messages")
+    def test_re_run_skips_submission_limits(self, mock_publish):
+        mock_publish.return_value = []
+        ChallengePhase.objects.filter(pk=self.challenge_phase.pk).update(
+            max_submissions=1, max_submissions_per_day=1
+        )
+        response = self.client.post(
+            self.url,
+            {"submission_pks": [self.submissions[2].pk]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mock_publish.call_args[0][0]), 1)
+
+    @mock.patch("jobs.views.publish_submission_messages")
+    @mock.patch("jobs.utils.requests.get")
+    def test_re_run_uses_stored_submitted_image_uri(
+        self, mock_get, mock_publish
+    ):
+        mock_publish.return_value = []
+        Challenge.objects.filter(pk=self.challenge.pk).update(
+            is_docker_based=True
+        )
+        Submission.objects.filter(pk=self.submissions[0].pk).update(
+            submitted_image_uri="evalai-repo.com"
+        )
+        response = self.client.post(
+            self.url,
+            {"submission_pks": [self.submissions[0].pk]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_get.assert_not_called()
+        messages = mock_publish.call_args[0][0]
+        self.assertEqual(messages[0]["submitted_image_uri"], "evalai-repo.com")
+
+
+@override_settings(
+    EVENT_STREAM={
+        "HEARTBEAT_INTERVAL": 0.05,
+        "MAX_DURATION": 0.2,
+        "RETRY": 3,
+        "MAX_STREAMS": 1,
+        "TOKEN_MAX_AGE": 60,
+    }
+)
+class ChallengePhaseEventsTest(BaseAPITestFixture):
+    def setUp(self):
+        super(ChallengePhaseEventsTest, self).setUp()
+        self.challenge.participant_teams.add(self.participant_team)
+        self.dataset_split = DatasetSplit.objects.create(
+            name="Test", codename="Test"
+        )
+        self.challenge_phase_split = ChallengePhaseSplit.objects.create(
+            challenge_phase=self.challenge_phase,
+            dataset_split=self.dataset_split,
+            leaderboard=self.leaderboard,
+            visibility=ChallengePhaseSplit.PUBLIC,
+        )
+        self.private_dataset_split = DatasetSplit.objects.create(
+            name="Private", codename="Private"
+        )
+        self.private_challenge_phase_split = ChallengePhaseSplit.objects.create(
+            challenge_phase=self.challenge_phase,
+            dataset_split=self.private_dataset_split,
+            leaderboard=self.private_leaderboard,
+            visibility=ChallengePhaseSplit.HOST,
+        )
+        self.submission = Submission.objects.create(
+            participant_team=self.participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=self.user1,
+            status=Submission.SUBMITTED,
+            input_file=self.challenge_phase.test_annotation,
+            method_name="Test Method",
+        )
+        self.host_submission = Submission.objects.create(
+            participant_team=self.host_participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=self.user,
+            status=Submission.SUBMITTED,
+            input_file=self.challenge_phase.test_annotation,
+            method_name="Test Method",
+        )
+        self.url = reverse_lazy(
+            "jobs:get_challenge_phase_events",
+            kwargs={
+                "challenge_pk": self.challenge.pk,
+                "challenge_phase_pk": self.challenge_phase.pk,
+            },
+        )
+
+    def get_events(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        # The events were published before the stream is read
+        publish_submission_status(self.submission)
+        publish_submission_status(self.host_submission)
+        publish_leaderboard_changed([self.challenge_phase_split.pk])
+        publish_leaderboard_changed([self.private_challenge_phase_split.pk])
+        content = b"".join(response.streaming_content).decode("utf-8")
+        return [
+            (
+                chunk.split("\n")[0][len("event: "):],
+                json.loads(chunk.split("\n")[1][len("data: "):]),
+            )
+            for chunk in content.split("\n\n")
+            if chunk.startswith("event: ")
+        ]
+
+    def test_participant_gets_events_of_its_team_and_public_leaderboards(self):
+        response = self.client.get(self.url)
+        events = self.get_events(response)
+        self.assertEqual(
+            events,
+            [
+                (
+                    SUBMISSION_STATUS_EVENT,
+                    {
+                        "submission_id": self.submission.pk,
+                        "challenge_phase_id": self.challenge_phase.pk,
+                        "participant_team_id": self.participant_team.pk,
+                        "status": Submission.SUBMITTED,
+                    },
+                ),
+                (
+                    LEADERBOARD_CHANGED_EVENT,
+                    {"challenge_phase_split_id": self.challenge_phase_split.pk},
+                ),
+            ],
+        )
+
+    def test_host_gets_all_the_events_of_the_phase(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        events = self.get_events(response)
+        self.assertEqual(
+            [event_type for event_type, data in events],
+            [
+                SUBMISSION_STATUS_EVENT,
+                SUBMISSION_STATUS_EVENT,
+                LEADERBOARD_CHANGED_EVENT,
+                LEADERBOARD_CHANGED_EVENT,
+            ],
+        )
+
+    def test_events_of_private_phase_are_not_streamed_to_participants(self):
+        self.url = reverse_lazy(
+            "jobs:get_challenge_phase_events",
+            kwargs={
+                "challenge_pk": self.challenge.pk,
+                "challenge_phase_pk": self.private_challenge_phase.pk,
+            },
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(
+            response.data,
+            {
+                "error": "Sorry, cannot accept events for a private challenge phase"
+            },
+        )
+
+    def test_event_source_accept_header_is_accepted(self):
+        response = self.client.get(self.url, HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(len(self.get_events(response)), 2)
+
+    def test_errors_are_sent_as_an_event_to_event_sources(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(self.url, HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(response.content.startswith(b"event: error\n"))
+
+    def test_stream_is_authenticated_with_a_signed_token(self):
+        token_url = reverse_lazy(
+            "jobs:get_challenge_phase_events_token",
+            kwargs={
+                "challenge_pk": self.challenge.pk,
+                "challenge_phase_pk": self.challenge_phase.pk,
+            },
+        )
+        token = self.client.get(token_url).data["token"]
+        self.client.force_authenticate(user=None)
+        response = self.client.get(
+            self.url, {"token": token}, HTTP_ACCEPT="text/event-stream"
+        )
+        self.assertEqual(len(self.get_events(response)), 2)
+
+        response = self.client.get(self.url, {"token": token + "x"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        other_phase_url = reverse_lazy(
+            "jobs:get_challenge_phase_events",
+            kwargs={
+                "challenge_pk": self.challenge.pk,
+                "challenge_phase_pk": self.private_challenge_phase.pk,
+            },
+        )
+        response = self.client.get(other_phase_url, {"token": token})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_number_of_open_streams_is_capped(self):
+        with self.settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                },
+                "throttling": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                },
+            }
+        ):
+            cache.clear()
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            other_response = self.client.get(self.url)
+            self.assertEqual(
+                other_response.status_code,
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            self.assertEqual(other_response["Retry-After"], "3")
+            # The slot is released when the stream ends
+            self.get_events(response)
+            response = self.client.get(self.url)
+            self.get_events(response)
+
+    @mock.patch("jobs.views.publish_submission_status")
+    def test_running_status_update_is_published(
+        self, mock_publish_submission_status
+    ):
+        self.client.force_authenticate(user=self.user)
+        url = reverse_lazy(
+            "jobs:update_submission",
+            kwargs={"challenge_pk": self.challenge.pk},
+        )
+        response = self.client.patch(
+            url,
+            {
+                "submission": self.submission.pk,
+                "submission_status": Submission.RUNNING,
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        published_submission = mock_publish_submission_status.call_args[0][0]
+        self.assertEqual(published_submission.pk, self.submission.pk)
+        self.assertEqual(published_submission.status, Submission.RUNNING)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ParticipantTeamRankTest(BaseAPITestFixture):
+    def setUp(self):
+        super(ParticipantTeamRankTest, self).setUp()
+        self.dataset_split = DatasetSplit.objects.create(
+            name="Test", codename="Test"
+        )
+        self.challenge_phase_split = ChallengePhaseSplit.objects.create(
+            challenge_phase=self.challenge_phase,
+            dataset_split=self.dataset_split,
+            leaderboard=self.leaderboard,
+            visibility=ChallengePhaseSplit.PUBLIC,
+        )
+        self.private_challenge_phase_split = ChallengePhaseSplit.objects.create(
+            challenge_phase=self.challenge_phase,
+            dataset_split=self.dataset_split,
+            leaderboard=self.private_leaderboard,
+            visibility=ChallengePhaseSplit.HOST,
+        )
+        self.participant_team_2 = self.create_participant_team("2")
+        self.participant_team_3 = self.create_participant_team("3")
+        self.add_leaderboard_entry(self.participant_team, self.user1, 50.0)
+        self.add_leaderboard_entry(
+            self.participant_team_2, self.participant_team_2.created_by, 70.0
+        )
+        self.add_leaderboard_entry(
+            self.participant_team_3, self.participant_team_3.created_by, 30.0
+        )
+        self.client.force_authenticate(user=self.user1)
+
+    def tearDown(self):
+        super(ParticipantTeamRankTest, self).tearDown()
+        cache.clear()
+
+    def create_participant_team(self, suffix):
+        user = User.objects.create(
+            username="rankuser{}".format(suffix),
+            email="rankuser{}@test.com".format(suffix),
+            password="secret_password",
+        )
+        participant_team = ParticipantTeam.objects.create(
+            team_name="Participant Team {}".format(suffix), created_by=user
+        )
+        Participant.objects.create(
+            user=user, status=Participant.SELF, team=participant_team
+        )
+        return participant_team
+
+    def add_leaderboard_entry(self, participant_team, user, score):
+        submission = Submission.objects.create(
+            participant_team=participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=user,
+            status="submitted",
+            input_file=self.challenge_phase.test_annotation,
+            method_name="Test Method",
+        )
+        # New submissions are saved as submitted and private by default
+        submission.status = Submission.FINISHED
+        submission.is_public = True
+        submission.save()
+        LeaderboardData.objects.create(
+            challenge_phase_split=self.challenge_phase_split,
+            submission=submission,
+            leaderboard=self.leaderboard,
+            result={"score": score, "test-score": score},
+        )
+
+    def get_rank_url(self, challenge_phase_split, participant_team):
+        return reverse_lazy(
+            "jobs:get_participant_team_rank",
+            kwargs={
+                "challenge_phase_split_pk": challenge_phase_split.pk,
+                "participant_team_pk": participant_team.pk,
+            },
+        )
+
+    def test_get_participant_team_rank_with_neighbours(self):
+        url = self.get_rank_url(
+            self.challenge_phase_split, self.participant_team
+        )
+        response = self.client.get(url, {"neighbours": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rank"], 2)
+        self.assertEqual(response.data["total_entries"], 3)
+        self.assertEqual(
+            response.data["entries"],
+            [
+                {
+                    "rank": 1,
+                    "participant_team": self.participant_team_2.pk,
+                    "team_name": "Participant Team 2",
+                    "score": 70.0,
+                },
+                {
+                    "rank": 2,
+                    "participant_team": self.participant_team.pk,
+                    "team_name": "Participant Team for Challenge",
+                    "score": 50.0,
+                },
+                {
+                    "rank": 3,
+                    "participant_team": self.participant_team_3.pk,
+                    "team_name": "Participant Team 3",
+                    "score": 30.0,
+                },
+            ],
+        )
+
+    @mock.patch("jobs.utils.LEADERBOARD_RANK_INDEX_CHUNK_SIZE", 2)
+    def test_rank_index_is_cached_in_chunks(self):
+        url = self.get_rank_url(
+            self.challenge_phase_split, self.participant_team
+        )
+        response = self.client.get(url, {"neighbours": 1})
+        self.assertEqual(
+            [entry["rank"] for entry in response.data["entries"]], [1, 2, 3]
+        )
+        # Only the items of the team and of its neighbours are read
+        with mock.patch(
+            "jobs.utils.calculate_distinct_sorted_leaderboard_data"
+        ) as mock_calculate:
+            response = self.client.get(url, {"neighbours": 1})
+            mock_calculate.assert_not_called()
+        self.assertEqual(response.data["rank"], 2)
+        self.assertEqual(
+            [entry["participant_team"] for entry in response.data["entries"]],
+            [
+                self.participant_team_2.pk,
+                self.participant_team.pk,
+                self.participant_team_3.pk,
+            ],
+        )
+
+    def test_get_participant_team_rank_without_neighbours(self):
+        url = self.get_rank_url(
+            self.challenge_phase_split, self.participant_team_3
+        )
+        response = self.client.get(url, {"neighbours": 0})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rank"], 3)
+        self.assertEqual(
+            [entry["rank"] for entry in response.data["entries"]], [3]
+        )
+
+    def test_get_participant_team_rank_when_team_is_not_on_leaderboard(self):
+        url = self.get_rank_url(
+            self.challenge_phase_split, self.host_participant_team
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data, {"rank": None, "total_entries": 3, "entries": []}
+        )
+
+    def test_get_participant_team_rank_when_leaderboard_is_not_public(self):
+        url = self.get_rank_url(
+            self.private_challenge_phase_split, self.participant_team
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data, {"error": "Sorry, the leaderboard is not public!"}
+        )
+
+    def test_get_github_badge_data(self):
+        url = reverse_lazy(
+            "jobs:get_github_badge_data",
+            kwargs={
+                "challenge_phase_split_pk": self.challenge_phase_split.pk,
+                "participant_team_pk": self.participant_team.pk,
+            },
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {
+                "schemaVersion": 1,
+                "label": "EvalAI",
+                "color": "blue",
+                "message": "Test Challenge Rank #2",
+            },
+        )
+
+    def test_rank_index_is_cached_until_the_leaderboard_changes(self):
+        url = self.get_rank_url(
+            self.challenge_phase_split, self.participant_team
+        )
+        self.assertEqual(self.client.get(url).data["rank"], 2)
+
+        participant_team_4 = self.create_participant_team("4")
+        self.add_leaderboard_entry(
+            participant_team_4, participant_team_4.created_by, 90.0
+        )
+        self.assertEqual(self.client.get(url).data["rank"], 2)
+
+        publish_leaderboard_changed([self.challenge_phase_split.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.data["rank"], 3)
+        self.assertEqual(response.data["total_entries"], 4)
+
+
+@override_settings(MEDIA_ROOT="/tmp/evalai", CACHES=LOCMEM_CACHES)
+class LeaderboardSnapshotTest(BaseAPITestFixture):
+    def setUp(self):
+        super(LeaderboardSnapshotTest, self).setUp()
+        self.challenge_phase.end_date = timezone.now() - timedelta(hours=1)
+        self.challenge_phase.save()
+        self.dataset_split = DatasetSplit.objects.create(
+            name="Test", codename="Test"
+        )
+        self.challenge_phase_split = ChallengePhaseSplit.objects.create(
+            challenge_phase=self.challenge_phase,
+            dataset_split=self.dataset_split,
+            leaderboard=self.leaderboard,
+            visibility=ChallengePhaseSplit.PUBLIC,
+        )
+        self.submission = Submission.objects.create(
+            participant_team=self.participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=self.user1,
+            status="submitted",
+            input_file=self.challenge_phase.test_annotation,
+            method_name="Test Method",
+        )
+        # New submissions are saved as submitted and private by default
+        self.submission.status = Submission.FINISHED
+        self.submission.is_public = True
+        self.submission.save()
+        self.leaderboard_data = LeaderboardData.objects.create(
+            challenge_phase_split=self.challenge_phase_split,
+            submission=self.submission,
+            leaderboard=self.leaderboard,
+            result={"score": 50.0, "test-score": 75.0},
+        )
+        self.url = reverse_lazy(
+            "jobs:leaderboard",
+            kwargs={"challenge_phase_split_id": self.challenge_phase_split.id},
+        )
+        self.snapshot_url = reverse_lazy(
+            "jobs:regenerate_leaderboard_snapshot",
+            kwargs={"challenge_phase_split_pk": self.challenge_phase_split.pk},
+        )
+
+    def tearDown(self):
+        super(LeaderboardSnapshotTest, self).tearDown()
+        cache.clear()
+
+    def get_scores(self):
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [entry["result"] for entry in response.data["results"]]
+
+    def change_result_without_notification(self, result):
+        LeaderboardData.objects.filter(pk=self.leaderboard_data.pk).update(
+            result=result
+        )
+
+    def test_leaderboard_of_ended_phase_is_served_from_snapshot(self):
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("max-age=3600", response["Cache-Control"])
+        self.assertEqual(response.data["results"][0]["result"], [50.0, 75.0])
+        self.assertEqual(
+            response.data["results"][0]["submission__submitted_at"],
+            self.submission.submitted_at.isoformat().replace("+00:00", "Z"),
+        )
+        self.challenge_phase_split.refresh_from_db()
+        self.assertTrue(self.challenge_phase_split.leaderboard_snapshot)
+        self.assertEqual(
+            self.challenge_phase_split.leaderboard_snapshot_version, 1
+        )
+
+        self.change_result_without_notification(
+            {"score": 60.0, "test-score": 80.0}
+        )
+        cache.clear()
+        self.assertEqual(self.get_scores(), [[50.0, 75.0]])
+
+    def test_snapshot_is_created_again_when_leaderboard_changes(self):
+        self.assertEqual(self.get_scores(), [[50.0, 75.0]])
+        self.change_result_without_notification(
+            {"score": 60.0, "test-score": 80.0}
+        )
+        publish_leaderboard_changed([self.challenge_phase_split.pk])
+        self.challenge_phase_split.refresh_from_db()
+        self.assertFalse(self.challenge_phase_split.leaderboard_snapshot)
+
+        self.assertEqual(self.get_scores(), [[60.0, 80.0]])
+        self.challenge_phase_split.refresh_from_db()
+        self.assertEqual(
+            self.challenge_phase_split.leaderboard_snapshot_version, 2
+        )
+
+    def test_snapshot_created_while_waiting_for_the_lock_is_served(self):
+        stale_challenge_phase_split = ChallengePhaseSplit.objects.get(
+            pk=self.challenge_phase_split.pk
+        )
+        self.assertEqual(self.get_scores(), [[50.0, 75.0]])
+        self.change_result_without_notification(
+            {"score": 60.0, "test-score": 80.0}
+        )
+        leaderboard_data, http_status_code = create_leaderboard_snapshot(
+            stale_challenge_phase_split
+        )
+        self.assertEqual(http_status_code, status.HTTP_200_OK)
+        self.assertEqual(leaderboard_data[0]["result"], [50.0, 75.0])
+        self.assertEqual(
+            stale_challenge_phase_split.leaderboard_snapshot_version, 1
+        )
+        self.challenge_phase_split.refresh_from_db()
+        self.assertEqual(
+            self.challenge_phase_split.leaderboard_snapshot_version, 1
+        )
+
+    def test_leaderboard_of_ongoing_phase_is_not_served_from_snapshot(self):
+        self.challenge_phase.end_date = timezone.now() + timedelta(days=1)
+        self.challenge_phase.save()
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Cache-Control"))
+        self.challenge_phase_split.refresh_from_db()
+        self.assertFalse(self.challenge_phase_split.leaderboard_snapshot)
+
+    def test_regenerate_leaderboard_snapshot_by_host(self):
+        self.assertEqual(self.get_scores(), [[50.0, 75.0]])
+        self.change_result_without_notification(
+            {"score": 60.0, "test-score": 80.0}
+        )
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.snapshot_url, {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data, {"leaderboard_snapshot_version": 2, "entries": 1}
+        )
+        self.assertEqual(self.get_scores(), [[60.0, 80.0]])
+
+    def test_regenerate_leaderboard_snapshot_by_participant(self):
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.post(self.snapshot_url, {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data,
+            {"error": "Sorry, you are not authorized to make this request!"},
+        )
+
+
+@override_settings(MEDIA_ROOT="/tmp/evalai")
+class SubmissionArtifactURLsTest(BaseAPITestFixture):
+    def setUp(self):
+        super(SubmissionArtifactURLsTest, self).setUp()
+        self.challenge.participant_teams.add(self.participant_team)
+        self.submission = Submission.objects.create(
+            participant_team=self.participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=self.user1,
+            status=Submission.FINISHED,
+            input_file=self.challenge_phase.test_annotation,
+            method_name="Test Method",
+        )
+        self.submission.stdout_file.save(
+            "stdout.txt", ContentFile(b"Evaluation output")
+        )
+        self.host_submission = Submission.objects.create(
+            participant_team=self.host_participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=self.user,
+            status=Submission.FINISHED,
+            input_file=self.challenge_phase.test_annotation,
+            method_name="Test Method",
+        )
+        self.artifact_urls_url = reverse_lazy(
+            "jobs:get_submission_artifact_urls"
+        )
+
+    def test_submissions_are_listed_with_artifact_identifiers(self):
+        response = self.client.get(self.url, {"artifact_urls": "deferred"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        submission = response.data["results"][0]
+        self.assertEqual(
+            submission["input_file"], "{}:input_file".format(self.submission.pk)
+        )
+        self.assertEqual(
+            submission["stdout_file"],
+            "{}:stdout_file".format(self.submission.pk),
+        )
+        self.assertIsNone(submission["stderr_file"])
+
+    def test_submissions_are_listed_with_urls_by_default(self):
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"][0]["stdout_file"],
+            "http://testserver{}".format(self.submission.stdout_file.url),
+        )
+
+    def test_get_submission_artifact_urls(self):
+        stdout_file = "{}:stdout_file".format(self.submission.pk)
+        stderr_file = "{}:stderr_file".format(self.submission.pk)
+        host_input_file = "{}:input_file".format(self.host_submission.pk)
+        response = self.client.post(
+            self.artifact_urls_url,
+            {
+                "artifacts": [
+                    stdout_file,
+                    stderr_file,
+                    host_input_file,
+                    "invalid",
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["urls"],
+            {
+                stdout_file: "http://testserver{}".format(
+                    self.submission.stdout_file.url
+                )
+            },
+        )
+        self.assertEqual(
+            response.data["errors"],
+            {
+                stderr_file: "The artifact does not exist",
+                host_input_file: "Sorry, you are not authorized to access this artifact",
+                "invalid": "Invalid artifact identifier",
+            },
+        )
+
+    def test_get_submission_artifact_urls_skips_non_string_identifiers(self):
+        stdout_file = "{}:stdout_file".format(self.submission.pk)
+        response = self.client.post(
+            self.artifact_urls_url,
+            {"artifacts": [{"name": stdout_file}, ["invalid"], 1, stdout_file]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data["urls"]), [stdout_file])
+        self.assertEqual(response.data["errors"], {})
+
+    def test_host_gets_artifact_urls_of_all_submissions(self):
+        self.client.force_authenticate(user=self.user)
+        input_file = "{}:input_file".format(self.submission.pk)
+        response = self.client.post(
+            self.artifact_urls_url, {"artifacts": [input_file]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data["urls"]), [input_file])
+        self.assertEqual(response.data["errors"], {})
+
+    def test_get_submission_artifact_urls_with_too_many_artifacts(self):
+        response = self.client.post(
+            self.artifact_urls_url,
+            {"artifacts": ["{}:input_file".format(i) for i in range(101)]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data,
+            {"error": "At most 100 artifacts can be requested at once"},
+        )
+
+
+@override_settings(MEDIA_ROOT="/tmp/evalai")
+class SubmissionLogPreviewTest(BaseAPITestFixture):
+    def setUp(self):
+        super(SubmissionLogPreviewTest, self).setUp()
+        self.submission = Submission.objects.create(
+            participant_team=self.participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=self.user1,
+            status=Submission.FAILED,
+            input_file=self.challenge_phase.test_annotation,
+            method_name="Test Method",
+        )
+        save_log_artifact(
+            self.submission,
+            "stderr_file",
+            "".join("error {}\n".format(i) for i in range(500)),
+        )
+        self.url = reverse_lazy(
+            "jobs:get_submission_log_preview",
+            kwargs={"submission_pk": self.submission.pk, "log_type": "stderr"},
+        )
+
+    def test_get_last_lines_of_log(self):
+        response = self.client.get(self.url, {"start_line": -2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {
+                "content": "error 498\nerror 499",
+                "start_line": 498,
+                "end_line": 500,
+                "total_lines": 500,
+                "truncated_bytes": 0,
+            },
+        )
+
+    def test_get_byte_range_of_log(self):
+        response = self.client.get(self.url, {"offset": 8, "length": 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["content"], "error 1")
+
+    def test_get_log_preview_when_log_does_not_exist(self):
+        url = reverse_lazy(
+            "jobs:get_submission_log_preview",
+            kwargs={"submission_pk": self.submission.pk, "log_type": "stdout"},
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            response.data, {"error": "The submission has no stdout"}
+        )
+
+    def test_get_log_preview_when_user_is_not_authorized(self):
+        user = User.objects.create(
+            username="otheruser",
+            email="otheruser@test.com",
+            password="secret_password",
+        )
+        EmailAddress.objects.create(
+            user=user, email="otheruser@test.com", primary=True, verified=True
+        )
+        self.client.force_authenticate(user=user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data,
+            {"error": "Sorry, you are not authorized to make this request!"},
+        )
+
+
+class SubmissionQueuePositionTest(BaseAPITestFixture):
+    def setUp(self):
+        super(SubmissionQueuePositionTest, self).setUp()
+        self.submissions = [
+            Submission.objects.create(
+                participant_team=self.participant_team,
+                challenge_phase=self.challenge_phase,
+                created_by=self.user1,
+                status=Submission.SUBMITTED,
+                input_file=self.challenge_phase.test_annotation,
+                method_name="Test Method",
+            )
+            for _ in range(2)
+        ]
+
+    def test_get_queue_position(self):
+        url = reverse_lazy(
+            "jobs:get_submission_queue_position",
+            kwargs={"submission_pk": self.submissions[1].pk},
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["submission_id"], self.submissions[1].pk)
+        self.assertEqual(response.data["position"], 1)
+        self.assertEqual(response.data["waiting_submissions"], 2)
+        self.assertLess(
+            response.data["estimated_start_time"],
+            response.data["estimated_completion_time"],
+        )
+
+    def test_get_queue_position_of_an_evaluated_submission(self):
+        self.submissions[0].status = Submission.FINISHED
+        self.submissions[0].save()
+        url = reverse_lazy(
+            "jobs:get_submission_queue_position",
+            kwargs={"submission_pk": self.submissions[0].pk},
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data,
+            {
+                "error": "Submission {} is not waiting for evaluation".format(
+                    self.submissions[0].pk
+                )
+            },
+        )
@@ -0,0 +1,47 @@
+import gzip
+
+from django.test import RequestFactory, TestCase, override_settings
+
+from middleware.compression import GzipRequestMiddleware
+
+
+class GzipRequestMiddlewareTest(TestCase):
+    def setUp(self):
+        self.middleware = GzipRequestMiddleware()
+
+    def post(self, body, content_encoding="gzip"):
+        return RequestFactory().post(
+            "/api/jobs/challenge/1/update_submission/",
+            data=body,
+            content_type="application/x-www-form-urlencoded",
+            HTTP_CONTENT_ENCODING=content_encoding,
+        )
+
+    def test_gzip_body_is_decompressed(self):
+        request = self.post(gzip.compress(b"submission=1&stdout=out"))
+        self.assertIsNone(self.middleware.process_request(request))
+        self.assertEqual(request.POST["stdout"], "out")
+        self.assertNotIn("HTTP_CONTENT_ENCODING", request.META)
+
+    def test_uncompressed_body_is_left_as_is(self):
+        request = self.post(b"submission=1", content_encoding="")
+        self.assertIsNone(self.middleware.process_request(request))
+        self.assertEqual(request.POST["submission"], "1")
+
+    def test_invalid_gzip_body_is_rejected(self):
+        response = self.middleware.process_request(self.post(b"not gzip"))
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=100)
+    def test_too_large_body_is_rejected(self):
+        request = self.post(gzip.compress(b"stdout=" + b"x" * 10000))
+        self.assertEqual(
+            self.middleware.process_request(request).status_code, 413
+        )
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=10)
+    def test_too_large_compressed_body_is_rejected(self):
+        request = self.post(gzip.compress(b"stdout=" + b"x" * 100))
+        self.assertEqual(
+            self.middleware.process_request(request).status_code, 413
+        )
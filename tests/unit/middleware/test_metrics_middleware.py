@@ -0,0 +1,95 @@
+import mock
+
+from django.contrib.auth.models import User
+from django.core.urlresolvers import ResolverMatch
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from base.utils import timed_serialization
+
+with override_settings(
+    DATADOG_API_KEY=None, DATADOG_APP_KEY=None, DATADOG_APP_NAME="EvalAI"
+):
+    from middleware.metrics import metrics_middleware
+
+
+@mock.patch.object(metrics_middleware, "statsd")
+class DatadogMiddlewareTest(TestCase):
+    def setUp(self):
+        self.middleware = metrics_middleware.DatadogMiddleware()
+        self.request = RequestFactory().get(
+            "/api/jobs/challenge_phase_split/1/leaderboard/"
+        )
+        self.request.resolver_match = ResolverMatch(
+            lambda request: None,
+            (),
+            {"challenge_phase_split_id": 1},
+            url_name="leaderboard",
+            app_names=["jobs"],
+            namespaces=["jobs"],
+        )
+
+    def get_histograms(self, statsd):
+        return {
+            call[0][0]: (call[0][1], call[1]["tags"])
+            for call in statsd.histogram.call_args_list
+        }
+
+    def test_metrics_are_tagged_with_the_route(self, statsd):
+        self.middleware.process_request(self.request)
+        self.middleware.process_response(self.request, HttpResponse("ok"))
+        tags = ["route:jobs:leaderboard", "method:GET", "status_code:200"]
+        statsd.increment.assert_any_call(
+            "EvalAI.no_of_successful_requests_metric", tags=tags
+        )
+        statsd.increment.assert_any_call(
+            "EvalAI.no_of_requests_metric", tags=tags
+        )
+        self.assertEqual(
+            self.get_histograms(statsd)["EvalAI.response_size"], (2, tags)
+        )
+
+    def test_unresolved_requests_share_a_route(self, statsd):
+        self.request.resolver_match = None
+        self.middleware.process_request(self.request)
+        self.middleware.process_response(
+            self.request, HttpResponse(status=404)
+        )
+        statsd.increment.assert_any_call(
+            "EvalAI.no_of_unsuccessful_requests_metric",
+            tags=["route:unresolved", "method:GET", "status_code:404"],
+        )
+
+    def test_serialization_time_is_reported(self, statsd):
+        self.middleware.process_request(self.request)
+        with mock.patch("base.utils.time.time", side_effect=[10, 10.25]):
+            with timed_serialization():
+                pass
+        self.middleware.process_response(self.request, HttpResponse())
+        serializer_time, tags = self.get_histograms(statsd)[
+            "EvalAI.serializer_time"
+        ]
+        self.assertEqual(serializer_time, 0.25)
+        self.assertIn("route:jobs:leaderboard", tags)
+
+    @override_settings(DATADOG_DB_QUERIES_SAMPLE_RATE=1)
+    def test_queries_of_sampled_requests_are_reported(self, statsd):
+        self.middleware.process_request(self.request)
+        User.objects.count()
+        self.middleware.process_response(self.request, HttpResponse())
+        histograms = self.get_histograms(statsd)
+        self.assertEqual(histograms["EvalAI.db_query_count"][0], 1)
+        self.assertIn("EvalAI.db_time", histograms)
+
+    @override_settings(DATADOG_DB_QUERIES_SAMPLE_RATE=0)
+    def test_queries_of_other_requests_are_not_recorded(self, statsd):
+        with mock.patch.object(
+            metrics_middleware.connections, "all"
+        ) as mock_connections:
+            self.middleware.process_request(self.request)
+            User.objects.count()
+            self.middleware.process_response(self.request, HttpResponse())
+        mock_connections.assert_not_called()
+        self.assertNotIn(
+            "EvalAI.db_query_count", self.get_histograms(statsd)
+        )
@@ -64,34 +64,34 @@ class BaseTestClass(TestCase):
 @mock.patch(
     "scripts.workers.remote_submission_worker.AUTH_TOKEN", "test_token"
 )
-@mock.patch("scripts.workers.remote_submission_worker.requests")
+@mock.patch("scripts.workers.remote_submission_worker.session")
 class MakeRequestTestClass(BaseTestClass):
     def setUp(self):
         super(MakeRequestTestClass, self).setUp()
         self.url = super(MakeRequestTestClass, self).make_request_url()
 
-    def test_make_request_get(self, mock_make_request):
+    def test_make_request_get(self, mock_session):
         make_request(self.url, "GET")
-        mock_make_request.get.assert_called_with(
-            url=self.url, headers=self.headers
+        mock_session.request.assert_called_with(
+            method="GET", url=self.url, headers=self.headers, data=None
         )
 
-    def test_make_request_put(self, mock_make_request):
+    def test_make_request_put(self, mock_session):
         make_request(self.url, "PUT", data=self.data)
-        mock_make_request.put.assert_called_with(
-            url=self.url, headers=self.headers, data=self.data
+        mock_session.request.assert_called_with(
+            method="PUT", url=self.url, headers=self.headers, data=self.data
         )
 
-    def test_make_request_patch(self, mock_make_request):
+    def test_make_request_patch(self, mock_session):
         make_request(self.url, "PATCH", data=self.data)
-        mock_make_request.patch.assert_called_with(
-            url=self.url, headers=self.headers, data=self.data
+        mock_session.request.assert_called_with(
+            method="PATCH", url=self.url, headers=self.headers, data=self.data
         )
 
-    def test_make_request_post(self, mock_make_request):
+    def test_make_request_post(self, mock_session):
         make_request(self.url, "POST", data=self.data)
-        mock_make_request.post.assert_called_with(
-            url=self.url, headers=self.headers, data=self.data
+        mock_session.request.assert_called_with(
+            method="POST", url=self.url, headers=self.headers, data=self.data
         )
 
 
@@ -0,0 +1,140 @@
+import os
+import shutil
+import sys
+import tempfile
+import types
+
+from unittest import TestCase
+
+from scripts.workers.challenge_cache import (
+    ChallengeCache,
+    get_directory_size,
+    unload_package,
+)
+
+
+class ChallengeCacheTest(TestCase):
+    def setUp(self):
+        self.loaded = []
+        self.unloaded = []
+        self.versions = {}
+        self.disk_usage = {}
+        self.memory_usage = None
+        self.memory_usage_growth = {}
+
+    def load(self, challenge_pk):
+        self.loaded.append(challenge_pk)
+        if self.memory_usage is not None:
+            self.memory_usage += self.memory_usage_growth.get(challenge_pk, 0)
+        return self.versions.get(challenge_pk, "v1")
+
+    def unload(self, challenge_pk):
+        self.unloaded.append(challenge_pk)
+
+    def get_cache(self, **kwargs):
+        return ChallengeCache(
+            self.load,
+            self.unload,
+            lambda challenge_pk: self.disk_usage.get(challenge_pk, 0),
+            get_memory_usage=lambda: self.memory_usage,
+            **kwargs
+        )
+
+    def test_challenge_is_loaded_once(self):
+        cache = self.get_cache()
+        self.assertTrue(cache.get(1, "v1"))
+        self.assertFalse(cache.get(1, "v1"))
+        self.assertFalse(cache.get(1))
+        self.assertEqual(self.loaded, [1])
+
+    def test_least_recently_used_challenge_is_evicted(self):
+        cache = self.get_cache(max_challenges=2)
+        cache.get(1)
+        cache.get(2)
+        cache.get(1)
+        cache.get(3)
+        self.assertEqual(self.unloaded, [2])
+        self.assertIn(1, cache)
+        self.assertNotIn(2, cache)
+
+    def test_challenge_is_reloaded_when_its_version_changes(self):
+        cache = self.get_cache()
+        cache.get(1, "v1")
+        self.versions[1] = "v2"
+        self.assertTrue(cache.get(1, "v2"))
+        self.assertEqual(self.loaded, [1, 1])
+        self.assertEqual(self.unloaded, [1])
+
+    def test_disk_budget_evicts_challenges_but_the_current_one(self):
+        self.disk_usage = {1: 40, 2: 40, 3: 100}
+        cache = self.get_cache(max_disk_usage=90)
+        cache.get(1)
+        cache.get(2)
+        cache.get(3)
+        self.assertEqual(self.unloaded, [1, 2])
+        self.assertIn(3, cache)
+
+    def test_memory_budget_evicts_challenges(self):
+        self.memory_usage = 1000
+        self.memory_usage_growth = {1: 60, 2: 60, 3: 30}
+        cache = self.get_cache(max_memory_usage=100)
+        cache.get(1)
+        cache.get(2)
+        self.assertEqual(self.unloaded, [1])
+        cache.get(3)
+        self.assertEqual(self.unloaded, [1])
+        self.assertIn(2, cache)
+        self.assertIn(3, cache)
+
+    def test_memory_not_returned_to_the_system_does_not_evict_challenges(
+        self
+    ):
+        self.memory_usage = 1000
+        self.memory_usage_growth = {1: 40, 2: 40}
+        cache = self.get_cache(max_memory_usage=100)
+        cache.get(1)
+        # e.g. the memory of an evicted challenge the allocator kept
+        self.memory_usage = 5000
+        for challenge_pk in (2, 1, 2):
+            cache.get(challenge_pk)
+        self.assertEqual(self.loaded, [1, 2])
+        self.assertEqual(self.unloaded, [])
+
+    def test_failed_load_is_cleaned_up(self):
+        def load(challenge_pk):
+            raise IOError("download failed")
+
+        cache = ChallengeCache(load, self.unload, lambda challenge_pk: 0)
+        with self.assertRaises(IOError):
+            cache.get(1)
+        self.assertNotIn(1, cache)
+        self.assertEqual(self.unloaded, [1])
+
+
+class UnloadPackageTest(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_package_and_its_submodules_are_forgotten(self):
+        sys.modules["challenge_x"] = types.ModuleType("challenge_x")
+        sys.modules["challenge_x.main"] = types.ModuleType("challenge_x.main")
+        sys.modules["challenge_xy"] = types.ModuleType("challenge_xy")
+        sys.path.append(os.path.join(self.path, "lib"))
+        try:
+            unload_package("challenge_x", self.path)
+            self.assertNotIn("challenge_x", sys.modules)
+            self.assertNotIn("challenge_x.main", sys.modules)
+            self.assertIn("challenge_xy", sys.modules)
+            self.assertNotIn(os.path.join(self.path, "lib"), sys.path)
+        finally:
+            sys.modules.pop("challenge_xy", None)
+
+    def test_get_directory_size(self):
+        os.makedirs(os.path.join(self.path, "phase_data"))
+        for name, size in (("a.txt", 10), ("phase_data/b.txt", 5)):
+            with open(os.path.join(self.path, name), "wb") as data_file:
+                data_file.write(b"x" * size)
+        self.assertEqual(get_directory_size(self.path), 15)
@@ -0,0 +1,115 @@
+import mock
+
+from unittest import TestCase
+
+from kubernetes.client.rest import ApiException
+
+from scripts.workers.code_upload_submission_worker import (
+    EKSClientCache,
+    process_submission_callback,
+)
+
+
+class EKSClientCacheTest(TestCase):
+    def setUp(self):
+        self.evalai = mock.Mock()
+        self.evalai.get_aws_eks_bearer_token.side_effect = [
+            {"aws_eks_bearer_token": "token-1"},
+            {"aws_eks_bearer_token": "token-2"},
+        ]
+        self.cache = EKSClientCache(
+            "https://cluster.eks.amazonaws.com", {"id": 1}, self.evalai
+        )
+
+    def get_token(self, api_client):
+        return api_client.configuration.get_api_key_with_prefix(
+            "authorization"
+        )
+
+    @mock.patch(
+        "scripts.workers.code_upload_submission_worker.time.time",
+        return_value=100,
+    )
+    def test_clients_are_cached(self, mock_time):
+        api_client = self.cache.get_api_client()
+        self.assertIs(self.cache.get_api_client(), api_client)
+        self.assertIs(self.cache.get_batch_v1_api().api_client, api_client)
+        self.assertIs(self.cache.get_core_v1_api().api_client, api_client)
+        self.evalai.get_aws_eks_bearer_token.assert_called_once_with(1)
+        self.assertEqual(self.get_token(api_client), "Bearer token-1")
+        self.assertEqual(
+            api_client.configuration.host,
+            "https://cluster.eks.amazonaws.com",
+        )
+
+    @mock.patch("scripts.workers.code_upload_submission_worker.time.time")
+    def test_clients_are_built_again_before_the_token_expires(
+        self, mock_time
+    ):
+        mock_time.return_value = 100
+        api_client = self.cache.get_api_client()
+        mock_time.return_value = 144
+        self.assertIs(self.cache.get_api_client(), api_client)
+        mock_time.return_value = 145
+        new_api_client = self.cache.get_api_client()
+        self.assertIsNot(new_api_client, api_client)
+        self.assertIs(self.cache.get_batch_v1_api().api_client, new_api_client)
+        self.assertEqual(self.get_token(new_api_client), "Bearer token-2")
+        # The client still used by other threads keeps its token
+        self.assertEqual(self.get_token(api_client), "Bearer token-1")
+
+    @mock.patch(
+        "scripts.workers.code_upload_submission_worker.time.time",
+        return_value=100,
+    )
+    def test_clients_are_built_again_when_the_token_is_rejected(
+        self, mock_time
+    ):
+        tokens = []
+
+        def create_job():
+            api_client = self.cache.get_api_client()
+            tokens.append(self.get_token(api_client))
+            if len(tokens) == 1:
+                raise ApiException(status=401)
+            return "job"
+
+        self.assertEqual(self.cache.retry_on_unauthorized(create_job), "job")
+        self.assertEqual(tokens, ["Bearer token-1", "Bearer token-2"])
+
+    def test_other_errors_are_not_retried(self):
+        func = mock.Mock(side_effect=ApiException(status=403))
+        with self.assertRaises(ApiException):
+            self.cache.retry_on_unauthorized(func)
+        self.assertEqual(func.call_count, 1)
+        self.evalai.get_aws_eks_bearer_token.assert_not_called()
+
+
+class ProcessSubmissionCallbackTest(TestCase):
+    @mock.patch("scripts.workers.code_upload_submission_worker.create_job")
+    def test_job_is_created_with_the_cached_client(self, mock_create_job):
+        evalai = mock.Mock()
+        eks_client_cache = mock.Mock()
+        eks_client_cache.retry_on_unauthorized.side_effect = lambda func: func()
+        mock_create_job.return_value.metadata.generate_name = "submission-1-"
+        body = {
+            "submission_pk": 1,
+            "challenge_pk": 2,
+            "phase_pk": 3,
+            "submitted_image_uri": "image",
+        }
+        process_submission_callback(
+            eks_client_cache, body, {"environment_image": "env"}, evalai
+        )
+        eks_client_cache.retry_on_unauthorized.assert_called_once()
+        mock_create_job.assert_called_once_with(
+            eks_client_cache.get_batch_v1_api.return_value, mock.ANY
+        )
+        evalai.update_submission_status.assert_called_once_with(
+            {
+                "submission_status": "running",
+                "submission": 1,
+                "job_name": "submission-1-",
+            },
+            2,
+        )
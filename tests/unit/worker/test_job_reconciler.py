@@ -0,0 +1,232 @@
+import datetime
+import mock
+
+from unittest import TestCase
+
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+
+from scripts.workers.job_reconciler import JobReconciler
+
+
+class FakeWatch:
+    """Replays a fixed list of events for every `stream` call"""
+
+    def __init__(self, events, reconciler=None):
+        self.events = events
+        self.reconciler = reconciler
+        self.stream_kwargs = []
+
+    def __call__(self):
+        return self
+
+    def stream(self, func, **kwargs):
+        self.stream_kwargs.append(kwargs)
+        for event in self.events:
+            yield event
+        # Stop the reconciler once the fake API has no more events
+        self.reconciler.stop()
+
+    def stop(self):
+        pass
+
+
+def make_labels(submission_pk=1):
+    return {
+        "app": "evaluation",
+        "submission_pk": str(submission_pk),
+        "challenge_pk": "2",
+        "phase_pk": "3",
+        "job-name": "submission-{}".format(submission_pk),
+    }
+
+
+def make_job(
+    succeeded=None, failed=None, resource_version="10", conditions=None
+):
+    return client.V1Job(
+        metadata=client.V1ObjectMeta(
+            name="submission-1",
+            labels=make_labels(),
+            resource_version=resource_version,
+        ),
+        status=client.V1JobStatus(
+            succeeded=succeeded, failed=failed, conditions=conditions
+        ),
+    )
+
+
+def make_failed_job():
+    return make_job(
+        failed=2,
+        conditions=[
+            client.V1JobCondition(
+                type="Failed", status="True", reason="BackoffLimitExceeded"
+            )
+        ],
+    )
+
+
+def make_pod(reason=None, name="submission-1-abcde", finished_at=None):
+    terminated = (
+        client.V1ContainerStateTerminated(
+            exit_code=1, reason=reason, finished_at=finished_at
+        )
+        if reason
+        else None
+    )
+    return client.V1Pod(
+        metadata=client.V1ObjectMeta(
+            name=name,
+            labels=make_labels(),
+            resource_version="11",
+        ),
+        status=client.V1PodStatus(
+            container_statuses=[
+                client.V1ContainerStatus(
+                    name="agent",
+                    image="agent",
+                    image_id="agent",
+                    ready=False,
+                    restart_count=0,
+                    state=client.V1ContainerState(terminated=terminated),
+                )
+            ]
+        ),
+    )
+
+
+class JobReconcilerTestClass(TestCase):
+    def setUp(self):
+        self.evalai = mock.Mock()
+        self.api_cache = mock.Mock()
+        self.batch_v1_api = self.api_cache.get_batch_v1_api.return_value
+        self.core_v1_api = self.api_cache.get_core_v1_api.return_value
+        self.core_v1_api.read_namespaced_pod_log.return_value.data = (
+            b"Traceback"
+        )
+
+    def watch_with_events(self, events, watch_method):
+        reconciler = JobReconciler(self.api_cache, self.evalai)
+        fake_watch = FakeWatch(events, reconciler)
+        reconciler.watch_factory = fake_watch
+        getattr(reconciler, watch_method)()
+        return reconciler, fake_watch
+
+    def test_succeeded_job_is_deleted(self):
+        self.watch_with_events(
+            [{"type": "MODIFIED", "object": make_job(succeeded=1)}],
+            "watch_jobs",
+        )
+        self.batch_v1_api.delete_namespaced_job.assert_called_once()
+        self.evalai.update_submission_data.assert_not_called()
+
+    def test_running_job_is_left_alone(self):
+        self.watch_with_events(
+            [{"type": "ADDED", "object": make_job()}], "watch_jobs"
+        )
+        self.batch_v1_api.delete_namespaced_job.assert_not_called()
+
+    def test_job_is_left_alone_until_its_retries_are_exhausted(self):
+        self.watch_with_events(
+            [{"type": "MODIFIED", "object": make_job(failed=1)}],
+            "watch_jobs",
+        )
+        self.evalai.update_submission_data.assert_not_called()
+        self.batch_v1_api.delete_namespaced_job.assert_not_called()
+
+    def test_failed_job_fails_submission_with_logs_and_is_deleted(self):
+        self.core_v1_api.list_namespaced_pod.return_value = client.V1PodList(
+            items=[
+                make_pod(
+                    reason="Error",
+                    name="submission-1-retry",
+                    finished_at=datetime.datetime(2020, 5, 1, 11),
+                ),
+                make_pod(
+                    reason="Error",
+                    finished_at=datetime.datetime(2020, 5, 1, 10),
+                ),
+            ]
+        )
+        event = {"type": "MODIFIED", "object": make_failed_job()}
+        self.watch_with_events([event, event], "watch_jobs")
+        self.evalai.update_submission_data.assert_called_once()
+        data, challenge_pk, submission_pk = (
+            self.evalai.update_submission_data.call_args[0]
+        )
+        self.assertEqual(data["submission_status"], "FAILED")
+        self.assertEqual(data["stderr"], "Traceback")
+        self.assertEqual(data["challenge_phase"], "3")
+        self.assertEqual((challenge_pk, submission_pk), ("2", "1"))
+        self.assertEqual(
+            self.core_v1_api.list_namespaced_pod.call_args[1][
+                "label_selector"
+            ],
+            "job-name=submission-1",
+        )
+        self.assertEqual(
+            self.core_v1_api.read_namespaced_pod_log.call_args[1]["name"],
+            "submission-1-retry",
+        )
+        self.batch_v1_api.delete_namespaced_job.assert_called_once()
+
+    def test_failed_job_without_errored_agent_is_reported_without_logs(self):
+        self.core_v1_api.list_namespaced_pod.return_value = client.V1PodList(
+            items=[make_pod(reason="Completed")]
+        )
+        self.watch_with_events(
+            [{"type": "MODIFIED", "object": make_failed_job()}],
+            "watch_jobs",
+        )
+        data = self.evalai.update_submission_data.call_args[0][0]
+        self.assertEqual(data["stderr"], "")
+        self.core_v1_api.read_namespaced_pod_log.assert_not_called()
+
+    def test_already_deleted_job_is_ignored(self):
+        self.batch_v1_api.delete_namespaced_job.side_effect = ApiException(
+            status=404
+        )
+        reconciler, _ = self.watch_with_events(
+            [{"type": "MODIFIED", "object": make_job(succeeded=1)}],
+            "watch_jobs",
+        )
+        self.assertIn("submission-1", reconciler.deleted_jobs)
+
+    def test_watch_error_lists_again(self):
+        reconciler = JobReconciler(self.api_cache, self.evalai)
+        streams = [
+            [{"type": "ADDED", "object": make_job(resource_version="5")}],
+            [{"type": "ERROR", "raw_object": {"code": 410}, "object": None}],
+            [],
+        ]
+        stream_kwargs = []
+
+        class ExpiringWatch(FakeWatch):
+            def stream(self, func, **kwargs):
+                stream_kwargs.append(kwargs)
+                events = streams.pop(0)
+                if not streams:
+                    reconciler.stop()
+                for event in events:
+                    yield event
+
+        reconciler.watch_factory = ExpiringWatch([], reconciler)
+        reconciler.watch_jobs()
+
+        self.assertNotIn("resource_version", stream_kwargs[0])
+        self.assertEqual(stream_kwargs[1]["resource_version"], "5")
+        self.assertNotIn("resource_version", stream_kwargs[2])
+
+    def test_rejected_token_is_fetched_again(self):
+        reconciler = JobReconciler(self.api_cache, self.evalai)
+
+        class UnauthorizedWatch(FakeWatch):
+            def stream(self, func, **kwargs):
+                reconciler.stop()
+                raise ApiException(status=401)
+
+        reconciler.watch_factory = UnauthorizedWatch([], reconciler)
+        reconciler.watch_jobs()
+
+        self.api_cache.invalidate.assert_called_once_with()
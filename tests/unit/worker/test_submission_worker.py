@@ -18,12 +18,18 @@ from django.utils import timezone
 
 from rest_framework.test import APITestCase
 
+from base.sqs import clear_sqs_cache
 from challenges.models import (
     Challenge,
     ChallengePhase,
+    ChallengePhaseSplit,
+    DatasetSplit,
+    Leaderboard,
 )
 from hosts.models import ChallengeHostTeam
 from jobs.models import Submission
+from jobs.submission_logs import get_log_content
+from jobs.utils import get_evaluation_shards, start_sharded_evaluation
 from participants.models import ParticipantTeam
 from scripts.workers.submission_worker import (
     create_dir,
@@ -34,6 +40,7 @@ from scripts.workers.submission_worker import (
     extract_zip_file,
     extract_submission_data,
     load_challenge_and_return_max_submissions,
+    process_submission_message,
     return_file_url_per_environment,
     get_or_create_sqs_queue,
 )
@@ -41,6 +48,7 @@ from scripts.workers.submission_worker import (
 
 class BaseAPITestClass(APITestCase):
     def setUp(self):
+        clear_sqs_cache()
 
         self.BASE_TEMP_DIR = tempfile.mkdtemp()
 
@@ -412,3 +420,60 @@ class DownloadAndExtractZipFileTest(BaseAPITestClass):
 
         delete_zip_file(self.download_location)
         mock_logger.assert_called_with(error_message)
+
+
+class ProcessSubmissionShardMessageTest(BaseAPITestClass):
+    def setUp(self):
+        super(ProcessSubmissionShardMessageTest, self).setUp()
+        self.challenge_phase.is_sharded_evaluation_enabled = True
+        self.challenge_phase.save()
+        leaderboard = Leaderboard.objects.create(
+            schema={"labels": ["score"], "default_order_by": "score"}
+        )
+        for i in range(2):
+            ChallengePhaseSplit.objects.create(
+                dataset_split=DatasetSplit.objects.create(
+                    name="Split {}".format(i), codename="split_{}".format(i)
+                ),
+                challenge_phase=self.challenge_phase,
+                leaderboard=leaderboard,
+                visibility=ChallengePhaseSplit.PUBLIC,
+            )
+        self.messages = start_sharded_evaluation(
+            self.submission, get_evaluation_shards(self.challenge_phase)
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.BASE_TEMP_DIR)
+
+    @mock.patch("scripts.workers.submission_worker.publish_submission_status")
+    @mock.patch("scripts.workers.submission_worker.extract_submission_data")
+    def test_failing_shards_fail_the_submission(
+        self, mock_extract_submission_data, mock_publish_submission_status
+    ):
+        mock_extract_submission_data.side_effect = IOError("Download failed")
+        with self.settings(MEDIA_ROOT=self.BASE_TEMP_DIR), mock.patch(
+            "scripts.workers.submission_worker.SUBMISSION_DATA_DIR",
+            self.SUBMISSION_DATA_DIR,
+        ):
+            with self.assertRaises(IOError):
+                process_submission_message(self.messages[0])
+            self.submission.refresh_from_db()
+            self.assertEqual(self.submission.status, Submission.RUNNING)
+            with self.assertRaises(IOError):
+                process_submission_message(self.messages[1])
+
+            self.submission.refresh_from_db()
+            self.assertEqual(self.submission.status, Submission.FAILED)
+            self.assertEqual(
+                [
+                    shard["status"]
+                    for shard in self.submission.evaluation_shards.values()
+                ],
+                [Submission.FAILED, Submission.FAILED],
+            )
+            # The log is read from the same MEDIA_ROOT it was stored in
+            self.assertIn(
+                b"Download failed",
+                get_log_content(self.submission, "stderr_file"),
+            )
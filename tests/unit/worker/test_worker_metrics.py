@@ -0,0 +1,115 @@
+import datetime
+import mock
+
+from unittest import TestCase
+
+from scripts.workers import worker_metrics
+from scripts.workers.worker_metrics import (
+    PrometheusMetricsBackend,
+    configure_metrics,
+    observe_queue_age,
+    observe_submission_latency,
+    parse_timestamp,
+    timed_stage,
+)
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.observed = []
+        self.incremented = []
+
+    def observe(self, name, value, tags):
+        self.observed.append((name, value, tags))
+
+    def increment(self, name, tags):
+        self.incremented.append((name, tags))
+
+
+class WorkerMetricsTest(TestCase):
+    def setUp(self):
+        self.backend = configure_metrics(RecordingBackend())
+
+    def tearDown(self):
+        configure_metrics(worker_metrics.NullMetricsBackend())
+
+    @mock.patch("scripts.workers.worker_metrics.time.time")
+    def test_timed_stage(self, mock_time):
+        mock_time.side_effect = [10, 12.5]
+        with timed_stage("evaluate", challenge_pk=1):
+            pass
+        self.assertEqual(
+            self.backend.observed,
+            [
+                (
+                    "stage_duration_seconds",
+                    2.5,
+                    {
+                        "stage": "evaluate",
+                        "status": "success",
+                        "challenge_pk": 1,
+                    },
+                )
+            ],
+        )
+
+    def test_timed_stage_of_a_failed_stage(self):
+        with self.assertRaises(ValueError):
+            with timed_stage("download"):
+                raise ValueError()
+        self.assertEqual(self.backend.observed[0][2]["status"], "error")
+
+    def test_failing_backend_does_not_fail_the_stage(self):
+        self.backend.observe = mock.Mock(side_effect=IOError())
+        with timed_stage("upload"):
+            pass
+
+    @mock.patch("scripts.workers.worker_metrics.time.time", return_value=100)
+    def test_observe_queue_age(self, mock_time):
+        observe_queue_age("40000", queue="queue")
+        self.assertEqual(
+            self.backend.observed,
+            [("queue_age_seconds", 60, {"queue": "queue"})],
+        )
+        self.assertEqual(
+            self.backend.incremented,
+            [("messages_received", {"queue": "queue"})],
+        )
+
+    def test_observe_submission_latency(self):
+        observe_submission_latency(
+            "2020-05-01T10:00:00.500000Z",
+            "2020-05-01T12:30:00+02:00",
+            status="finished",
+        )
+        self.assertEqual(
+            self.backend.observed,
+            [("submission_latency_seconds", 1799.5, {"status": "finished"})],
+        )
+
+    def test_parse_timestamp(self):
+        self.assertEqual(
+            parse_timestamp("2020-05-01T10:00:00Z"),
+            datetime.datetime(2020, 5, 1, 10, tzinfo=datetime.timezone.utc),
+        )
+        self.assertIsNone(parse_timestamp("not a timestamp"))
+        self.assertIsNone(parse_timestamp(None))
+
+
+class PrometheusMetricsBackendTest(TestCase):
+    def test_render(self):
+        backend = PrometheusMetricsBackend("evalai.worker", buckets=(1, 10))
+        backend.observe("queue_age_seconds", 0.5, {"queue": "q"})
+        backend.observe("queue_age_seconds", 20, {"queue": "q"})
+        backend.increment("messages_received", {"queue": "q"})
+        self.assertEqual(
+            backend.render(),
+            "# TYPE evalai_worker_queue_age_seconds histogram\n"
+            'evalai_worker_queue_age_seconds_bucket{queue="q",le="1.0"} 1\n'
+            'evalai_worker_queue_age_seconds_bucket{queue="q",le="10.0"} 1\n'
+            'evalai_worker_queue_age_seconds_bucket{queue="q",le="+Inf"} 2\n'
+            'evalai_worker_queue_age_seconds_sum{queue="q"} 20.5\n'
+            'evalai_worker_queue_age_seconds_count{queue="q"} 2\n'
+            "# TYPE evalai_worker_messages_received counter\n"
+            'evalai_worker_messages_received{queue="q"} 1\n',
+        )
@@ -0,0 +1,131 @@
+import asyncio
+import gzip
+import mock
+
+from unittest import TestCase
+
+from scripts.workers.worker_utils import (
+    AsyncEvalAI_Interface,
+    EvalAI_Interface,
+    JitteredRetry,
+    WorkerBundleCache,
+    compress_request_data,
+    create_session,
+)
+
+
+class CreateSessionTestClass(TestCase):
+    def test_session_is_pooled_and_retries(self):
+        session = create_session(pool_maxsize=4, max_retries=3)
+        adapter = session.get_adapter("https://evalai.cloudcv.org")
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertIsInstance(adapter.max_retries, JitteredRetry)
+        self.assertEqual(adapter.max_retries.total, 3)
+
+    def test_backoff_is_jittered_below_exponential_backoff(self):
+        retry = JitteredRetry(total=5, backoff_factor=1)
+        for _ in range(3):
+            retry = retry.increment(method="GET", url="/")
+        for _ in range(20):
+            self.assertTrue(0 <= retry.get_backoff_time() <= 4)
+
+    def test_only_reads_are_retried_after_a_response(self):
+        session = create_session()
+        retry = session.get_adapter("https://evalai.cloudcv.org").max_retries
+        self.assertTrue(retry.is_retry("GET", 503))
+        self.assertFalse(retry.is_retry("PUT", 503))
+        self.assertFalse(retry.is_retry("POST", 502))
+        self.assertFalse(retry._is_method_retryable("PATCH"))
+
+
+class CompressRequestDataTestClass(TestCase):
+    def test_small_data_is_not_compressed(self):
+        headers = {}
+        data = {"submission": 1}
+        self.assertEqual(compress_request_data(data, headers), data)
+        self.assertEqual(headers, {})
+
+    def test_large_data_is_compressed(self):
+        headers = {}
+        data = {"stdout": "x" * 4096}
+        body = compress_request_data(data, headers)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(
+            gzip.decompress(body), ("stdout=" + "x" * 4096).encode("utf-8")
+        )
+
+    def test_requests_of_the_interface_are_compressed(self):
+        session = mock.Mock()
+        evalai = EvalAI_Interface(
+            "test_token",
+            "http://testserver",
+            "test_queue",
+            session,
+            compress_requests=True,
+        )
+        evalai.update_submission_data({"stdout": "x" * 4096}, 1, 1)
+        kwargs = session.request.call_args[1]
+        self.assertEqual(kwargs["headers"]["Content-Encoding"], "gzip")
+        self.assertEqual(
+            gzip.decompress(kwargs["data"]),
+            ("stdout=" + "x" * 4096).encode("utf-8"),
+        )
+
+
+class AsyncEvalAIInterfaceTestClass(TestCase):
+    def setUp(self):
+        self.session = mock.Mock()
+        self.session.request.return_value.json.return_value = {"id": 1}
+        self.evalai = EvalAI_Interface(
+            "test_token", "http://testserver", "test_queue", self.session
+        )
+
+    def test_calls_are_run_concurrently_on_the_shared_session(self):
+        async_evalai = AsyncEvalAI_Interface(self.evalai)
+
+        async def fetch():
+            return await asyncio.gather(
+                async_evalai.get_submission_by_pk(1),
+                async_evalai.get_challenge_phase_by_pk(1, 1),
+            )
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(
+                loop.run_until_complete(fetch()), [{"id": 1}, {"id": 1}]
+            )
+        finally:
+            loop.close()
+        self.assertEqual(self.session.request.call_count, 2)
+
+
+class WorkerBundleCacheTestClass(TestCase):
+    def setUp(self):
+        self.bundles = [
+            {"version": "1", "challenge": {"id": 1}, "phases": [{"id": 2}]},
+            {
+                "version": "2",
+                "challenge": {"id": 1},
+                "phases": [{"id": 2}, {"id": 3}],
+            },
+        ]
+        self.fetch_bundle = mock.Mock(side_effect=self.bundles)
+        self.on_refresh = mock.Mock()
+        self.cache = WorkerBundleCache(self.fetch_bundle, self.on_refresh)
+
+    def test_bundle_is_fetched_once_for_the_same_version(self):
+        self.assertEqual(self.cache.get_challenge(), {"id": 1})
+        self.assertEqual(self.cache.get_phase("2", "1"), {"id": 2})
+        self.assertEqual(self.cache.get_phase(2), {"id": 2})
+        self.fetch_bundle.assert_called_once_with()
+        self.on_refresh.assert_called_once_with(None, self.bundles[0])
+
+    def test_bundle_is_fetched_again_for_a_new_version(self):
+        self.cache.get()
+        self.assertEqual(self.cache.get(version="2"), self.bundles[1])
+        self.on_refresh.assert_called_with(self.bundles[0], self.bundles[1])
+
+    def test_bundle_is_fetched_again_for_an_unknown_phase(self):
+        self.cache.get()
+        self.assertEqual(self.cache.get_phase(3), {"id": 3})
+        self.assertEqual(self.fetch_bundle.call_count, 2)